@@ -0,0 +1,21 @@
+import json
+
+from ragbenchmark.evaluator.dataset_evaluator.dataset_evaluator import DatasetEvaluator
+
+def main():
+    with open("data/customized_dataset/baseline.json", "r", encoding="utf-8") as f:
+        baseline_dataset = json.load(f)
+    with open("data/customized_dataset/samples.json", "r", encoding="utf-8") as f:
+        sample_dataset = json.load(f)
+
+    # The same evaluation is available from the command line:
+    # ragbench eval --baseline data/customized_dataset/baseline.json --samples data/customized_dataset/samples.json
+    dataset_evaluator = DatasetEvaluator(baseline_dataset, sample_dataset, workers=2)
+    result = dataset_evaluator.evaluate()
+    print("dataset name:", result["name"])
+    print("task number:", result["num_tasks"])
+    for metric, value in result["metrics"].items():
+        print(metric, value)
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,20 @@
+import json
+
 from ragbenchmark.tasks.custom_task import CustomTask
 from ragbenchmark.evaluator.task_evaluator.task_evaluator import TaskEvaluator
 
 def main():
-    pass
+    with open("data/customized_dataset/baseline.json", "r", encoding="utf-8") as f:
+        baseline_dataset = json.load(f)
+    with open("data/customized_dataset/samples.json", "r", encoding="utf-8") as f:
+        sample_dataset = json.load(f)
+
+    a_task = CustomTask("1", baseline_dataset["TASKS"]["1"], sample_dataset["TASKS"]["1"])
+    task_evaluator = TaskEvaluator(a_task, None)
+    print("recall_by_page_number", task_evaluator.get_recall_by_page_number())
+    print("precision_by_page_number", task_evaluator.get_precision_by_page_number())
+    print("recall_by_char", task_evaluator.get_recall_by_char())
+    print("precision_by_char", task_evaluator.get_precision_by_char())
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,36 @@
+from ._lazy import lazy_attributes
+
+__getattr__, __dir__ = lazy_attributes(__name__, {
+    "BaseContext": ".context.base_context",
+    "CustomContext": ".context.custom_context",
+    "CustomRagContext": ".context.custom_context",
+    "BaseTask": ".tasks.base_task",
+    "CustomTask": ".tasks.custom_task",
+    "BaseDataset": ".datasets.base_dataset",
+    "CustomDataset": ".datasets.custom_dataset",
+    "CustomRagDataset": ".datasets.custom_dataset",
+    "JsonlDataset": ".datasets.jsonl_dataset",
+    "JsonlTaskFile": ".datasets.jsonl_dataset",
+    "PubMedQA": ".datasets.pubmed",
+    "TaskEvaluator": ".evaluator.task_evaluator.task_evaluator",
+    "DatasetEvaluator": ".evaluator.dataset_evaluator.dataset_evaluator",
+    "PubMedQAEvaluator": ".evaluator.pubmed_evaluator.pubmed_evaluator",
+    "StreamEvaluator": ".evaluator.stream_evaluator.stream_evaluator",
+    "SampledEvaluator": ".evaluator.sampled_evaluator.sampled_evaluator",
+    "RedundancyAnalyzer": ".analysis.redundancy",
+    "DrillDownReport": ".analysis.drilldown",
+    "CoverageAnalyzer": ".analysis.coverage",
+    "AlignmentBuilder": ".analysis.alignment",
+    "ThresholdSweep": ".analysis.threshold_sweep",
+    "ChunkingConfig": ".chunking.chunkers",
+    "ChunkingSimulator": ".chunking.simulator",
+    "PageStore": ".documents.page_store",
+    "BaselineLabeller": ".labelling.baseline_labeller",
+    "TextNormalizer": ".preprocessing.text_normalizer",
+    "BaseRetriever": ".retrievers.base_retriever",
+    "LoadGenerator": ".retrievers.load_generator",
+    "EvaluationService": ".server.evaluation_server",
+    "EvaluationServer": ".server.evaluation_server",
+    "AnswerGenerator": ".generation.answer_generator",
+    "PROFILER": ".profiling.profiler",
+})
@@ -0,0 +1,35 @@
+import importlib
+from typing import Any, Callable, Dict, List, Tuple
+
+
+def lazy_attributes(package_name: str, attributes: Dict[str, str]) -> Tuple[Callable[[str], Any], Callable[[], List[str]]]:
+    """
+    Build the module-level `__getattr__` and `__dir__` of a package whose public names are imported on first access.
+
+    Keeping package `__init__` modules free of eager imports means `import ragbenchmark` does not pull in
+    NumPy, pandas or any model backend until one of their users is actually touched.
+
+    Parameters:
+    package_name (str): The `__name__` of the package.
+    attributes (Dict[str, str]): Maps every public name to the relative module defining it.
+
+    Returns:
+    Tuple[Callable[[str], Any], Callable[[], List[str]]]: The `__getattr__` and `__dir__` functions of the package.
+
+    Example:
+    >>> __getattr__, __dir__ = lazy_attributes(__name__, {"CustomTask": ".tasks.custom_task"})
+    """
+    package = importlib.import_module(package_name)
+
+    def __getattr__(name: str) -> Any:
+        module_name = attributes.get(name)
+        if module_name is None:
+            raise AttributeError(f"module {package_name!r} has no attribute {name!r}")
+        value = getattr(importlib.import_module(module_name, package_name), name)
+        setattr(package, name, value)
+        return value
+
+    def __dir__() -> List[str]:
+        return sorted(set(vars(package)) | set(attributes))
+
+    return __getattr__, __dir__
@@ -0,0 +1,495 @@
+import os
+import tempfile
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from ..embeddings.embedding_base import EmbeddingBase
+from ..metrics.metrics_by_content.calc_tfidf_similarity import CharNgramVectorizer
+from ..preprocessing.text_normalizer import TextNormalizer
+from ..profiling.profiler import count, stage
+
+ALIGNMENT_METRICS = (
+    "recall_by_char", "precision_by_char", "recall_by_page_number", "precision_by_page_number",
+    "similarity_by_tfidf", "similarity_by_embedding",
+)
+ASSIGNMENT_METHODS = ("hungarian", "greedy")
+
+
+def char_hit_matrix(baseline_texts: Sequence[str], sample_texts: Sequence[str]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Count the characters shared by every pair of baseline and sample texts, as RecallByChar and
+    PrecisionByRecall do: the sum over characters of the minimum of their counts in both texts.
+
+    The counts of all the texts of a task are computed at once over the characters of the task.
+
+    Parameters:
+    baseline_texts (Sequence[str]): The baseline texts.
+    sample_texts (Sequence[str]): The sample texts.
+
+    Returns:
+    Tuple[np.ndarray, np.ndarray, np.ndarray]: The hits, shape (baseline, sample), and the lengths of
+                                               the baseline and of the sample texts.
+    """
+    texts = list(baseline_texts) + list(sample_texts)
+    lengths = np.array([len(text) for text in texts], dtype=np.int64)
+    code_points = np.frombuffer("".join(texts).encode("utf-32-le"), dtype=np.uint32)
+    alphabet, columns = np.unique(code_points, return_inverse=True)
+    rows = np.repeat(np.arange(len(texts)), lengths)
+    counts = np.zeros((len(texts), len(alphabet)), dtype=np.int64)
+    np.add.at(counts, (rows, columns), 1)
+    num_baseline = len(baseline_texts)
+    hits = np.minimum(counts[:num_baseline, None, :], counts[None, num_baseline:, :]).sum(axis=2)
+    return hits, lengths[:num_baseline], lengths[num_baseline:]
+
+
+def page_overlap_matrix(
+    baseline_pages: Sequence[Sequence[int]],
+    sample_pages: Sequence[Sequence[int]]
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Count the pages shared by every pair of baseline and sample page number lists.
+
+    Parameters:
+    baseline_pages (Sequence[Sequence[int]]): The page numbers of every baseline context.
+    sample_pages (Sequence[Sequence[int]]): The page numbers of every sample context.
+
+    Returns:
+    Tuple[np.ndarray, np.ndarray, np.ndarray]: The overlaps, shape (baseline, sample), and the numbers
+                                               of pages of the baseline and of the sample contexts.
+    """
+    all_pages = {page for page_lists in (baseline_pages, sample_pages) for page_list in page_lists for page in page_list}
+    pages = {page: index for index, page in enumerate(sorted(all_pages))}
+
+    def membership(page_lists: Sequence[Sequence[int]]) -> np.ndarray:
+        matrix = np.zeros((len(page_lists), len(pages)), dtype=np.int64)
+        for row, page_list in enumerate(page_lists):
+            matrix[row, [pages[page] for page in page_list]] = 1
+        return matrix
+
+    overlaps = membership(baseline_pages) @ membership(sample_pages).T
+    baseline_sizes = np.array([len(page_list) for page_list in baseline_pages], dtype=np.int64)
+    sample_sizes = np.array([len(page_list) for page_list in sample_pages], dtype=np.int64)
+    return overlaps, baseline_sizes, sample_sizes
+
+
+def _ratio(numerator: np.ndarray, denominator: np.ndarray) -> np.ndarray:
+    """
+    Divide elementwise, with 0.0 where the denominator is 0, as the metrics do.
+
+    Parameters:
+    numerator (np.ndarray): The numerators.
+    denominator (np.ndarray): The denominators, broadcastable to the numerators.
+
+    Returns:
+    np.ndarray: The ratios.
+    """
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(denominator > 0, numerator / np.maximum(denominator, 1), 0.0)
+
+
+def _dense_rows(matrix: Any, rows: List[int]) -> np.ndarray:
+    """
+    Get rows of a sparse CSR matrix as a dense matrix over the columns they use, which keeps their dot
+    products but avoids transposing a matrix with as many columns as hashed n-grams.
+
+    Parameters:
+    matrix (scipy.sparse.csr_matrix): The sparse matrix, e.g. from CharNgramVectorizer.fit_transform.
+    rows (List[int]): The indices of the rows.
+
+    Returns:
+    np.ndarray: One row per index, over the columns used by any of the rows.
+    """
+    selected = matrix[rows]
+    columns, indices = np.unique(selected.indices, return_inverse=True)
+    dense = np.zeros((len(rows), len(columns)))
+    dense[np.repeat(np.arange(len(rows)), np.diff(selected.indptr)), indices] = selected.data
+    return dense
+
+
+def assign(matrix: np.ndarray, method: str = "hungarian") -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Match baseline contexts to sample contexts one-to-one, maximizing the values of the matched pairs.
+
+    The Hungarian method finds the matching of maximal total value, the greedy one repeatedly matches
+    the pair of highest value whose contexts are both unmatched, which is faster but not optimal.
+    Pairs of value 0 are not matched.
+
+    Parameters:
+    matrix (np.ndarray): The values, shape (baseline, sample).
+    method (str): Either "hungarian" or "greedy".
+
+    Returns:
+    Tuple[np.ndarray, np.ndarray]: The baseline and sample indices of the matched pairs, by baseline index.
+
+    Raises:
+    ValueError: If the method is unknown.
+    """
+    if method not in ASSIGNMENT_METHODS:
+        raise ValueError(f"Invalid assignment method {method!r}! Expected one of {', '.join(ASSIGNMENT_METHODS)}.")
+    if matrix.size == 0:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    if method == "hungarian":
+        from scipy.optimize import linear_sum_assignment
+
+        rows, columns = linear_sum_assignment(matrix, maximize=True)
+    else:
+        order = np.argsort(-matrix, axis=None, kind="stable")
+        used_rows = np.zeros(matrix.shape[0], dtype=bool)
+        used_columns = np.zeros(matrix.shape[1], dtype=bool)
+        rows_list, columns_list = [], []
+        for row, column in zip(*np.unravel_index(order, matrix.shape)):
+            if matrix[row, column] <= 0 or len(rows_list) == min(matrix.shape):
+                break
+            if not used_rows[row] and not used_columns[column]:
+                used_rows[row] = used_columns[column] = True
+                rows_list.append(row)
+                columns_list.append(column)
+        rows, columns = np.array(rows_list, dtype=np.int64), np.array(columns_list, dtype=np.int64)
+        order = np.argsort(rows)
+        rows, columns = rows[order], columns[order]
+    kept = matrix[rows, columns] > 0
+    return rows[kept].astype(np.int64), columns[kept].astype(np.int64)
+
+
+class TaskAlignment:
+    """
+    The baseline x sample alignment matrices of a task, one per metric, and the one-to-one matching of its contexts.
+
+    Entry (i, j) of a matrix is the value of the metric between baseline context i and sample context j:
+    the share of the characters or pages of the baseline context found in the sample context for the
+    recalls, the share of the sample context found in the baseline context for the precisions, and the
+    cosine similarity of their vectors for the similarities.
+
+    Attributes:
+    task_id (str): The task id.
+    matrices (Dict[str, np.ndarray]): The matrices, by metric.
+    assignment (Optional[Tuple[np.ndarray, np.ndarray]]): The baseline and sample indices of the matched pairs.
+    """
+
+    def __init__(
+        self,
+        task_id: str,
+        matrices: Dict[str, np.ndarray],
+        assignment: Optional[Tuple[np.ndarray, np.ndarray]] = None
+    ) -> None:
+        """
+        Initialize the TaskAlignment.
+
+        Parameters:
+        task_id (str): The task id.
+        matrices (Dict[str, np.ndarray]): The matrices, by metric, all of shape (baseline, sample).
+        assignment (Optional[Tuple[np.ndarray, np.ndarray]]): The baseline and sample indices of the matched pairs,
+                                                              None without a matching.
+        """
+        self.task_id = task_id
+        self.matrices = matrices
+        self.assignment = assignment
+
+    @property
+    def shape(self) -> Tuple[int, int]:
+        """
+        Get the numbers of baseline and sample contexts.
+
+        Returns:
+        Tuple[int, int]: The shape of the matrices.
+        """
+        return next(iter(self.matrices.values())).shape if self.matrices else (0, 0)
+
+    def assign(self, metric: str, method: str = "hungarian") -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Match the contexts one-to-one on a metric, see `assign`, and keep the matching.
+
+        Parameters:
+        metric (str): The metric.
+        method (str): Either "hungarian" or "greedy".
+
+        Returns:
+        Tuple[np.ndarray, np.ndarray]: The baseline and sample indices of the matched pairs.
+        """
+        self.assignment = assign(self.matrices[metric], method=method)
+        return self.assignment
+
+    def matched_values(self, metric: str) -> np.ndarray:
+        """
+        Get the values of a metric for the matched pairs.
+
+        Parameters:
+        metric (str): The metric.
+
+        Returns:
+        np.ndarray: One value per matched pair, empty without a matching.
+        """
+        if self.assignment is None:
+            return np.empty(0, dtype=self.matrices[metric].dtype)
+        return self.matrices[metric][self.assignment]
+
+
+class AlignmentBuilder:
+    """
+    A class used to compute the alignment matrices of every task of a dataset and save them to one compressed `.npz` file.
+
+    The texts of the whole dataset are deduplicated and normalized once. The char and page matrices are
+    computed per task with numpy, the TF-IDF similarities from the vectors of all the texts at once,
+    and the embedding similarities from vectors computed in batches by an embedding model, if given.
+
+    Attributes:
+    metrics (List[str]): The metrics of the matrices.
+    normalizer (Optional[TextNormalizer]): Normalizes texts before the char and TF-IDF metrics compare them.
+    vectorizer (CharNgramVectorizer): The vectorizer of the TF-IDF similarities.
+    embedding (Optional[EmbeddingBase]): The embedding model of the embedding similarities.
+    batch_size (int): The number of texts embedded at once.
+    dtype (np.dtype): The type of the matrices.
+
+    Example:
+    >>> builder = AlignmentBuilder(metrics=["recall_by_char", "recall_by_page_number"])
+    >>> alignments = builder.align_dataset(baseline_dataset_dict, sample_dataset_dict, assignment_metric="recall_by_char")
+    >>> AlignmentBuilder.save(alignments, "alignments.npz")
+    """
+
+    def __init__(
+        self,
+        metrics: Optional[Iterable[str]] = None,
+        normalizer: Optional[TextNormalizer] = None,
+        vectorizer: Optional[CharNgramVectorizer] = None,
+        embedding: Optional[EmbeddingBase] = None,
+        batch_size: int = 256,
+        dtype: Any = np.float32
+    ) -> None:
+        """
+        Initialize the AlignmentBuilder.
+
+        Parameters:
+        metrics (Optional[Iterable[str]]): The metrics, all of them by default, without the embedding
+                                           similarity if no embedding model is given.
+        normalizer (Optional[TextNormalizer]): Normalizes texts before the char and TF-IDF metrics compare them.
+        vectorizer (Optional[CharNgramVectorizer]): The vectorizer of the TF-IDF similarities.
+        embedding (Optional[EmbeddingBase]): The embedding model of the embedding similarities.
+        batch_size (int): The number of texts embedded at once.
+        dtype (Any): The type of the matrices.
+
+        Raises:
+        ValueError: If a metric is unknown, or the embedding similarity is requested without an embedding model.
+        """
+        if metrics is None:
+            metrics = [metric for metric in ALIGNMENT_METRICS if metric != "similarity_by_embedding" or embedding is not None]
+        self.metrics = list(metrics)
+        unknown = [metric for metric in self.metrics if metric not in ALIGNMENT_METRICS]
+        if unknown:
+            raise ValueError(f"Invalid alignment metrics {', '.join(unknown)}! Expected some of {', '.join(ALIGNMENT_METRICS)}.")
+        if "similarity_by_embedding" in self.metrics and embedding is None:
+            raise ValueError("The similarity_by_embedding metric requires an embedding model!")
+        self.normalizer = normalizer
+        self.vectorizer = vectorizer or CharNgramVectorizer()
+        self.embedding = embedding
+        self.batch_size = batch_size
+        self.dtype = np.dtype(dtype)
+
+    def align_dataset(
+        self,
+        baseline_dataset_dict: Dict[str, Any],
+        sample_dataset_dict: Dict[str, Any],
+        assignment_metric: Optional[str] = None,
+        assignment_method: str = "hungarian"
+    ) -> List[TaskAlignment]:
+        """
+        Compute the alignment matrices of every baseline task, and optionally match their contexts.
+
+        Parameters:
+        baseline_dataset_dict (Dict[str, Any]): The baseline dataset dictionary.
+        sample_dataset_dict (Dict[str, Any]): The sample dataset dictionary. Missing tasks have no sample contexts.
+        assignment_metric (Optional[str]): The metric the contexts are matched on, no matching by default.
+        assignment_method (str): Either "hungarian" or "greedy".
+
+        Returns:
+        List[TaskAlignment]: One alignment per baseline task, in order.
+
+        Raises:
+        ValueError: If the assignment metric is not computed.
+        """
+        if assignment_metric is not None and assignment_metric not in self.metrics:
+            raise ValueError(f"Cannot match contexts on {assignment_metric}, which is not among the computed metrics!")
+        sample_tasks = sample_dataset_dict["TASKS"]
+        tasks = [
+            (str(task_id), baseline_task_dict["CONTEXTS"], (sample_tasks.get(task_id) or {"CONTEXTS": []})["CONTEXTS"])
+            for task_id, baseline_task_dict in baseline_dataset_dict["TASKS"].items()
+        ]
+        text_index: Dict[str, int] = {}
+        for _, baseline_contexts, sample_contexts in tasks:
+            for context_dict in baseline_contexts + sample_contexts:
+                text_index.setdefault(context_dict["TEXT"], len(text_index))
+        texts = list(text_index)
+        normalized = self.normalizer.normalize_batch(texts) if self.normalizer is not None else texts
+        vectors = self._vectorize(texts, normalized)
+
+        alignments = []
+        with stage("alignment.matrices"):
+            for task_id, baseline_contexts, sample_contexts in tasks:
+                matrices = self._task_matrices(
+                    [text_index[context_dict["TEXT"]] for context_dict in baseline_contexts],
+                    [text_index[context_dict["TEXT"]] for context_dict in sample_contexts],
+                    [context_dict["PAGE_NUMBER"] for context_dict in baseline_contexts],
+                    [context_dict["PAGE_NUMBER"] for context_dict in sample_contexts],
+                    normalized, vectors
+                )
+                alignment = TaskAlignment(task_id, matrices)
+                if assignment_metric is not None:
+                    alignment.assign(assignment_metric, method=assignment_method)
+                alignments.append(alignment)
+            count("alignment_tasks", len(alignments))
+        return alignments
+
+    @staticmethod
+    def save(alignments: Sequence[TaskAlignment], path: str) -> str:
+        """
+        Save alignments to one compressed `.npz` file, written atomically.
+
+        The matrices of a metric are flattened row by row and concatenated over the tasks into one array,
+        so the file holds a fixed number of arrays whatever the number of tasks:
+        task_ids, metrics, shapes (tasks x 2), offsets (tasks + 1, into the flat matrices),
+        matrix_<metric> for every metric, and, if the contexts were matched, assignment_offsets
+        (tasks + 1), assignment_rows and assignment_columns.
+
+        Parameters:
+        alignments (Sequence[TaskAlignment]): The alignments.
+        path (str): The `.npz` file path.
+
+        Returns:
+        str: The file path.
+        """
+        metrics = list(alignments[0].matrices) if alignments else []
+        shapes = np.array([alignment.shape for alignment in alignments], dtype=np.int64).reshape(-1, 2)
+        arrays = {
+            "task_ids": np.array([alignment.task_id for alignment in alignments], dtype=str),
+            "metrics": np.array(metrics, dtype=str),
+            "shapes": shapes,
+            "offsets": np.concatenate([[0], np.cumsum(shapes.prod(axis=1))]).astype(np.int64),
+        }
+        for metric in metrics:
+            arrays[f"matrix_{metric}"] = np.concatenate(
+                [alignment.matrices[metric].ravel() for alignment in alignments]
+            ) if alignments else np.empty(0)
+        if alignments and all(alignment.assignment is not None for alignment in alignments):
+            arrays["assignment_offsets"] = np.concatenate(
+                [[0], np.cumsum([len(alignment.assignment[0]) for alignment in alignments])]
+            ).astype(np.int64)
+            arrays["assignment_rows"] = np.concatenate([alignment.assignment[0] for alignment in alignments]).astype(np.int32)
+            arrays["assignment_columns"] = np.concatenate([alignment.assignment[1] for alignment in alignments]).astype(np.int32)
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".npz")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                np.savez_compressed(f, **arrays)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+        return path
+
+    @staticmethod
+    def load(path: str) -> List[TaskAlignment]:
+        """
+        Load alignments saved by `save`.
+
+        Parameters:
+        path (str): The `.npz` file path.
+
+        Returns:
+        List[TaskAlignment]: The alignments, in order.
+        """
+        with np.load(path) as arrays:
+            metrics = arrays["metrics"].tolist()
+            flat = {metric: arrays[f"matrix_{metric}"] for metric in metrics}
+            shapes, offsets = arrays["shapes"], arrays["offsets"]
+            assignment = None
+            if "assignment_offsets" in arrays:
+                assignment = arrays["assignment_offsets"], arrays["assignment_rows"], arrays["assignment_columns"]
+            alignments = []
+            for index, task_id in enumerate(arrays["task_ids"].tolist()):
+                start, end = offsets[index], offsets[index + 1]
+                matrices = {metric: flat[metric][start:end].reshape(shapes[index]) for metric in metrics}
+                pairs = None
+                if assignment is not None:
+                    pair_offsets, rows, columns = assignment
+                    pair_slice = slice(pair_offsets[index], pair_offsets[index + 1])
+                    pairs = rows[pair_slice].astype(np.int64), columns[pair_slice].astype(np.int64)
+                alignments.append(TaskAlignment(task_id, matrices, pairs))
+        return alignments
+
+    def _vectorize(self, texts: List[str], normalized: List[str]) -> Dict[str, Any]:
+        """
+        Compute the vectors of the similarity metrics for all the texts of the dataset.
+
+        Parameters:
+        texts (List[str]): The unique texts.
+        normalized (List[str]): The normalized texts.
+
+        Returns:
+        Dict[str, Any]: The TF-IDF matrix and the L2-normalized embedding matrix, by metric.
+        """
+        vectors: Dict[str, Any] = {}
+        if "similarity_by_tfidf" in self.metrics and texts:
+            with stage("alignment.tfidf"):
+                vectors["similarity_by_tfidf"] = self.vectorizer.fit_transform(normalized)
+        if "similarity_by_embedding" in self.metrics and texts:
+            with stage("alignment.embed"):
+                batches = [
+                    np.asarray(self.embedding.embed(texts[start:start + self.batch_size]), dtype=np.float32)
+                    for start in range(0, len(texts), self.batch_size)
+                ]
+                embedded = np.concatenate(batches)
+                norms = np.linalg.norm(embedded, axis=1, keepdims=True)
+                vectors["similarity_by_embedding"] = embedded / np.where(norms > 0, norms, 1.0)
+        return vectors
+
+    def _task_matrices(
+        self,
+        baseline_rows: List[int],
+        sample_rows: List[int],
+        baseline_pages: List[List[int]],
+        sample_pages: List[List[int]],
+        normalized: List[str],
+        vectors: Dict[str, Any]
+    ) -> Dict[str, np.ndarray]:
+        """
+        Compute the matrices of a task.
+
+        Parameters:
+        baseline_rows (List[int]): The indices of the baseline texts among the unique texts.
+        sample_rows (List[int]): The indices of the sample texts among the unique texts.
+        baseline_pages (List[List[int]]): The page numbers of the baseline contexts.
+        sample_pages (List[List[int]]): The page numbers of the sample contexts.
+        normalized (List[str]): The normalized unique texts.
+        vectors (Dict[str, Any]): The vectors of the similarity metrics, see `_vectorize`.
+
+        Returns:
+        Dict[str, np.ndarray]: The matrices, by metric.
+        """
+        shape = (len(baseline_rows), len(sample_rows))
+        matrices = {}
+        if "recall_by_char" in self.metrics or "precision_by_char" in self.metrics:
+            hits, baseline_lengths, sample_lengths = char_hit_matrix(
+                [normalized[row] for row in baseline_rows], [normalized[row] for row in sample_rows]
+            )
+        if "recall_by_page_number" in self.metrics or "precision_by_page_number" in self.metrics:
+            overlaps, baseline_sizes, sample_sizes = page_overlap_matrix(baseline_pages, sample_pages)
+        for metric in self.metrics:
+            if metric == "recall_by_char":
+                matrix = _ratio(hits, baseline_lengths[:, None])
+            elif metric == "precision_by_char":
+                matrix = _ratio(hits, sample_lengths[None, :])
+            elif metric == "recall_by_page_number":
+                matrix = _ratio(overlaps, baseline_sizes[:, None])
+            elif metric == "precision_by_page_number":
+                matrix = _ratio(overlaps, sample_sizes[None, :])
+            elif metric not in vectors or 0 in shape:
+                matrix = np.zeros(shape)
+            elif metric == "similarity_by_tfidf":
+                dense = _dense_rows(vectors[metric], baseline_rows + sample_rows)
+                matrix = dense[:shape[0]] @ dense[shape[0]:].T
+            else:
+                matrix = vectors[metric][baseline_rows] @ vectors[metric][sample_rows].T
+            matrices[metric] = np.asarray(matrix, dtype=self.dtype).reshape(shape)
+        return matrices
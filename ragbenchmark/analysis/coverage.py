@@ -0,0 +1,481 @@
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from ..chunking.corpus import Document
+from ..profiling.profiler import count, stage
+from ..tasks.custom_task import CustomTask
+
+COVERAGE_GRANULARITIES = ("page", "char")
+
+_EMPTY = np.empty(0, dtype=np.int64)
+
+
+def merge_intervals(starts: np.ndarray, ends: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Merge overlapping or touching half-open intervals.
+
+    Parameters:
+    starts (np.ndarray): The start of each interval.
+    ends (np.ndarray): The end of each interval, after its last position.
+
+    Returns:
+    Tuple[np.ndarray, np.ndarray]: The starts and ends of the disjoint merged intervals, sorted.
+
+    Example:
+    >>> merge_intervals(np.array([5, 1, 2]), np.array([7, 3, 5]))
+    (array([1]), array([7]))
+    """
+    keep = ends > starts
+    starts, ends = starts[keep], ends[keep]
+    if starts.size == 0:
+        return _EMPTY, _EMPTY
+    order = np.argsort(starts, kind="stable")
+    starts, ends = starts[order], ends[order]
+    reach = np.maximum.accumulate(ends)
+    first = np.ones(starts.size, dtype=bool)
+    first[1:] = starts[1:] > reach[:-1]
+    heads = np.flatnonzero(first)
+    return starts[heads], np.maximum.reduceat(ends, heads)
+
+
+def _contains(starts: np.ndarray, ends: np.ndarray, positions: np.ndarray) -> np.ndarray:
+    """
+    Tell which positions fall inside disjoint sorted intervals.
+
+    Parameters:
+    starts (np.ndarray): The start of each interval, sorted.
+    ends (np.ndarray): The end of each interval, after its last position.
+    positions (np.ndarray): The positions to look up.
+
+    Returns:
+    np.ndarray: Whether every position is inside an interval.
+    """
+    if starts.size == 0:
+        return np.zeros(positions.size, dtype=bool)
+    index = np.searchsorted(starts, positions, side="right") - 1
+    return (index >= 0) & (positions < ends[np.maximum(index, 0)])
+
+
+def combine_intervals(
+    left: Tuple[np.ndarray, np.ndarray],
+    right: Tuple[np.ndarray, np.ndarray],
+    operation: Callable[[np.ndarray, np.ndarray], np.ndarray]
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Combine two sets of disjoint sorted intervals with a boolean operation.
+
+    The endpoints of both sets cut the line into elementary segments, each of which is entirely inside
+    or outside of every interval, so the operation is evaluated once per segment.
+
+    Parameters:
+    left (Tuple[np.ndarray, np.ndarray]): The starts and ends of the first set.
+    right (Tuple[np.ndarray, np.ndarray]): The starts and ends of the second set.
+    operation (Callable[[np.ndarray, np.ndarray], np.ndarray]): The element-wise operation on the memberships
+                                                                 of the segments, e.g. np.logical_and.
+
+    Returns:
+    Tuple[np.ndarray, np.ndarray]: The starts and ends of the merged resulting intervals.
+
+    Example:
+    >>> combine_intervals((np.array([0]), np.array([10])), (np.array([2]), np.array([4])), lambda a, b: a & ~b)
+    (array([0, 4]), array([ 2, 10]))
+    """
+    points = np.unique(np.concatenate([left[0], left[1], right[0], right[1]]))
+    if points.size < 2:
+        return _EMPTY, _EMPTY
+    segment_starts, segment_ends = points[:-1], points[1:]
+    keep = operation(_contains(*left, segment_starts), _contains(*right, segment_starts))
+    return merge_intervals(segment_starts[keep], segment_ends[keep])
+
+
+class IntervalAccumulator:
+    """
+    A class used to accumulate the intervals of one document in a streaming pass, in bounded memory.
+
+    Intervals are buffered and merged into the disjoint sorted set every `compact_size` additions,
+    so the memory stays proportional to the number of disjoint regions rather than of contexts.
+
+    Attributes:
+    num_contexts (int): The number of contexts added.
+    _compact_size (int): The number of buffered intervals that triggers a merge.
+    _starts (List[int]): The starts of the buffered intervals.
+    _ends (List[int]): The ends of the buffered intervals.
+    _merged (Tuple[np.ndarray, np.ndarray]): The merged intervals.
+    """
+
+    def __init__(self, compact_size: int = 4096) -> None:
+        """
+        Initialize the IntervalAccumulator.
+
+        Parameters:
+        compact_size (int): The number of buffered intervals that triggers a merge.
+        """
+        self.num_contexts = 0
+        self._compact_size = max(1, compact_size)
+        self._starts: List[int] = []
+        self._ends: List[int] = []
+        self._merged: Tuple[np.ndarray, np.ndarray] = (_EMPTY, _EMPTY)
+
+    def add_context(self, intervals: Iterable[Tuple[int, int]]) -> None:
+        """
+        Add the half-open intervals of one context.
+
+        Parameters:
+        intervals (Iterable[Tuple[int, int]]): The starts and ends, after the last position, of the intervals.
+        """
+        self.num_contexts += 1
+        for start, end in intervals:
+            self._starts.append(start)
+            self._ends.append(end)
+        if len(self._starts) >= self._compact_size:
+            self._compact()
+
+    def merged(self) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Get the merged intervals added so far.
+
+        Returns:
+        Tuple[np.ndarray, np.ndarray]: The starts and ends of the disjoint sorted intervals.
+        """
+        self._compact()
+        return self._merged
+
+    def _compact(self) -> None:
+        """
+        Merge the buffered intervals into the merged set.
+        """
+        if not self._starts:
+            return
+        self._merged = merge_intervals(
+            np.concatenate([self._merged[0], np.array(self._starts, dtype=np.int64)]),
+            np.concatenate([self._merged[1], np.array(self._ends, dtype=np.int64)]),
+        )
+        self._starts, self._ends = [], []
+
+
+class CoverageAnalyzer:
+    """
+    A class used to find which regions of a corpus a retriever surfaces, and which regions the
+    baseline needs but never gets.
+
+    Every baseline context (CustomContext) and sample context (CustomRagContext) is mapped to
+    intervals of its document, either its pages or, with the corpus texts, the character span of
+    its text. The intervals are accumulated per document and side in a single streaming pass over
+    the tasks, then combined into:
+    - covered: needed by the baseline and retrieved by the sample.
+    - missed: needed by the baseline and never retrieved.
+    - over_retrieved: retrieved but never needed.
+    - unsurfaced: in the corpus but never retrieved, only when the corpus is known.
+
+    Pages are reported as inclusive ranges of page numbers, characters as half-open offset ranges
+    into the text of the document, see `Document.text`.
+
+    Attributes:
+    granularity (str): Either "page" or "char".
+    num_tasks (int): The number of tasks added.
+    num_unmapped_contexts (int): The number of contexts of unknown documents or without page numbers.
+    num_approximate_contexts (int): In char granularity, the number of contexts whose text was not
+                                    found in their pages, and which cover these whole pages instead.
+    _documents (Optional[List[str]]): The file paths of the documents, or None to accept any document.
+    _corpus (Dict[str, Document]): The documents with known texts, by file path.
+    _baseline (Dict[str, IntervalAccumulator]): The intervals needed by the baseline, by file path.
+    _sample (Dict[str, IntervalAccumulator]): The intervals retrieved by the sample, by file path.
+    """
+
+    def __init__(
+        self,
+        documents: Optional[Iterable[str]] = None,
+        corpus: Optional[Iterable[Document]] = None,
+        granularity: str = "page"
+    ) -> None:
+        """
+        Initialize the CoverageAnalyzer.
+
+        Parameters:
+        documents (Optional[Iterable[str]]): The file paths of the documents, e.g. the DOCUMENTS of the
+                                             dataset. Contexts of other documents are not mapped.
+                                             Defaults to the corpus documents, or any document.
+        corpus (Optional[Iterable[Document]]): The documents with their pages, needed by the char
+                                               granularity and to report unsurfaced regions.
+        granularity (str): Either "page" or "char".
+
+        Raises:
+        ValueError: If the granularity is unknown, or "char" without a corpus.
+        """
+        if granularity not in COVERAGE_GRANULARITIES:
+            raise ValueError(f"Invalid granularity {granularity!r}! Expected one of {', '.join(COVERAGE_GRANULARITIES)}.")
+        self._corpus: Dict[str, Document] = {document.file_path: document for document in corpus or []}
+        if granularity == "char" and not self._corpus:
+            raise ValueError("The char granularity needs the corpus documents!")
+        if documents is not None:
+            self._documents: Optional[List[str]] = list(dict.fromkeys(documents))
+        else:
+            self._documents = list(self._corpus) if self._corpus else None
+        # contexts often refer to the documents by a path, e.g. "data/paper.pdf" for "paper.pdf"
+        self._aliases: Optional[Dict[str, str]] = None
+        if self._documents is not None:
+            self._aliases = {}
+            for file_path in self._documents + list(self._corpus):
+                self._aliases.setdefault(file_path, file_path)
+                self._aliases.setdefault(_basename(file_path), file_path)
+        self.granularity = granularity
+        self.num_tasks = 0
+        self.num_unmapped_contexts = 0
+        self.num_approximate_contexts = 0
+        self._baseline: Dict[str, IntervalAccumulator] = {}
+        self._sample: Dict[str, IntervalAccumulator] = {}
+
+    def add_task(self, task: Any) -> None:
+        """
+        Accumulate the baseline and sample contexts of a task.
+
+        Parameters:
+        task (BaseTask): The task, whose contexts have a file path and page numbers.
+        """
+        self.num_tasks += 1
+        for context in task.baseline_contexts:
+            self._add_context(self._baseline, context)
+        for context in task.sample_contexts:
+            self._add_context(self._sample, context)
+
+    def analyze_dataset(self, tasks: Iterable[Any]) -> Dict[str, Any]:
+        """
+        Accumulate the contexts of all tasks and report the coverage.
+
+        Parameters:
+        tasks (Iterable[BaseTask]): The tasks, consumed once, e.g. a generator.
+
+        Returns:
+        Dict[str, Any]: The coverage report, see `report`.
+        """
+        with stage("coverage.accumulate"):
+            for task in tasks:
+                self.add_task(task)
+        return self.report()
+
+    def analyze_dataset_dicts(self, baseline_dataset_dict: Dict[str, Any], sample_dataset_dict: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Report the coverage of a sample dataset over the tasks of a baseline dataset.
+
+        Tasks are built one at a time, and baseline tasks missing from the sample count as retrieving nothing.
+
+        Parameters:
+        baseline_dataset_dict (Dict[str, Any]): The baseline dataset.
+        sample_dataset_dict (Dict[str, Any]): The sample dataset.
+
+        Returns:
+        Dict[str, Any]: The coverage report, see `report`.
+        """
+        return self.analyze_dataset(iter_coverage_tasks(baseline_dataset_dict, sample_dataset_dict))
+
+    def report(self) -> Dict[str, Any]:
+        """
+        Report the coverage of the contexts added so far.
+
+        Returns:
+        Dict[str, Any]: The totals, rates and per-document regions. Each document reports the size of
+                        its baseline, sample, covered, missed, over-retrieved and, with a corpus, corpus
+                        and unsurfaced regions, along with the regions themselves as dicts with start,
+                        end and size. Sizes count pages or characters.
+        """
+        with stage("coverage.report"):
+            file_paths = list(self._documents or [])
+            file_paths.extend(sorted((set(self._baseline) | set(self._sample)) - set(file_paths)))
+            documents = {file_path: self._document_report(file_path) for file_path in file_paths}
+        sizes = ["baseline", "sample", "covered", "missed", "over_retrieved"]
+        if self._corpus:
+            sizes += ["corpus", "unsurfaced"]
+        totals = {name: sum(report["sizes"].get(name, 0) for report in documents.values()) for name in sizes}
+        report = {
+            "granularity": self.granularity,
+            "num_tasks": self.num_tasks,
+            "num_unmapped_contexts": self.num_unmapped_contexts,
+            "num_approximate_contexts": self.num_approximate_contexts,
+            "totals": totals,
+            "coverage_rate": totals["covered"] / totals["baseline"] if totals["baseline"] else 0.0,
+            "over_retrieval_rate": totals["over_retrieved"] / totals["sample"] if totals["sample"] else 0.0,
+            "documents": documents,
+        }
+        if self._corpus:
+            report["surfaced_rate"] = (totals["corpus"] - totals["unsurfaced"]) / totals["corpus"] if totals["corpus"] else 0.0
+        return report
+
+    def _add_context(self, accumulators: Dict[str, IntervalAccumulator], context: Any) -> None:
+        """
+        Map a context to an interval of its document and accumulate it.
+
+        Parameters:
+        accumulators (Dict[str, IntervalAccumulator]): The accumulators of the side of the context.
+        context (CustomContext): The context.
+        """
+        file_path = self._resolve(getattr(context, "file_path", None))
+        intervals = []
+        if file_path is not None:
+            intervals = self._page_intervals(context) if self.granularity == "page" else self._char_intervals(file_path, context)
+        if not intervals:
+            self.num_unmapped_contexts += 1
+            return
+        count("coverage_contexts")
+        accumulator = accumulators.get(file_path)
+        if accumulator is None:
+            accumulator = accumulators[file_path] = IntervalAccumulator()
+        accumulator.add_context(intervals)
+
+    def _resolve(self, file_path: Optional[str]) -> Optional[str]:
+        """
+        Resolve the file path of a context to a known document, by path or by file name.
+
+        Parameters:
+        file_path (Optional[str]): The file path of the context.
+
+        Returns:
+        Optional[str]: The file path of the document, or None if it is unknown.
+        """
+        if file_path is None or self._aliases is None:
+            return file_path
+        return self._aliases.get(file_path) or self._aliases.get(_basename(file_path))
+
+    @staticmethod
+    def _page_intervals(context: Any) -> List[Tuple[int, int]]:
+        """
+        Map a context to the half-open ranges of its pages.
+
+        Parameters:
+        context (CustomContext): The context.
+
+        Returns:
+        List[Tuple[int, int]]: One range per page, empty without page numbers.
+        """
+        return [(page_number, page_number + 1) for page_number in context.page_number or []]
+
+    def _char_intervals(self, file_path: str, context: Any) -> List[Tuple[int, int]]:
+        """
+        Map a context to the character span of its text in its document, searched in its pages first.
+
+        Parameters:
+        file_path (str): The resolved file path of the document.
+        context (CustomContext): The context.
+
+        Returns:
+        List[Tuple[int, int]]: The span, the span of its whole pages if the text is not found, or nothing
+                               if the document is not in the corpus or neither is found.
+        """
+        document = self._corpus.get(file_path)
+        if document is None:
+            return []
+        page_numbers = [
+            page_number for page_number in context.page_number or []
+            if document.first_page <= page_number < document.first_page + document.num_pages
+        ]
+        pages_span = None
+        if page_numbers:
+            pages_span = (document.page_span(min(page_numbers))[0], document.page_span(max(page_numbers))[1])
+        text = context.text.strip()
+        if text:
+            position = -1
+            if pages_span is not None:
+                position = document.text.find(text, pages_span[0], pages_span[1] + len(text))
+            if position < 0:
+                position = document.text.find(text)
+            if position >= 0:
+                return [(position, position + len(text))]
+        if pages_span is None:
+            return []
+        self.num_approximate_contexts += 1
+        return [pages_span]
+
+    def _document_report(self, file_path: str) -> Dict[str, Any]:
+        """
+        Combine the intervals of both sides of a document into its regions.
+
+        Parameters:
+        file_path (str): The file path of the document.
+
+        Returns:
+        Dict[str, Any]: The numbers of contexts, the sizes and the regions of the document.
+        """
+        baseline = self._baseline[file_path].merged() if file_path in self._baseline else (_EMPTY, _EMPTY)
+        sample = self._sample[file_path].merged() if file_path in self._sample else (_EMPTY, _EMPTY)
+        regions = {
+            "covered": combine_intervals(baseline, sample, np.logical_and),
+            "missed": combine_intervals(baseline, sample, lambda needed, retrieved: needed & ~retrieved),
+            "over_retrieved": combine_intervals(sample, baseline, lambda retrieved, needed: retrieved & ~needed),
+        }
+        sizes = {"baseline": _size(baseline), "sample": _size(sample)}
+        document = self._corpus.get(file_path)
+        if document is not None:
+            if self.granularity == "page":
+                extent = (np.array([document.first_page]), np.array([document.first_page + document.num_pages]))
+            else:
+                extent = (np.array([0]), np.array([len(document.text)]))
+            regions["unsurfaced"] = combine_intervals(extent, sample, lambda corpus, retrieved: corpus & ~retrieved)
+            sizes["corpus"] = _size(extent)
+        sizes.update((name, _size(intervals)) for name, intervals in regions.items())
+        return {
+            "num_baseline_contexts": self._baseline[file_path].num_contexts if file_path in self._baseline else 0,
+            "num_sample_contexts": self._sample[file_path].num_contexts if file_path in self._sample else 0,
+            "sizes": sizes,
+            "regions": {name: self._regions(intervals) for name, intervals in regions.items()},
+        }
+
+    def _regions(self, intervals: Tuple[np.ndarray, np.ndarray]) -> List[Dict[str, int]]:
+        """
+        Convert intervals to reported regions, with inclusive last pages in page granularity.
+
+        Parameters:
+        intervals (Tuple[np.ndarray, np.ndarray]): The starts and ends of the intervals.
+
+        Returns:
+        List[Dict[str, int]]: One dict with start, end and size per region.
+        """
+        last_offset = 1 if self.granularity == "page" else 0
+        return [
+            {"start": start, "end": end - last_offset, "size": end - start}
+            for start, end in zip(intervals[0].tolist(), intervals[1].tolist())
+        ]
+
+
+def _basename(file_path: str) -> str:
+    """
+    Get the file name of a path with either separator.
+
+    Parameters:
+    file_path (str): The file path, with slashes or backslashes.
+
+    Returns:
+    str: The last component of the path.
+    """
+    return file_path.replace("\\", "/").rsplit("/", 1)[-1]
+
+
+def _size(intervals: Tuple[np.ndarray, np.ndarray]) -> int:
+    """
+    Sum the lengths of disjoint intervals.
+
+    Parameters:
+    intervals (Tuple[np.ndarray, np.ndarray]): The starts and ends of the intervals.
+
+    Returns:
+    int: The total length.
+    """
+    return int((intervals[1] - intervals[0]).sum())
+
+
+def iter_coverage_tasks(baseline_dataset_dict: Dict[str, Any], sample_dataset_dict: Dict[str, Any]) -> Iterator[CustomTask]:
+    """
+    Build the tasks of a baseline dataset one at a time, with no sample contexts for tasks missing from the sample.
+
+    Parameters:
+    baseline_dataset_dict (Dict[str, Any]): The baseline dataset.
+    sample_dataset_dict (Dict[str, Any]): The sample dataset.
+
+    Returns:
+    Iterator[CustomTask]: The task of every baseline task.
+    """
+    sample_tasks = sample_dataset_dict["TASKS"]
+    for task_id, baseline_task_dict in baseline_dataset_dict["TASKS"].items():
+        sample_task_dict = sample_tasks.get(task_id)
+        if sample_task_dict is None:
+            sample_task_dict = {"QUESTION": baseline_task_dict["QUESTION"], "ANSWER": "", "CONTEXTS": []}
+        yield CustomTask(task_id, baseline_task_dict, sample_task_dict)
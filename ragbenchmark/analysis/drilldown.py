@@ -0,0 +1,322 @@
+from typing import Any, Dict, List, Optional, Sequence, Union
+
+import numpy as np
+import pandas as pd
+
+from ..metrics.metrics_by_char.utils import count_chars
+from ..metrics.metrics_by_char.calc_recall_by_char import RecallByChar
+from ..metrics.metrics_by_char.calc_precision_by_char import PrecisionByRecall
+from ..preprocessing.text_normalizer import TextNormalizer
+from ..profiling.profiler import stage, count
+
+DRILLDOWN_VIEWS = ("file", "page", "score", "question_length")
+
+RECALL_METRICS = ("recall_by_page_number", "recall_by_char")
+PRECISION_METRICS = ("precision_by_page_number", "precision_by_char")
+
+
+class DrillDownReport:
+    """
+    A class used to find which documents, pages and kinds of questions drag the metrics of a run down.
+
+    The report is built from the datasets once, as a columnar fact table with one row per (task,
+    context) on both sides. A baseline row carries the recall of its context, e.g. how many of its
+    pages the best sample context covers, and a sample row the precision of its context. Every row
+    also carries its weight in the task value, one over the number of contexts on its side, so that
+    the weighted sums of a task give exactly the values of TaskEvaluator, and the recall loss of a
+    row is its share of the gap between the dataset mean and a perfect score. Group-by queries are
+    then plain vectorized pandas operations over the table.
+
+    Columns of the fact table:
+    task_id, question_length (words), side ("baseline" or "sample"), context_index, file_path,
+    page (first page), pages, num_pages, text_length, score (sample side only), hit (whether the
+    context shares a page with the other side), weight, the four metrics (NaN on the side they do
+    not apply to) and recall_loss_by_page_number / recall_loss_by_char (baseline side only).
+
+    Attributes:
+    facts (pd.DataFrame): The fact table.
+    num_tasks (int): The number of tasks, the denominator of the dataset means.
+
+    Example:
+    >>> report = DrillDownReport.build(baseline_dataset_dict, sample_dataset_dict)
+    >>> report.by_file().sort_values("recall_loss_by_page_number", ascending=False).head()
+    """
+
+    def __init__(self, facts: pd.DataFrame, num_tasks: int) -> None:
+        """
+        Initialize the DrillDownReport.
+
+        Parameters:
+        facts (pd.DataFrame): The fact table, see `build`.
+        num_tasks (int): The number of tasks.
+        """
+        self.facts = facts
+        self.num_tasks = num_tasks
+
+    @classmethod
+    def build(
+        cls,
+        baseline_dataset_dict: Dict[str, Any],
+        sample_dataset_dict: Dict[str, Any],
+        normalizer: Optional[TextNormalizer] = None
+    ) -> "DrillDownReport":
+        """
+        Build the fact table of a run in one pass over the tasks.
+
+        Parameters:
+        baseline_dataset_dict (Dict[str, Any]): The baseline dataset dictionary.
+        sample_dataset_dict (Dict[str, Any]): The sample dataset dictionary. Missing tasks have no sample contexts.
+        normalizer (Optional[TextNormalizer]): Normalizes texts before the char metrics compare them.
+
+        Returns:
+        DrillDownReport: The report.
+        """
+        columns: Dict[str, List[Any]] = {name: [] for name in (
+            "task_id", "question_length", "side", "context_index", "file_path", "page", "pages", "num_pages",
+            "text_length", "score", "hit", "weight", *RECALL_METRICS, *PRECISION_METRICS,
+        )}
+        char_counts: Dict[str, Dict[str, int]] = {}
+
+        def count_text(text: str) -> Dict[str, int]:
+            counter = char_counts.get(text)
+            if counter is None:
+                normalized = normalizer.normalize(text) if normalizer is not None else text
+                counter = char_counts[text] = count_chars(normalized)
+            return counter
+
+        sample_tasks = sample_dataset_dict["TASKS"]
+        with stage("drilldown.facts"):
+            for task_id, baseline_task_dict in baseline_dataset_dict["TASKS"].items():
+                sample_task_dict = sample_tasks.get(task_id) or {"CONTEXTS": []}
+                question_length = len(baseline_task_dict["QUESTION"].split())
+                sides = (baseline_task_dict["CONTEXTS"], sample_task_dict["CONTEXTS"])
+                page_sets = [[set(context_dict["PAGE_NUMBER"]) for context_dict in contexts] for contexts in sides]
+                counters = [[count_text(context_dict["TEXT"]) for context_dict in contexts] for contexts in sides]
+                for side_index, side in enumerate(("baseline", "sample")):
+                    other_pages, other_counters = page_sets[1 - side_index], counters[1 - side_index]
+                    contexts = sides[side_index]
+                    for context_index, context_dict in enumerate(contexts):
+                        pages = page_sets[side_index][context_index]
+                        overlap = max((len(pages & other) for other in other_pages), default=0)
+                        # the page metrics of a context: the best overlap over the other side, relative to its pages
+                        num_pages = len(context_dict["PAGE_NUMBER"])
+                        page_value = overlap / num_pages if num_pages and other_pages else 0.0
+                        counter = counters[side_index][context_index]
+                        if side == "baseline":
+                            char_values = [RecallByChar.calculate_recall_by_char(counter, other) for other in other_counters]
+                        else:
+                            char_values = [PrecisionByRecall.calculate_precision_by_char(other, counter) for other in other_counters]
+                        char_value = sum(char_values) / len(char_values) if char_values else 0.0
+                        is_baseline = side == "baseline"
+                        columns["task_id"].append(task_id)
+                        columns["question_length"].append(question_length)
+                        columns["side"].append(side)
+                        columns["context_index"].append(context_index)
+                        columns["file_path"].append(context_dict["FILE_PATH"])
+                        columns["page"].append(min(context_dict["PAGE_NUMBER"], default=-1))
+                        columns["pages"].append(list(context_dict["PAGE_NUMBER"]))
+                        columns["num_pages"].append(num_pages)
+                        columns["text_length"].append(len(context_dict["TEXT"]))
+                        columns["score"].append(np.nan if is_baseline else context_dict.get("SCORE", np.nan))
+                        columns["hit"].append(overlap > 0)
+                        columns["weight"].append(1.0 / len(contexts))
+                        columns["recall_by_page_number"].append(page_value if is_baseline else np.nan)
+                        columns["recall_by_char"].append(char_value if is_baseline else np.nan)
+                        columns["precision_by_page_number"].append(np.nan if is_baseline else page_value)
+                        columns["precision_by_char"].append(np.nan if is_baseline else char_value)
+            count("drilldown_facts", len(columns["task_id"]))
+
+        facts = pd.DataFrame(columns)
+        facts["side"] = facts["side"].astype("category")
+        facts["file_path"] = facts["file_path"].astype("category")
+        facts["score"] = facts["score"].astype(float)
+        num_tasks = len(baseline_dataset_dict["TASKS"])
+        for metric in RECALL_METRICS:
+            loss = metric.replace("recall", "recall_loss")
+            facts[loss] = facts["weight"] * (1.0 - facts[metric]) / max(num_tasks, 1)
+        return cls(facts, num_tasks)
+
+    def task_metrics(self) -> pd.DataFrame:
+        """
+        Get the value of every metric per task from the fact table.
+
+        Returns:
+        pd.DataFrame: One row per task with at least one context, indexed by task id.
+        """
+        metrics = [*RECALL_METRICS, *PRECISION_METRICS]
+        weighted = self.facts[metrics].mul(self.facts["weight"], axis=0)
+        weighted["task_id"] = self.facts["task_id"]
+        return weighted.groupby("task_id", sort=False).sum(min_count=0)
+
+    def group_by(self, keys: Union[str, Sequence[str], pd.Series], facts: Optional[pd.DataFrame] = None) -> pd.DataFrame:
+        """
+        Aggregate the fact table by any key.
+
+        For each group: the number of tasks, of baseline and sample contexts, the hit rate of each side,
+        the mean metrics of the contexts, the mean score of the sample contexts and the recall loss,
+        i.e. how much the dataset mean would rise if the baseline contexts of the group were fully retrieved.
+
+        Parameters:
+        keys (Union[str, Sequence[str], pd.Series]): Columns of the fact table, or a series aligned with it.
+        facts (Optional[pd.DataFrame]): A derived fact table to aggregate instead, e.g. exploded by page.
+
+        Returns:
+        pd.DataFrame: One row per group.
+        """
+        facts = self.facts if facts is None else facts
+        is_baseline = (facts["side"] == "baseline").to_numpy()
+        frame = pd.DataFrame({
+            "task_id": facts["task_id"],
+            "baseline_contexts": is_baseline.astype(np.int64),
+            "sample_contexts": (~is_baseline).astype(np.int64),
+            "baseline_hits": (facts["hit"].to_numpy() & is_baseline).astype(np.int64),
+            "sample_hits": (facts["hit"].to_numpy() & ~is_baseline).astype(np.int64),
+            "score": facts["score"],
+            **{metric: facts[metric] for metric in (*RECALL_METRICS, *PRECISION_METRICS)},
+            **{metric.replace("recall", "recall_loss"): facts[metric.replace("recall", "recall_loss")] for metric in RECALL_METRICS},
+        }, index=facts.index)
+        if isinstance(keys, pd.Series):
+            group_keys: Any = keys
+        else:
+            keys = [keys] if isinstance(keys, str) else list(keys)
+            for key in keys:
+                frame[key] = facts[key]
+            group_keys = keys
+        grouped = frame.groupby(group_keys, observed=True, sort=True)
+        report = grouped.agg(
+            num_tasks=("task_id", "nunique"),
+            baseline_contexts=("baseline_contexts", "sum"),
+            sample_contexts=("sample_contexts", "sum"),
+            baseline_hits=("baseline_hits", "sum"),
+            sample_hits=("sample_hits", "sum"),
+            mean_score=("score", "mean"),
+            **{metric: (metric, "mean") for metric in (*RECALL_METRICS, *PRECISION_METRICS)},
+            **{loss: (loss, "sum") for loss in ("recall_loss_by_page_number", "recall_loss_by_char")},
+        )
+        with np.errstate(divide="ignore", invalid="ignore"):
+            report.insert(5, "baseline_hit_rate", report["baseline_hits"] / report["baseline_contexts"].where(report["baseline_contexts"] > 0))
+            report.insert(6, "sample_hit_rate", report["sample_hits"] / report["sample_contexts"].where(report["sample_contexts"] > 0))
+        return report.drop(columns=["baseline_hits", "sample_hits"])
+
+    def by_file(self) -> pd.DataFrame:
+        """
+        Aggregate the contexts by file.
+
+        Returns:
+        pd.DataFrame: One row per FILE_PATH.
+        """
+        return self.group_by("file_path")
+
+    def by_page(self) -> pd.DataFrame:
+        """
+        Aggregate the contexts by page, a context spanning several pages counting once for each of them.
+
+        Returns:
+        pd.DataFrame: One row per (FILE_PATH, page).
+        """
+        exploded = self.facts.explode("pages", ignore_index=True)
+        exploded = exploded[exploded["pages"].notna()]
+        exploded = exploded.assign(page=exploded["pages"].astype(np.int64))
+        return self.group_by(["file_path", "page"], facts=exploded)
+
+    def by_score(self, bins: Union[int, Sequence[float]] = 5) -> pd.DataFrame:
+        """
+        Aggregate the sample contexts by score bucket.
+
+        Parameters:
+        bins (Union[int, Sequence[float]]): The number of equal-frequency buckets, or explicit bucket edges.
+
+        Returns:
+        pd.DataFrame: One row per score bucket.
+        """
+        sample_facts = self.facts[self.facts["side"] == "sample"]
+        return self.group_by(self._bucket(sample_facts["score"], bins, "score_bucket"), facts=sample_facts)
+
+    def by_question_length(self, bins: Union[int, Sequence[float]] = (0, 5, 10, 15, 20, 30, np.inf)) -> pd.DataFrame:
+        """
+        Aggregate the contexts by question length, in words.
+
+        Parameters:
+        bins (Union[int, Sequence[float]]): The number of equal-frequency buckets, or explicit bucket edges.
+
+        Returns:
+        pd.DataFrame: One row per question length bucket.
+        """
+        return self.group_by(self._bucket(self.facts["question_length"], bins, "question_length_bucket"))
+
+    def view(self, name: str, **kwargs: Any) -> pd.DataFrame:
+        """
+        Get a drill-down view by name.
+
+        Parameters:
+        name (str): One of DRILLDOWN_VIEWS.
+        kwargs (Any): Options of the view, e.g. bins.
+
+        Returns:
+        pd.DataFrame: The view.
+
+        Raises:
+        ValueError: If the view is unknown.
+        """
+        if name not in DRILLDOWN_VIEWS:
+            raise ValueError(f"Invalid view {name!r}! Supported views: {', '.join(DRILLDOWN_VIEWS)}.")
+        return getattr(self, f"by_{name}")(**kwargs)
+
+    @staticmethod
+    def _bucket(values: pd.Series, bins: Union[int, Sequence[float]], name: str) -> pd.Series:
+        """
+        Bucket numeric values.
+
+        Parameters:
+        values (pd.Series): The values.
+        bins (Union[int, Sequence[float]]): The number of equal-frequency buckets, or explicit bucket edges.
+        name (str): The name of the bucket series.
+
+        Returns:
+        pd.Series: The bucket of every value, NaN for NaN values.
+        """
+        if isinstance(bins, int):
+            buckets = pd.qcut(values, q=bins, duplicates="drop")
+        else:
+            buckets = pd.cut(values, bins=list(bins), include_lowest=True)
+        return buckets.rename(name)
+
+    @staticmethod
+    def to_rows(frame: pd.DataFrame) -> List[Dict[str, Any]]:
+        """
+        Convert a view or the fact table to JSON-friendly rows, e.g. for `export_rows`.
+
+        Parameters:
+        frame (pd.DataFrame): The view or fact table.
+
+        Returns:
+        List[Dict[str, Any]]: One dictionary per row, with group keys as columns, buckets as strings and NaN as None.
+        """
+        frame = frame.reset_index() if not isinstance(frame.index, pd.RangeIndex) else frame
+        frame = frame.astype({
+            column: str for column in frame.columns if isinstance(frame[column].dtype, pd.CategoricalDtype)
+            and isinstance(frame[column].cat.categories, pd.IntervalIndex)
+        })
+        frame = frame.astype(object).where(frame.notna(), None)
+        return [
+            {key: value.item() if isinstance(value, np.generic) else value for key, value in row.items()}
+            for row in frame.to_dict("records")
+        ]
+
+    def export(self, name: str, file_path: str, format: str = "json", **kwargs: Any) -> str:
+        """
+        Export a drill-down view, or the fact table if name is "facts".
+
+        Parameters:
+        name (str): One of DRILLDOWN_VIEWS, or "facts".
+        file_path (str): The output file path.
+        format (str): One of EXPORT_FORMATS.
+        kwargs (Any): Options of the view, e.g. bins.
+
+        Returns:
+        str: The path of the written file.
+        """
+        from ..exporter.exporter import export_rows
+
+        frame = self.facts if name == "facts" else self.view(name, **kwargs)
+        return export_rows(self.to_rows(frame), file_path, format=format)
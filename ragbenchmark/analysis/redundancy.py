@@ -0,0 +1,430 @@
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from ..metrics.metrics_by_char.utils import count_chars
+from ..metrics.metrics_by_char.calc_precision_by_char import PrecisionByRecall
+from ..metrics.metrics_by_page_number.calc_precision_by_page_number import PrecisionByPageNumber
+
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+_SHINGLE_BASE = 1_000_003
+
+
+class MinHasher:
+    """
+    A class used to build MinHash signatures of texts over character shingles.
+
+    Every text is turned into the set of hashes of its character k-shingles, and each of the
+    `num_perm` universal hash functions (a * x + b) mod p keeps the minimum over that set.
+    All hashing is done with NumPy on whole arrays of shingles, without per-shingle Python loops.
+
+    Attributes:
+    _num_perm (int): Number of hash permutations, i.e. the length of a signature.
+    _shingle_size (int): Number of characters in each shingle.
+    _a (np.ndarray): Multipliers of the permutations.
+    _b (np.ndarray): Offsets of the permutations.
+    _powers (np.ndarray): Polynomial weights used to hash a shingle window.
+    """
+
+    def __init__(self, num_perm: int = 128, shingle_size: int = 5, seed: int = 1) -> None:
+        """
+        Initialize the MinHasher with random permutations.
+
+        Parameters:
+        num_perm (int): Number of hash permutations.
+        shingle_size (int): Number of characters in each shingle.
+        seed (int): Seed of the random permutations, so that signatures are reproducible.
+        """
+        if num_perm <= 0 or shingle_size <= 0:
+            raise ValueError("num_perm and shingle_size must be positive!")
+        self._num_perm = num_perm
+        self._shingle_size = shingle_size
+        rng = np.random.default_rng(seed)
+        # a < 2^31 and x < 2^32 keep a * x + b below 2^64, so uint64 arithmetic never wraps.
+        self._a = rng.integers(1, 1 << 31, size=num_perm, dtype=np.uint64)
+        self._b = rng.integers(0, 1 << 32, size=num_perm, dtype=np.uint64)
+        powers = []
+        power = 1
+        for _ in range(shingle_size):
+            powers.append(power)
+            power = (power * _SHINGLE_BASE) & 0xFFFFFFFFFFFFFFFF
+        self._powers = np.array(powers[::-1], dtype=np.uint64)
+
+    @property
+    def num_perm(self) -> int:
+        """
+        Get the number of hash permutations.
+
+        Returns:
+        int: The length of a signature.
+        """
+        return self._num_perm
+
+    def shingle(self, text: str) -> np.ndarray:
+        """
+        Hash the character shingles of a text.
+
+        Parameters:
+        text (str): The text to shingle.
+
+        Returns:
+        np.ndarray: Sorted unique 32-bit shingle hashes (uint64). Texts shorter than the shingle
+                    size form a single shingle, and an empty text has no shingles.
+        """
+        codes = np.frombuffer(text.encode("utf-32-le"), dtype=np.uint32).astype(np.uint64)
+        if codes.size == 0:
+            return codes
+        if codes.size < self._shingle_size:
+            windows = codes[np.newaxis, :]
+            weights = self._powers[-codes.size:]
+        else:
+            windows = sliding_window_view(codes, self._shingle_size)
+            weights = self._powers
+        hashes = (windows * weights).sum(axis=1, dtype=np.uint64)
+        hashes = (hashes ^ (hashes >> np.uint64(32))) & _MAX_HASH
+        return np.unique(hashes)
+
+    def signature(self, text: str) -> np.ndarray:
+        """
+        Build the MinHash signature of a text.
+
+        Parameters:
+        text (str): The text to sign.
+
+        Returns:
+        np.ndarray: A signature of length `num_perm` (uint64). An empty text gets the maximal
+                    signature, which never collides with a non-empty text.
+        """
+        shingles = self.shingle(text)
+        if shingles.size == 0:
+            return np.full(self._num_perm, _MAX_HASH, dtype=np.uint64)
+        permuted = (np.outer(self._a, shingles) + self._b[:, np.newaxis]) % _MERSENNE_PRIME
+        return (permuted & _MAX_HASH).min(axis=1)
+
+    def signatures(self, texts: Iterable[str]) -> np.ndarray:
+        """
+        Build the MinHash signatures of several texts, signing every distinct text only once.
+
+        Parameters:
+        texts (Iterable[str]): The texts to sign.
+
+        Returns:
+        np.ndarray: A matrix of shape (number of texts, num_perm) with one signature per row.
+        """
+        texts = list(texts)
+        cache: Dict[str, np.ndarray] = {}
+        matrix = np.empty((len(texts), self._num_perm), dtype=np.uint64)
+        for row, text in enumerate(texts):
+            if text not in cache:
+                cache[text] = self.signature(text)
+            matrix[row] = cache[text]
+        return matrix
+
+
+class MinHashLSH:
+    """
+    A class used to find near-duplicate signatures with locality-sensitive hashing (LSH) banding.
+
+    Signatures are cut into `bands` bands of `rows` values. Two signatures become a candidate pair
+    when they agree on every value of at least one band, and candidates are then verified by their
+    estimated Jaccard similarity. Only pairs sharing a bucket are compared, so the search is
+    sub-quadratic for realistic data.
+
+    Attributes:
+    _bands (int): Number of bands.
+    _rows (int): Number of signature values per band.
+    """
+
+    def __init__(self, num_perm: int = 128, bands: int = 16) -> None:
+        """
+        Initialize the MinHashLSH.
+
+        Parameters:
+        num_perm (int): Length of the signatures to index.
+        bands (int): Number of bands, must divide `num_perm`.
+        """
+        if bands <= 0 or num_perm % bands != 0:
+            raise ValueError("Invalid number of bands! bands must divide num_perm.")
+        self._bands = bands
+        self._rows = num_perm // bands
+
+    def candidate_pairs(self, signatures: np.ndarray) -> Set[Tuple[int, int]]:
+        """
+        Find all pairs of signatures sharing at least one band bucket.
+
+        Parameters:
+        signatures (np.ndarray): A matrix of signatures, one per row.
+
+        Returns:
+        Set[Tuple[int, int]]: Pairs of row indices (i, j) with i < j.
+        """
+        pairs: Set[Tuple[int, int]] = set()
+        if signatures.shape[0] < 2:
+            return pairs
+        for band in range(self._bands):
+            band_values = np.ascontiguousarray(signatures[:, band * self._rows:(band + 1) * self._rows])
+            _, buckets = np.unique(band_values, axis=0, return_inverse=True)
+            buckets = buckets.reshape(-1)
+            order = np.argsort(buckets, kind="stable")
+            sorted_buckets = buckets[order]
+            bounds = np.flatnonzero(np.diff(sorted_buckets)) + 1
+            for members in np.split(order, bounds):
+                if members.size < 2:
+                    continue
+                members = members.tolist()
+                for i, left in enumerate(members):
+                    for right in members[i + 1:]:
+                        pairs.add((left, right))
+        return pairs
+
+    def near_duplicate_pairs(self, signatures: np.ndarray, threshold: float) -> List[Tuple[int, int, float]]:
+        """
+        Find all verified near-duplicate pairs of signatures.
+
+        Parameters:
+        signatures (np.ndarray): A matrix of signatures, one per row.
+        threshold (float): Minimal estimated Jaccard similarity of a near-duplicate pair.
+
+        Returns:
+        List[Tuple[int, int, float]]: Sorted (i, j, similarity) triples with i < j.
+        """
+        candidates = sorted(self.candidate_pairs(signatures))
+        if not candidates:
+            return []
+        index = np.array(candidates, dtype=np.int64)
+        similarities = (signatures[index[:, 0]] == signatures[index[:, 1]]).mean(axis=1)
+        keep = similarities >= threshold
+        return [(int(i), int(j), float(s)) for (i, j), s in zip(index[keep], similarities[keep])]
+
+
+def _cluster(num_items: int, pairs: Iterable[Tuple[int, int, float]]) -> List[int]:
+    """
+    Group items connected by pairs with a union-find.
+
+    Parameters:
+    num_items (int): Number of items.
+    pairs (Iterable[Tuple[int, int, float]]): Pairs of connected items.
+
+    Returns:
+    List[int]: The root of each item's cluster.
+    """
+    parents = list(range(num_items))
+
+    def find(item: int) -> int:
+        while parents[item] != item:
+            parents[item] = parents[parents[item]]
+            item = parents[item]
+        return item
+
+    for left, right, _ in pairs:
+        left_root, right_root = find(left), find(right)
+        if left_root != right_root:
+            parents[max(left_root, right_root)] = min(left_root, right_root)
+    return [find(item) for item in range(num_items)]
+
+
+class RedundancyAnalyzer:
+    """
+    A class used to detect near-duplicate retrieved contexts and report redundancy-aware precision.
+
+    Near duplicates are found with MinHash signatures and LSH banding, both within each task and
+    across a whole dataset. Duplicates of a context are grouped into a cluster whose representative
+    is its highest-scored member. Dedup-adjusted precision only credits the representatives, but
+    still divides by the number of retrieved contexts, so duplicates occupy retrieval slots without
+    adding to precision.
+
+    Attributes:
+    _threshold (float): Minimal estimated Jaccard similarity of near duplicates.
+    _minhasher (MinHasher): Signature builder.
+    _lsh (MinHashLSH): Candidate pair finder.
+    """
+
+    def __init__(
+        self,
+        threshold: float = 0.8,
+        num_perm: int = 128,
+        bands: int = 16,
+        shingle_size: int = 5,
+        seed: int = 1
+    ) -> None:
+        """
+        Initialize the RedundancyAnalyzer.
+
+        Parameters:
+        threshold (float): Minimal estimated Jaccard similarity of near duplicates.
+        num_perm (int): Length of the MinHash signatures.
+        bands (int): Number of LSH bands, must divide `num_perm`.
+        shingle_size (int): Number of characters in each shingle.
+        seed (int): Seed of the MinHash permutations.
+        """
+        self._threshold = threshold
+        self._minhasher = MinHasher(num_perm=num_perm, shingle_size=shingle_size, seed=seed)
+        self._lsh = MinHashLSH(num_perm=num_perm, bands=bands)
+
+    def analyze_task(self, task: Any, task_id: Optional[Any] = None) -> Dict[str, Any]:
+        """
+        Analyze the redundancy of the sample contexts of one task.
+
+        Parameters:
+        task (BaseTask): The task to analyze.
+        task_id (Optional[Any]): Identifier reported for the task, defaults to `task.task_id`.
+
+        Returns:
+        Dict[str, Any]: The redundancy report of the task.
+        """
+        signatures = self._minhasher.signatures(context.text for context in task.sample_contexts)
+        return self._analyze_task(task, task_id, signatures)
+
+    def analyze_dataset(self, tasks: Iterable[Any]) -> Dict[str, Any]:
+        """
+        Analyze the redundancy of the sample contexts of all tasks, within and across tasks.
+
+        Parameters:
+        tasks (Iterable[BaseTask]): The tasks of a dataset, e.g. `dataset.tasks`.
+
+        Returns:
+        Dict[str, Any]: The dataset-level report with per-task reports under "tasks" and
+                        near duplicates shared between different tasks under "cross_task_duplicate_pairs".
+        """
+        task_reports = []
+        signature_blocks = []
+        owners: List[Tuple[Any, int]] = []
+        for index, task in enumerate(tasks):
+            task_id = getattr(task, "task_id", index)
+            signatures = self._minhasher.signatures(context.text for context in task.sample_contexts)
+            task_reports.append(self._analyze_task(task, task_id, signatures))
+            signature_blocks.append(signatures)
+            owners.extend((task_id, context_index) for context_index in range(signatures.shape[0]))
+
+        if signature_blocks:
+            all_signatures = np.concatenate(signature_blocks, axis=0)
+        else:
+            all_signatures = np.empty((0, self._minhasher.num_perm), dtype=np.uint64)
+        cross_pairs = [
+            (owners[left], owners[right], similarity)
+            for left, right, similarity in self._lsh.near_duplicate_pairs(all_signatures, self._threshold)
+            if owners[left][0] != owners[right][0]
+        ]
+        cross_redundant = {owner for pair in cross_pairs for owner in pair[:2]}
+
+        num_contexts = len(owners)
+        num_redundant = sum(report["num_contexts"] - report["num_unique_contexts"] for report in task_reports)
+        return {
+            "num_tasks": len(task_reports),
+            "num_contexts": num_contexts,
+            "redundancy_rate": num_redundant / num_contexts if num_contexts else 0.0,
+            "cross_task_redundancy_rate": len(cross_redundant) / num_contexts if num_contexts else 0.0,
+            "precision_by_page_number": self._mean(task_reports, "precision_by_page_number"),
+            "dedup_precision_by_page_number": self._mean(task_reports, "dedup_precision_by_page_number"),
+            "precision_by_char": self._mean(task_reports, "precision_by_char"),
+            "dedup_precision_by_char": self._mean(task_reports, "dedup_precision_by_char"),
+            "cross_task_duplicate_pairs": cross_pairs,
+            "tasks": task_reports,
+        }
+
+    def _analyze_task(self, task: Any, task_id: Optional[Any], signatures: np.ndarray) -> Dict[str, Any]:
+        """
+        Analyze the redundancy of one task from the signatures of its sample contexts.
+
+        Parameters:
+        task (BaseTask): The task to analyze.
+        task_id (Optional[Any]): Identifier reported for the task.
+        signatures (np.ndarray): Signatures of the task's sample contexts.
+
+        Returns:
+        Dict[str, Any]: The redundancy report of the task.
+        """
+        if task_id is None:
+            task_id = getattr(task, "task_id", None)
+        sample_contexts = task.sample_contexts
+        num_contexts = len(sample_contexts)
+        pairs = self._lsh.near_duplicate_pairs(signatures, self._threshold)
+
+        roots = _cluster(num_contexts, pairs)
+        representatives: Dict[int, int] = {}
+        for index, root in enumerate(roots):
+            best = representatives.get(root)
+            if best is None or getattr(sample_contexts[index], "score", 0.0) > getattr(sample_contexts[best], "score", 0.0):
+                representatives[root] = index
+        kept = sorted(representatives.values())
+
+        page_precisions = self._page_number_precisions(task)
+        char_precisions = self._char_precisions(task)
+        report = {
+            "task_id": task_id,
+            "num_contexts": num_contexts,
+            "num_unique_contexts": len(kept),
+            "redundancy_rate": (num_contexts - len(kept)) / num_contexts if num_contexts else 0.0,
+            "duplicate_pairs": pairs,
+            "unique_context_indices": kept,
+            "precision_by_page_number": None,
+            "dedup_precision_by_page_number": None,
+            "precision_by_char": 0.0,
+            "dedup_precision_by_char": 0.0,
+        }
+        if page_precisions is not None and num_contexts:
+            report["precision_by_page_number"] = sum(page_precisions) / num_contexts
+            report["dedup_precision_by_page_number"] = sum(page_precisions[index] for index in kept) / num_contexts
+        if num_contexts:
+            report["precision_by_char"] = sum(char_precisions) / num_contexts
+            report["dedup_precision_by_char"] = sum(char_precisions[index] for index in kept) / num_contexts
+        return report
+
+    @staticmethod
+    def _page_number_precisions(task: Any) -> Optional[List[float]]:
+        """
+        Calculate the precision by page number of each sample context of a task.
+
+        Parameters:
+        task (BaseTask): The task to evaluate.
+
+        Returns:
+        Optional[List[float]]: One precision per sample context, or None if the task has no page numbers.
+        """
+        baseline_page_number_list = [context.page_number for context in task.baseline_contexts if hasattr(context, "page_number")]
+        sample_page_number_list = [context.page_number for context in task.sample_contexts if hasattr(context, "page_number")]
+        if not baseline_page_number_list or len(sample_page_number_list) != len(task.sample_contexts):
+            return None
+        return [
+            PrecisionByPageNumber.calculate_precision_by_page_number(baseline_page_number_list, [sample_page_number])
+            for sample_page_number in sample_page_number_list
+        ]
+
+    @staticmethod
+    def _char_precisions(task: Any) -> List[float]:
+        """
+        Calculate the precision by char of each sample context of a task, averaged over baseline contexts.
+
+        Parameters:
+        task (BaseTask): The task to evaluate.
+
+        Returns:
+        List[float]: One precision per sample context.
+        """
+        baseline_char_counts = [count_chars(context.text) for context in task.baseline_contexts]
+        precisions = []
+        for context in task.sample_contexts:
+            sample_char_count = count_chars(context.text)
+            values = [
+                PrecisionByRecall.calculate_precision_by_char(baseline_char_count, sample_char_count)
+                for baseline_char_count in baseline_char_counts
+            ]
+            precisions.append(sum(values) / len(values) if values else 0.0)
+        return precisions
+
+    @staticmethod
+    def _mean(task_reports: List[Dict[str, Any]], key: str) -> Optional[float]:
+        """
+        Average a value over the task reports that provide it.
+
+        Parameters:
+        task_reports (List[Dict[str, Any]]): The task reports.
+        key (str): The key of the value to average.
+
+        Returns:
+        Optional[float]: The mean value, or None if no task report provides it.
+        """
+        values = [report[key] for report in task_reports if report[key] is not None]
+        return sum(values) / len(values) if values else None
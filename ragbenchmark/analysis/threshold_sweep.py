@@ -0,0 +1,262 @@
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from ..metrics.metrics_by_char.utils import count_chars
+from ..metrics.metrics_by_char.calc_recall_by_char import RecallByChar
+from ..metrics.metrics_by_char.calc_precision_by_char import PrecisionByRecall
+from ..preprocessing.text_normalizer import TextNormalizer
+from ..profiling.profiler import stage, count
+
+SWEEP_METRICS = ("recall_by_page_number", "precision_by_page_number", "recall_by_char", "precision_by_char")
+F1_METRICS = {
+    "f1_by_page_number": ("precision_by_page_number", "recall_by_page_number"),
+    "f1_by_char": ("precision_by_char", "recall_by_char"),
+}
+
+
+def _prefix_values(
+    baseline_pages: List[List[int]],
+    sample_pages: List[List[int]],
+    baseline_counters: List[Dict[str, int]],
+    sample_counters: List[Dict[str, int]]
+) -> np.ndarray:
+    """
+    Compute the metrics of a task for every number of included sample contexts.
+
+    Sample contexts must be given by decreasing score. Precisions are means of independent per-context
+    values and char recall a mean over (baseline, sample) pairs, so both are cumulative sums, while the
+    page recall of a baseline context is its best overlap so far, a cumulative maximum.
+
+    Parameters:
+    baseline_pages (List[List[int]]): The page numbers of every baseline context.
+    sample_pages (List[List[int]]): The page numbers of every sample context, by decreasing score.
+    baseline_counters (List[Dict[str, int]]): The character counts of every baseline context.
+    sample_counters (List[Dict[str, int]]): The character counts of every sample context, by decreasing score.
+
+    Returns:
+    np.ndarray: A (len(SWEEP_METRICS), num_samples + 1) array, column k holding the metrics of the top-k contexts.
+    """
+    num_baseline, num_samples = len(baseline_pages), len(sample_pages)
+    values = np.zeros((len(SWEEP_METRICS), num_samples + 1))
+    if num_baseline == 0 or num_samples == 0:
+        return values
+    baseline_sets = [set(pages) for pages in baseline_pages]
+    sample_sets = [set(pages) for pages in sample_pages]
+    overlaps = np.array([[len(b & s) for s in sample_sets] for b in baseline_sets], dtype=float)
+    baseline_sizes = np.array([len(pages) for pages in baseline_pages], dtype=float)[:, np.newaxis]
+    sample_sizes = np.array([len(pages) for pages in sample_pages], dtype=float)
+    char_recalls = np.array([
+        [RecallByChar.calculate_recall_by_char(b, s) for s in sample_counters] for b in baseline_counters
+    ])
+    char_precisions = np.array([
+        [PrecisionByRecall.calculate_precision_by_char(b, s) for s in sample_counters] for b in baseline_counters
+    ])
+
+    k = np.arange(1, num_samples + 1, dtype=float)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        page_recalls = np.nan_to_num(overlaps / baseline_sizes)
+        page_precisions = np.nan_to_num(overlaps.max(axis=0) / sample_sizes)
+    values[0, 1:] = np.maximum.accumulate(page_recalls, axis=1).mean(axis=0)
+    values[1, 1:] = np.cumsum(page_precisions) / k
+    values[2, 1:] = np.cumsum(char_recalls.sum(axis=0)) / (num_baseline * k)
+    values[3, 1:] = np.cumsum(char_precisions.mean(axis=0)) / k
+    return values
+
+
+class ThresholdSweep:
+    """
+    A class used to choose a retrieval score cutoff, by evaluating every possible threshold at once.
+
+    A threshold keeps the sample contexts scored at or above it. The contexts of every task are sorted
+    by score once, and the metrics of each of its top-k prefixes are computed with cumulative sums and
+    maxima. The dataset mean then only changes where a task gains a context, so all the thresholds are
+    swept with one cumulative sum over the score-sorted contexts of the whole dataset, instead of
+    re-evaluating the dataset once per threshold.
+
+    Scores are also checked for calibration, reading a score as the probability that the context
+    shares a page with a baseline context.
+
+    Attributes:
+    num_tasks (int): The number of baseline tasks, the denominator of the dataset means.
+    scores (np.ndarray): The score of every sample context.
+    relevant (np.ndarray): Whether every sample context shares a page with a baseline context.
+
+    Example:
+    >>> sweep = ThresholdSweep(baseline_dataset_dict, sample_dataset_dict)
+    >>> sweep.best_thresholds()["f1_by_char"]
+    {'threshold': 0.42, 'value': 0.81, 'mean_contexts': 3.2}
+    """
+
+    def __init__(
+        self,
+        baseline_dataset_dict: Dict[str, Any],
+        sample_dataset_dict: Dict[str, Any],
+        normalizer: Optional[TextNormalizer] = None
+    ) -> None:
+        """
+        Initialize the ThresholdSweep and compute the prefix metrics of every task.
+
+        Parameters:
+        baseline_dataset_dict (Dict[str, Any]): The baseline dataset dictionary.
+        sample_dataset_dict (Dict[str, Any]): The sample dataset dictionary, whose contexts carry a SCORE.
+        normalizer (Optional[TextNormalizer]): Normalizes texts before the char metrics compare them.
+        """
+        char_counts: Dict[str, Dict[str, int]] = {}
+
+        def count_text(text: str) -> Dict[str, int]:
+            counter = char_counts.get(text)
+            if counter is None:
+                counter = char_counts[text] = count_chars(normalizer.normalize(text) if normalizer is not None else text)
+            return counter
+
+        event_scores = []
+        event_deltas = []
+        relevant = []
+        sample_tasks = sample_dataset_dict["TASKS"]
+        with stage("sweep.prefix"):
+            for task_id, baseline_task_dict in baseline_dataset_dict["TASKS"].items():
+                sample_contexts = (sample_tasks.get(task_id) or {"CONTEXTS": []})["CONTEXTS"]
+                if not sample_contexts:
+                    continue
+                scores = np.array([context_dict["SCORE"] for context_dict in sample_contexts], dtype=float)
+                order = np.argsort(-scores, kind="stable")
+                ranked = [sample_contexts[index] for index in order]
+                baseline_contexts = baseline_task_dict["CONTEXTS"]
+                values = _prefix_values(
+                    [context_dict["PAGE_NUMBER"] for context_dict in baseline_contexts],
+                    [context_dict["PAGE_NUMBER"] for context_dict in ranked],
+                    [count_text(context_dict["TEXT"]) for context_dict in baseline_contexts],
+                    [count_text(context_dict["TEXT"]) for context_dict in ranked],
+                )
+                event_scores.append(scores[order])
+                event_deltas.append(np.diff(values, axis=1))
+                baseline_pages = set(page for context_dict in baseline_contexts for page in context_dict["PAGE_NUMBER"])
+                relevant.extend(not baseline_pages.isdisjoint(context_dict["PAGE_NUMBER"]) for context_dict in ranked)
+                count("sweep_contexts", len(sample_contexts))
+
+        self.num_tasks = len(baseline_dataset_dict["TASKS"])
+        self.scores = np.concatenate(event_scores) if event_scores else np.empty(0)
+        self.relevant = np.array(relevant, dtype=bool)
+        self._deltas = np.concatenate(event_deltas, axis=1) if event_deltas else np.empty((len(SWEEP_METRICS), 0))
+        self._curve: Optional[pd.DataFrame] = None
+
+    def curve(self) -> pd.DataFrame:
+        """
+        Get the dataset metrics at every threshold.
+
+        Thresholds are the distinct context scores, by decreasing value, after a first row at +inf that
+        keeps no context. F1 scores are the harmonic means of the dataset mean precision and recall.
+
+        Returns:
+        pd.DataFrame: One row per threshold with the threshold, the mean number of kept contexts per
+                      task, the mean of every metric and the F1 scores.
+        """
+        if self._curve is not None:
+            return self._curve
+        with stage("sweep.curve"):
+            order = np.argsort(-self.scores, kind="stable")
+            scores = self.scores[order]
+            sums = np.cumsum(self._deltas[:, order], axis=1)
+            # the last event of every distinct score holds the sums at that threshold
+            last = np.flatnonzero(np.r_[scores[1:] != scores[:-1], True]) if scores.size else np.empty(0, dtype=int)
+            num_tasks = max(self.num_tasks, 1)
+            columns = {
+                "threshold": np.r_[np.inf, scores[last]],
+                "mean_contexts": np.r_[0.0, (last + 1) / num_tasks],
+            }
+            for index, metric in enumerate(SWEEP_METRICS):
+                columns[metric] = np.r_[0.0, sums[index, last] / num_tasks]
+            curve = pd.DataFrame(columns)
+            for f1, (precision, recall) in F1_METRICS.items():
+                denominator = curve[precision] + curve[recall]
+                curve[f1] = np.where(denominator > 0, 2 * curve[precision] * curve[recall] / denominator.where(denominator > 0, 1.0), 0.0)
+        self._curve = curve
+        return curve
+
+    def pr_curve(self, by: str = "char") -> pd.DataFrame:
+        """
+        Get the precision-recall curve of one metric family.
+
+        Parameters:
+        by (str): "char" or "page_number".
+
+        Returns:
+        pd.DataFrame: The threshold, precision, recall and F1 at every threshold.
+
+        Raises:
+        ValueError: If the metric family is unknown.
+        """
+        if by not in ("char", "page_number"):
+            raise ValueError(f"Invalid metric family {by!r}! Expected 'char' or 'page_number'.")
+        curve = self.curve()
+        return pd.DataFrame({
+            "threshold": curve["threshold"],
+            "precision": curve[f"precision_by_{by}"],
+            "recall": curve[f"recall_by_{by}"],
+            "f1": curve[f"f1_by_{by}"],
+        })
+
+    def best_thresholds(self) -> Dict[str, Dict[str, float]]:
+        """
+        Get the threshold maximizing every metric over the whole dataset. Ties are broken by the highest
+        threshold, i.e. the fewest kept contexts, so the best recall is the tightest cutoff reaching it.
+
+        Returns:
+        Dict[str, Dict[str, float]]: For every metric and F1 score, the threshold, the value and the
+                                     mean number of kept contexts per task.
+        """
+        curve = self.curve()
+        best = {}
+        for metric in (*SWEEP_METRICS, *F1_METRICS):
+            index = int(np.argmax(curve[metric].to_numpy()))
+            best[metric] = {
+                "threshold": float(curve["threshold"].iloc[index]),
+                "value": float(curve[metric].iloc[index]),
+                "mean_contexts": float(curve["mean_contexts"].iloc[index]),
+            }
+        return best
+
+    def calibration(self, num_bins: int = 10) -> Tuple[pd.DataFrame, Dict[str, float]]:
+        """
+        Compute the reliability diagram of the scores over equal-width bins of [0, 1].
+
+        Scores outside [0, 1] are min-max scaled first, since only probabilities can be calibrated.
+
+        Parameters:
+        num_bins (int): The number of bins.
+
+        Returns:
+        Tuple[pd.DataFrame, Dict[str, float]]: The diagram, one row per bin with its bounds, number of
+            contexts, mean score and fraction of relevant contexts, and the summary with the expected
+            (ECE) and maximal (MCE) calibration errors and the Brier score.
+        """
+        scores = self.scores
+        if scores.size and (scores.min() < 0.0 or scores.max() > 1.0):
+            span = scores.max() - scores.min()
+            scores = (scores - scores.min()) / span if span > 0 else np.full_like(scores, 0.5)
+        bins = np.minimum((scores * num_bins).astype(int), num_bins - 1)
+        counts = np.bincount(bins, minlength=num_bins)
+        score_sums = np.bincount(bins, weights=scores, minlength=num_bins)
+        relevant_sums = np.bincount(bins, weights=self.relevant.astype(float), minlength=num_bins)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            mean_scores = score_sums / counts
+            fractions = relevant_sums / counts
+        gaps = np.abs(fractions - mean_scores)
+        filled = counts > 0
+        diagram = pd.DataFrame({
+            "bin_start": np.arange(num_bins) / num_bins,
+            "bin_end": np.arange(1, num_bins + 1) / num_bins,
+            "count": counts,
+            "mean_score": mean_scores,
+            "fraction_relevant": fractions,
+        })
+        total = max(int(counts.sum()), 1)
+        summary = {
+            "num_contexts": int(counts.sum()),
+            "ece": float((counts[filled] * gaps[filled]).sum() / total),
+            "mce": float(gaps[filled].max()) if filled.any() else 0.0,
+            "brier": float(np.mean((scores - self.relevant) ** 2)) if scores.size else 0.0,
+        }
+        return diagram, summary
@@ -0,0 +1,8 @@
+from .._lazy import lazy_attributes
+
+__getattr__, __dir__ = lazy_attributes(__name__, {
+    "BaseChatModel": ".base_chat_model",
+    "ChatResponse": ".base_chat_model",
+    "GPTChatModel": ".gpt_chat_model",
+    "StubChatModel": ".stub_chat_model",
+})
@@ -1,5 +1,136 @@
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List, Optional, Union
 
+Messages = List[Dict[str, str]]
 
-class BaseChatModel:
-    def __init__(self):
-        pass
\ No newline at end of file
+
+def estimate_tokens(text: str) -> int:
+    """
+    Estimate the number of tokens of a text when a backend does not report usage, at about 4 characters per token.
+
+    Parameters:
+    text (str): The text.
+
+    Returns:
+    int: The estimated number of tokens.
+    """
+    return (len(text) + 3) // 4
+
+
+class ChatResponse:
+    """
+    The response of a chat model to one conversation.
+
+    Attributes:
+    text (str): The generated message.
+    prompt_tokens (int): Number of tokens of the prompt.
+    completion_tokens (int): Number of tokens of the generated message.
+    model (str): The model that generated the message.
+    cached (bool): Whether the response was served from a response cache.
+    """
+
+    def __init__(self, text: str, prompt_tokens: int, completion_tokens: int, model: str, cached: bool = False) -> None:
+        """
+        Initialize the ChatResponse.
+
+        Parameters:
+        text (str): The generated message.
+        prompt_tokens (int): Number of tokens of the prompt.
+        completion_tokens (int): Number of tokens of the generated message.
+        model (str): The model that generated the message.
+        cached (bool): Whether the response was served from a response cache.
+        """
+        self.text = text
+        self.prompt_tokens = prompt_tokens
+        self.completion_tokens = completion_tokens
+        self.model = model
+        self.cached = cached
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Serialize the response.
+
+        Returns:
+        Dict[str, Any]: The text, token counts and model.
+        """
+        return {
+            "text": self.text,
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "model": self.model,
+        }
+
+    @classmethod
+    def from_dict(cls, response_dict: Dict[str, Any], cached: bool = False) -> "ChatResponse":
+        """
+        Deserialize a response written by `to_dict`.
+
+        Parameters:
+        response_dict (Dict[str, Any]): The serialized response.
+        cached (bool): Whether the response is served from a cache.
+
+        Returns:
+        ChatResponse: The response.
+        """
+        return cls(
+            response_dict["text"], response_dict["prompt_tokens"], response_dict["completion_tokens"],
+            response_dict["model"], cached=cached
+        )
+
+
+class BaseChatModel(ABC):
+    """
+    Abstract base class for chat model backends.
+
+    A backend answers conversations given as OpenAI-style messages, i.e. dictionaries with a role and
+    a content. Backends must be safe to call from several threads at once.
+
+    Attributes:
+    model (str): The name of the model, part of the response cache key.
+    """
+
+    model: str = ""
+
+    @abstractmethod
+    def chat(self, messages: Messages, **params: Any) -> ChatResponse:
+        """
+        Answer one conversation.
+
+        Parameters:
+        messages (Messages): The conversation.
+        params (Any): Generation parameters such as temperature or max_tokens.
+
+        Returns:
+        ChatResponse: The response.
+        """
+        pass
+
+    def chat_batch(self, batch: List[Messages], **params: Any) -> List[Union[ChatResponse, Exception]]:
+        """
+        Answer several conversations. Backends with a batch endpoint should override this method,
+        by default the conversations are answered one after the other. A conversation that fails gets
+        its exception in place of its response, so that it does not lose the responses of the others.
+
+        Parameters:
+        batch (List[Messages]): The conversations.
+        params (Any): Generation parameters such as temperature or max_tokens.
+
+        Returns:
+        List[Union[ChatResponse, Exception]]: One response or exception per conversation, in order.
+        """
+        results: List[Union[ChatResponse, Exception]] = []
+        for messages in batch:
+            try:
+                results.append(self.chat(messages, **params))
+            except Exception as e:
+                results.append(e)
+        return results
+
+    def default_params(self) -> Optional[Dict[str, Any]]:
+        """
+        Get the generation parameters applied when none are given, part of the response cache key.
+
+        Returns:
+        Optional[Dict[str, Any]]: The parameters.
+        """
+        return {}
@@ -1,5 +1,127 @@
-from .base_chat_model import ChatModelBase
+import os
+import json
+import time
+import urllib.error
+import urllib.request
+from typing import Any, Dict, Optional
 
-class GPTChatModel(ChatModelBase):
-    def __init__(self):
-        pass
\ No newline at end of file
+from .base_chat_model import BaseChatModel, ChatResponse, Messages, estimate_tokens
+
+RETRY_STATUS_CODES = (408, 409, 429, 500, 502, 503, 504)
+
+
+class GPTChatModel(BaseChatModel):
+    """
+    A chat model served by an OpenAI-compatible `/chat/completions` endpoint, such as the OpenAI API,
+    vLLM, llama.cpp or a local mock server.
+
+    Requests are sent with the standard library, so no client package is needed. Rate-limited and
+    failed requests are retried with exponential backoff.
+
+    Attributes:
+    model (str): The model name sent with every request.
+    base_url (str): The API base URL, e.g. https://api.openai.com/v1.
+    api_key (Optional[str]): The API key, read from OPENAI_API_KEY if not given.
+    temperature (float): The default sampling temperature.
+    max_tokens (Optional[int]): The default maximum number of generated tokens.
+    timeout (float): The timeout of a request in seconds.
+    max_retries (int): Number of retries of a failed request.
+    """
+
+    def __init__(
+        self,
+        model: str = "gpt-4o-mini",
+        base_url: Optional[str] = None,
+        api_key: Optional[str] = None,
+        temperature: float = 0.0,
+        max_tokens: Optional[int] = None,
+        timeout: float = 60.0,
+        max_retries: int = 3
+    ) -> None:
+        """
+        Initialize the GPTChatModel.
+
+        Parameters:
+        model (str): The model name sent with every request.
+        base_url (Optional[str]): The API base URL, read from OPENAI_BASE_URL or the OpenAI API if not given.
+        api_key (Optional[str]): The API key, read from OPENAI_API_KEY if not given.
+        temperature (float): The default sampling temperature.
+        max_tokens (Optional[int]): The default maximum number of generated tokens.
+        timeout (float): The timeout of a request in seconds.
+        max_retries (int): Number of retries of a failed request.
+        """
+        self.model = model
+        self.base_url = (base_url or os.environ.get("OPENAI_BASE_URL") or "https://api.openai.com/v1").rstrip("/")
+        self.api_key = api_key if api_key is not None else os.environ.get("OPENAI_API_KEY")
+        self.temperature = temperature
+        self.max_tokens = max_tokens
+        self.timeout = timeout
+        self.max_retries = max_retries
+
+    def default_params(self) -> Dict[str, Any]:
+        """
+        Get the generation parameters applied when none are given.
+
+        Returns:
+        Dict[str, Any]: The temperature and, if set, max_tokens.
+        """
+        params: Dict[str, Any] = {"temperature": self.temperature}
+        if self.max_tokens is not None:
+            params["max_tokens"] = self.max_tokens
+        return params
+
+    def _post(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Send a request to the chat completions endpoint, retrying transient failures.
+
+        Parameters:
+        payload (Dict[str, Any]): The request body.
+
+        Returns:
+        Dict[str, Any]: The response body.
+
+        Raises:
+        RuntimeError: If the request still fails after every retry.
+        """
+        headers = {"Content-Type": "application/json"}
+        if self.api_key:
+            headers["Authorization"] = f"Bearer {self.api_key}"
+        data = json.dumps(payload).encode("utf-8")
+        for attempt in range(self.max_retries + 1):
+            request = urllib.request.Request(f"{self.base_url}/chat/completions", data=data, headers=headers, method="POST")
+            try:
+                with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                    return json.loads(response.read().decode("utf-8"))
+            except urllib.error.HTTPError as e:
+                if e.code not in RETRY_STATUS_CODES or attempt == self.max_retries:
+                    raise RuntimeError(f"Chat completion failed with HTTP {e.code}: {e.read().decode('utf-8', 'replace')}") from e
+                retry_after = e.headers.get("Retry-After") if e.headers else None
+                delay = float(retry_after) if retry_after and retry_after.replace(".", "", 1).isdigit() else 2 ** attempt
+            except (urllib.error.URLError, TimeoutError) as e:
+                if attempt == self.max_retries:
+                    raise RuntimeError(f"Chat completion failed: {e}") from e
+                delay = 2 ** attempt
+            time.sleep(min(delay, 30.0))
+        raise RuntimeError("Chat completion failed!")
+
+    def chat(self, messages: Messages, **params: Any) -> ChatResponse:
+        """
+        Answer one conversation.
+
+        Parameters:
+        messages (Messages): The conversation.
+        params (Any): Generation parameters overriding the defaults, e.g. temperature or max_tokens.
+
+        Returns:
+        ChatResponse: The response, with token counts estimated if the server does not report usage.
+        """
+        payload = {"model": self.model, "messages": messages, **self.default_params(), **params}
+        body = self._post(payload)
+        text = body["choices"][0]["message"].get("content") or ""
+        usage = body.get("usage") or {}
+        return ChatResponse(
+            text,
+            usage.get("prompt_tokens", sum(estimate_tokens(message["content"]) for message in messages)),
+            usage.get("completion_tokens", estimate_tokens(text)),
+            body.get("model", self.model),
+        )
@@ -0,0 +1,60 @@
+import re
+import time
+import threading
+from typing import Any
+
+from .base_chat_model import BaseChatModel, ChatResponse, Messages, estimate_tokens
+
+_SENTENCE_PATTERN = re.compile(r"(?<=[.!?])\s+")
+
+
+class StubChatModel(BaseChatModel):
+    """
+    A deterministic local chat model for tests and dry runs, which costs nothing and needs no network.
+
+    It answers with the first sentence of the first context found in the last user message, i.e. the
+    most relevant context of a prompt built by the AnswerGenerator, after an optional delay.
+
+    Attributes:
+    model (str): The model name.
+    delay (float): Seconds spent on every conversation, to simulate latency.
+    calls (int): Number of answered conversations.
+    """
+
+    def __init__(self, model: str = "stub", delay: float = 0.0) -> None:
+        """
+        Initialize the StubChatModel.
+
+        Parameters:
+        model (str): The model name.
+        delay (float): Seconds spent on every conversation.
+        """
+        self.model = model
+        self.delay = delay
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def chat(self, messages: Messages, **params: Any) -> ChatResponse:
+        """
+        Answer one conversation.
+
+        Parameters:
+        messages (Messages): The conversation.
+        params (Any): Ignored generation parameters.
+
+        Returns:
+        ChatResponse: The first sentence of the first context, with estimated token counts.
+        """
+        with self._lock:
+            self.calls += 1
+        if self.delay:
+            time.sleep(self.delay)
+        prompt = messages[-1]["content"] if messages else ""
+        text = "I don't know."
+        for line in prompt.splitlines():
+            if line.startswith("[1]"):
+                text = _SENTENCE_PATTERN.split(line[3:].strip(), maxsplit=1)[0]
+                break
+        return ChatResponse(
+            text, sum(estimate_tokens(message["content"]) for message in messages), estimate_tokens(text), self.model
+        )
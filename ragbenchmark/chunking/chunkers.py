@@ -0,0 +1,229 @@
+import re
+from typing import List
+
+import numpy as np
+
+from .corpus import Document
+from ..profiling.profiler import profile_stage
+
+STRATEGIES = ("fixed", "sentence", "sliding")
+
+_TOKEN_PATTERN = re.compile(r"\S+")
+_TERM_PATTERN = re.compile(r"\w+")
+_SENTENCE_END_PATTERN = re.compile(r"[.!?][\"')\]]*$")
+
+
+def normalize_term(token: str) -> str:
+    """
+    Normalize a whitespace token into a retrieval term: lower case, word characters only.
+
+    Parameters:
+    token (str): The token.
+
+    Returns:
+    str: The term, empty for punctuation-only tokens.
+    """
+    return "".join(_TERM_PATTERN.findall(token.lower()))
+
+
+def text_terms(text: str) -> List[str]:
+    """
+    Split a text, such as a question, into the retrieval terms of its tokens.
+
+    Parameters:
+    text (str): The text.
+
+    Returns:
+    List[str]: The non-empty terms, in order.
+    """
+    return [term for term in map(normalize_term, _TOKEN_PATTERN.findall(text)) if term]
+
+
+class TokenizedDocument:
+    """
+    The whitespace tokenization of a document, shared by every chunking configuration.
+
+    Attributes:
+    document (Document): The tokenized document.
+    starts (np.ndarray): The character offset of the first character of every token.
+    ends (np.ndarray): The character offset after the last character of every token.
+    terms (List[str]): The normalized retrieval term of every token.
+    sentence_ends (np.ndarray): The token index after the last token of every sentence, the last one is the number of tokens.
+    """
+
+    @profile_stage("chunking.tokenize", counter="documents")
+    def __init__(self, document: Document) -> None:
+        """
+        Tokenize a document.
+
+        Parameters:
+        document (Document): The document.
+        """
+        self.document = document
+        text = document.text
+        starts = []
+        ends = []
+        self.terms: List[str] = []
+        sentence_ends = []
+        previous_token = ""
+        for match in _TOKEN_PATTERN.finditer(text):
+            start, end = match.span()
+            if ends and (_SENTENCE_END_PATTERN.search(previous_token) or "\n\n" in text[ends[-1]:start]):
+                sentence_ends.append(len(ends))
+            previous_token = match.group()
+            starts.append(start)
+            ends.append(end)
+            self.terms.append(normalize_term(previous_token))
+        if ends:
+            sentence_ends.append(len(ends))
+        self.starts = np.array(starts, dtype=np.int64)
+        self.ends = np.array(ends, dtype=np.int64)
+        self.sentence_ends = np.array(sentence_ends, dtype=np.int64)
+
+    @property
+    def num_tokens(self) -> int:
+        """
+        Get the number of tokens.
+
+        Returns:
+        int: The number of tokens.
+        """
+        return len(self.starts)
+
+
+class ChunkingConfig:
+    """
+    A chunking configuration: a strategy, a chunk size in tokens and an overlap.
+
+    - fixed: consecutive windows of `size` tokens.
+    - sliding: windows of `size` tokens starting every `size - overlap` tokens.
+    - sentence: whole sentences packed into chunks of at most `size` tokens, the last `overlap`
+      sentences of a chunk are repeated at the start of the next one. Longer sentences are cut.
+
+    Attributes:
+    strategy (str): One of STRATEGIES.
+    size (int): The maximum number of tokens of a chunk.
+    overlap (int): The overlap in tokens (sliding) or sentences (sentence).
+    """
+
+    def __init__(self, strategy: str, size: int, overlap: int = 0) -> None:
+        """
+        Initialize the ChunkingConfig.
+
+        Parameters:
+        strategy (str): One of STRATEGIES.
+        size (int): The maximum number of tokens of a chunk.
+        overlap (int): The overlap in tokens (sliding) or sentences (sentence).
+
+        Raises:
+        ValueError: If the configuration is invalid.
+        """
+        if strategy not in STRATEGIES:
+            raise ValueError(f"Invalid chunking strategy {strategy!r}! Expected one of {', '.join(STRATEGIES)}.")
+        if size <= 0 or overlap < 0:
+            raise ValueError("Chunk size must be positive and overlap cannot be negative!")
+        if strategy == "fixed" and overlap:
+            raise ValueError("Fixed-size chunks cannot overlap, use the sliding strategy!")
+        if strategy == "sliding" and overlap >= size:
+            raise ValueError("The overlap of sliding windows must be smaller than their size!")
+        self.strategy = strategy
+        self.size = size
+        self.overlap = overlap
+
+    @classmethod
+    def parse(cls, spec: str) -> "ChunkingConfig":
+        """
+        Parse a configuration given as STRATEGY:SIZE[:OVERLAP], e.g. `sliding:256:64`.
+
+        Parameters:
+        spec (str): The configuration.
+
+        Returns:
+        ChunkingConfig: The configuration.
+
+        Raises:
+        ValueError: If the configuration is malformed.
+        """
+        parts = spec.split(":")
+        if len(parts) not in (2, 3) or not all(part.isdigit() for part in parts[1:]):
+            raise ValueError(f"Invalid chunking configuration {spec!r}! Expected STRATEGY:SIZE[:OVERLAP], e.g. sliding:256:64.")
+        return cls(parts[0], *(int(part) for part in parts[1:]))
+
+    @property
+    def name(self) -> str:
+        """
+        Get the name of the configuration, e.g. `sliding-256-64`.
+
+        Returns:
+        str: The name.
+        """
+        return f"{self.strategy}-{self.size}-{self.overlap}" if self.overlap else f"{self.strategy}-{self.size}"
+
+    def __repr__(self) -> str:
+        return f"ChunkingConfig({self.strategy!r}, {self.size}, {self.overlap})"
+
+    def token_spans(self, tokens: TokenizedDocument) -> np.ndarray:
+        """
+        Chunk a tokenized document.
+
+        Parameters:
+        tokens (TokenizedDocument): The tokenized document.
+
+        Returns:
+        np.ndarray: An (n, 2) array with the first token index and the index after the last token of every chunk.
+        """
+        if self.strategy == "sentence":
+            return self._sentence_spans(tokens.sentence_ends)
+        return self._window_spans(0, tokens.num_tokens, self.size, self.size - self.overlap)
+
+    @staticmethod
+    def _window_spans(begin: int, end: int, size: int, step: int) -> np.ndarray:
+        """
+        Cut a token range into windows.
+
+        Parameters:
+        begin (int): The first token index.
+        end (int): The index after the last token.
+        size (int): The number of tokens of a window.
+        step (int): The number of tokens between the starts of two windows.
+
+        Returns:
+        np.ndarray: An (n, 2) array of token spans.
+        """
+        if end <= begin:
+            return np.empty((0, 2), dtype=np.int64)
+        starts = np.arange(begin, end, step, dtype=np.int64)
+        # Drop trailing windows that lie entirely inside the previous one.
+        starts = starts[(starts == begin) | (starts + size - step < end)]
+        return np.stack([starts, np.minimum(starts + size, end)], axis=1)
+
+    def _sentence_spans(self, sentence_ends: np.ndarray) -> np.ndarray:
+        """
+        Pack sentences into chunks.
+
+        Parameters:
+        sentence_ends (np.ndarray): The token index after every sentence.
+
+        Returns:
+        np.ndarray: An (n, 2) array of token spans.
+        """
+        boundaries = [0] + sentence_ends.tolist()
+        num_sentences = len(boundaries) - 1
+        spans = []
+        first = 0
+        while first < num_sentences:
+            begin = boundaries[first]
+            last = first + 1
+            while last < num_sentences and boundaries[last + 1] - begin <= self.size:
+                last += 1
+            if boundaries[last] - begin > self.size:
+                spans.extend(self._window_spans(begin, boundaries[last], self.size, self.size).tolist())
+            else:
+                spans.append([begin, boundaries[last]])
+            if last == num_sentences:
+                break
+            # Overlap only if the next chunk can still take at least one new sentence.
+            overlap_first = max(last - self.overlap, first + 1)
+            first = overlap_first if boundaries[last + 1] - boundaries[overlap_first] <= self.size else last
+        return np.array(spans, dtype=np.int64).reshape(-1, 2)
+
@@ -0,0 +1,227 @@
+import csv
+import sys
+import json
+from bisect import bisect_right
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+
+class Document:
+    """
+    A corpus document made of pages, with the character offset where every page starts.
+
+    The document text is the concatenation of its pages, so pages should keep their own trailing
+    whitespace. Chunks are located by character offsets into this text and mapped back to pages.
+
+    Attributes:
+    _file_path (str): The file path (or document id) used as FILE_PATH of the chunks.
+    _text (str): The concatenated text of all pages.
+    _page_starts (List[int]): The offset of the first character of every page.
+    _first_page (int): The number of the first page.
+    """
+
+    def __init__(self, file_path: str, pages: Sequence[str], first_page: int = 1) -> None:
+        """
+        Initialize the Document.
+
+        Parameters:
+        file_path (str): The file path (or document id) of the document.
+        pages (Sequence[str]): The text of every page.
+        first_page (int): The number of the first page.
+        """
+        self._file_path = file_path
+        self._first_page = first_page
+        self._page_starts: List[int] = []
+        offset = 0
+        for page in pages:
+            self._page_starts.append(offset)
+            offset += len(page)
+        self._text = "".join(pages)
+
+    @classmethod
+    def from_text(cls, file_path: str, text: str, page_size: Optional[int] = None) -> "Document":
+        """
+        Build a document from plain text. Pages are separated by form feeds, as written by most
+        PDF-to-text tools, or cut every `page_size` characters after a line break to emulate pages.
+
+        Parameters:
+        file_path (str): The file path (or document id) of the document.
+        text (str): The document text.
+        page_size (Optional[int]): The approximate number of characters of an emulated page.
+
+        Returns:
+        Document: The document.
+        """
+        if page_size is None:
+            pages = text.split("\f")
+            pages = [page + "\f" for page in pages[:-1]] + pages[-1:]
+            return cls(file_path, pages)
+        if page_size <= 0:
+            raise ValueError("page_size must be positive!")
+        pages = []
+        position = 0
+        while len(text) - position > page_size:
+            cut = text.rfind("\n", position, position + page_size) + 1
+            if cut <= position:
+                cut = position + page_size
+            pages.append(text[position:cut])
+            position = cut
+        pages.append(text[position:])
+        return cls(file_path, pages)
+
+    @property
+    def file_path(self) -> str:
+        """
+        Get the file path of the document.
+
+        Returns:
+        str: The file path.
+        """
+        return self._file_path
+
+    @property
+    def text(self) -> str:
+        """
+        Get the text of the document.
+
+        Returns:
+        str: The concatenated text of all pages.
+        """
+        return self._text
+
+    @property
+    def num_pages(self) -> int:
+        """
+        Get the number of pages.
+
+        Returns:
+        int: The number of pages.
+        """
+        return len(self._page_starts)
+
+    @property
+    def first_page(self) -> int:
+        """
+        Get the number of the first page.
+
+        Returns:
+        int: The number of the first page.
+        """
+        return self._first_page
+
+    def page_span(self, page_number: int) -> Tuple[int, int]:
+        """
+        Get the character span of a page.
+
+        Parameters:
+        page_number (int): The page number.
+
+        Returns:
+        Tuple[int, int]: The offset of the first character of the page and the offset after its last one.
+
+        Raises:
+        IndexError: If the document has no such page.
+        """
+        index = page_number - self._first_page
+        if not 0 <= index < len(self._page_starts):
+            raise IndexError(f"Page {page_number} is out of the pages of {self._file_path}!")
+        end = self._page_starts[index + 1] if index + 1 < len(self._page_starts) else len(self._text)
+        return self._page_starts[index], end
+
+    def page_numbers(self, start: int, end: int) -> List[int]:
+        """
+        Get the pages overlapped by a character span.
+
+        Parameters:
+        start (int): The offset of the first character.
+        end (int): The offset after the last character.
+
+        Returns:
+        List[int]: The page numbers, in order.
+        """
+        first = max(bisect_right(self._page_starts, start) - 1, 0)
+        last = max(bisect_right(self._page_starts, max(end - 1, start)) - 1, first)
+        return list(range(first + self._first_page, last + self._first_page + 1))
+
+
+def load_tsv_documents(
+    file_path: str,
+    id_column: str = "doc_id",
+    text_column: str = "doc",
+    page_size: Optional[int] = None
+) -> List[Document]:
+    """
+    Load a corpus from a TSV file with one document per row, such as COVID-QA `docs.tsv`.
+
+    Parameters:
+    file_path (str): The TSV file path.
+    id_column (str): The column used as FILE_PATH of the documents.
+    text_column (str): The column of the document texts.
+    page_size (Optional[int]): The approximate number of characters of an emulated page, see `Document.from_text`.
+
+    Returns:
+    List[Document]: The documents.
+    """
+    csv.field_size_limit(sys.maxsize)
+    with open(file_path, "r", encoding="utf-8", newline="") as f:
+        return [
+            Document.from_text(row[id_column], row[text_column], page_size=page_size)
+            for row in csv.DictReader(f, delimiter="\t")
+        ]
+
+
+def load_squad_documents(file_path: str, page_size: Optional[int] = None) -> List[Document]:
+    """
+    Load the corpus of a SQuAD-format file, such as COVID-QA `200421_covidQA.json`.
+
+    Parameters:
+    file_path (str): The JSON file path.
+    page_size (Optional[int]): The approximate number of characters of an emulated page, see `Document.from_text`.
+
+    Returns:
+    List[Document]: One document per paragraph, whose FILE_PATH is the document id.
+    """
+    with open(file_path, "r", encoding="utf-8") as f:
+        squad_dict = json.load(f)
+    return [
+        Document.from_text(str(paragraph["document_id"]), paragraph["context"], page_size=page_size)
+        for article in squad_dict["data"]
+        for paragraph in article["paragraphs"]
+    ]
+
+
+def squad_to_baseline_dict(file_path: str, documents: Sequence[Document], name: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Convert the questions of a SQuAD-format file into a baseline dataset, whose contexts are the answer spans.
+
+    Parameters:
+    file_path (str): The JSON file path.
+    documents (Sequence[Document]): The documents loaded by `load_squad_documents`, used for page numbers.
+    name (Optional[str]): The dataset name, defaults to the file name.
+
+    Returns:
+    Dict[str, Any]: The baseline dataset dictionary with NAME, DOCUMENTS and TASKS.
+    """
+    with open(file_path, "r", encoding="utf-8") as f:
+        squad_dict = json.load(f)
+    documents_by_path = {document.file_path: document for document in documents}
+    tasks = {}
+    for article in squad_dict["data"]:
+        for paragraph in article["paragraphs"]:
+            document = documents_by_path[str(paragraph["document_id"])]
+            for qa in paragraph["qas"]:
+                if qa.get("is_impossible") or not qa["answers"]:
+                    continue
+                contexts = []
+                for answer in qa["answers"]:
+                    start = answer["answer_start"]
+                    contexts.append({
+                        "TEXT": answer["text"],
+                        "FILE_PATH": document.file_path,
+                        "PAGE_NUMBER": document.page_numbers(start, start + len(answer["text"])),
+                    })
+                tasks[str(qa["id"])] = {"QUESTION": qa["question"], "ANSWER": qa["answers"][0]["text"], "CONTEXTS": contexts}
+    return {
+        "NAME": name or file_path.replace("\\", "/").rsplit("/", 1)[-1],
+        "DOCUMENTS": [document.file_path for document in documents],
+        "TASKS": tasks,
+    }
@@ -0,0 +1,403 @@
+import math
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .chunkers import ChunkingConfig, TokenizedDocument, text_terms
+from .corpus import Document
+from ..profiling.profiler import stage, count
+
+RETRIEVERS = ("bm25", "oracle")
+
+
+class _ChunkTable:
+    """
+    The chunks of one configuration over the whole corpus, with their BM25 postings.
+
+    Attributes:
+    char_spans (np.ndarray): The (n, 2) character spans of the chunks, collected per document until `finalize`.
+    token_lengths (np.ndarray): The number of tokens of every chunk, collected per document until `finalize`.
+    chunk_ptr (np.ndarray): The index of the first chunk of every document, and the total number of chunks.
+    term_ptr (np.ndarray): The CSR row pointer of the postings, by term id.
+    posting_chunks (np.ndarray): The chunk of every posting.
+    posting_tfs (np.ndarray): The term frequency of every posting.
+    """
+
+    def __init__(self) -> None:
+        self.char_spans: Any = []
+        self.token_lengths: Any = []
+        self.chunk_ptr: Any = [0]
+        self._postings: List[Tuple[np.ndarray, np.ndarray, np.ndarray]] = []
+        self.term_ptr = np.zeros(1, dtype=np.int64)
+        self.posting_chunks = np.empty(0, dtype=np.int64)
+        self.posting_tfs = np.empty(0, dtype=np.int64)
+
+    def add_document(self, tokens: TokenizedDocument, term_ids: np.ndarray, token_spans: np.ndarray) -> None:
+        """
+        Add the chunks of one document.
+
+        Parameters:
+        tokens (TokenizedDocument): The tokenized document.
+        term_ids (np.ndarray): The term id of every token, -1 for tokens without a term.
+        token_spans (np.ndarray): The (n, 2) token spans of the chunks.
+        """
+        first_chunk = self.chunk_ptr[-1]
+        self.chunk_ptr.append(first_chunk + len(token_spans))
+        if not len(token_spans):
+            return
+        self.char_spans.append(np.stack([tokens.starts[token_spans[:, 0]], tokens.ends[token_spans[:, 1] - 1]], axis=1))
+        lengths = token_spans[:, 1] - token_spans[:, 0]
+        self.token_lengths.append(lengths)
+
+        token_indices = np.concatenate([np.arange(begin, end) for begin, end in token_spans.tolist()])
+        chunk_ids = np.repeat(np.arange(first_chunk, first_chunk + len(token_spans), dtype=np.int64), lengths)
+        chunk_terms = term_ids[token_indices]
+        valid = chunk_terms >= 0
+        keys, tfs = np.unique(chunk_ids[valid] << 32 | chunk_terms[valid], return_counts=True)
+        self._postings.append((keys >> 32, keys & 0xFFFFFFFF, tfs))
+
+    def finalize(self, num_terms: int) -> None:
+        """
+        Concatenate the per-document arrays and sort the postings by term.
+
+        Parameters:
+        num_terms (int): The size of the vocabulary.
+        """
+        self.chunk_ptr = np.array(self.chunk_ptr, dtype=np.int64)
+        self.char_spans = np.concatenate(self.char_spans) if self.char_spans else np.empty((0, 2), dtype=np.int64)
+        self.token_lengths = np.concatenate(self.token_lengths) if self.token_lengths else np.empty(0, dtype=np.int64)
+        if self._postings:
+            chunks, terms, tfs = (np.concatenate(arrays) for arrays in zip(*self._postings))
+            order = np.argsort(terms, kind="stable")
+            self.posting_chunks = chunks[order]
+            self.posting_tfs = tfs[order]
+            self.term_ptr = np.concatenate([[0], np.cumsum(np.bincount(terms, minlength=num_terms))])
+        else:
+            self.term_ptr = np.zeros(num_terms + 1, dtype=np.int64)
+        self._postings = []
+
+    @property
+    def num_chunks(self) -> int:
+        return int(self.chunk_ptr[-1])
+
+
+class ChunkingSimulator:
+    """
+    A class used to benchmark chunking configurations offline.
+
+    The corpus is tokenized once and every configuration is chunked from the same tokenization in a
+    single pass. For each configuration, every baseline task then retrieves its top chunks, either with
+    BM25 on the question or with an oracle ranking chunks by their overlap with the baseline contexts,
+    and the chunks are written as a sample dataset that the existing metrics can evaluate. The oracle
+    isolates the effect of the granularity from the quality of the retriever.
+
+    Attributes:
+    _documents (List[Document]): The corpus.
+    _configs (List[ChunkingConfig]): The chunking configurations.
+    _k1 (float): The BM25 term-frequency saturation.
+    _b (float): The BM25 length normalization.
+    _tables (Optional[Dict[str, _ChunkTable]]): The chunks of every configuration, built by `run`.
+    _vocabulary (Dict[str, int]): The term ids.
+
+    Example:
+    >>> simulator = ChunkingSimulator(documents, [ChunkingConfig("fixed", 128), ChunkingConfig("sliding", 256, 64)])
+    >>> sample_dataset_dicts = simulator.build_sample_datasets(baseline_dataset_dict, top_k=5)
+    >>> DatasetEvaluator(baseline_dataset_dict, sample_dataset_dicts["fixed-128"]).evaluate()
+    """
+
+    def __init__(
+        self,
+        documents: Iterable[Document],
+        configs: Sequence[ChunkingConfig],
+        k1: float = 1.5,
+        b: float = 0.75
+    ) -> None:
+        """
+        Initialize the ChunkingSimulator.
+
+        Parameters:
+        documents (Iterable[Document]): The corpus.
+        configs (Sequence[ChunkingConfig]): The chunking configurations.
+        k1 (float): The BM25 term-frequency saturation.
+        b (float): The BM25 length normalization.
+
+        Raises:
+        ValueError: If no configuration is given or two configurations have the same name.
+        """
+        names = [config.name for config in configs]
+        if not names or len(set(names)) != len(names):
+            raise ValueError("Chunking configurations must be given and have distinct names!")
+        self._documents = list(documents)
+        self._configs = list(configs)
+        self._k1 = k1
+        self._b = b
+        self._tables: Optional[Dict[str, _ChunkTable]] = None
+        self._vocabulary: Dict[str, int] = {}
+        self._documents_by_path: Dict[str, List[int]] = {}
+        for doc_index, document in enumerate(self._documents):
+            self._documents_by_path.setdefault(document.file_path, []).append(doc_index)
+
+    @property
+    def configs(self) -> List[ChunkingConfig]:
+        """
+        Get the chunking configurations.
+
+        Returns:
+        List[ChunkingConfig]: The configurations.
+        """
+        return self._configs
+
+    def run(self) -> "ChunkingSimulator":
+        """
+        Chunk the corpus with every configuration in one pass, tokenizing each document once.
+
+        Returns:
+        ChunkingSimulator: The simulator itself.
+        """
+        tables = {config.name: _ChunkTable() for config in self._configs}
+        vocabulary = self._vocabulary
+        for document in self._documents:
+            tokens = TokenizedDocument(document)
+            term_ids = np.array(
+                [vocabulary.setdefault(term, len(vocabulary)) if term else -1 for term in tokens.terms],
+                dtype=np.int64
+            )
+            with stage("chunking.chunk"):
+                for config in self._configs:
+                    tables[config.name].add_document(tokens, term_ids, config.token_spans(tokens))
+        for table in tables.values():
+            table.finalize(len(vocabulary))
+            count("chunks", table.num_chunks)
+        self._tables = tables
+        return self
+
+    def _table(self, config_name: str) -> _ChunkTable:
+        if self._tables is None:
+            self.run()
+        if config_name not in self._tables:
+            raise KeyError(f"Unknown chunking configuration {config_name!r}!")
+        return self._tables[config_name]
+
+    def num_chunks(self, config_name: str) -> int:
+        """
+        Get the number of chunks of a configuration.
+
+        Parameters:
+        config_name (str): The configuration name.
+
+        Returns:
+        int: The number of chunks over the corpus.
+        """
+        return self._table(config_name).num_chunks
+
+    def chunk_context(self, config_name: str, chunk_index: int, score: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Build the context dictionary of a chunk.
+
+        Parameters:
+        config_name (str): The configuration name.
+        chunk_index (int): The index of the chunk.
+        score (Optional[float]): The retrieval score, omitted if None.
+
+        Returns:
+        Dict[str, Any]: The context with TEXT, FILE_PATH, PAGE_NUMBER, START and END, plus SCORE if given.
+        """
+        table = self._table(config_name)
+        document = self._documents[int(np.searchsorted(table.chunk_ptr, chunk_index, side="right")) - 1]
+        start, end = (int(offset) for offset in table.char_spans[chunk_index])
+        context_dict = {
+            "TEXT": document.text[start:end],
+            "FILE_PATH": document.file_path,
+            "PAGE_NUMBER": document.page_numbers(start, end),
+            "START": start,
+            "END": end,
+        }
+        if score is not None:
+            context_dict["SCORE"] = score
+        return context_dict
+
+    def iter_chunks(self, config_name: str) -> Iterator[Dict[str, Any]]:
+        """
+        Iterate over the chunks of a configuration.
+
+        Parameters:
+        config_name (str): The configuration name.
+
+        Returns:
+        Iterator[Dict[str, Any]]: The context dictionary of every chunk, in corpus order.
+        """
+        for chunk_index in range(self.num_chunks(config_name)):
+            yield self.chunk_context(config_name, chunk_index)
+
+    def bm25_scores(self, config_name: str, question: str) -> np.ndarray:
+        """
+        Score every chunk of a configuration against a question with BM25.
+
+        Parameters:
+        config_name (str): The configuration name.
+        question (str): The question.
+
+        Returns:
+        np.ndarray: The score of every chunk.
+        """
+        table = self._table(config_name)
+        scores = np.zeros(table.num_chunks)
+        if not table.num_chunks:
+            return scores
+        term_ids = {self._vocabulary.get(term, -1) for term in text_terms(question)}
+        length_norm = self._k1 * (1 - self._b + self._b * table.token_lengths / table.token_lengths.mean())
+        for term_id in term_ids - {-1}:
+            begin, end = table.term_ptr[term_id], table.term_ptr[term_id + 1]
+            if begin == end:
+                continue
+            chunks = table.posting_chunks[begin:end]
+            tfs = table.posting_tfs[begin:end]
+            idf = math.log(1 + (table.num_chunks - (end - begin) + 0.5) / (end - begin + 0.5))
+            scores[chunks] += idf * tfs * (self._k1 + 1) / (tfs + length_norm[chunks])
+        return scores
+
+    def retrieve(self, config_name: str, question: str, top_k: int) -> List[Dict[str, Any]]:
+        """
+        Retrieve the best chunks of a configuration for a question with BM25.
+
+        Parameters:
+        config_name (str): The configuration name.
+        question (str): The question.
+        top_k (int): The maximum number of chunks.
+
+        Returns:
+        List[Dict[str, Any]]: The context dictionaries of the chunks with a positive score, best first.
+        """
+        scores = self.bm25_scores(config_name, question)
+        return [
+            self.chunk_context(config_name, int(chunk_index), float(scores[chunk_index]))
+            for chunk_index in self._top_k(scores, top_k)
+        ]
+
+    def locate_contexts(self, baseline_task_dict: Dict[str, Any]) -> List[Tuple[int, int, int]]:
+        """
+        Find the baseline contexts of a task in the corpus, first in the documents with the same FILE_PATH.
+
+        Parameters:
+        baseline_task_dict (Dict[str, Any]): The baseline task dictionary.
+
+        Returns:
+        List[Tuple[int, int, int]]: The (document index, start, end) of every context found.
+        """
+        spans = []
+        for context_dict in baseline_task_dict["CONTEXTS"]:
+            text = context_dict["TEXT"]
+            candidates = self._documents_by_path.get(context_dict.get("FILE_PATH"), [])
+            for doc_index in list(candidates) + [index for index in range(len(self._documents)) if index not in candidates]:
+                start = self._documents[doc_index].text.find(text)
+                if text and start >= 0:
+                    spans.append((doc_index, start, start + len(text)))
+                    break
+        return spans
+
+    def oracle_scores(self, config_name: str, spans: List[Tuple[int, int, int]]) -> np.ndarray:
+        """
+        Score every chunk of a configuration by the number of baseline characters it contains.
+
+        Parameters:
+        config_name (str): The configuration name.
+        spans (List[Tuple[int, int, int]]): The baseline spans found by `locate_contexts`.
+
+        Returns:
+        np.ndarray: The share of the baseline characters inside every chunk.
+        """
+        table = self._table(config_name)
+        scores = np.zeros(table.num_chunks)
+        total = sum(end - start for _, start, end in spans)
+        for doc_index, start, end in spans:
+            first, last = table.chunk_ptr[doc_index], table.chunk_ptr[doc_index + 1]
+            chunk_spans = table.char_spans[first:last]
+            overlap = np.minimum(chunk_spans[:, 1], end) - np.maximum(chunk_spans[:, 0], start)
+            scores[first:last] += np.clip(overlap, 0, None) / total
+        return scores
+
+    @staticmethod
+    def _top_k(scores: np.ndarray, top_k: int) -> np.ndarray:
+        """
+        Get the indices of the best positive scores, ties broken by chunk index.
+
+        Parameters:
+        scores (np.ndarray): The scores.
+        top_k (int): The number of indices.
+
+        Returns:
+        np.ndarray: The indices, best first.
+        """
+        candidates = np.flatnonzero(scores > 0)
+        if len(candidates) > top_k:
+            candidates = np.sort(candidates[np.argpartition(-scores[candidates], top_k - 1)[:top_k]])
+        return candidates[np.lexsort((candidates, -scores[candidates]))]
+
+    def build_sample_datasets(
+        self,
+        baseline_dataset_dict: Dict[str, Any],
+        top_k: int = 5,
+        retriever: str = "bm25"
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        Retrieve the top chunks of every baseline task with every configuration.
+
+        Parameters:
+        baseline_dataset_dict (Dict[str, Any]): The baseline dataset dictionary.
+        top_k (int): The number of chunks retrieved per task.
+        retriever (str): "bm25" to rank chunks against the question, "oracle" to rank them by overlap with the baseline contexts.
+
+        Returns:
+        Dict[str, Dict[str, Any]]: A sample dataset dictionary per configuration name.
+
+        Raises:
+        ValueError: If the retriever is unknown or top_k is not positive.
+        """
+        if retriever not in RETRIEVERS:
+            raise ValueError(f"Invalid retriever {retriever!r}! Expected one of {', '.join(RETRIEVERS)}.")
+        if top_k <= 0:
+            raise ValueError("top_k must be positive!")
+        sample_dataset_dicts = {
+            config.name: {
+                "NAME": f"{baseline_dataset_dict['NAME']}-{config.name}",
+                "DOCUMENTS": list(baseline_dataset_dict["DOCUMENTS"]),
+                "TASKS": {},
+            }
+            for config in self._configs
+        }
+        with stage("chunking.retrieve"):
+            for task_id, baseline_task_dict in baseline_dataset_dict["TASKS"].items():
+                spans = self.locate_contexts(baseline_task_dict) if retriever == "oracle" else None
+                for config in self._configs:
+                    if spans is None:
+                        scores = self.bm25_scores(config.name, baseline_task_dict["QUESTION"])
+                    else:
+                        scores = self.oracle_scores(config.name, spans)
+                    sample_dataset_dicts[config.name]["TASKS"][task_id] = {
+                        "QUESTION": baseline_task_dict["QUESTION"],
+                        "ANSWER": "",
+                        "CONTEXTS": [
+                            self.chunk_context(config.name, int(chunk_index), float(scores[chunk_index]))
+                            for chunk_index in self._top_k(scores, top_k)
+                        ],
+                    }
+        return sample_dataset_dicts
+
+    def summary(self) -> List[Dict[str, Any]]:
+        """
+        Summarize the chunks of every configuration.
+
+        Returns:
+        List[Dict[str, Any]]: The name, number of chunks, and mean number of tokens and characters of the chunks of every configuration.
+        """
+        rows = []
+        for config in self._configs:
+            table = self._table(config.name)
+            has_chunks = table.num_chunks > 0
+            rows.append({
+                "config": config.name,
+                "num_chunks": table.num_chunks,
+                "mean_tokens": float(table.token_lengths.mean()) if has_chunks else 0.0,
+                "mean_chars": float((table.char_spans[:, 1] - table.char_spans[:, 0]).mean()) if has_chunks else 0.0,
+            })
+        return rows
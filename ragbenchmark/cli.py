@@ -0,0 +1,1045 @@
+import os
+import sys
+import glob
+import json
+import argparse
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from .evaluator.dataset_evaluator.dataset_evaluator import METRICS
+from .exporter.exporter import EXPORT_FORMATS, check_export_format
+
+
+class CLIError(Exception):
+    """
+    Raised when the command-line input is invalid: arguments, missing files or unreadable JSON. `main`
+    reports it as a usage error, while any other exception propagates with its traceback.
+    """
+
+
+@contextmanager
+def _user_input() -> Iterator[None]:
+    """
+    Report the ValueError raised while parsing arguments, or building objects from them, as a CLIError.
+
+    Raises:
+    CLIError: If the wrapped block raises a ValueError.
+    """
+    try:
+        yield
+    except ValueError as e:
+        raise CLIError(str(e)) from e
+
+
+def _load_json(file_path: str) -> Dict[str, Any]:
+    """
+    Load a dataset dictionary from a JSON file.
+
+    Parameters:
+    file_path (str): The JSON file path.
+
+    Returns:
+    Dict[str, Any]: The loaded dictionary.
+
+    Raises:
+    CLIError: If the file cannot be read or is not valid JSON.
+    """
+    try:
+        with open(file_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError) as e:
+        raise CLIError(f"Cannot load {file_path!r}! {e}") from e
+
+
+def _parse_normalizer(spec: Optional[str]) -> Any:
+    """
+    Parse the --normalize argument.
+
+    Parameters:
+    spec (Optional[str]): The comma-separated normalization steps.
+
+    Returns:
+    Optional[TextNormalizer]: The normalizer, None without steps.
+
+    Raises:
+    CLIError: If a step is unknown.
+    """
+    if not spec:
+        return None
+    from .preprocessing.text_normalizer import TextNormalizer
+
+    with _user_input():
+        return TextNormalizer.parse(spec)
+
+
+def _expand_paths(patterns: Sequence[str]) -> List[str]:
+    """
+    Expand glob patterns that were not already expanded by the shell.
+
+    Parameters:
+    patterns (Sequence[str]): File paths or glob patterns.
+
+    Returns:
+    List[str]: The matching file paths, without duplicates, in the given order.
+
+    Raises:
+    CLIError: If a pattern matches no file.
+    """
+    paths = []
+    for pattern in patterns:
+        matches = sorted(glob.glob(pattern)) if glob.has_magic(pattern) else [pattern]
+        if not matches or not all(os.path.isfile(path) for path in matches):
+            raise CLIError(f"No file found for {pattern!r}!")
+        paths.extend(path for path in matches if path not in paths)
+    return paths
+
+
+def _parse_thresholds(items: Sequence[str], metrics: Sequence[str] = METRICS) -> Dict[str, float]:
+    """
+    Parse metric thresholds given as METRIC=VALUE.
+
+    Parameters:
+    items (Sequence[str]): The raw threshold arguments.
+    metrics (Sequence[str]): The metrics that can be thresholded.
+
+    Returns:
+    Dict[str, float]: The minimal mean value of every metric.
+
+    Raises:
+    CLIError: If a threshold is malformed or refers to an unknown metric.
+    """
+    thresholds = {}
+    for item in items:
+        metric, separator, value = item.partition("=")
+        try:
+            threshold = float(value)
+        except ValueError:
+            threshold = None
+        if not separator or metric not in metrics or threshold is None:
+            raise CLIError(f"Invalid threshold {item!r}! Expected METRIC=VALUE with METRIC in {', '.join(metrics)}.")
+        thresholds[metric] = threshold
+    return thresholds
+
+
+def _parse_shard(value: Optional[str]) -> Tuple[int, int]:
+    """
+    Parse a shard given as INDEX/COUNT.
+
+    Parameters:
+    value (Optional[str]): The raw shard argument.
+
+    Returns:
+    Tuple[int, int]: The shard index and the number of shards, (0, 1) if no shard is given.
+
+    Raises:
+    CLIError: If the shard is malformed.
+    """
+    if value is None:
+        return 0, 1
+    index, separator, count = value.partition("/")
+    if not separator or not index.isdigit() or not count.isdigit():
+        raise CLIError(f"Invalid shard {value!r}! Expected INDEX/COUNT, e.g. 0/4.")
+    return int(index), int(count)
+
+
+def _load_corpus(patterns: Sequence[str], page_size: Optional[int], page_cache: str, workers: int = 1) -> List[Any]:
+    """
+    Load the documents of a corpus with their pages.
+
+    Parameters:
+    patterns (Sequence[str]): Document files or glob patterns: PDFs, text files with form feeds between
+                              pages, a TSV corpus or a SQuAD-format JSON file.
+    page_size (Optional[int]): The approximate number of characters of an emulated page of text documents.
+    page_cache (str): The cache directory of the text extracted from PDFs.
+    workers (int): The number of processes extracting PDFs.
+
+    Returns:
+    List[Document]: The documents.
+    """
+    from .chunking.corpus import Document, load_tsv_documents, load_squad_documents
+
+    documents = []
+    pdf_paths = []
+    for path in _expand_paths(patterns):
+        if path.endswith(".pdf"):
+            pdf_paths.append(path)
+        elif path.endswith(".tsv"):
+            documents.extend(load_tsv_documents(path, page_size=page_size))
+        elif path.endswith(".json"):
+            documents.extend(load_squad_documents(path, page_size=page_size))
+        else:
+            with open(path, "r", encoding="utf-8") as f:
+                documents.append(Document.from_text(path, f.read(), page_size=page_size))
+    if pdf_paths:
+        from .documents.page_store import PageStore
+
+        with PageStore(page_cache, workers=workers) as store:
+            store.add(pdf_paths)
+            documents.extend(Document(path, [page + "\n" for page in store.get_pages(path)]) for path in pdf_paths)
+    return documents
+
+
+def _check_thresholds(label: str, metrics: Dict[str, float], thresholds: Dict[str, float]) -> List[str]:
+    """
+    Compare metric means with their thresholds.
+
+    Parameters:
+    label (str): The name of the evaluated run, used in the messages.
+    metrics (Dict[str, float]): The mean value of every metric.
+    thresholds (Dict[str, float]): The minimal mean value of every metric.
+
+    Returns:
+    List[str]: One message per regressed metric.
+    """
+    return [
+        f"{label}: {metric} = {metrics[metric]:.4f} < {threshold}"
+        for metric, threshold in thresholds.items()
+        if metric in metrics and metrics[metric] < threshold
+    ]
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """
+    Build the argument parser of the `ragbench` command.
+
+    Returns:
+    argparse.ArgumentParser: The parser.
+    """
+    parser = argparse.ArgumentParser(prog="ragbench", description="Evaluate RAG (Retrieval-Augmented Generation) runs.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    eval_parser = subparsers.add_parser("eval", help="Evaluate sample datasets against a baseline dataset.")
+    eval_parser.add_argument("--baseline", required=True, help="Baseline dataset JSON file.")
+    eval_parser.add_argument("--samples", required=True, nargs="+", help="Sample dataset JSON files or glob patterns.")
+    eval_parser.add_argument("--metrics", nargs="+", choices=METRICS, default=list(METRICS), help="Metrics to compute.")
+    eval_parser.add_argument("--workers", type=int, default=1, help="Number of worker processes.")
+    eval_parser.add_argument("--chunk-size", type=int, default=64, help="Number of tasks sent to a worker at once.")
+    eval_parser.add_argument("--format", choices=EXPORT_FORMATS, default="json", help="Format of the per-task results.")
+    eval_parser.add_argument("--output", default=None, help="Directory of the per-task results and summary.json.")
+    eval_parser.add_argument(
+        "--threshold", action="append", default=[], metavar="METRIC=VALUE",
+        help="Fail with exit code 1 if the mean of METRIC falls below VALUE. Can be repeated. Sharded runs check it in `ragbench merge`."
+    )
+    eval_parser.add_argument("--no-validate", action="store_true", help="Skip the schema validation of the datasets.")
+    eval_parser.add_argument(
+        "--normalize", default=None, metavar="STEP[,STEP...]",
+        help="Normalize texts before comparing them, with steps among nfkc, casefold, punctuation, stopwords and whitespace."
+    )
+    eval_parser.add_argument(
+        "--shard", default=None, metavar="INDEX/COUNT",
+        help="Only evaluate one shard of the tasks and write a partial aggregate to --output, see `ragbench merge`."
+    )
+    eval_parser.add_argument(
+        "--cache", default=None, metavar="PATH",
+        help="SQLite file memoizing per-task metric values, so that re-runs only evaluate changed tasks."
+    )
+    eval_parser.add_argument(
+        "--tfidf", action="store_true",
+        help="Also compute recall_by_tfidf and precision_by_tfidf, from character n-gram TF-IDF vectors fitted over each dataset."
+    )
+    eval_parser.add_argument("--profile", action="store_true", help="Print per-stage timings of the main process.")
+    eval_parser.add_argument("--quiet", action="store_true", help="Do not show progress.")
+
+    merge_parser = subparsers.add_parser("merge", help="Merge the partial aggregates of sharded evaluations.")
+    merge_parser.add_argument("partials", nargs="+", help="Partial-aggregate files or glob patterns.")
+    merge_parser.add_argument("--output", default=None, help="File of the merged result.")
+    merge_parser.add_argument("--allow-missing-shards", action="store_true", help="Merge an incomplete set of shards.")
+    merge_parser.add_argument(
+        "--threshold", action="append", default=[], metavar="METRIC=VALUE",
+        help="Fail with exit code 1 if the mean of METRIC falls below VALUE. Can be repeated."
+    )
+
+    chunk_parser = subparsers.add_parser("chunk", help="Chunk a corpus with several configurations and write one sample dataset per configuration.")
+    chunk_parser.add_argument("--corpus", required=True, help="Corpus TSV file (doc_id, doc) or SQuAD-format JSON file.")
+    chunk_parser.add_argument(
+        "--baseline", default=None,
+        help="Baseline dataset JSON file. Derived from the answers of a SQuAD-format corpus if omitted."
+    )
+    chunk_parser.add_argument(
+        "--config", action="append", required=True, metavar="STRATEGY:SIZE[:OVERLAP]",
+        help="Chunking configuration, e.g. fixed:128, sentence:256 or sliding:256:64. Can be repeated."
+    )
+    chunk_parser.add_argument("--top-k", type=int, default=5, help="Number of chunks retrieved per task.")
+    chunk_parser.add_argument("--retriever", choices=("bm25", "oracle"), default="bm25", help="How chunks are ranked for a task.")
+    chunk_parser.add_argument("--page-size", type=int, default=None, help="Emulate pages of about this many characters.")
+    chunk_parser.add_argument("--output", required=True, help="Directory of the sample datasets.")
+
+    generate_parser = subparsers.add_parser("generate", help="Generate the answers of a sample dataset with a chat model.")
+    generate_parser.add_argument("--samples", required=True, help="Sample dataset JSON file with retrieved contexts.")
+    generate_parser.add_argument("--output", required=True, help="File of the sample dataset with generated answers.")
+    generate_parser.add_argument("--model", default="gpt-4o-mini", help="Model name.")
+    generate_parser.add_argument(
+        "--base-url", default=None,
+        help="Base URL of an OpenAI-compatible API, defaults to OPENAI_BASE_URL or the OpenAI API. The key is read from OPENAI_API_KEY."
+    )
+    generate_parser.add_argument("--stub", action="store_true", help="Use the local stub model instead of an API, e.g. for dry runs.")
+    generate_parser.add_argument("--top-k", type=int, default=5, help="Number of contexts put into a prompt.")
+    generate_parser.add_argument("--max-tokens", type=int, default=None, help="Maximal number of generated tokens per answer.")
+    generate_parser.add_argument("--batch-size", type=int, default=8, help="Number of prompts sent to the model at once.")
+    generate_parser.add_argument("--concurrency", type=int, default=4, help="Maximal number of batches in flight.")
+    generate_parser.add_argument("--cache-dir", default=None, help="Directory of the response cache, re-runs of cached prompts cost nothing.")
+    generate_parser.add_argument("--prompt-price", type=float, default=0.0, help="Price of a million prompt tokens.")
+    generate_parser.add_argument("--completion-price", type=float, default=0.0, help="Price of a million completion tokens.")
+
+    report_parser = subparsers.add_parser("report", help="Break the metrics of sample datasets down by file, page, score and question length.")
+    report_parser.add_argument("--baseline", required=True, help="Baseline dataset JSON file.")
+    report_parser.add_argument("--samples", required=True, nargs="+", help="Sample dataset JSON files or glob patterns.")
+    report_parser.add_argument(
+        "--view", action="append", choices=("file", "page", "score", "question_length"), default=None,
+        help="Drill-down view to export, all of them by default. Can be repeated."
+    )
+    report_parser.add_argument("--score-bins", type=int, default=5, help="Number of equal-frequency score buckets.")
+    report_parser.add_argument("--facts", action="store_true", help="Also export the per-(task, context) fact table.")
+    report_parser.add_argument("--format", choices=EXPORT_FORMATS, default="csv", help="Format of the exported views.")
+    report_parser.add_argument("--output", required=True, help="Directory of the exported views.")
+    report_parser.add_argument(
+        "--normalize", default=None, metavar="STEP[,STEP...]",
+        help="Normalize texts before comparing them, with steps among nfkc, casefold, punctuation, stopwords and whitespace."
+    )
+
+    sweep_parser = subparsers.add_parser("sweep", help="Sweep score thresholds of sample datasets and check score calibration.")
+    sweep_parser.add_argument("--baseline", required=True, help="Baseline dataset JSON file.")
+    sweep_parser.add_argument("--samples", required=True, nargs="+", help="Sample dataset JSON files or glob patterns.")
+    sweep_parser.add_argument("--bins", type=int, default=10, help="Number of bins of the reliability diagram.")
+    sweep_parser.add_argument("--format", choices=EXPORT_FORMATS, default="csv", help="Format of the curves and diagrams.")
+    sweep_parser.add_argument("--output", default=None, help="Directory of the threshold curves and reliability diagrams.")
+    sweep_parser.add_argument(
+        "--normalize", default=None, metavar="STEP[,STEP...]",
+        help="Normalize texts before comparing them, with steps among nfkc, casefold, punctuation, stopwords and whitespace."
+    )
+
+    estimate_parser = subparsers.add_parser("estimate", help="Estimate the metrics from a growing stratified sample of tasks, with confidence intervals.")
+    estimate_parser.add_argument("--baseline", required=True, help="Baseline dataset JSON file.")
+    estimate_parser.add_argument("--samples", required=True, nargs="+", help="Sample dataset JSON files or glob patterns.")
+    estimate_parser.add_argument("--metrics", default=None, help=f"Comma-separated metrics, among {', '.join(METRICS)}.")
+    estimate_parser.add_argument("--width", type=float, default=0.05, help="Target width of every confidence interval.")
+    estimate_parser.add_argument("--confidence", type=float, default=0.95, help="Confidence level of the intervals.")
+    estimate_parser.add_argument("--batch-size", type=int, default=100, help="Size of the first round, and minimal growth per round.")
+    estimate_parser.add_argument("--max-tasks", type=int, default=None, help="Maximal number of evaluated tasks per sample dataset.")
+    estimate_parser.add_argument("--strata", choices=("file", "none"), default="file", help="Stratify tasks by the file of their first context, or not.")
+    estimate_parser.add_argument("--seed", type=int, default=0, help="Seed of the random sample.")
+    estimate_parser.add_argument("--workers", type=int, default=1, help="Number of worker processes.")
+    estimate_parser.add_argument(
+        "--normalize", default=None, metavar="STEP[,STEP...]",
+        help="Normalize texts before comparing them, with steps among nfkc, casefold, punctuation, stopwords and whitespace."
+    )
+
+    label_parser = subparsers.add_parser("label", help="Label the baseline contexts of questions by aligning their reference answers to documents.")
+    label_parser.add_argument("--questions", required=True, help="JSON file of questions with reference answers, a dataset with TASKS or a list.")
+    label_parser.add_argument(
+        "--documents", required=True, nargs="+",
+        help="Document files or glob patterns: PDFs, text files with form feeds between pages, a TSV corpus or a SQuAD-format JSON file."
+    )
+    label_parser.add_argument("--output", required=True, help="File of the labelled baseline dataset.")
+    label_parser.add_argument("--name", default=None, help="Name of the dataset, defaults to the name of the questions file.")
+    label_parser.add_argument("--page-size", type=int, default=None, help="Emulate pages of about this many characters for text documents.")
+    label_parser.add_argument("--page-cache", default=".cache/pages", help="Cache directory of the text extracted from PDFs.")
+    label_parser.add_argument("--ngram", type=int, default=3, help="Number of words of the indexed n-grams.")
+    label_parser.add_argument("--threshold", type=int, default=85, help="Minimal fuzzy score, from 0 to 100, of a labelled passage.")
+    label_parser.add_argument("--max-contexts", type=int, default=1, help="Maximal number of contexts labelled per question.")
+    label_parser.add_argument("--workers", type=int, default=1, help="Number of worker processes.")
+
+    coverage_parser = subparsers.add_parser(
+        "coverage", help="Report the regions of the corpus that samples retrieve, miss or over-retrieve compared to a baseline."
+    )
+    coverage_parser.add_argument("--baseline", required=True, help="Baseline dataset JSON file.")
+    coverage_parser.add_argument("--samples", required=True, nargs="+", help="Sample dataset JSON files or glob patterns.")
+    coverage_parser.add_argument(
+        "--documents", nargs="*", default=[],
+        help="Corpus files or glob patterns, as for `ragbench label`, to report unsurfaced regions. Needed by --granularity char."
+    )
+    coverage_parser.add_argument("--granularity", choices=("page", "char"), default="page", help="Map contexts to pages or to character spans.")
+    coverage_parser.add_argument("--page-size", type=int, default=None, help="Emulate pages of about this many characters for text documents.")
+    coverage_parser.add_argument("--page-cache", default=".cache/pages", help="Cache directory of the text extracted from PDFs.")
+    coverage_parser.add_argument("--output", default=None, help="File of the coverage reports, printed otherwise.")
+
+    align_parser = subparsers.add_parser(
+        "align", help="Export the baseline x sample alignment matrices of every task, and match the contexts one-to-one."
+    )
+    align_parser.add_argument("--baseline", required=True, help="Baseline dataset JSON file.")
+    align_parser.add_argument("--samples", required=True, nargs="+", help="Sample dataset JSON files or glob patterns.")
+    align_parser.add_argument(
+        "--metrics", default=None,
+        help="Comma-separated metrics, among recall_by_char, precision_by_char, recall_by_page_number, "
+             "precision_by_page_number and similarity_by_tfidf. All of them by default."
+    )
+    align_parser.add_argument("--assign", default="recall_by_char", help="Metric the contexts are matched on, 'none' to skip matching.")
+    align_parser.add_argument("--method", choices=("hungarian", "greedy"), default="hungarian", help="Matching method.")
+    align_parser.add_argument("--output", required=True, help="Directory of the .npz files, one per sample dataset.")
+    align_parser.add_argument(
+        "--normalize", default=None, metavar="STEP[,STEP...]",
+        help="Normalize texts before comparing them, with steps among nfkc, casefold, punctuation, stopwords and whitespace."
+    )
+
+    pubmedqa_parser = subparsers.add_parser("pubmedqa", help="Evaluate yes/no/maybe answers and retrieved contexts on PubMedQA.")
+    pubmedqa_parser.add_argument("--data", default="data/pubmedqa/ori_pqal.json", help="PubMedQA file with the labelled questions.")
+    pubmedqa_parser.add_argument("--ground-truth", default=None, help="Split file mapping PubMed ids to decisions, to evaluate only that split.")
+    pubmedqa_parser.add_argument(
+        "--predictions", default=None,
+        help="JSON file mapping PubMed ids to answers, or a sample dataset whose contexts are also scored."
+    )
+    pubmedqa_parser.add_argument("--model", default=None, help="Model name, to generate the answers from the sections of the abstracts.")
+    pubmedqa_parser.add_argument(
+        "--base-url", default=None,
+        help="Base URL of an OpenAI-compatible API, defaults to OPENAI_BASE_URL or the OpenAI API. The key is read from OPENAI_API_KEY."
+    )
+    pubmedqa_parser.add_argument("--stub", action="store_true", help="Generate the answers with the local stub model, e.g. for dry runs.")
+    pubmedqa_parser.add_argument("--batch-size", type=int, default=8, help="Number of prompts sent to the model at once.")
+    pubmedqa_parser.add_argument("--concurrency", type=int, default=4, help="Maximal number of batches in flight.")
+    pubmedqa_parser.add_argument("--cache-dir", default=None, help="Directory of the response cache.")
+    pubmedqa_parser.add_argument("--output", default=None, help="File of the sample dataset with generated answers.")
+    pubmedqa_parser.add_argument("--workers", type=int, default=1, help="Number of worker processes scoring retrieved contexts.")
+    pubmedqa_parser.add_argument(
+        "--normalize", default=None, metavar="STEP[,STEP...]",
+        help="Normalize texts before comparing them, with steps among nfkc, casefold, punctuation, stopwords and whitespace."
+    )
+
+    serve_parser = subparsers.add_parser(
+        "serve", help="Serve POST /evaluate and /evaluate/batch over HTTP, with baselines loaded once and a warm worker pool."
+    )
+    serve_parser.add_argument(
+        "--baseline", required=True, nargs="+",
+        help="Baseline dataset JSON files or glob patterns, selected by the DATASET of a request, their NAME."
+    )
+    serve_parser.add_argument("--host", default="127.0.0.1", help="Address to listen on.")
+    serve_parser.add_argument("--port", type=int, default=8000, help="Port to listen on.")
+    serve_parser.add_argument("--metrics", nargs="+", choices=METRICS, default=list(METRICS), help="Metrics to compute.")
+    serve_parser.add_argument("--workers", type=int, default=1, help="Number of worker processes evaluating large batches.")
+    serve_parser.add_argument("--chunk-size", type=int, default=64, help="Number of tasks sent to a worker at once.")
+    serve_parser.add_argument("--no-validate", action="store_true", help="Skip the schema validation of the baselines and requests.")
+    serve_parser.add_argument(
+        "--normalize", default=None, metavar="STEP[,STEP...]",
+        help="Normalize texts before comparing them, with steps among nfkc, casefold, punctuation, stopwords and whitespace."
+    )
+    serve_parser.add_argument(
+        "--cache", default=None, metavar="PATH",
+        help="SQLite file memoizing per-task metric values across restarts, shared with `ragbench eval --cache`."
+    )
+    serve_parser.add_argument("--verbose", action="store_true", help="Log every request.")
+
+    watch_parser = subparsers.add_parser("watch", help="Evaluate a live trace file of sample tasks over tumbling and sliding windows.")
+    watch_parser.add_argument("--baseline", required=True, help="Baseline dataset JSON file.")
+    watch_parser.add_argument("--trace", required=True, help="Append-only JSONL file of sample tasks with their TASK_ID and optional TIMESTAMP.")
+    watch_parser.add_argument("--window", type=float, default=300.0, help="Length of the sliding window, in seconds.")
+    watch_parser.add_argument("--tumbling", type=float, default=60.0, help="Length of the tumbling windows, in seconds.")
+    watch_parser.add_argument("--interval", type=float, default=10.0, help="Period of the snapshots, in seconds.")
+    watch_parser.add_argument("--duration", type=float, default=None, help="Stop after this many seconds, follow forever by default.")
+    watch_parser.add_argument("--from-end", action="store_true", help="Skip the records already in the trace file.")
+    watch_parser.add_argument(
+        "--normalize", default=None, metavar="STEP[,STEP...]",
+        help="Normalize texts before comparing them, with steps among nfkc, casefold, punctuation, stopwords and whitespace."
+    )
+
+    validate_parser = subparsers.add_parser("validate", help="Check datasets against the dataset schema without evaluating them.")
+    validate_parser.add_argument("--baseline", required=True, help="Baseline dataset JSON file.")
+    validate_parser.add_argument("--samples", nargs="*", default=[], help="Sample dataset JSON files or glob patterns.")
+    return parser
+
+
+def run_eval(args: argparse.Namespace) -> int:
+    """
+    Run the `eval` command.
+
+    Parameters:
+    args (argparse.Namespace): The parsed arguments.
+
+    Returns:
+    int: 0 if every threshold is met, 1 if any metric regressed.
+    """
+    from tclogger import logger, TCLogbar
+    from .evaluator.dataset_evaluator.dataset_evaluator import DatasetEvaluator
+    from .evaluator.dataset_evaluator.task_result_cache import TaskResultCache
+    from .exporter.exporter import export_rows
+    from .profiling.profiler import PROFILER
+
+    if args.tfidf:
+        from .metrics.metrics_by_content.calc_tfidf_similarity import TfidfSimilarity
+    thresholds = _parse_thresholds(args.threshold, (*METRICS, *TfidfSimilarity.METRICS) if args.tfidf else METRICS)
+    normalizer = _parse_normalizer(args.normalize)
+    sample_paths = _expand_paths(args.samples)
+    shard_index, num_shards = _parse_shard(args.shard)
+    if num_shards > 1 and not args.output:
+        raise CLIError("Sharded evaluations need --output for their partial aggregates!")
+    if num_shards > 1 and args.tfidf:
+        raise CLIError("TF-IDF similarities are fitted over whole datasets and cannot be sharded!")
+    if num_shards > 1 and thresholds:
+        raise CLIError("Thresholds apply to whole datasets, pass --threshold to `ragbench merge` instead of a sharded eval!")
+    if args.profile:
+        PROFILER.enable()
+    cache = TaskResultCache(args.cache) if args.cache else None
+
+    baseline_dataset_dict = _load_json(args.baseline)
+    summaries = {}
+    regressions = []
+    for sample_path in sample_paths:
+        sample_dataset_dict = _load_json(sample_path)
+        with _user_input():
+            evaluator = DatasetEvaluator(
+                baseline_dataset_dict, sample_dataset_dict,
+                metrics=args.metrics, workers=args.workers, chunk_size=args.chunk_size, validate=not args.no_validate,
+                shard_index=shard_index, num_shards=num_shards, normalizer=normalizer, cache=cache
+            )
+        progress_bar = TCLogbar(total=evaluator.num_tasks, head=os.path.basename(sample_path), verbose=not args.quiet)
+        rows = []
+        for row in evaluator.iter_results():
+            rows.append(row)
+            progress_bar.update(increment=1)
+        if not args.quiet:
+            progress_bar.update(flush=True, linebreak=True)
+
+        metrics = DatasetEvaluator.aggregate(rows, evaluator.metrics)
+        if args.tfidf:
+            tfidf = TfidfSimilarity(normalizer=normalizer).calculate_by_dataset(baseline_dataset_dict, sample_dataset_dict)
+            tfidf_rows = {row["task_id"]: row for row in tfidf["tasks"]}
+            for row in rows:
+                row.update(tfidf_rows[row["task_id"]])
+            metrics.update(tfidf["metrics"])
+        summaries[sample_path] = {"num_tasks": len(rows), "metrics": metrics}
+        if args.output:
+            stem = os.path.splitext(os.path.basename(sample_path))[0]
+            if num_shards > 1:
+                stem = f"{stem}.shard-{shard_index}-of-{num_shards}"
+                evaluator.write_partial(os.path.join(args.output, f"{stem}.partial.json"), rows=rows)
+            export_rows(rows, os.path.join(args.output, f"{stem}.{args.format}"), format=args.format)
+        regressions.extend(_check_thresholds(sample_path, metrics, thresholds))
+
+    summary = {"baseline": args.baseline, "samples": summaries, "regressions": regressions}
+    if cache is not None:
+        summary["cache"] = {"path": args.cache, "hits": cache.hits, "misses": cache.misses}
+        cache.close()
+    if args.output:
+        summary_name = "summary.json" if num_shards == 1 else f"summary.shard-{shard_index}-of-{num_shards}.json"
+        export_path = os.path.join(args.output, summary_name)
+        with open(export_path, "w", encoding="utf-8") as f:
+            json.dump(summary, f, ensure_ascii=False, indent=4)
+    print(json.dumps(summary, ensure_ascii=False, indent=4))
+
+    if args.profile:
+        PROFILER.disable()
+        PROFILER.log_report()
+    for regression in regressions:
+        logger.warn(f"× Regression: {regression}")
+    return 1 if regressions else 0
+
+
+def run_merge(args: argparse.Namespace) -> int:
+    """
+    Run the `merge` command.
+
+    Parameters:
+    args (argparse.Namespace): The parsed arguments.
+
+    Returns:
+    int: 0 if every threshold is met, 1 if any metric regressed.
+    """
+    from tclogger import logger
+    from .evaluator.dataset_evaluator.dataset_evaluator import DatasetEvaluator
+
+    thresholds = _parse_thresholds(args.threshold)
+    partial_paths = _expand_paths(args.partials)
+    # merging only fails on partials that do not belong together
+    with _user_input():
+        result = DatasetEvaluator.merge_partials(partial_paths, allow_missing_shards=args.allow_missing_shards)
+    regressions = _check_thresholds("merged", result["metrics"], thresholds)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(result, f, ensure_ascii=False, indent=4)
+    summary = {
+        "num_tasks": result["num_tasks"],
+        "metrics": result["metrics"],
+        "missing_shards": result["missing_shards"],
+        "regressions": regressions,
+    }
+    print(json.dumps(summary, ensure_ascii=False, indent=4))
+    for regression in regressions:
+        logger.warn(f"× Regression: {regression}")
+    return 1 if regressions else 0
+
+
+def run_chunk(args: argparse.Namespace) -> int:
+    """
+    Run the `chunk` command.
+
+    Parameters:
+    args (argparse.Namespace): The parsed arguments.
+
+    Returns:
+    int: 0 on success.
+    """
+    from .chunking.chunkers import ChunkingConfig
+    from .chunking.corpus import load_tsv_documents, load_squad_documents, squad_to_baseline_dict
+    from .chunking.simulator import ChunkingSimulator
+
+    with _user_input():
+        configs = [ChunkingConfig.parse(spec) for spec in args.config]
+    if not os.path.isfile(args.corpus):
+        raise CLIError(f"No file found for {args.corpus!r}!")
+    is_squad = args.corpus.endswith(".json")
+    if not is_squad and args.baseline is None:
+        raise CLIError("--baseline is required unless the corpus is a SQuAD-format JSON file!")
+    if is_squad:
+        documents = load_squad_documents(args.corpus, page_size=args.page_size)
+    else:
+        documents = load_tsv_documents(args.corpus, page_size=args.page_size)
+
+    os.makedirs(args.output, exist_ok=True)
+    if args.baseline is None:
+        baseline_dataset_dict = squad_to_baseline_dict(args.corpus, documents)
+        baseline_path = os.path.join(args.output, "baseline.json")
+        with open(baseline_path, "w", encoding="utf-8") as f:
+            json.dump(baseline_dataset_dict, f, ensure_ascii=False, indent=4)
+    else:
+        baseline_path = args.baseline
+        baseline_dataset_dict = _load_json(args.baseline)
+
+    simulator = ChunkingSimulator(documents, configs).run()
+    sample_dataset_dicts = simulator.build_sample_datasets(baseline_dataset_dict, top_k=args.top_k, retriever=args.retriever)
+    sample_paths = []
+    for config_name, sample_dataset_dict in sample_dataset_dicts.items():
+        sample_path = os.path.join(args.output, f"{config_name}.json")
+        with open(sample_path, "w", encoding="utf-8") as f:
+            json.dump(sample_dataset_dict, f, ensure_ascii=False, indent=4)
+        sample_paths.append(sample_path)
+    summary = {"baseline": baseline_path, "samples": sample_paths, "chunks": simulator.summary()}
+    print(json.dumps(summary, ensure_ascii=False, indent=4))
+    return 0
+
+
+def run_generate(args: argparse.Namespace) -> int:
+    """
+    Run the `generate` command.
+
+    Parameters:
+    args (argparse.Namespace): The parsed arguments.
+
+    Returns:
+    int: 0 if every answer was generated, 1 otherwise.
+    """
+    from .generation.answer_generator import AnswerGenerator
+
+    if args.stub:
+        from .chat_models.stub_chat_model import StubChatModel
+
+        chat_model = StubChatModel()
+    else:
+        from .chat_models.gpt_chat_model import GPTChatModel
+
+        chat_model = GPTChatModel(args.model, base_url=args.base_url, max_tokens=args.max_tokens)
+    with _user_input():
+        generator = AnswerGenerator(
+            chat_model, top_k=args.top_k, batch_size=args.batch_size, max_concurrency=args.concurrency,
+            cache_dir=args.cache_dir, prompt_price=args.prompt_price, completion_price=args.completion_price
+        )
+    sample_dataset_dict = generator.generate(_load_json(args.samples))
+    output_dir = os.path.dirname(args.output)
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(sample_dataset_dict, f, ensure_ascii=False, indent=4)
+    usage = generator.usage.summary()
+    print(json.dumps({"output": args.output, "usage": usage}, ensure_ascii=False, indent=4))
+    return 1 if usage["errors"] else 0
+
+
+def run_report(args: argparse.Namespace) -> int:
+    """
+    Run the `report` command.
+
+    Parameters:
+    args (argparse.Namespace): The parsed arguments.
+
+    Returns:
+    int: 0 on success.
+    """
+    from .analysis.drilldown import DrillDownReport, DRILLDOWN_VIEWS
+
+    views = args.view or list(DRILLDOWN_VIEWS)
+    normalizer = _parse_normalizer(args.normalize)
+    baseline_dataset_dict = _load_json(args.baseline)
+    exported = {}
+    for sample_path in _expand_paths(args.samples):
+        report = DrillDownReport.build(baseline_dataset_dict, _load_json(sample_path), normalizer=normalizer)
+        stem = os.path.splitext(os.path.basename(sample_path))[0]
+        paths = []
+        for view in views:
+            kwargs = {"bins": args.score_bins} if view == "score" else {}
+            export_path = os.path.join(args.output, f"{stem}.by_{view}.{args.format}")
+            paths.append(report.export(view, export_path, format=args.format, **kwargs))
+        if args.facts:
+            paths.append(report.export("facts", os.path.join(args.output, f"{stem}.facts.{args.format}"), format=args.format))
+        exported[sample_path] = paths
+    print(json.dumps({"baseline": args.baseline, "reports": exported}, ensure_ascii=False, indent=4))
+    return 0
+
+
+def run_sweep(args: argparse.Namespace) -> int:
+    """
+    Run the `sweep` command.
+
+    Parameters:
+    args (argparse.Namespace): The parsed arguments.
+
+    Returns:
+    int: 0 on success.
+    """
+    from .analysis.drilldown import DrillDownReport
+    from .analysis.threshold_sweep import ThresholdSweep
+    from .exporter.exporter import export_rows
+
+    normalizer = _parse_normalizer(args.normalize)
+    baseline_dataset_dict = _load_json(args.baseline)
+    summaries = {}
+    for sample_path in _expand_paths(args.samples):
+        sweep = ThresholdSweep(baseline_dataset_dict, _load_json(sample_path), normalizer=normalizer)
+        diagram, calibration = sweep.calibration(num_bins=args.bins)
+        summaries[sample_path] = {"best_thresholds": sweep.best_thresholds(), "calibration": calibration}
+        if args.output:
+            stem = os.path.splitext(os.path.basename(sample_path))[0]
+            # the first point, at an infinite threshold that keeps no context, is not representable in JSON
+            curve = sweep.curve().iloc[1:]
+            export_rows(DrillDownReport.to_rows(curve), os.path.join(args.output, f"{stem}.thresholds.{args.format}"), format=args.format)
+            export_rows(DrillDownReport.to_rows(diagram), os.path.join(args.output, f"{stem}.calibration.{args.format}"), format=args.format)
+    print(json.dumps({"baseline": args.baseline, "samples": summaries}, ensure_ascii=False, indent=4))
+    return 0
+
+
+def run_estimate(args: argparse.Namespace) -> int:
+    """
+    Run the `estimate` command.
+
+    Parameters:
+    args (argparse.Namespace): The parsed arguments.
+
+    Returns:
+    int: 0 if every estimate reached the target width, 1 otherwise.
+    """
+    from .evaluator.sampled_evaluator.sampled_evaluator import SampledEvaluator, file_stratum
+
+    metrics = [metric.strip() for metric in args.metrics.split(",")] if args.metrics else None
+    normalizer = _parse_normalizer(args.normalize)
+    baseline_dataset_dict = _load_json(args.baseline)
+    results = {}
+    for sample_path in _expand_paths(args.samples):
+        sample_dataset_dict = _load_json(sample_path)
+        with _user_input():
+            evaluator = SampledEvaluator(
+                baseline_dataset_dict, sample_dataset_dict, metrics=metrics, target_width=args.width,
+                confidence=args.confidence, batch_size=args.batch_size, max_tasks=args.max_tasks,
+                strata=file_stratum if args.strata == "file" else None, seed=args.seed, workers=args.workers,
+                normalizer=normalizer
+            )
+        results[sample_path] = evaluator.evaluate()
+    print(json.dumps({"baseline": args.baseline, "samples": results}, ensure_ascii=False, indent=4))
+    return 0 if all(result["stopped"] != "max_tasks" for result in results.values()) else 1
+
+
+def run_label(args: argparse.Namespace) -> int:
+    """
+    Run the `label` command.
+
+    Parameters:
+    args (argparse.Namespace): The parsed arguments.
+
+    Returns:
+    int: 0 if every question was labelled, 1 otherwise.
+    """
+    from .labelling.baseline_labeller import BaselineLabeller, load_questions
+
+    documents = _load_corpus(args.documents, page_size=args.page_size, page_cache=args.page_cache, workers=args.workers)
+    questions_dict = _load_json(args.questions)
+    with _user_input():
+        questions = load_questions(questions_dict)
+        labeller = BaselineLabeller(
+            documents, n=args.ngram, threshold=args.threshold, max_contexts=args.max_contexts, workers=args.workers
+        )
+    name = args.name or os.path.splitext(os.path.basename(args.questions))[0]
+    baseline_dataset_dict = labeller.label(questions, name=name)
+    output_dir = os.path.dirname(args.output)
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(baseline_dataset_dict, f, ensure_ascii=False, indent=4)
+    unlabelled = baseline_dataset_dict["UNLABELLED"]
+    print(json.dumps({
+        "output": args.output,
+        "num_documents": len(documents),
+        "num_pages": sum(document.num_pages for document in documents),
+        "num_tasks": len(questions),
+        "num_unlabelled": len(unlabelled),
+    }, ensure_ascii=False, indent=4))
+    return 1 if unlabelled else 0
+
+
+def run_coverage(args: argparse.Namespace) -> int:
+    """
+    Run the `coverage` command.
+
+    Parameters:
+    args (argparse.Namespace): The parsed arguments.
+
+    Returns:
+    int: 0 on success.
+    """
+    from .analysis.coverage import CoverageAnalyzer
+
+    corpus = _load_corpus(args.documents, page_size=args.page_size, page_cache=args.page_cache) if args.documents else None
+    baseline_dataset_dict = _load_json(args.baseline)
+    reports = {}
+    for sample_path in _expand_paths(args.samples):
+        with _user_input():
+            analyzer = CoverageAnalyzer(documents=baseline_dataset_dict["DOCUMENTS"] or None, corpus=corpus, granularity=args.granularity)
+        reports[sample_path] = analyzer.analyze_dataset_dicts(baseline_dataset_dict, _load_json(sample_path))
+    summary = {"baseline": args.baseline, "samples": reports}
+    if args.output:
+        output_dir = os.path.dirname(args.output)
+        if output_dir:
+            os.makedirs(output_dir, exist_ok=True)
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(summary, f, ensure_ascii=False, indent=4)
+        summary = {
+            "baseline": args.baseline,
+            "output": args.output,
+            "samples": {
+                sample_path: {key: value for key, value in report.items() if key != "documents"}
+                for sample_path, report in reports.items()
+            },
+        }
+    print(json.dumps(summary, ensure_ascii=False, indent=4))
+    return 0
+
+
+def run_align(args: argparse.Namespace) -> int:
+    """
+    Run the `align` command.
+
+    Parameters:
+    args (argparse.Namespace): The parsed arguments.
+
+    Returns:
+    int: 0 on success.
+    """
+    from .analysis.alignment import AlignmentBuilder
+
+    metrics = [metric.strip() for metric in args.metrics.split(",")] if args.metrics else None
+    assignment_metric = None if args.assign == "none" else args.assign
+    normalizer = _parse_normalizer(args.normalize)
+    with _user_input():
+        builder = AlignmentBuilder(metrics=metrics, normalizer=normalizer)
+    if assignment_metric is not None and assignment_metric not in builder.metrics:
+        raise CLIError(f"Cannot match contexts on {assignment_metric}, which is not among the computed metrics!")
+    baseline_dataset_dict = _load_json(args.baseline)
+    exported = {}
+    for sample_path in _expand_paths(args.samples):
+        alignments = builder.align_dataset(
+            baseline_dataset_dict, _load_json(sample_path), assignment_metric=assignment_metric, assignment_method=args.method
+        )
+        stem = os.path.splitext(os.path.basename(sample_path))[0]
+        exported[sample_path] = {
+            "output": AlignmentBuilder.save(alignments, os.path.join(args.output, f"{stem}.alignment.npz")),
+            "num_tasks": len(alignments),
+            "num_pairs": sum(alignment.shape[0] * alignment.shape[1] for alignment in alignments),
+            "num_matches": sum(len(alignment.assignment[0]) for alignment in alignments) if assignment_metric else None,
+        }
+    print(json.dumps({"baseline": args.baseline, "metrics": builder.metrics, "samples": exported}, ensure_ascii=False, indent=4))
+    return 0
+
+
+def run_pubmedqa(args: argparse.Namespace) -> int:
+    """
+    Run the `pubmedqa` command.
+
+    Parameters:
+    args (argparse.Namespace): The parsed arguments.
+
+    Returns:
+    int: 0 on success.
+
+    Raises:
+    CLIError: If neither predictions nor a model are given.
+    """
+    from .datasets.pubmed import PubMedQA
+    from .evaluator.pubmed_evaluator.pubmed_evaluator import PubMedQAEvaluator, DECISION_SYSTEM_PROMPT, decision_answers, generate_decisions
+
+    with _user_input():
+        dataset = PubMedQA.from_file(args.data, ground_truth_path=args.ground_truth)
+    usage = None
+    if args.predictions:
+        predictions = _load_json(args.predictions)
+    elif args.stub or args.model:
+        from .generation.answer_generator import AnswerGenerator
+
+        if args.stub:
+            from .chat_models.stub_chat_model import StubChatModel
+
+            chat_model = StubChatModel()
+        else:
+            from .chat_models.gpt_chat_model import GPTChatModel
+
+            chat_model = GPTChatModel(args.model, base_url=args.base_url)
+        generator = AnswerGenerator(
+            chat_model, top_k=max(len(task.baseline_contexts) for task in dataset.tasks), batch_size=args.batch_size,
+            max_concurrency=args.concurrency, cache_dir=args.cache_dir, system_prompt=DECISION_SYSTEM_PROMPT
+        )
+        generated = generate_decisions(dataset, generator)
+        usage = generator.usage.summary()
+        if args.output:
+            with open(args.output, "w", encoding="utf-8") as f:
+                json.dump(generated, f, ensure_ascii=False, indent=4)
+        # the contexts of the prompts are the abstracts themselves, there is no retrieval to score
+        predictions = decision_answers(generated)
+    else:
+        raise CLIError("Invalid arguments! Expected --predictions, --model or --stub.")
+    normalizer = _parse_normalizer(args.normalize)
+    result = PubMedQAEvaluator(dataset, predictions, workers=args.workers).evaluate(normalizer=normalizer)
+    if usage is not None:
+        result["usage"] = usage
+    print(json.dumps(result, ensure_ascii=False, indent=4))
+    return 0
+
+
+def run_serve(args: argparse.Namespace) -> int:
+    """
+    Run the `serve` command until interrupted.
+
+    Parameters:
+    args (argparse.Namespace): The parsed arguments.
+
+    Returns:
+    int: 0 on success.
+
+    Raises:
+    CLIError: If two baselines have the same NAME.
+    """
+    from tclogger import logger
+    from .evaluator.dataset_evaluator.task_result_cache import TaskResultCache
+    from .server.evaluation_server import EvaluationServer, EvaluationService
+
+    baselines = {}
+    for baseline_path in _expand_paths(args.baseline):
+        baseline_dataset_dict = _load_json(baseline_path)
+        name = baseline_dataset_dict.get("NAME") or os.path.splitext(os.path.basename(baseline_path))[0]
+        if name in baselines:
+            raise CLIError(f"Several baselines are named {name!r}!")
+        baselines[name] = baseline_dataset_dict
+    normalizer = _parse_normalizer(args.normalize)
+    cache = TaskResultCache(args.cache) if args.cache else None
+    with _user_input():
+        service = EvaluationService(
+            baselines, metrics=args.metrics, workers=args.workers, chunk_size=args.chunk_size,
+            validate=not args.no_validate, normalizer=normalizer, cache=cache
+        )
+    with service, EvaluationServer(service, host=args.host, port=args.port, verbose=args.verbose) as server:
+        logger.note(f"> Serving {', '.join(baselines)} on {server.url}")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+    if cache is not None:
+        cache.close()
+    return 0
+
+
+def run_watch(args: argparse.Namespace) -> int:
+    """
+    Run the `watch` command, printing one JSON snapshot per line.
+
+    Parameters:
+    args (argparse.Namespace): The parsed arguments.
+
+    Returns:
+    int: 0 on success.
+    """
+    from .evaluator.stream_evaluator.stream_evaluator import StreamEvaluator, TraceTailer
+
+    normalizer = _parse_normalizer(args.normalize)
+    baseline_dataset_dict = _load_json(args.baseline)
+    with _user_input():
+        evaluator = StreamEvaluator(baseline_dataset_dict, window=args.window, tumbling=args.tumbling, normalizer=normalizer)
+    tailer = TraceTailer(args.trace, from_start=not args.from_end)
+    try:
+        for snapshot in evaluator.follow(tailer, interval=args.interval, duration=args.duration):
+            print(json.dumps(snapshot, ensure_ascii=False), flush=True)
+    except KeyboardInterrupt:
+        print(json.dumps(evaluator.snapshot(), ensure_ascii=False), flush=True)
+    return 0
+
+
+def run_validate(args: argparse.Namespace) -> int:
+    """
+    Run the `validate` command.
+
+    Parameters:
+    args (argparse.Namespace): The parsed arguments.
+
+    Returns:
+    int: 0 if every dataset is valid, 1 otherwise.
+    """
+    from .datasets.dataset_validator import DatasetValidator
+
+    baseline_dataset_dict = _load_json(args.baseline)
+    errors = []
+    if args.samples:
+        for sample_path in _expand_paths(args.samples):
+            for task_id, message in DatasetValidator.iter_pair_errors(baseline_dataset_dict, _load_json(sample_path)):
+                errors.append({"file": sample_path, "task_id": task_id, "message": message})
+    else:
+        for task_id, message in DatasetValidator(rag=False).iter_errors(baseline_dataset_dict):
+            errors.append({"file": args.baseline, "task_id": task_id, "message": message})
+    print(json.dumps({"valid": not errors, "errors": errors}, ensure_ascii=False, indent=4))
+    return 1 if errors else 0
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    """
+    Entry point of the `ragbench` command.
+
+    Parameters:
+    argv (Optional[Sequence[str]]): The command-line arguments, defaults to sys.argv.
+
+    Returns:
+    int: The process exit code.
+    """
+    from .datasets.dataset_validator import DatasetValidationError
+
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    try:
+        if getattr(args, "format", None) is not None:
+            # fail before evaluating rather than when exporting the results
+            with _user_input():
+                check_export_format(args.format)
+        if args.command == "eval":
+            return run_eval(args)
+        if args.command == "merge":
+            return run_merge(args)
+        if args.command == "chunk":
+            return run_chunk(args)
+        if args.command == "generate":
+            return run_generate(args)
+        if args.command == "report":
+            return run_report(args)
+        if args.command == "sweep":
+            return run_sweep(args)
+        if args.command == "estimate":
+            return run_estimate(args)
+        if args.command == "label":
+            return run_label(args)
+        if args.command == "coverage":
+            return run_coverage(args)
+        if args.command == "align":
+            return run_align(args)
+        if args.command == "pubmedqa":
+            return run_pubmedqa(args)
+        if args.command == "serve":
+            return run_serve(args)
+        if args.command == "watch":
+            return run_watch(args)
+        if args.command == "validate":
+            return run_validate(args)
+    except (CLIError, DatasetValidationError) as e:
+        parser.error(str(e))
+    return 2
+
+
+if __name__ == "__main__":
+    sys.exit(main())
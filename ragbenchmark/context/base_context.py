@@ -1,4 +1,4 @@
-from typing import Dict
+from typing import Dict, Optional
 from abc import ABC, abstractmethod
 
 class BaseContext(ABC):
@@ -7,10 +7,12 @@ class BaseContext(ABC):
 
     Attributes:
     _text (str): The text content of the context.
+    _normalized_text (Optional[str]): The text after normalization, set by a TextNormalizer.
 
     Methods:
     _extract(context_dict: Dict): Abstract method to extract information from a context dictionary, must be implemented by subclasses.
     text: Property to get the text content of the context.
+    normalized_text: Property to get the normalized text content of the context.
     """
 
     def __init__(self) -> None:
@@ -18,6 +20,7 @@ class BaseContext(ABC):
         Initialize the BaseContext with default values.
         """
         self._text: str = ""
+        self._normalized_text: Optional[str] = None
 
     @abstractmethod
     def _extract(self, context_dict: Dict) -> None:
@@ -38,3 +41,23 @@ class BaseContext(ABC):
         str: The text content of the context.
         """
         return self._text
+
+    @property
+    def normalized_text(self) -> str:
+        """
+        Get the normalized text content of the context, shared by all metrics.
+
+        Returns:
+        str: The normalized text, or the raw text if the context was not normalized.
+        """
+        return self._text if self._normalized_text is None else self._normalized_text
+
+    @normalized_text.setter
+    def normalized_text(self, normalized_text: str) -> None:
+        """
+        Set the normalized text content of the context.
+
+        Parameters:
+        normalized_text (str): The normalized text.
+        """
+        self._normalized_text = normalized_text
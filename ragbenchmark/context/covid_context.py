@@ -1,8 +1,3 @@
-import os
-import sys
-
-sys.path.append(os.path.dirname(os.path.abspath(__file__)))
-
 from .base_context import BaseContext
 
 class CovidContext(BaseContext):
@@ -1,10 +1,7 @@
-import os
-import sys
 from typing import List, Dict
 
-sys.path.append(os.path.dirname(os.path.abspath(__file__)))
-
-from base_context import BaseContext
+from .base_context import BaseContext
+from ..profiling.profiler import profile_stage
 
 class CustomContext(BaseContext):
     """
@@ -21,6 +18,7 @@ class CustomContext(BaseContext):
     page_number() -> List[int]: Returns the list of page numbers.
     """
 
+    @profile_stage("construct.context", counter="contexts")
     def __init__(self, context_dict: Dict) -> None:
         """
         Initialize CustomContext with a context dictionary.
@@ -1,10 +1,75 @@
-import os
-import sys
-
-sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from typing import Dict
 
 from .base_context import BaseContext
 
 class PubMedContext(BaseContext):
-    def __init__(self) -> None:
-        super().__init__()
\ No newline at end of file
+    """
+    PubMedContext is a class that extends BaseContext to hold one labelled section of a PubMedQA
+    abstract, e.g. its BACKGROUND or its RESULTS.
+
+    Attributes:
+    _label (str): The section label of the context.
+    _pmid (str): The PubMed id of the abstract.
+    _section (int): The 1-based position of the section in the abstract.
+
+    Methods:
+    _extract(context_dict: Dict) -> None: Extracts required attributes from the context dictionary.
+    label() -> str: Returns the section label.
+    pmid() -> str: Returns the PubMed id.
+    section() -> int: Returns the position of the section.
+    """
+
+    def __init__(self, context_dict: Dict) -> None:
+        """
+        Initialize PubMedContext with a context dictionary.
+
+        Parameters:
+        context_dict (Dict): A dictionary with the TEXT, LABEL, PMID and SECTION of the context.
+        """
+        super().__init__()
+        self._label: str = ""
+        self._pmid: str = ""
+        self._section: int = 0
+        self._extract(context_dict)
+
+    def _extract(self, context_dict: Dict) -> None:
+        """
+        Extract attributes from the context dictionary.
+
+        Parameters:
+        context_dict (Dict): A dictionary containing context information.
+        """
+        self._text = context_dict["TEXT"]
+        self._label = context_dict.get("LABEL", "")
+        self._pmid = context_dict.get("PMID", "")
+        self._section = context_dict.get("SECTION", 0)
+
+    @property
+    def label(self) -> str:
+        """
+        Get the section label of the context.
+
+        Returns:
+        str: The section label, empty if unknown.
+        """
+        return self._label
+
+    @property
+    def pmid(self) -> str:
+        """
+        Get the PubMed id of the abstract.
+
+        Returns:
+        str: The PubMed id.
+        """
+        return self._pmid
+
+    @property
+    def section(self) -> int:
+        """
+        Get the 1-based position of the section in the abstract.
+
+        Returns:
+        int: The position of the section.
+        """
+        return self._section
@@ -1,11 +1,7 @@
-import os
-import sys
 from typing import Optional, List, Dict, Any
 from abc import ABC, abstractmethod
 
-sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-
-from tasks.base_task import BaseTask
+from ..tasks.base_task import BaseTask
 
 class BaseDataset(ABC):
     """
@@ -1,16 +1,13 @@
-import os
-import sys
 from typing import Dict, Any
 
-sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-
-from base_dataset import BaseDataset
-from tasks.custom_task import CustomTask, CustomRagTask
+from .base_dataset import BaseDataset
+from ..tasks.custom_task import CustomTask
+from ..profiling.profiler import profile_stage
 
 class CustomDataset(BaseDataset):
     """
     A custom dataset class that extends the BaseDataset class. It initializes and extracts
-    dataset information and tasks from a provided dictionary.
+    dataset information and tasks from a baseline dictionary and the matching sample dictionary.
 
     Attributes:
     _dataset_name (Optional[str]): Name of the dataset.
@@ -18,41 +15,48 @@ class CustomDataset(BaseDataset):
     _tasks (List[BaseTask]): List of tasks associated with the dataset.
     """
 
-    def __init__(self, dataset_dict: Dict[str, Any]) -> None:
+    def __init__(self, dataset_dict: Dict[str, Any], sample_dataset_dict: Dict[str, Any]) -> None:
         """
         Initializes the CustomDataset and extracts dataset information and tasks.
 
         Parameters:
-        dataset_dict (Dict[str, Any]): Dictionary containing dataset information.
+        dataset_dict (Dict[str, Any]): Dictionary containing baseline dataset information.
+        sample_dataset_dict (Dict[str, Any]): Dictionary containing sample dataset information.
         """
         super().__init__()
-        self._extract(dataset_dict)
+        self._extract(dataset_dict, sample_dataset_dict)
 
-    def _extract(self, dataset_dict: Dict[str, Any]) -> None:
+    @profile_stage("parse.dataset")
+    def _extract(self, dataset_dict: Dict[str, Any], sample_dataset_dict: Dict[str, Any]) -> None:
         """
-        Extracts dataset information from the provided dictionary.
+        Extracts dataset information from the provided dictionaries.
 
         Parameters:
-        dataset_dict (Dict[str, Any]): Dictionary containing dataset information.
+        dataset_dict (Dict[str, Any]): Dictionary containing baseline dataset information.
+        sample_dataset_dict (Dict[str, Any]): Dictionary containing sample dataset information.
         """
         self._dataset_name = dataset_dict["NAME"]
         self._documents = dataset_dict["DOCUMENTS"]
-        self._extract_tasks(dataset_dict["TASKS"])
+        self._extract_tasks(dataset_dict["TASKS"], sample_dataset_dict["TASKS"])
 
-    def _extract_tasks(self, tasks_dict: Dict[str, Dict[str, Any]]) -> None:
+    def _extract_tasks(self, tasks_dict: Dict[str, Dict[str, Any]], sample_tasks_dict: Dict[str, Dict[str, Any]]) -> None:
         """
-        Extracts tasks from the provided dictionary and appends them to the tasks list.
+        Extracts tasks from the provided dictionaries and appends them to the tasks list.
+        Every baseline task is paired with the sample task of the same task id, or with an empty
+        sample if the samples lack it, like in DatasetEvaluator.
 
         Parameters:
-        tasks_dict (Dict[str, Dict[str, Any]]): Dictionary containing task information.
+        tasks_dict (Dict[str, Dict[str, Any]]): Dictionary containing baseline task information.
+        sample_tasks_dict (Dict[str, Dict[str, Any]]): Dictionary containing sample task information.
         """
         for task_id, task_info in tasks_dict.items():
-            self._tasks.append(CustomTask({task_id: task_info}))
+            sample_task_info = sample_tasks_dict.get(task_id) or {"QUESTION": task_info["QUESTION"], "ANSWER": "", "CONTEXTS": []}
+            self._tasks.append(CustomTask(task_id, task_info, sample_task_info))
 
 class CustomRagDataset(CustomDataset):
     """
     A custom RAG (Retrieval-Augmented Generation) dataset class that extends the CustomDataset class.
-    It specifically handles tasks related to RAG by utilizing the CustomRagTask class.
+    Its sample tasks come from a retriever, so their contexts are CustomRagContext objects with scores.
 
     Attributes:
     _dataset_name (Optional[str]): Name of the dataset.
@@ -60,43 +64,32 @@ class CustomRagDataset(CustomDataset):
     _tasks (List[BaseTask]): List of tasks associated with the dataset.
     """
 
-    def __init__(self, dataset_dict: Dict[str, Any]) -> None:
+    def __init__(self, dataset_dict: Dict[str, Any], sample_dataset_dict: Dict[str, Any]) -> None:
         """
         Initializes the CustomRagDataset and extracts dataset information and tasks.
 
         Parameters:
-        dataset_dict (Dict[str, Any]): Dictionary containing dataset information.
-        """
-        super().__init__(dataset_dict)
-
-    def _extract_tasks(self, tasks_dict: Dict[str, Dict[str, Any]]) -> None:
-        """
-        Extracts RAG-specific tasks from the provided dictionary and appends them to the tasks list.
-
-        Parameters:
-        tasks_dict (Dict[str, Dict[str, Any]]): Dictionary containing task information.
+        dataset_dict (Dict[str, Any]): Dictionary containing baseline dataset information.
+        sample_dataset_dict (Dict[str, Any]): Dictionary containing sample dataset information.
         """
-        for task_id, tasks_info in tasks_dict.items():
-            self._tasks.append(CustomRagTask({task_id: tasks_info}))
+        super().__init__(dataset_dict, sample_dataset_dict)
 
 if __name__ == "__main__":
     import json
 
     # Example usage for CustomDataset
-    file_path = "data/customized_dataset/baseline.json"
-    with open(file=file_path, mode='r', encoding='utf-8') as f:
-        ds_dict = json.load(f)
-    ds = CustomDataset(ds_dict)
+    with open(file="data/customized_dataset/baseline.json", mode='r', encoding='utf-8') as f:
+        baseline_ds_dict = json.load(f)
+    with open(file="data/customized_dataset/samples.json", mode='r', encoding='utf-8') as f:
+        sample_ds_dict = json.load(f)
+    ds = CustomDataset(baseline_ds_dict, sample_ds_dict)
 
     print("dataset name:", ds.dataset_name)
     print("documents:", ds.documents)
     print("task number:", len(ds.tasks))
 
     # Example usage for CustomRagDataset
-    file_path = "data/customized_dataset/samples.json"
-    with open(file=file_path, mode='r', encoding='utf-8') as f:
-        ds_dict = json.load(f)
-    ds = CustomRagDataset(ds_dict)
+    ds = CustomRagDataset(baseline_ds_dict, sample_ds_dict)
 
     print("dataset name:", ds.dataset_name)
     print("documents:", ds.documents)
@@ -0,0 +1,247 @@
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from schema import Schema, And, Or, SchemaError, Optional as OptionalKey
+
+ValidationError = Tuple[Optional[str], str]
+
+# bool is a subclass of int, but true/false are not page numbers or scores
+_INTEGER = And(int, lambda value: not isinstance(value, bool))
+_NON_EMPTY_PAGE_NUMBER = And([_INTEGER], len, error="PAGE_NUMBER must be a non-empty list of integers")
+_NUMBER = And(Or(int, float), lambda value: not isinstance(value, bool), error="SCORE must be a number")
+
+CONTEXT_SCHEMA = Schema({
+    "TEXT": str,
+    "FILE_PATH": str,
+    "PAGE_NUMBER": _NON_EMPTY_PAGE_NUMBER,
+    OptionalKey(str): object,
+})
+
+RAG_CONTEXT_SCHEMA = Schema({
+    "TEXT": str,
+    "FILE_PATH": str,
+    "PAGE_NUMBER": _NON_EMPTY_PAGE_NUMBER,
+    "SCORE": _NUMBER,
+    OptionalKey(str): object,
+})
+
+TASK_SCHEMA = Schema({
+    "QUESTION": str,
+    "ANSWER": str,
+    "CONTEXTS": list,
+    OptionalKey(str): object,
+})
+
+DATASET_SCHEMA = Schema({
+    "NAME": str,
+    "DOCUMENTS": list,
+    "TASKS": dict,
+    OptionalKey(str): object,
+})
+
+
+def _compile(fields: Dict[str, Callable[[Any], bool]]) -> Callable[[Any], bool]:
+    """
+    Compile the field checks of a record type into a single predicate.
+
+    The predicate is the fast path of the validator: valid records never reach the schema library,
+    which is only used to explain why a record was rejected.
+
+    Parameters:
+    fields (Dict[str, Callable[[Any], bool]]): Maps every required key to a check of its value.
+
+    Returns:
+    Callable[[Any], bool]: True if the record is a dictionary passing every check.
+    """
+    checks = tuple(fields.items())
+
+    def is_valid(record: Any) -> bool:
+        if type(record) is not dict:
+            return False
+        for key, check in checks:
+            if key not in record or not check(record[key]):
+                return False
+        return True
+
+    return is_valid
+
+
+def _is_str(value: Any) -> bool:
+    return isinstance(value, str)
+
+
+def _is_page_number(value: Any) -> bool:
+    return isinstance(value, list) and len(value) > 0 and all(isinstance(page, int) and not isinstance(page, bool) for page in value)
+
+
+def _is_score(value: Any) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+_is_valid_context = _compile({"TEXT": _is_str, "FILE_PATH": _is_str, "PAGE_NUMBER": _is_page_number})
+_is_valid_rag_context = _compile({"TEXT": _is_str, "FILE_PATH": _is_str, "PAGE_NUMBER": _is_page_number, "SCORE": _is_score})
+_is_valid_task = _compile({"QUESTION": _is_str, "ANSWER": _is_str, "CONTEXTS": lambda value: isinstance(value, list)})
+
+
+class DatasetValidationError(ValueError):
+    """
+    Raised when a dataset does not match the expected schema. It carries every error found, not only the first one.
+
+    Attributes:
+    errors (List[Tuple[Optional[str], str]]): (task id, message) pairs, the task id is None for dataset-level errors.
+    """
+
+    def __init__(self, errors: List[ValidationError], max_shown: int = 10) -> None:
+        """
+        Initialize the DatasetValidationError.
+
+        Parameters:
+        errors (List[Tuple[Optional[str], str]]): The validation errors.
+        max_shown (int): Number of errors listed in the message.
+        """
+        self.errors = errors
+        lines = [f"task {task_id}: {message}" if task_id is not None else message for task_id, message in errors[:max_shown]]
+        if len(errors) > max_shown:
+            lines.append(f"... and {len(errors) - max_shown} more")
+        super().__init__(f"Invalid dataset! {len(errors)} error(s):\n" + "\n".join(lines))
+
+
+class DatasetValidator:
+    """
+    Validates baseline and sample datasets in one streaming sweep before evaluation.
+
+    Every record is first checked by compiled predicates and only records failing them are re-validated
+    with the `schema` library to build a readable message. All errors are collected with their task id,
+    so a malformed record deep inside a large file is reported before any evaluation starts.
+
+    Attributes:
+    rag (bool): Whether contexts must carry a SCORE, as in sample datasets.
+    """
+
+    def __init__(self, rag: bool = False) -> None:
+        """
+        Initialize the DatasetValidator.
+
+        Parameters:
+        rag (bool): Whether contexts must carry a SCORE, as in sample datasets.
+        """
+        self.rag = rag
+        self._is_valid_context = _is_valid_rag_context if rag else _is_valid_context
+        self._context_schema = RAG_CONTEXT_SCHEMA if rag else CONTEXT_SCHEMA
+
+    def iter_errors(self, dataset_dict: Any) -> Iterator[ValidationError]:
+        """
+        Validate a whole dataset dictionary.
+
+        Parameters:
+        dataset_dict (Any): The dataset dictionary with NAME, DOCUMENTS and TASKS.
+
+        Returns:
+        Iterator[Tuple[Optional[str], str]]: The (task id, message) pairs of every error found.
+        """
+        try:
+            DATASET_SCHEMA.validate(dataset_dict)
+        except SchemaError as e:
+            yield None, e.code
+            if not isinstance(dataset_dict, dict) or not isinstance(dataset_dict.get("TASKS"), dict):
+                return
+        yield from self.iter_task_errors(dataset_dict["TASKS"].items())
+
+    def iter_task_errors(self, task_items: Iterable[Tuple[str, Any]]) -> Iterator[ValidationError]:
+        """
+        Validate a stream of tasks.
+
+        Parameters:
+        task_items (Iterable[Tuple[str, Any]]): (task id, task dictionary) pairs, e.g. `dataset_dict["TASKS"].items()`.
+
+        Returns:
+        Iterator[Tuple[Optional[str], str]]: The (task id, message) pairs of every error found.
+        """
+        is_valid_task = _is_valid_task
+        is_valid_context = self._is_valid_context
+        for task_id, task_dict in task_items:
+            if not is_valid_task(task_dict):
+                try:
+                    TASK_SCHEMA.validate(task_dict)
+                except SchemaError as e:
+                    yield task_id, e.code
+                if not isinstance(task_dict, dict) or not isinstance(task_dict.get("CONTEXTS"), list):
+                    continue
+            for index, context_dict in enumerate(task_dict["CONTEXTS"]):
+                if not is_valid_context(context_dict):
+                    yield task_id, self._explain_context(index, context_dict)
+
+    def validate(self, dataset_dict: Any) -> None:
+        """
+        Validate a whole dataset dictionary.
+
+        Parameters:
+        dataset_dict (Any): The dataset dictionary with NAME, DOCUMENTS and TASKS.
+
+        Raises:
+        DatasetValidationError: If any error is found.
+        """
+        errors = list(self.iter_errors(dataset_dict))
+        if errors:
+            raise DatasetValidationError(errors)
+
+    @staticmethod
+    def iter_pair_errors(baseline_dataset_dict: Dict[str, Any], sample_dataset_dict: Dict[str, Any]) -> Iterator[ValidationError]:
+        """
+        Validate a baseline dataset, the matching sample dataset, and that their tasks ask the same questions.
+        Baseline tasks without a sample task are not errors, the evaluator scores them zero.
+
+        Parameters:
+        baseline_dataset_dict (Dict[str, Any]): The baseline dataset dictionary.
+        sample_dataset_dict (Dict[str, Any]): The sample dataset dictionary, whose contexts need a SCORE.
+
+        Returns:
+        Iterator[Tuple[Optional[str], str]]: The (task id, message) pairs of every error found.
+        """
+        for task_id, message in DatasetValidator(rag=False).iter_errors(baseline_dataset_dict):
+            yield task_id, f"baseline: {message}"
+        for task_id, message in DatasetValidator(rag=True).iter_errors(sample_dataset_dict):
+            yield task_id, f"sample: {message}"
+
+        baseline_tasks = baseline_dataset_dict.get("TASKS") if isinstance(baseline_dataset_dict, dict) else None
+        sample_tasks = sample_dataset_dict.get("TASKS") if isinstance(sample_dataset_dict, dict) else None
+        if not isinstance(baseline_tasks, dict) or not isinstance(sample_tasks, dict):
+            return
+        for task_id, baseline_task_dict in baseline_tasks.items():
+            sample_task_dict = sample_tasks.get(task_id)
+            if isinstance(baseline_task_dict, dict) and isinstance(sample_task_dict, dict) \
+                    and "QUESTION" in baseline_task_dict and "QUESTION" in sample_task_dict \
+                    and baseline_task_dict["QUESTION"] != sample_task_dict["QUESTION"]:
+                yield task_id, "Questions of baseline and sample do not belong to one task!"
+
+    @classmethod
+    def validate_pair(cls, baseline_dataset_dict: Dict[str, Any], sample_dataset_dict: Dict[str, Any]) -> None:
+        """
+        Validate a baseline dataset and the matching sample dataset.
+
+        Parameters:
+        baseline_dataset_dict (Dict[str, Any]): The baseline dataset dictionary.
+        sample_dataset_dict (Dict[str, Any]): The sample dataset dictionary.
+
+        Raises:
+        DatasetValidationError: If any error is found.
+        """
+        errors = list(cls.iter_pair_errors(baseline_dataset_dict, sample_dataset_dict))
+        if errors:
+            raise DatasetValidationError(errors)
+
+    def _explain_context(self, index: int, context_dict: Any) -> str:
+        """
+        Explain why a context was rejected by the compiled predicate.
+
+        Parameters:
+        index (int): The position of the context in the task.
+        context_dict (Any): The rejected context.
+
+        Returns:
+        str: The error message.
+        """
+        try:
+            self._context_schema.validate(context_dict)
+        except SchemaError as e:
+            return f"CONTEXTS[{index}]: {e.code}"
+        return f"CONTEXTS[{index}]: invalid context"
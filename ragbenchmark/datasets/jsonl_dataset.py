@@ -0,0 +1,483 @@
+import os
+import json
+import mmap
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .base_dataset import BaseDataset
+from ..tasks.custom_task import CustomTask
+from ..profiling.profiler import stage, count
+
+INDEX_SUFFIX = ".idx"
+INDEX_MAGIC = "ragbench-jsonl-index\t1"
+
+
+def _encode_line(record: Dict[str, Any]) -> bytes:
+    """
+    Encode a record as one JSON line.
+
+    Parameters:
+    record (Dict[str, Any]): The record.
+
+    Returns:
+    bytes: The UTF-8 line, ending with a newline.
+    """
+    return (json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8")
+
+
+class JsonlTaskFile:
+    """
+    A JSON-Lines dataset file with a sidecar index from task id to byte offset.
+
+    The first line holds the NAME and DOCUMENTS of the dataset, and every following line one task, the
+    task dictionary of the JSON format with its id under TASK_ID. The index file, `<path>.idx`, lists
+    the id, offset and length of every task line, so a task is read by slicing a memory map of the file
+    and parsing that line only. Appending a task writes one line to each file. An id appended again
+    supersedes its earlier line but keeps its position.
+
+    The index covers the file up to the end of its last line. Lines appended by other tools are indexed
+    when the file is opened, and the index is rebuilt if the file shrank or the index is missing. A last
+    line without its newline may still be being written, so it is only indexed once terminated.
+
+    Attributes:
+    path (str): The path of the JSONL file.
+    index_path (str): The path of the index file.
+    name (str): Name of the dataset.
+    documents (List[str]): List of documents in the dataset.
+
+    Example:
+    >>> task_file = JsonlTaskFile.create("baseline.jsonl", baseline_dataset_dict)
+    >>> task_file["0"]["QUESTION"]
+    >>> task_file.append("20", task_dict)
+    """
+
+    def __init__(self, path: str) -> None:
+        """
+        Open a JSONL dataset file and load, update or build its index.
+
+        Parameters:
+        path (str): The path of the JSONL file.
+
+        Raises:
+        FileNotFoundError: If the file does not exist.
+        ValueError: If the header or a task line is not valid JSON.
+        """
+        self.path = path
+        self.index_path = path + INDEX_SUFFIX
+        self._offsets: Dict[str, Tuple[int, int]] = {}
+        self._file = open(path, "rb")
+        self._mmap: Optional[mmap.mmap] = None
+        header_line = self._file.readline()
+        try:
+            header = json.loads(header_line)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Invalid JSONL dataset {path}! The first line must hold the NAME and DOCUMENTS: {e}.") from e
+        self.name: str = header.get("NAME", "")
+        self.documents: List[str] = header.get("DOCUMENTS", [])
+        self._header_end = len(header_line)
+        # the offset after the last indexed line
+        self._end = self._header_end
+        self._load_index()
+
+    @classmethod
+    def create(cls, path: str, dataset_dict: Optional[Dict[str, Any]] = None, name: str = "", documents: Optional[List[str]] = None) -> "JsonlTaskFile":
+        """
+        Write a JSONL dataset file and its index, overwriting existing files.
+
+        Parameters:
+        path (str): The path of the JSONL file.
+        dataset_dict (Optional[Dict[str, Any]]): A dataset dictionary of the JSON format to convert, None
+                                                 for a dataset without tasks.
+        name (str): Name of the dataset, if dataset_dict is None.
+        documents (Optional[List[str]]): List of documents, if dataset_dict is None.
+
+        Returns:
+        JsonlTaskFile: The opened file.
+        """
+        if dataset_dict is not None:
+            name, documents = dataset_dict["NAME"], dataset_dict["DOCUMENTS"]
+        header = _encode_line({"NAME": name, "DOCUMENTS": documents or []})
+        with stage("jsonl.write"), open(path, "wb") as f, open(path + INDEX_SUFFIX, "w", encoding="utf-8") as index:
+            f.write(header)
+            index.write(INDEX_MAGIC + "\n")
+            offset = len(header)
+            for task_id, task_dict in (dataset_dict or {"TASKS": {}})["TASKS"].items():
+                line = _encode_line({"TASK_ID": str(task_id), **task_dict})
+                f.write(line)
+                index.write(f"{json.dumps(str(task_id), ensure_ascii=False)}\t{offset}\t{len(line)}\n")
+                offset += len(line)
+        return cls(path)
+
+    def _load_index(self) -> None:
+        """
+        Load the index, then index the lines it does not cover yet.
+        """
+        size = os.fstat(self._file.fileno()).st_size
+        end = self._header_end
+        entries: List[Tuple[str, int, int]] = []
+        valid = False
+        if os.path.exists(self.index_path):
+            with open(self.index_path, "r", encoding="utf-8") as index:
+                valid = index.readline().rstrip("\n") == INDEX_MAGIC
+                if valid:
+                    for line in index:
+                        task_id, offset, length = line.rstrip("\n").rsplit("\t", 2)
+                        entries.append((json.loads(task_id), int(offset), int(length)))
+            if entries:
+                end = max(offset + length for _, offset, length in entries)
+        if not valid or end > size:
+            # the file shrank, or was never indexed
+            entries, end = [], self._header_end
+            with open(self.index_path, "w", encoding="utf-8") as index:
+                index.write(INDEX_MAGIC + "\n")
+        for task_id, offset, length in entries:
+            self._offsets[task_id] = (offset, length)
+        self._end = end
+        if end < size:
+            with stage("jsonl.index"):
+                self._index_entries(self._scan(end))
+
+    def _scan(self, start: int) -> Iterator[Tuple[str, int, int]]:
+        """
+        Read the task ids of the lines from an offset to the end of the file, but an unterminated last line.
+
+        Parameters:
+        start (int): The offset of the first line.
+
+        Returns:
+        Iterator[Tuple[str, int, int]]: The id, offset and length of every complete task line.
+
+        Raises:
+        ValueError: If a line is not a valid task.
+        """
+        self._file.seek(start)
+        offset = start
+        for line in self._file:
+            if not line.endswith(b"\n"):
+                break
+            try:
+                task_id = str(json.loads(line)["TASK_ID"])
+            except (json.JSONDecodeError, KeyError, TypeError) as e:
+                raise ValueError(f"Invalid JSONL dataset {self.path}! The line at byte {offset} is not a task: {e}.") from e
+            yield task_id, offset, len(line)
+            offset += len(line)
+
+    def _index_entries(self, entries: Iterable[Tuple[str, int, int]]) -> None:
+        """
+        Add entries to the in-memory index and to the index file.
+
+        Parameters:
+        entries (Iterable[Tuple[str, int, int]]): The id, offset and length of task lines.
+        """
+        with open(self.index_path, "a", encoding="utf-8") as index:
+            for task_id, offset, length in entries:
+                self._offsets[task_id] = (offset, length)
+                self._end = max(self._end, offset + length)
+                index.write(f"{json.dumps(task_id, ensure_ascii=False)}\t{offset}\t{length}\n")
+
+    def _view(self, end: int) -> mmap.mmap:
+        """
+        Get a read-only memory map of the file, mapped again if it does not reach an offset yet.
+
+        Parameters:
+        end (int): The offset that must be mapped.
+
+        Returns:
+        mmap.mmap: The memory map.
+        """
+        if self._mmap is None or len(self._mmap) < end:
+            if self._mmap is not None:
+                self._mmap.close()
+            self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        return self._mmap
+
+    @property
+    def task_ids(self) -> List[str]:
+        """
+        Get the task ids, in file order.
+
+        Returns:
+        List[str]: The task ids.
+        """
+        return list(self._offsets)
+
+    def __len__(self) -> int:
+        return len(self._offsets)
+
+    def __contains__(self, task_id: object) -> bool:
+        return task_id in self._offsets
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(list(self._offsets))
+
+    def __getitem__(self, task_id: str) -> Dict[str, Any]:
+        """
+        Read one task.
+
+        Parameters:
+        task_id (str): The task id.
+
+        Returns:
+        Dict[str, Any]: The task dictionary of the JSON format, without TASK_ID.
+
+        Raises:
+        KeyError: If there is no such task.
+        """
+        offset, length = self._offsets[task_id]
+        task_dict = json.loads(self._view(offset + length)[offset:offset + length])
+        del task_dict["TASK_ID"]
+        count("jsonl_tasks_read")
+        return task_dict
+
+    def get(self, task_id: str, default: Any = None) -> Any:
+        """
+        Read one task if it exists.
+
+        Parameters:
+        task_id (str): The task id.
+        default (Any): The value returned for a missing task.
+
+        Returns:
+        Any: The task dictionary, or default.
+        """
+        return self[task_id] if task_id in self._offsets else default
+
+    def range_ids(self, start: Optional[str] = None, stop: Optional[str] = None) -> List[str]:
+        """
+        Get the ids of a range of tasks in file order, like a slice.
+
+        Parameters:
+        start (Optional[str]): The id of the first task, None to start at the first task.
+        stop (Optional[str]): The id of the task ending the range, excluded, None to go to the last task.
+
+        Returns:
+        List[str]: The task ids of the range.
+
+        Raises:
+        KeyError: If start or stop is not a task id.
+        """
+        task_ids = self.task_ids
+        positions = {task_id: position for position, task_id in enumerate(task_ids)}
+        first = positions[start] if start is not None else 0
+        last = positions[stop] if stop is not None else len(task_ids)
+        return task_ids[first:last]
+
+    def iter_tasks(self, task_ids: Optional[Iterable[str]] = None) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """
+        Read tasks lazily, one at a time.
+
+        Parameters:
+        task_ids (Optional[Iterable[str]]): The ids to read, all tasks in file order by default.
+
+        Returns:
+        Iterator[Tuple[str, Dict[str, Any]]]: The id and dictionary of every task.
+        """
+        for task_id in (self.task_ids if task_ids is None else task_ids):
+            yield task_id, self[task_id]
+
+    def append(self, task_id: str, task_dict: Dict[str, Any]) -> None:
+        """
+        Append a task without rewriting the file. If the id already exists, the new line supersedes it.
+
+        Parameters:
+        task_id (str): The task id.
+        task_dict (Dict[str, Any]): The task dictionary of the JSON format.
+        """
+        self.extend([(task_id, task_dict)])
+
+    def extend(self, tasks: Iterable[Tuple[str, Dict[str, Any]]]) -> None:
+        """
+        Append tasks without rewriting the file.
+
+        If the file does not end with a newline, e.g. after another tool appended a line without one, the
+        line is terminated first, then the lines not indexed yet are indexed, so the tasks start on a new line.
+
+        Parameters:
+        tasks (Iterable[Tuple[str, Dict[str, Any]]]): The id and dictionary of every task.
+
+        Raises:
+        ValueError: If a line appended by another tool is not a valid task.
+        """
+        entries = []
+        with open(self.path, "ab+") as f:
+            offset = f.tell()
+            if offset > self._header_end:
+                f.seek(offset - 1)
+                if f.read(1) != b"\n":
+                    f.write(b"\n")
+                    offset += 1
+            if offset > self._end:
+                f.flush()
+                self._index_entries(self._scan(self._end))
+            for task_id, task_dict in tasks:
+                line = _encode_line({"TASK_ID": str(task_id), **task_dict})
+                f.write(line)
+                entries.append((str(task_id), offset, len(line)))
+                offset += len(line)
+        self._index_entries(entries)
+
+    def to_dataset_dict(self, task_ids: Optional[Iterable[str]] = None) -> Dict[str, Any]:
+        """
+        Convert the file, or a subset of its tasks, into a dataset dictionary of the JSON format, e.g. to
+        evaluate a slice of tasks with DatasetEvaluator.
+
+        Parameters:
+        task_ids (Optional[Iterable[str]]): The ids of the tasks to keep, all of them by default.
+
+        Returns:
+        Dict[str, Any]: The dataset dictionary.
+        """
+        return {"NAME": self.name, "DOCUMENTS": list(self.documents), "TASKS": dict(self.iter_tasks(task_ids))}
+
+    def close(self) -> None:
+        """
+        Close the memory map and the file.
+        """
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+        self._file.close()
+
+    def __enter__(self) -> "JsonlTaskFile":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+
+class JsonlDataset(BaseDataset):
+    """
+    A dataset stored as a pair of JSONL files, the baseline and the matching samples, see JsonlTaskFile.
+
+    Unlike CustomDataset, tasks are not parsed when the dataset is opened. A task is read by id from
+    both files and built on demand, so one task or a slice of ids can be re-scored without parsing the
+    rest of the files, and the `tasks` property is the only place every task gets built.
+
+    Attributes:
+    _dataset_name (Optional[str]): Name of the dataset.
+    _documents (List[str]): List of documents in the dataset.
+    baseline (JsonlTaskFile): The baseline file.
+    samples (JsonlTaskFile): The sample file.
+
+    Example:
+    >>> dataset = JsonlDataset("baseline.jsonl", "samples.jsonl")
+    >>> dataset.get_task("3").sample_answer
+    >>> for task in dataset.iter_tasks(start="10", stop="20"):
+    ...     print(task.task_id)
+    """
+
+    def __init__(self, baseline_path: str, sample_path: str) -> None:
+        """
+        Open the baseline and sample files.
+
+        Parameters:
+        baseline_path (str): The path of the baseline JSONL file.
+        sample_path (str): The path of the sample JSONL file.
+        """
+        super().__init__()
+        self.baseline = JsonlTaskFile(baseline_path)
+        self.samples = JsonlTaskFile(sample_path)
+        self._extract(self.baseline)
+
+    def _extract(self, dataset_dict: Any) -> None:
+        """
+        Read the dataset information from the header of the baseline file.
+
+        Parameters:
+        dataset_dict (Any): The baseline file.
+        """
+        self._dataset_name = dataset_dict.name
+        self._documents = dataset_dict.documents
+
+    def _extract_tasks(self, dataset_dict: Any) -> None:
+        """
+        Tasks are built on demand by `get_task` and `iter_tasks`, so nothing is extracted up front.
+
+        Parameters:
+        dataset_dict (Any): The baseline file.
+        """
+        pass
+
+    @property
+    def task_ids(self) -> List[str]:
+        """
+        Get the ids of the baseline tasks, in file order.
+
+        Returns:
+        List[str]: The task ids.
+        """
+        return self.baseline.task_ids
+
+    def __len__(self) -> int:
+        return len(self.baseline)
+
+    def get_task(self, task_id: str) -> CustomTask:
+        """
+        Build one task from both files.
+
+        Parameters:
+        task_id (str): The task id.
+
+        Returns:
+        CustomTask: The task.
+
+        Raises:
+        KeyError: If either file lacks the task.
+        """
+        return CustomTask(task_id, self.baseline[task_id], self.samples[task_id])
+
+    def iter_tasks(self, start: Optional[str] = None, stop: Optional[str] = None) -> Iterator[CustomTask]:
+        """
+        Build the tasks of a range of ids lazily, one at a time.
+
+        Parameters:
+        start (Optional[str]): The id of the first task, None to start at the first task.
+        stop (Optional[str]): The id of the task ending the range, excluded, None to go to the last task.
+
+        Returns:
+        Iterator[CustomTask]: The tasks, in baseline file order.
+        """
+        for task_id in self.baseline.range_ids(start, stop):
+            yield self.get_task(task_id)
+
+    @property
+    def tasks(self) -> List[CustomTask]:
+        """
+        Build every task.
+
+        Returns:
+        List[CustomTask]: The tasks, in baseline file order.
+        """
+        return list(self.iter_tasks())
+
+    def append(self, task_id: str, baseline_task_dict: Dict[str, Any], sample_task_dict: Dict[str, Any]) -> None:
+        """
+        Append a task to both files without rewriting them.
+
+        Parameters:
+        task_id (str): The task id.
+        baseline_task_dict (Dict[str, Any]): The baseline task dictionary.
+        sample_task_dict (Dict[str, Any]): The sample task dictionary.
+        """
+        self.baseline.append(task_id, baseline_task_dict)
+        self.samples.append(task_id, sample_task_dict)
+
+    def to_dataset_dicts(self, task_ids: Optional[Iterable[str]] = None) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """
+        Convert the dataset, or a subset of its tasks, into the baseline and sample dataset dictionaries,
+        e.g. to re-score a slice of tasks with DatasetEvaluator.
+
+        Parameters:
+        task_ids (Optional[Iterable[str]]): The ids of the tasks to keep, all of them by default.
+
+        Returns:
+        Tuple[Dict[str, Any], Dict[str, Any]]: The baseline and sample dataset dictionaries.
+        """
+        task_ids = list(task_ids) if task_ids is not None else self.task_ids
+        return self.baseline.to_dataset_dict(task_ids), self.samples.to_dataset_dict(task_ids)
+
+    def close(self) -> None:
+        """
+        Close both files.
+        """
+        self.baseline.close()
+        self.samples.close()
@@ -1,5 +1,158 @@
+import json
+from typing import Any, Dict, List, Optional
+
 from .base_dataset import BaseDataset
+from ..tasks.pubmed_task import PubMedTask
+from ..profiling.profiler import profile_stage
 
 class PubMedQA(BaseDataset):
-    def __init__(self):
-        pass
+    """
+    The labelled PubMedQA dataset (PQA-L): 1k biomedical questions answered by yes, no or maybe from
+    the sections of a PubMed abstract, see data/pubmedqa.
+
+    Tasks are keyed by PubMed id. Each section of an abstract is addressed like a page of a document,
+    with the PubMed id as FILE_PATH and the 1-based section position as PAGE_NUMBER, so the dataset
+    can be turned into a baseline dataset dictionary and retrieval can be scored with the existing
+    overlap metrics.
+
+    Attributes:
+    _dataset_name (Optional[str]): Name of the dataset.
+    _documents (List[str]): The PubMed ids of the abstracts.
+    _tasks (List[PubMedTask]): The tasks, in file order.
+    _task_dicts (Dict[str, Dict[str, Any]]): The raw PubMedQA entries by PubMed id.
+    """
+
+    def __init__(
+        self,
+        dataset_dict: Dict[str, Dict[str, Any]],
+        sample_dataset_dict: Optional[Dict[str, Any]] = None,
+        name: str = "PubMedQA"
+    ) -> None:
+        """
+        Initialize the PubMedQA dataset.
+
+        Parameters:
+        dataset_dict (Dict[str, Dict[str, Any]]): The PubMedQA entries by PubMed id, as in ori_pqal.json.
+        sample_dataset_dict (Optional[Dict[str, Any]]): A sample dataset with the predicted ANSWER and the
+                                                        retrieved CONTEXTS of the tasks, keyed by PubMed id.
+        name (str): Name of the dataset.
+        """
+        super().__init__()
+        self._task_dicts: Dict[str, Dict[str, Any]] = {}
+        self._dataset_name = name
+        self._extract(dataset_dict, sample_dataset_dict)
+
+    @classmethod
+    def from_file(
+        cls,
+        file_path: str = "data/pubmedqa/ori_pqal.json",
+        ground_truth_path: Optional[str] = None,
+        sample_dataset_dict: Optional[Dict[str, Any]] = None
+    ) -> "PubMedQA":
+        """
+        Load the dataset from ori_pqal.json.
+
+        Parameters:
+        file_path (str): The PubMedQA file.
+        ground_truth_path (Optional[str]): A split file mapping PubMed ids to decisions, e.g.
+                                           test_ground_truth.json, to keep only the questions of that split.
+        sample_dataset_dict (Optional[Dict[str, Any]]): A sample dataset with predictions, see __init__.
+
+        Returns:
+        PubMedQA: The dataset.
+
+        Raises:
+        ValueError: If the split file disagrees with the labels of the dataset.
+        """
+        with open(file_path, "r", encoding="utf-8") as f:
+            dataset_dict = json.load(f)
+        name = "PubMedQA"
+        if ground_truth_path is not None:
+            with open(ground_truth_path, "r", encoding="utf-8") as f:
+                ground_truth = json.load(f)
+            conflicts = [
+                pmid for pmid, decision in ground_truth.items()
+                if pmid not in dataset_dict or dataset_dict[pmid]["final_decision"] != decision
+            ]
+            if conflicts:
+                raise ValueError(f"Invalid ground truth! {len(conflicts)} questions are missing or labelled differently, e.g. {conflicts[0]}.")
+            dataset_dict = {pmid: dataset_dict[pmid] for pmid in ground_truth}
+            name = "PubMedQA-test"
+        return cls(dataset_dict, sample_dataset_dict, name=name)
+
+    @profile_stage("parse.dataset")
+    def _extract(self, dataset_dict: Dict[str, Dict[str, Any]], sample_dataset_dict: Optional[Dict[str, Any]] = None) -> None:
+        """
+        Extract the documents and tasks from the PubMedQA entries.
+
+        Parameters:
+        dataset_dict (Dict[str, Dict[str, Any]]): The PubMedQA entries by PubMed id.
+        sample_dataset_dict (Optional[Dict[str, Any]]): A sample dataset with predictions.
+        """
+        self._task_dicts = dataset_dict
+        self._documents = list(dataset_dict)
+        self._extract_tasks(dataset_dict, sample_dataset_dict["TASKS"] if sample_dataset_dict else {})
+
+    def _extract_tasks(self, tasks_dict: Dict[str, Dict[str, Any]], sample_tasks_dict: Dict[str, Dict[str, Any]]) -> None:
+        """
+        Build one PubMedTask per question.
+
+        Parameters:
+        tasks_dict (Dict[str, Dict[str, Any]]): The PubMedQA entries by PubMed id.
+        sample_tasks_dict (Dict[str, Dict[str, Any]]): The sample tasks by PubMed id.
+        """
+        for pmid, task_dict in tasks_dict.items():
+            self._tasks.append(PubMedTask(pmid, task_dict, sample_tasks_dict.get(pmid)))
+
+    @property
+    def labels(self) -> List[str]:
+        """
+        Get the labelled decision of every task.
+
+        Returns:
+        List[str]: The decisions, in task order.
+        """
+        return [task.baseline_answer for task in self._tasks]
+
+    def to_baseline_dict(self) -> Dict[str, Any]:
+        """
+        Convert the dataset into a baseline dataset dictionary, whose contexts are all the sections of
+        the abstract and whose answers are the decisions.
+
+        Returns:
+        Dict[str, Any]: The baseline dataset dictionary.
+        """
+        return {
+            "NAME": self._dataset_name,
+            "DOCUMENTS": list(self._documents),
+            "TASKS": {
+                pmid: {
+                    "QUESTION": task_dict["QUESTION"],
+                    "ANSWER": task_dict["final_decision"],
+                    "CONTEXTS": [
+                        {"TEXT": text, "FILE_PATH": pmid, "PAGE_NUMBER": [section]}
+                        for section, text in enumerate(task_dict["CONTEXTS"], start=1)
+                    ],
+                }
+                for pmid, task_dict in self._task_dicts.items()
+            },
+        }
+
+    def to_sample_dict(self, name: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Convert the dataset into a sample dataset dictionary whose contexts are the sections of the
+        abstract, e.g. to generate decisions from the gold contexts with an AnswerGenerator.
+
+        Parameters:
+        name (Optional[str]): Name of the sample dataset.
+
+        Returns:
+        Dict[str, Any]: The sample dataset dictionary, with empty answers and every section scored 1.0.
+        """
+        baseline_dataset_dict = self.to_baseline_dict()
+        for task_dict in baseline_dataset_dict["TASKS"].values():
+            task_dict["ANSWER"] = ""
+            for context_dict in task_dict["CONTEXTS"]:
+                context_dict["SCORE"] = 1.0
+        baseline_dataset_dict["NAME"] = name or f"{self._dataset_name}-contexts"
+        return baseline_dataset_dict
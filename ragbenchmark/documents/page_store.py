@@ -0,0 +1,372 @@
+import os
+import re
+import json
+import mmap
+import hashlib
+import tempfile
+from array import array
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from ..profiling.profiler import stage, count
+
+PageExtractor = Callable[[str], List[str]]
+
+_WHITESPACE_PATTERN = re.compile(r"\s+")
+
+
+def file_sha256(file_path: str, block_size: int = 1 << 20) -> str:
+    """
+    Hash the content of a file.
+
+    Parameters:
+    file_path (str): The file path.
+    block_size (int): The number of bytes read at once.
+
+    Returns:
+    str: The hexadecimal SHA-256 digest.
+    """
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def extract_pages(file_path: str) -> List[str]:
+    """
+    Extract the text of every page of a document. PDF files are read with pypdf, other files
+    are read as UTF-8 text whose pages are separated by form feeds.
+
+    Parameters:
+    file_path (str): The document path.
+
+    Returns:
+    List[str]: The text of every page.
+
+    Raises:
+    ImportError: If a PDF is given and pypdf is not installed.
+    """
+    if file_path.lower().endswith(".pdf"):
+        try:
+            from pypdf import PdfReader
+        except ImportError as e:
+            raise ImportError("pypdf is required to extract PDF pages, install it with `pip install pypdf`.") from e
+        return [page.extract_text() or "" for page in PdfReader(file_path).pages]
+    with open(file_path, "r", encoding="utf-8") as f:
+        return f.read().split("\f")
+
+
+def _write_atomic(file_path: str, data: bytes) -> None:
+    """
+    Write a file atomically, so that concurrent readers never see a partial file.
+
+    Parameters:
+    file_path (str): The file path.
+    data (bytes): The content.
+    """
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(file_path), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, file_path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+
+
+def _extract_to_cache(file_path: str, key: str, cache_dir: str, extractor: PageExtractor) -> int:
+    """
+    Extract the pages of a document into the cache. Module-level so that it can run in worker processes.
+
+    Parameters:
+    file_path (str): The document path.
+    key (str): The SHA-256 digest of the document.
+    cache_dir (str): The cache directory.
+    extractor (PageExtractor): Extracts the text of every page.
+
+    Returns:
+    int: The number of pages.
+    """
+    offsets = array("q", [0])
+    chunks = []
+    for page in extractor(file_path):
+        data = page.encode("utf-8")
+        chunks.append(data)
+        offsets.append(offsets[-1] + len(data))
+    _write_atomic(os.path.join(cache_dir, f"{key}.pages"), b"".join(chunks))
+    _write_atomic(os.path.join(cache_dir, f"{key}.offsets"), offsets.tobytes())
+    return len(offsets) - 1
+
+
+class _MappedPages:
+    """
+    The cached pages of one document, memory-mapped for random access.
+
+    Attributes:
+    _file (Any): The open pages file.
+    _buffer (Any): The memory map of the pages file, or empty bytes for an empty file.
+    _offsets (array): The byte offset where every page starts, and the total size.
+    """
+
+    def __init__(self, pages_path: str, offsets_path: str) -> None:
+        self._offsets = array("q")
+        with open(offsets_path, "rb") as f:
+            self._offsets.frombytes(f.read())
+        self._file = open(pages_path, "rb")
+        self._buffer: Any = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if self._offsets[-1] else b""
+
+    @property
+    def num_pages(self) -> int:
+        return len(self._offsets) - 1
+
+    def page(self, index: int) -> str:
+        return self._buffer[self._offsets[index]:self._offsets[index + 1]].decode("utf-8")
+
+    def close(self) -> None:
+        if isinstance(self._buffer, mmap.mmap):
+            self._buffer.close()
+        self._file.close()
+
+
+class PageStore:
+    """
+    A class used to read the pages of source documents, such as the PDFs referenced by FILE_PATH.
+
+    The text of every page is extracted once into a cache directory shared by all runs: the pages of a
+    document are stored as one UTF-8 file plus the byte offset of every page, keyed by the SHA-256 of
+    the document content, so renamed or copied documents are not extracted again and modified ones are.
+    Pages are then read by memory-mapping the cache, which gives random access by (file_path, page)
+    without loading whole documents. Missing documents are extracted in a process pool.
+
+    Attributes:
+    cache_dir (str): The cache directory.
+    root (Optional[str]): The directory relative file paths are resolved against.
+    extractor (PageExtractor): Extracts the text of every page of a document.
+    workers (int): Number of worker processes used to extract documents.
+    _index (Dict[str, Dict[str, Any]]): Maps resolved paths to their size, modification time and digest.
+    _opened (Dict[str, _MappedPages]): The memory-mapped documents, by digest.
+
+    Example:
+    >>> with PageStore(".cache/pages", root=".") as store:
+    ...     store.add(["data/attention_is_all_you_need.pdf"])
+    ...     store.get_page("data/attention_is_all_you_need.pdf", 1)
+    """
+
+    INDEX_FILE = "index.json"
+
+    def __init__(
+        self,
+        cache_dir: str,
+        root: Optional[str] = None,
+        extractor: Optional[PageExtractor] = None,
+        workers: int = 1
+    ) -> None:
+        """
+        Initialize the PageStore.
+
+        Parameters:
+        cache_dir (str): The cache directory, created if missing.
+        root (Optional[str]): The directory relative file paths are resolved against, defaults to the working directory.
+        extractor (Optional[PageExtractor]): Extracts the text of every page, defaults to `extract_pages`.
+                                             It must be picklable when workers > 1.
+        workers (int): Number of worker processes used to extract documents.
+        """
+        if workers < 1:
+            raise ValueError("workers must be at least 1!")
+        self.cache_dir = cache_dir
+        self.root = root
+        self.extractor = extractor or extract_pages
+        self.workers = workers
+        os.makedirs(cache_dir, exist_ok=True)
+        self._index: Dict[str, Dict[str, Any]] = self._load_index()
+        self._opened: Dict[str, _MappedPages] = {}
+
+    def __enter__(self) -> "PageStore":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    def _load_index(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Load the index of hashed documents.
+
+        Returns:
+        Dict[str, Dict[str, Any]]: The index, empty if missing or unreadable.
+        """
+        try:
+            with open(os.path.join(self.cache_dir, self.INDEX_FILE), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_index(self) -> None:
+        """
+        Save the index of hashed documents, keeping entries added concurrently by other stores.
+        """
+        index = self._load_index()
+        index.update(self._index)
+        self._index = index
+        _write_atomic(os.path.join(self.cache_dir, self.INDEX_FILE), json.dumps(index, indent=4).encode("utf-8"))
+
+    def _resolve(self, file_path: str) -> str:
+        """
+        Resolve a file path against the root directory.
+
+        Parameters:
+        file_path (str): The file path.
+
+        Returns:
+        str: The absolute path.
+        """
+        return os.path.abspath(file_path if self.root is None else os.path.join(self.root, file_path))
+
+    def _key(self, path: str) -> str:
+        """
+        Get the digest of a document, hashing it only if it is new or was modified since it was indexed.
+
+        Parameters:
+        path (str): The absolute document path.
+
+        Returns:
+        str: The SHA-256 digest.
+
+        Raises:
+        FileNotFoundError: If the document does not exist.
+        """
+        status = os.stat(path)
+        entry = self._index.get(path)
+        if entry is None or entry["size"] != status.st_size or entry["mtime_ns"] != status.st_mtime_ns:
+            with stage("documents.hash"):
+                entry = {"size": status.st_size, "mtime_ns": status.st_mtime_ns, "sha256": file_sha256(path)}
+            self._index[path] = entry
+        return entry["sha256"]
+
+    def _is_cached(self, key: str) -> bool:
+        return os.path.exists(os.path.join(self.cache_dir, f"{key}.offsets"))
+
+    def add(self, file_paths: Iterable[str]) -> Dict[str, str]:
+        """
+        Make sure that documents are in the cache, extracting the missing ones.
+
+        Parameters:
+        file_paths (Iterable[str]): The document paths.
+
+        Returns:
+        Dict[str, str]: The digest of every document, by given path.
+        """
+        keys = {}
+        missing = {}
+        for file_path in file_paths:
+            path = self._resolve(file_path)
+            keys[file_path] = key = self._key(path)
+            if not self._is_cached(key):
+                missing.setdefault(key, path)
+
+        with stage("documents.extract"):
+            if self.workers == 1 or len(missing) <= 1:
+                for key, path in missing.items():
+                    count("pages", _extract_to_cache(path, key, self.cache_dir, self.extractor))
+            else:
+                from concurrent.futures import ProcessPoolExecutor
+
+                with ProcessPoolExecutor(max_workers=min(self.workers, len(missing))) as executor:
+                    futures = [
+                        executor.submit(_extract_to_cache, path, key, self.cache_dir, self.extractor)
+                        for key, path in missing.items()
+                    ]
+                    for future in futures:
+                        count("pages", future.result())
+        self._save_index()
+        return keys
+
+    def _open(self, file_path: str) -> _MappedPages:
+        """
+        Get the memory-mapped pages of a document, extracting it first if needed.
+
+        Parameters:
+        file_path (str): The document path.
+
+        Returns:
+        _MappedPages: The pages.
+        """
+        key = self._key(self._resolve(file_path))
+        if key not in self._opened:
+            if not self._is_cached(key):
+                self.add([file_path])
+            self._opened[key] = _MappedPages(
+                os.path.join(self.cache_dir, f"{key}.pages"), os.path.join(self.cache_dir, f"{key}.offsets")
+            )
+        return self._opened[key]
+
+    def num_pages(self, file_path: str) -> int:
+        """
+        Get the number of pages of a document.
+
+        Parameters:
+        file_path (str): The document path.
+
+        Returns:
+        int: The number of pages.
+        """
+        return self._open(file_path).num_pages
+
+    def get_page(self, file_path: str, page: int) -> str:
+        """
+        Get the text of one page.
+
+        Parameters:
+        file_path (str): The document path.
+        page (int): The page number, starting at 1 as in PAGE_NUMBER.
+
+        Returns:
+        str: The page text.
+
+        Raises:
+        IndexError: If the document has no such page.
+        """
+        pages = self._open(file_path)
+        if not 1 <= page <= pages.num_pages:
+            raise IndexError(f"Page {page} out of range for {file_path!r} with {pages.num_pages} pages!")
+        return pages.page(page - 1)
+
+    def get_pages(self, file_path: str) -> List[str]:
+        """
+        Get the text of every page of a document.
+
+        Parameters:
+        file_path (str): The document path.
+
+        Returns:
+        List[str]: The page texts.
+        """
+        pages = self._open(file_path)
+        return [pages.page(index) for index in range(pages.num_pages)]
+
+    def find_pages(self, file_path: str, text: str) -> List[int]:
+        """
+        Find the pages containing a text, ignoring differences in whitespace introduced by extraction.
+
+        Parameters:
+        file_path (str): The document path.
+        text (str): The text, such as the TEXT of a context.
+
+        Returns:
+        List[int]: The numbers of the pages containing the text.
+        """
+        needle = _WHITESPACE_PATTERN.sub(" ", text).strip()
+        if not needle:
+            return []
+        return [
+            index + 1
+            for index, page in enumerate(self.get_pages(file_path))
+            if needle in _WHITESPACE_PATTERN.sub(" ", page)
+        ]
+
+    def close(self) -> None:
+        """
+        Close every memory-mapped document.
+        """
+        for pages in self._opened.values():
+            pages.close()
+        self._opened = {}
@@ -0,0 +1,14 @@
+from .._lazy import lazy_attributes
+
+__getattr__, __dir__ = lazy_attributes(__name__, {
+    "EmbeddingBase": ".embedding_base",
+    "EmbeddingUtils": ".embedding_utils",
+    "EmbeddingVisualizer": ".embedding_visualizer",
+    "BERTEmbedding": ".bert_embedding",
+    "ELMoEmbedding": ".elmo_embedding",
+    "FastTextEmbedding": ".fasttext_embedding",
+    "GloVeEmbedding": ".glove_embedding",
+    "SentenceEmbedding": ".sentence_embedding",
+    "TransformerEmbedding": ".transformer_embedding",
+    "Word2VecEmbedding": ".word2vec_embedding",
+})
@@ -1,6 +1,40 @@
+from typing import List
 
+import numpy as np
 
 
 class EmbeddingBase:
+    """
+    Base class of the embedding models, which turn texts into vectors of a fixed dimension.
+
+    Subclasses implement `embed`, which is called with batches of texts so that a whole dataset never
+    has to be embedded, or held in memory, at once.
+    """
+
     def __init__(self):
-        pass
\ No newline at end of file
+        pass
+
+    @property
+    def name(self) -> str:
+        """
+        Get the name of the model, part of the cache keys of the vectors it produces.
+
+        Returns:
+        str: The name, the class name by default.
+        """
+        return type(self).__name__
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        """
+        Embed a batch of texts.
+
+        Parameters:
+        texts (List[str]): The texts.
+
+        Returns:
+        np.ndarray: A matrix with one vector per text.
+
+        Raises:
+        NotImplementedError: If the model does not implement embedding.
+        """
+        raise NotImplementedError(f"{self.name} does not implement embed!")
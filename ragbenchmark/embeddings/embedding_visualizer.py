@@ -1,4 +1,645 @@
+import os
+import json
+import hashlib
+import tempfile
+from typing import Any, Dict, Iterator, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from .embedding_base import EmbeddingBase
+from ..profiling.profiler import count, stage
+
+PROJECTION_METHODS = ("pca", "random")
+
+
+def dataset_hash(baseline_dataset_dict: Dict[str, Any], sample_dataset_dict: Optional[Dict[str, Any]] = None) -> str:
+    """
+    Hash the texts of a dataset that are embedded for visualization: the questions and the context texts.
+
+    Parameters:
+    baseline_dataset_dict (Dict[str, Any]): The baseline dataset.
+    sample_dataset_dict (Optional[Dict[str, Any]]): The sample dataset, if its contexts are embedded too.
+
+    Returns:
+    str: The hexadecimal SHA-256 digest.
+    """
+    digest = hashlib.sha256()
+    for dataset_dict in (baseline_dataset_dict, sample_dataset_dict):
+        if dataset_dict is None:
+            continue
+        for task_id, task_dict in dataset_dict["TASKS"].items():
+            content = [str(task_id), task_dict["QUESTION"], [context_dict["TEXT"] for context_dict in task_dict["CONTEXTS"]]]
+            digest.update(json.dumps(content, ensure_ascii=False).encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+class VectorSource:
+    """
+    A class used to read vectors in batches, from an in-memory array or a memory-mapped `.npy` file,
+    so that no more than one batch of a large file is resident at once.
+
+    Attributes:
+    batch_size (int): The number of vectors read at once.
+    fingerprint (str): Identifies the vectors in cache keys: the given fingerprint, or the path, size and
+                       modification time of the file, or the hash of an in-memory array.
+    _vectors (np.ndarray): The vectors, possibly memory-mapped.
+    """
+
+    def __init__(self, vectors: Union[np.ndarray, str], batch_size: int = 8192, fingerprint: Optional[str] = None) -> None:
+        """
+        Initialize the VectorSource.
+
+        Parameters:
+        vectors (Union[np.ndarray, str]): A matrix with one vector per row, or the path of a `.npy` file
+                                          holding one, which is memory-mapped.
+        batch_size (int): The number of vectors read at once.
+        fingerprint (Optional[str]): Identifies the vectors in cache keys, e.g. a `dataset_hash`.
+
+        Raises:
+        ValueError: If the vectors are not a matrix.
+        """
+        if isinstance(vectors, str):
+            if fingerprint is None:
+                stat = os.stat(vectors)
+                fingerprint = f"{os.path.abspath(vectors)}:{stat.st_size}:{stat.st_mtime_ns}"
+            vectors = np.load(vectors, mmap_mode="r")
+        elif fingerprint is None:
+            fingerprint = hashlib.sha256(np.ascontiguousarray(vectors).tobytes()).hexdigest()
+        if vectors.ndim != 2:
+            raise ValueError(f"Vectors must be a matrix, got {vectors.ndim} dimension(s)!")
+        self._vectors = vectors
+        self.batch_size = max(1, batch_size)
+        self.fingerprint = fingerprint
+
+    @classmethod
+    def from_embedding(
+        cls,
+        embedding: EmbeddingBase,
+        texts: Sequence[str],
+        path: str,
+        batch_size: int = 256,
+        fingerprint: Optional[str] = None
+    ) -> "VectorSource":
+        """
+        Embed texts batch by batch into a `.npy` file, reusing the file if it already holds them.
+
+        Parameters:
+        embedding (EmbeddingBase): The embedding model.
+        texts (Sequence[str]): The texts.
+        path (str): The `.npy` file of the vectors.
+        batch_size (int): The number of texts embedded at once.
+        fingerprint (Optional[str]): Identifies the texts, stored next to the file so that it is only reused
+                                     for the same texts and model. Defaults to a hash of the texts.
+
+        Returns:
+        VectorSource: The source of the vectors, memory-mapped.
+        """
+        if fingerprint is None:
+            digest = hashlib.sha256()
+            for text in texts:
+                digest.update(text.encode("utf-8") + b"\0")
+            fingerprint = digest.hexdigest()
+        fingerprint = f"{embedding.name}:{fingerprint}"
+        fingerprint_path = f"{path}.fingerprint"
+        if os.path.exists(path) and os.path.exists(fingerprint_path):
+            with open(fingerprint_path, "r", encoding="utf-8") as f:
+                if f.read() == fingerprint:
+                    return cls(path, fingerprint=fingerprint)
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".npy")
+        os.close(fd)
+        try:
+            vectors = None
+            with stage("embeddings.embed"):
+                for start in range(0, len(texts), batch_size):
+                    batch = np.asarray(embedding.embed(list(texts[start:start + batch_size])), dtype=np.float32)
+                    if vectors is None:
+                        vectors = np.lib.format.open_memmap(tmp_path, mode="w+", dtype=np.float32, shape=(len(texts), batch.shape[1]))
+                    vectors[start:start + len(batch)] = batch
+                    count("embedding_texts", len(batch))
+            if vectors is None:
+                np.save(tmp_path, np.empty((0, 0), dtype=np.float32))
+            else:
+                vectors.flush()
+                del vectors
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+        with open(fingerprint_path, "w", encoding="utf-8") as f:
+            f.write(fingerprint)
+        return cls(path, fingerprint=fingerprint)
+
+    @property
+    def num_vectors(self) -> int:
+        """
+        Get the number of vectors.
+
+        Returns:
+        int: The number of vectors.
+        """
+        return self._vectors.shape[0]
+
+    @property
+    def dimension(self) -> int:
+        """
+        Get the dimension of the vectors.
+
+        Returns:
+        int: The dimension.
+        """
+        return self._vectors.shape[1]
+
+    def iter_batches(self) -> Iterator[Tuple[int, np.ndarray]]:
+        """
+        Read the vectors in batches.
+
+        Returns:
+        Iterator[Tuple[int, np.ndarray]]: The index of the first vector of every batch, and the batch as float64.
+        """
+        for start in range(0, self.num_vectors, self.batch_size):
+            yield start, np.asarray(self._vectors[start:start + self.batch_size], dtype=np.float64)
+
+
+class ChunkedPCA:
+    """
+    A class used to compute a principal component analysis from batches of vectors.
+
+    The mean and the covariance matrix are accumulated batch by batch, around the mean of the first
+    batch to avoid cancellation, so memory is quadratic in the dimension but independent of the number
+    of vectors. The components are the leading eigenvectors of the covariance, which gives exactly
+    the components of a PCA of all the vectors at once.
+
+    Attributes:
+    n_components (int): The number of components.
+    num_vectors (int): The number of vectors seen.
+    mean (np.ndarray): The mean vector, set by `finalize`.
+    components (np.ndarray): The components, one per row, set by `finalize`.
+    explained_variance_ratio (np.ndarray): The share of the variance explained by every component.
+    """
+
+    def __init__(self, n_components: int = 2) -> None:
+        """
+        Initialize the ChunkedPCA.
+
+        Parameters:
+        n_components (int): The number of components.
+        """
+        self.n_components = n_components
+        self.num_vectors = 0
+        self.mean = None
+        self.components = None
+        self.explained_variance_ratio = None
+        self._shift = None
+        self._sum = None
+        self._outer = None
+
+    def partial_fit(self, batch: np.ndarray) -> None:
+        """
+        Accumulate a batch of vectors.
+
+        Parameters:
+        batch (np.ndarray): The vectors, one per row.
+        """
+        if len(batch) == 0:
+            return
+        if self._shift is None:
+            self._shift = batch.mean(axis=0)
+            self._sum = np.zeros(batch.shape[1])
+            self._outer = np.zeros((batch.shape[1], batch.shape[1]))
+        centered = batch - self._shift
+        self._sum += centered.sum(axis=0)
+        self._outer += centered.T @ centered
+        self.num_vectors += len(batch)
+
+    def finalize(self) -> "ChunkedPCA":
+        """
+        Compute the mean and the components from the accumulated vectors.
+
+        Returns:
+        ChunkedPCA: The fitted PCA.
+
+        Raises:
+        ValueError: If no vector was accumulated.
+        """
+        if not self.num_vectors:
+            raise ValueError("Cannot fit a PCA without vectors!")
+        offset = self._sum / self.num_vectors
+        covariance = (self._outer - self.num_vectors * np.outer(offset, offset)) / max(self.num_vectors - 1, 1)
+        eigenvalues, eigenvectors = np.linalg.eigh(covariance)
+        order = np.argsort(eigenvalues)[::-1][:self.n_components]
+        components = eigenvectors[:, order].T
+        # the sign of an eigenvector is arbitrary, make the largest coordinate positive for stable plots
+        signs = np.sign(components[np.arange(len(components)), np.abs(components).argmax(axis=1)])
+        self.components = components * np.where(signs == 0, 1.0, signs)[:, None]
+        total = eigenvalues.clip(min=0).sum()
+        self.explained_variance_ratio = eigenvalues[order].clip(min=0) / total if total > 0 else np.zeros(len(order))
+        self.mean = self._shift + offset
+        return self
+
+    def transform(self, batch: np.ndarray) -> np.ndarray:
+        """
+        Project a batch of vectors on the components.
+
+        Parameters:
+        batch (np.ndarray): The vectors, one per row.
+
+        Returns:
+        np.ndarray: The coordinates, one row per vector.
+        """
+        return (batch - self.mean) @ self.components.T
+
+
+class RandomProjection:
+    """
+    A class used to project vectors on random Gaussian directions, in a single pass.
+
+    By the Johnson-Lindenstrauss lemma, random directions approximately preserve distances, without
+    the pass over the data and the quadratic memory of a PCA, so it suits very high dimensions.
+
+    Attributes:
+    n_components (int): The number of components.
+    seed (int): The seed of the random directions.
+    num_vectors (int): The number of vectors seen.
+    components (np.ndarray): The random directions, one per row, drawn on the first batch.
+    """
+
+    def __init__(self, n_components: int = 2, seed: int = 0) -> None:
+        """
+        Initialize the RandomProjection.
+
+        Parameters:
+        n_components (int): The number of components.
+        seed (int): The seed of the random directions.
+        """
+        self.n_components = n_components
+        self.seed = seed
+        self.num_vectors = 0
+        self.components = None
+        self.explained_variance_ratio = None
+
+    def partial_fit(self, batch: np.ndarray) -> None:
+        """
+        Draw the random directions for the dimension of the vectors.
+
+        Parameters:
+        batch (np.ndarray): The vectors, one per row.
+        """
+        if self.components is None:
+            rng = np.random.default_rng(self.seed)
+            self.components = rng.standard_normal((self.n_components, batch.shape[1])) / np.sqrt(self.n_components)
+        self.num_vectors += len(batch)
+
+    def finalize(self) -> "RandomProjection":
+        """
+        Finish fitting, nothing is left to compute.
+
+        Returns:
+        RandomProjection: The fitted projection.
+        """
+        return self
+
+    def transform(self, batch: np.ndarray) -> np.ndarray:
+        """
+        Project a batch of vectors on the random directions.
+
+        Parameters:
+        batch (np.ndarray): The vectors, one per row.
+
+        Returns:
+        np.ndarray: The coordinates, one row per vector.
+        """
+        return batch @ self.components.T
+
+
+class ReservoirSampler:
+    """
+    A class used to draw a uniform sample of fixed size from a stream of items of unknown length.
+
+    Item i (counting from 0) replaces a random slot of the reservoir with probability size / (i + 1),
+    as in Algorithm R, with the random draws of a whole batch made at once.
+
+    Attributes:
+    size (int): The size of the sample.
+    num_items (int): The number of items seen.
+    _reservoir (np.ndarray): The indices of the sampled items.
+    _rng (np.random.Generator): The random generator.
+    """
+
+    def __init__(self, size: int, seed: int = 0) -> None:
+        """
+        Initialize the ReservoirSampler.
+
+        Parameters:
+        size (int): The size of the sample.
+        seed (int): The seed of the sample.
+        """
+        self.size = max(0, size)
+        self.num_items = 0
+        self._reservoir = np.empty(self.size, dtype=np.int64)
+        self._rng = np.random.default_rng(seed)
+
+    def add(self, num_items: int) -> None:
+        """
+        Stream the next items.
+
+        Parameters:
+        num_items (int): The number of items.
+        """
+        indices = np.arange(self.num_items, self.num_items + num_items, dtype=np.int64)
+        self.num_items += num_items
+        filling = indices < self.size
+        self._reservoir[indices[filling]] = indices[filling]
+        indices = indices[~filling]
+        if indices.size == 0:
+            return
+        slots = (self._rng.random(indices.size) * (indices + 1)).astype(np.int64)
+        kept = slots < self.size
+        slots, indices = slots[kept], indices[kept]
+        # a later item replacing the same slot wins, as if the items were streamed one at a time
+        _, last = np.unique(slots[::-1], return_index=True)
+        last = slots.size - 1 - last
+        self._reservoir[slots[last]] = indices[last]
+
+    def indices(self) -> np.ndarray:
+        """
+        Get the sampled indices.
+
+        Returns:
+        np.ndarray: The sorted indices of the sampled items.
+        """
+        return np.sort(self._reservoir[:min(self.size, self.num_items)])
+
+
+class Projection:
+    """
+    The 2-D coordinates of a set of vectors, and the sample of them to plot.
+
+    Attributes:
+    coordinates (np.ndarray): The coordinates of every vector, shape (number of vectors, 2).
+    sample_indices (np.ndarray): The sorted indices of the sampled vectors.
+    labels (Optional[np.ndarray]): The label of every vector, e.g. "question" or "context".
+    method (str): The projection method.
+    explained_variance_ratio (Optional[np.ndarray]): The variance explained by the components of a PCA.
+    cache_path (Optional[str]): The cache file of the projection.
+    from_cache (bool): Whether the projection was read from the cache.
+    """
+
+    def __init__(
+        self,
+        coordinates: np.ndarray,
+        sample_indices: np.ndarray,
+        labels: Optional[np.ndarray] = None,
+        method: str = "pca",
+        explained_variance_ratio: Optional[np.ndarray] = None,
+        cache_path: Optional[str] = None,
+        from_cache: bool = False
+    ) -> None:
+        """
+        Initialize the Projection.
+
+        Parameters:
+        coordinates (np.ndarray): The coordinates of every vector, shape (number of vectors, 2).
+        sample_indices (np.ndarray): The sorted indices of the sampled vectors.
+        labels (Optional[np.ndarray]): The label of every vector.
+        method (str): The projection method.
+        explained_variance_ratio (Optional[np.ndarray]): The variance explained by the components of a PCA.
+        cache_path (Optional[str]): The cache file of the projection.
+        from_cache (bool): Whether the projection was read from the cache.
+        """
+        self.coordinates = coordinates
+        self.sample_indices = sample_indices
+        self.labels = labels
+        self.method = method
+        self.explained_variance_ratio = explained_variance_ratio
+        self.cache_path = cache_path
+        self.from_cache = from_cache
+
+    @property
+    def sample_coordinates(self) -> np.ndarray:
+        """
+        Get the coordinates of the sampled vectors.
+
+        Returns:
+        np.ndarray: The coordinates, shape (sample size, 2).
+        """
+        return self.coordinates[self.sample_indices]
+
+    @property
+    def sample_labels(self) -> Optional[np.ndarray]:
+        """
+        Get the labels of the sampled vectors.
+
+        Returns:
+        Optional[np.ndarray]: The labels, None without labels.
+        """
+        return self.labels[self.sample_indices] if self.labels is not None else None
+
 
 class EmbeddingVisualizer:
-    def __init__(self):
-        pass
\ No newline at end of file
+    """
+    A class used to project the question and context embeddings of a whole dataset to 2-D and plot them.
+
+    Vectors are read in batches from a VectorSource, so they are never all loaded at once. A PCA is
+    fitted in a first pass over the batches (or random directions are drawn, in a single pass), and
+    the coordinates of every vector are computed in the next pass, during which a reservoir sample of
+    the vectors to plot is drawn. The coordinates and the sample are cached in a compressed `.npz`
+    file keyed by the fingerprint of the vectors and the projection parameters, so a large
+    visualization is plotted from the cache without reading any vector.
+
+    Attributes:
+    method (str): Either "pca" or "random".
+    sample_size (int): The maximal number of points plotted.
+    cache_dir (Optional[str]): The cache directory, None disables the cache.
+    seed (int): The seed of the sample and of the random projection.
+    """
+
+    def __init__(
+        self,
+        method: str = "pca",
+        sample_size: int = 20_000,
+        cache_dir: Optional[str] = ".cache/embeddings",
+        seed: int = 0
+    ) -> None:
+        """
+        Initialize the EmbeddingVisualizer.
+
+        Parameters:
+        method (str): Either "pca" or "random".
+        sample_size (int): The maximal number of points plotted.
+        cache_dir (Optional[str]): The cache directory, None disables the cache.
+        seed (int): The seed of the sample and of the random projection.
+
+        Raises:
+        ValueError: If the method is unknown.
+        """
+        if method not in PROJECTION_METHODS:
+            raise ValueError(f"Invalid projection method {method!r}! Expected one of {', '.join(PROJECTION_METHODS)}.")
+        self.method = method
+        self.sample_size = sample_size
+        self.cache_dir = cache_dir
+        self.seed = seed
+
+    def cache_key(self, source: VectorSource) -> str:
+        """
+        Get the cache key of the projection of a source.
+
+        Parameters:
+        source (VectorSource): The vectors.
+
+        Returns:
+        str: The hexadecimal SHA-256 of the fingerprint of the vectors and the projection parameters.
+        """
+        payload = json.dumps([source.fingerprint, self.method, self.sample_size, self.seed])
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def project(self, source: VectorSource, labels: Optional[Sequence[str]] = None) -> Projection:
+        """
+        Project vectors to 2-D, or read their projection from the cache.
+
+        Parameters:
+        source (VectorSource): The vectors.
+        labels (Optional[Sequence[str]]): The label of every vector, used to color the plot.
+
+        Returns:
+        Projection: The coordinates and the sample to plot.
+
+        Raises:
+        ValueError: If the number of labels differs from the number of vectors.
+        """
+        if labels is not None and len(labels) != source.num_vectors:
+            raise ValueError(f"Got {len(labels)} labels for {source.num_vectors} vectors!")
+        labels = np.asarray(labels) if labels is not None else None
+        cache_path = os.path.join(self.cache_dir, f"{self.cache_key(source)}.npz") if self.cache_dir else None
+        if cache_path is not None and os.path.exists(cache_path):
+            with stage("embeddings.cache_read"), np.load(cache_path) as cached:
+                explained = cached["explained_variance_ratio"] if "explained_variance_ratio" in cached else None
+                return Projection(
+                    cached["coordinates"], cached["sample_indices"], labels, self.method, explained, cache_path, from_cache=True
+                )
+
+        if self.method == "pca":
+            projector = ChunkedPCA()
+            with stage("embeddings.fit"):
+                for _, batch in source.iter_batches():
+                    projector.partial_fit(batch)
+        else:
+            projector = RandomProjection(seed=self.seed)
+            projector.partial_fit(np.empty((0, source.dimension)))
+        projector.finalize()
+        sampler = ReservoirSampler(self.sample_size, seed=self.seed)
+        coordinates = np.empty((source.num_vectors, 2), dtype=np.float32)
+        with stage("embeddings.transform"):
+            for start, batch in source.iter_batches():
+                coordinates[start:start + len(batch)] = projector.transform(batch)
+                sampler.add(len(batch))
+                count("embedding_vectors", len(batch))
+        projection = Projection(
+            coordinates, sampler.indices(), labels, self.method, projector.explained_variance_ratio, cache_path
+        )
+        if cache_path is not None:
+            self._write_cache(projection)
+        return projection
+
+    def visualize_dataset(
+        self,
+        embedding: EmbeddingBase,
+        baseline_dataset_dict: Dict[str, Any],
+        sample_dataset_dict: Optional[Dict[str, Any]] = None,
+        vectors_path: Optional[str] = None,
+        batch_size: int = 256
+    ) -> Projection:
+        """
+        Embed and project the questions and the context texts of a dataset, each unique text once.
+
+        Parameters:
+        embedding (EmbeddingBase): The embedding model.
+        baseline_dataset_dict (Dict[str, Any]): The baseline dataset.
+        sample_dataset_dict (Optional[Dict[str, Any]]): The sample dataset, whose contexts are labelled "sample".
+        vectors_path (Optional[str]): The `.npy` file of the vectors, in the cache directory by default.
+        batch_size (int): The number of texts embedded at once.
+
+        Returns:
+        Projection: The projection, labelled "question", "baseline" or "sample" by the first role of each text.
+
+        Raises:
+        ValueError: If no vectors path is given and the cache is disabled.
+        """
+        texts: Dict[str, str] = {}
+        for task_dict in baseline_dataset_dict["TASKS"].values():
+            texts.setdefault(task_dict["QUESTION"], "question")
+            for context_dict in task_dict["CONTEXTS"]:
+                texts.setdefault(context_dict["TEXT"], "baseline")
+        if sample_dataset_dict is not None:
+            for task_dict in sample_dataset_dict["TASKS"].values():
+                for context_dict in task_dict["CONTEXTS"]:
+                    texts.setdefault(context_dict["TEXT"], "sample")
+        fingerprint = dataset_hash(baseline_dataset_dict, sample_dataset_dict)
+        if vectors_path is None:
+            if not self.cache_dir:
+                raise ValueError("A vectors path is needed when the cache is disabled!")
+            vectors_path = os.path.join(self.cache_dir, f"{embedding.name}-{fingerprint}.npy")
+        source = VectorSource.from_embedding(embedding, list(texts), vectors_path, batch_size=batch_size, fingerprint=fingerprint)
+        return self.project(source, labels=list(texts.values()))
+
+    @staticmethod
+    def plot(projection: Projection, path: Optional[str] = None, title: Optional[str] = None, ax: Any = None) -> Any:
+        """
+        Scatter the sampled points of a projection, colored by label.
+
+        Parameters:
+        projection (Projection): The projection.
+        path (Optional[str]): The image file to save the figure to.
+        title (Optional[str]): The title of the plot.
+        ax (Any): The matplotlib axes to draw on, by default a new figure outside of pyplot, which leaves
+                  the backend and the figures of pyplot untouched.
+
+        Returns:
+        Any: The matplotlib figure.
+
+        Raises:
+        ImportError: If matplotlib is not installed.
+        """
+        try:
+            from matplotlib.figure import Figure
+        except ImportError as e:
+            raise ImportError("matplotlib is required to plot embeddings, install it with `pip install matplotlib`.") from e
+
+        if ax is None:
+            ax = Figure(figsize=(8, 8)).add_subplot()
+        coordinates, labels = projection.sample_coordinates, projection.sample_labels
+        marker_size = max(1.0, 20.0 / np.sqrt(max(len(coordinates), 1) / 1000))
+        if labels is None:
+            ax.scatter(coordinates[:, 0], coordinates[:, 1], s=marker_size, alpha=0.6, linewidths=0)
+        else:
+            for label in dict.fromkeys(labels.tolist()):
+                points = coordinates[labels == label]
+                ax.scatter(points[:, 0], points[:, 1], s=marker_size, alpha=0.6, linewidths=0, label=str(label))
+            ax.legend(markerscale=max(1.0, 6.0 / marker_size))
+        ax.set_title(title or f"{projection.method.upper()} of {len(projection.coordinates)} embeddings ({len(coordinates)} shown)")
+        if path is not None:
+            ax.figure.savefig(path, dpi=150, bbox_inches="tight")
+        return ax.figure
+
+    def _write_cache(self, projection: Projection) -> None:
+        """
+        Write a projection to its cache file atomically.
+
+        Parameters:
+        projection (Projection): The projection.
+        """
+        os.makedirs(self.cache_dir, exist_ok=True)
+        arrays = {"coordinates": projection.coordinates, "sample_indices": projection.sample_indices}
+        if projection.explained_variance_ratio is not None:
+            arrays["explained_variance_ratio"] = projection.explained_variance_ratio
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".npz")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                np.savez_compressed(f, **arrays)
+            os.replace(tmp_path, projection.cache_path)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
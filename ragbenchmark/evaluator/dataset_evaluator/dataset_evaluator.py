@@ -0,0 +1,568 @@
+import os
+import gzip
+import json
+import zlib
+import hashlib
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+
+from ...tasks.custom_task import CustomTask
+from ...metrics.aggregate import MeanAggregate
+from ...metrics.metrics_by_char.calc_recall_by_char import RecallByChar
+from ...metrics.metrics_by_char.calc_precision_by_char import PrecisionByRecall
+from ...metrics.metrics_by_page_number.calc_recall_by_page_number import RecallByPageNumber
+from ...metrics.metrics_by_page_number.calc_precision_by_page_number import PrecisionByPageNumber
+from ...preprocessing.text_normalizer import TextNormalizer
+from ..task_evaluator.task_evaluator import TaskEvaluator
+from .task_result_cache import TaskResultCache, task_hash
+
+METRIC_CLASSES = {
+    "recall_by_page_number": RecallByPageNumber,
+    "precision_by_page_number": PrecisionByPageNumber,
+    "recall_by_char": RecallByChar,
+    "precision_by_char": PrecisionByRecall,
+}
+METRICS = tuple(METRIC_CLASSES)
+
+PARTIAL_FORMAT = "ragbench-partial-aggregate"
+
+NORMALIZE_BATCH_SIZE = 4096
+
+
+def dataset_hash(dataset_dict: Dict[str, Any]) -> str:
+    """
+    Compute a stable hash of the tasks of a dataset, so that shards can tell whether they evaluated the
+    same sample dataset.
+
+    Parameters:
+    dataset_dict (Dict[str, Any]): The dataset dictionary.
+
+    Returns:
+    str: The hexadecimal SHA-256 of the canonical JSON of the tasks.
+    """
+    payload = json.dumps(dataset_dict["TASKS"], sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def shard_of(task_id: Any, num_shards: int) -> int:
+    """
+    Get the shard of a task. The hash is stable across processes and machines, unlike the built-in hash().
+
+    Parameters:
+    task_id (Any): The task id.
+    num_shards (int): The number of shards.
+
+    Returns:
+    int: The shard index, between 0 and num_shards - 1.
+    """
+    return zlib.crc32(str(task_id).encode("utf-8")) % num_shards
+
+
+def _open_text(file_path: str, mode: str):
+    """
+    Open a text file, gzip-compressed if its name ends with .gz.
+
+    Parameters:
+    file_path (str): The file path.
+    mode (str): "r" or "w".
+
+    Returns:
+    IO[str]: The opened file.
+    """
+    if file_path.endswith(".gz"):
+        return gzip.open(file_path, mode + "t", encoding="utf-8")
+    return open(file_path, mode, encoding="utf-8")
+
+
+def iter_task_texts(task_pair: Tuple[str, Dict[str, Any], Dict[str, Any]]) -> Iterator[str]:
+    """
+    Iterate over the texts of a task that metrics compare: the answers and the context texts.
+
+    Parameters:
+    task_pair (Tuple[str, Dict[str, Any], Dict[str, Any]]): The task id, the baseline task dictionary
+                                                            and the sample task dictionary.
+
+    Returns:
+    Iterator[str]: The raw texts.
+    """
+    for task_dict in task_pair[1:]:
+        yield task_dict["ANSWER"]
+        for context_dict in task_dict["CONTEXTS"]:
+            yield context_dict["TEXT"]
+
+
+def evaluate_task_pair(
+    task_pair: Tuple[str, Dict[str, Any], Dict[str, Any]],
+    metrics: Sequence[str],
+    validated: bool = False,
+    normalizer: Optional[TextNormalizer] = None
+) -> Dict[str, Any]:
+    """
+    Evaluate one task from its raw baseline and sample dictionaries.
+
+    Parameters:
+    task_pair (Tuple[str, Dict[str, Any], Dict[str, Any]]): The task id, the baseline task dictionary
+                                                            and the sample task dictionary.
+    metrics (Sequence[str]): The metrics to compute.
+    validated (bool): Whether the task was checked by DatasetValidator, so per-record checks can be skipped.
+    normalizer (Optional[TextNormalizer]): Normalizes texts before the metrics compare them.
+
+    Returns:
+    Dict[str, Any]: A row with the task id and one value per metric.
+    """
+    task_id, baseline_task_dict, sample_task_dict = task_pair
+    task_evaluator = TaskEvaluator(
+        CustomTask(task_id, baseline_task_dict, sample_task_dict), None, validated=validated, normalizer=normalizer
+    )
+    row = {"task_id": task_id}
+    for metric in metrics:
+        row[metric] = getattr(task_evaluator, f"get_{metric}")()
+    return row
+
+
+def _evaluate_task_chunk(
+    task_pairs: List[Tuple[str, Dict[str, Any], Dict[str, Any]]],
+    metrics: Sequence[str],
+    validated: bool,
+    normalizer: Optional[TextNormalizer] = None
+) -> List[Dict[str, Any]]:
+    """
+    Evaluate a chunk of tasks in a worker process.
+
+    Parameters:
+    task_pairs (List[Tuple[str, Dict[str, Any], Dict[str, Any]]]): The raw task pairs.
+    metrics (Sequence[str]): The metrics to compute.
+    validated (bool): Whether the tasks were checked by DatasetValidator.
+    normalizer (Optional[TextNormalizer]): Normalizes texts, shipped with the normalized forms of the chunk.
+
+    Returns:
+    List[Dict[str, Any]]: One row per task.
+    """
+    return [evaluate_task_pair(task_pair, metrics, validated, normalizer) for task_pair in task_pairs]
+
+
+def _evaluate_cache_misses(
+    misses: List[Tuple[Tuple[str, Dict[str, Any], Dict[str, Any]], List[str]]],
+    validated: bool,
+    normalizer: Optional[TextNormalizer] = None
+) -> List[Dict[str, Any]]:
+    """
+    Evaluate the metrics missing from the result cache, in the current or a worker process.
+
+    Parameters:
+    misses (List[Tuple[Tuple[str, Dict[str, Any], Dict[str, Any]], List[str]]]): The raw task pairs and their missing metrics.
+    validated (bool): Whether the tasks were checked by DatasetValidator.
+    normalizer (Optional[TextNormalizer]): Normalizes texts, shipped with the normalized forms of the tasks.
+
+    Returns:
+    List[Dict[str, Any]]: One row per task, with the missing metrics only.
+    """
+    return [evaluate_task_pair(task_pair, metrics, validated, normalizer) for task_pair, metrics in misses]
+
+
+class DatasetEvaluator:
+    """
+    Evaluates every task of a baseline dataset against the matching sample dataset.
+
+    Tasks are built from the raw dataset dictionaries only when they are evaluated, so results can be
+    streamed one task at a time. With several workers, chunks of tasks are evaluated in a process pool
+    and yielded back in dataset order. Both datasets are validated in one sweep before any task is
+    evaluated, so malformed records fail early with every error listed.
+
+    A run can be restricted to one shard of the tasks, selected by a stable hash of the task id. Each
+    shard writes a partial-aggregate file, and `merge_partials` combines any number of them into exactly
+    the result of a single-process run.
+
+    Attributes:
+    dataset_name (Optional[str]): Name of the baseline dataset.
+    metrics (List[str]): The metrics to compute.
+    validated (bool): Whether both datasets passed DatasetValidator.
+    workers (int): Number of worker processes, 1 evaluates in the current process.
+    chunk_size (int): Number of tasks sent to a worker at once.
+    shard_index (int): The shard evaluated by this run.
+    num_shards (int): The number of shards, 1 evaluates every task.
+    normalizer (Optional[TextNormalizer]): Normalizes texts before the metrics compare them. Every unique
+                                           text of the shard is normalized once, in batches, at load time.
+    cache (Optional[TaskResultCache]): Persistent memo of per-task metric values. Tasks are looked up by
+                                       content hash chunk by chunk, and only the metrics missing from the
+                                       cache are evaluated, then written back.
+    """
+
+    def __init__(
+        self,
+        baseline_dataset_dict: Dict[str, Any],
+        sample_dataset_dict: Dict[str, Any],
+        metrics: Optional[Sequence[str]] = None,
+        workers: int = 1,
+        chunk_size: int = 64,
+        validate: bool = True,
+        shard_index: int = 0,
+        num_shards: int = 1,
+        normalizer: Optional[TextNormalizer] = None,
+        cache: Optional[TaskResultCache] = None
+    ) -> None:
+        """
+        Initialize the DatasetEvaluator.
+
+        Parameters:
+        baseline_dataset_dict (Dict[str, Any]): Dictionary containing baseline dataset information.
+        sample_dataset_dict (Dict[str, Any]): Dictionary containing sample dataset information.
+        metrics (Optional[Sequence[str]]): The metrics to compute, defaults to all of METRICS.
+        workers (int): Number of worker processes.
+        chunk_size (int): Number of tasks sent to a worker at once.
+        validate (bool): Whether to validate both datasets before evaluation.
+        shard_index (int): The shard evaluated by this run.
+        num_shards (int): The number of shards.
+        normalizer (Optional[TextNormalizer]): Normalizes texts before the metrics compare them.
+        cache (Optional[TaskResultCache]): Persistent memo of per-task metric values.
+
+        Raises:
+        ValueError: If an unknown metric or an invalid shard is requested.
+        DatasetValidationError: If validation is enabled and the datasets are malformed.
+        """
+        metrics = list(metrics) if metrics else list(METRICS)
+        unknown_metrics = [metric for metric in metrics if metric not in METRICS]
+        if unknown_metrics:
+            raise ValueError(f"Invalid metrics {unknown_metrics}! Supported metrics: {', '.join(METRICS)}.")
+        if num_shards < 1 or not 0 <= shard_index < num_shards:
+            raise ValueError(f"Invalid shard {shard_index}/{num_shards}! Expected 0 <= shard_index < num_shards.")
+        if validate:
+            from ...datasets.dataset_validator import DatasetValidator
+            DatasetValidator.validate_pair(baseline_dataset_dict, sample_dataset_dict)
+        self.validated = validate
+        self.dataset_name: Optional[str] = baseline_dataset_dict.get("NAME")
+        self.metrics: List[str] = metrics
+        self.workers = max(1, workers)
+        self.chunk_size = max(1, chunk_size)
+        self.shard_index = shard_index
+        self.num_shards = num_shards
+        self._baseline_tasks: Dict[str, Dict[str, Any]] = baseline_dataset_dict["TASKS"]
+        self._sample_tasks: Dict[str, Dict[str, Any]] = sample_dataset_dict["TASKS"]
+        self.normalizer = normalizer
+        self.cache = cache
+        self._metric_versions: Dict[str, int] = {metric: METRIC_CLASSES[metric].VERSION for metric in metrics}
+        # with a result cache, texts are normalized lazily since most tasks are expected to hit the cache
+        if normalizer is not None and cache is None:
+            self._normalize_texts()
+
+    def _normalize_texts(self) -> None:
+        """
+        Normalize every text of the shard once, in batches, so that tasks only hit the normalizer cache.
+        """
+        batch = []
+        for task_pair in self.iter_task_pairs():
+            batch.extend(iter_task_texts(task_pair))
+            if len(batch) >= NORMALIZE_BATCH_SIZE:
+                self.normalizer.normalize_batch(batch)
+                batch = []
+        self.normalizer.normalize_batch(batch)
+
+    @property
+    def num_tasks(self) -> int:
+        """
+        Get the number of tasks to evaluate.
+
+        Returns:
+        int: The number of baseline tasks in the shard.
+        """
+        if self.num_shards == 1:
+            return len(self._baseline_tasks)
+        return sum(1 for task_id in self._baseline_tasks if shard_of(task_id, self.num_shards) == self.shard_index)
+
+    def iter_task_pairs(self) -> Iterator[Tuple[str, Dict[str, Any], Dict[str, Any]]]:
+        """
+        Iterate over the raw task pairs of the shard in dataset order. A baseline task without a sample
+        task is paired with an empty sample, so that it scores zero instead of being dropped.
+
+        Returns:
+        Iterator[Tuple[str, Dict[str, Any], Dict[str, Any]]]: (task id, baseline task, sample task) triples.
+        """
+        for task_id, baseline_task_dict in self._baseline_tasks.items():
+            if self.num_shards > 1 and shard_of(task_id, self.num_shards) != self.shard_index:
+                continue
+            sample_task_dict = self._sample_tasks.get(task_id)
+            if sample_task_dict is None:
+                sample_task_dict = {"QUESTION": baseline_task_dict["QUESTION"], "ANSWER": "", "CONTEXTS": []}
+            yield task_id, baseline_task_dict, sample_task_dict
+
+    def iter_results(self) -> Iterator[Dict[str, Any]]:
+        """
+        Evaluate the tasks and yield one result row per task, in dataset order.
+
+        Returns:
+        Iterator[Dict[str, Any]]: Rows with the task id and one value per metric.
+        """
+        if self.workers == 1 and self.cache is None:
+            for task_pair in self.iter_task_pairs():
+                yield evaluate_task_pair(task_pair, self.metrics, self.validated, self.normalizer)
+            return
+        if self.workers == 1:
+            for chunk in self._iter_chunks():
+                hashes, cached, misses = self._lookup_chunk(chunk)
+                miss_rows = _evaluate_cache_misses(misses, self.validated, self.normalizer)
+                yield from self._complete_chunk(chunk, hashes, cached, miss_rows)
+            return
+
+        from concurrent.futures import ProcessPoolExecutor
+
+        with ProcessPoolExecutor(max_workers=self.workers) as executor:
+            def submit(chunk):
+                if self.cache is None:
+                    return None, executor.submit(
+                        _evaluate_task_chunk, chunk, self.metrics, self.validated, self._chunk_normalizer(chunk)
+                    )
+                hashes, cached, misses = self._lookup_chunk(chunk)
+                if not misses:
+                    return (chunk, hashes, cached), None
+                normalizer = self._chunk_normalizer([task_pair for task_pair, _ in misses])
+                return (chunk, hashes, cached), executor.submit(_evaluate_cache_misses, misses, self.validated, normalizer)
+
+            chunks = self._iter_chunks()
+            pending = []
+            for _ in range(self.workers * 2):
+                chunk = next(chunks, None)
+                if chunk is None:
+                    break
+                pending.append(submit(chunk))
+            while pending:
+                cached_chunk, future = pending.pop(0)
+                rows = future.result() if future is not None else []
+                chunk = next(chunks, None)
+                if chunk is not None:
+                    pending.append(submit(chunk))
+                if cached_chunk is not None:
+                    rows = self._complete_chunk(*cached_chunk, rows)
+                yield from rows
+
+    def _lookup_chunk(
+        self,
+        chunk: List[Tuple[str, Dict[str, Any], Dict[str, Any]]]
+    ) -> Tuple[List[str], Dict[str, Dict[str, Any]], List[Tuple[Tuple[str, Dict[str, Any], Dict[str, Any]], List[str]]]]:
+        """
+        Look up the cached metric values of a chunk of tasks.
+
+        Parameters:
+        chunk (List[Tuple[str, Dict[str, Any], Dict[str, Any]]]): The raw task pairs.
+
+        Returns:
+        Tuple[List[str], Dict[str, Dict[str, Any]], List[Tuple[Tuple[str, Dict[str, Any], Dict[str, Any]], List[str]]]]:
+            The hash of every task, the cached values by hash, and the task pairs with their missing metrics.
+        """
+        normalization = self.normalizer.signature if self.normalizer is not None else "raw"
+        hashes = [task_hash(task_pair[1], task_pair[2], normalization) for task_pair in chunk]
+        cached = self.cache.get_many(hashes, self._metric_versions)
+        misses = []
+        for task_pair, hash_ in zip(chunk, hashes):
+            values = cached.get(hash_, {})
+            missing_metrics = [metric for metric in self.metrics if metric not in values]
+            if missing_metrics:
+                misses.append((task_pair, missing_metrics))
+        return hashes, cached, misses
+
+    def _complete_chunk(
+        self,
+        chunk: List[Tuple[str, Dict[str, Any], Dict[str, Any]]],
+        hashes: List[str],
+        cached: Dict[str, Dict[str, Any]],
+        miss_rows: List[Dict[str, Any]]
+    ) -> List[Dict[str, Any]]:
+        """
+        Combine the cached and the computed metric values of a chunk, and write the computed ones to the cache.
+
+        Parameters:
+        chunk (List[Tuple[str, Dict[str, Any], Dict[str, Any]]]): The raw task pairs.
+        hashes (List[str]): The hash of every task.
+        cached (Dict[str, Dict[str, Any]]): The cached values by hash.
+        miss_rows (List[Dict[str, Any]]): The computed rows of the tasks with missing metrics, in chunk order.
+
+        Returns:
+        List[Dict[str, Any]]: One complete row per task, in chunk order.
+        """
+        computed = iter(miss_rows)
+        entries = []
+        rows = []
+        for task_pair, hash_ in zip(chunk, hashes):
+            values = dict(cached.get(hash_, {}))
+            missing_metrics = [metric for metric in self.metrics if metric not in values]
+            if missing_metrics:
+                row = next(computed)
+                for metric in missing_metrics:
+                    values[metric] = row[metric]
+                    entries.append((hash_, metric, self._metric_versions[metric], row[metric]))
+            rows.append({"task_id": task_pair[0], **{metric: values[metric] for metric in self.metrics}})
+        if entries:
+            self.cache.put_many(entries)
+        return rows
+
+    def _chunk_normalizer(self, chunk: List[Tuple[str, Dict[str, Any], Dict[str, Any]]]) -> Optional[TextNormalizer]:
+        """
+        Get the normalizer sent to a worker, carrying only the normalized forms of the chunk.
+
+        Parameters:
+        chunk (List[Tuple[str, Dict[str, Any], Dict[str, Any]]]): The raw task pairs.
+
+        Returns:
+        Optional[TextNormalizer]: The normalizer, None without normalization.
+        """
+        if self.normalizer is None:
+            return None
+        return self.normalizer.subset(text for task_pair in chunk for text in iter_task_texts(task_pair))
+
+    def evaluate(self) -> Dict[str, Any]:
+        """
+        Evaluate every task and aggregate the results.
+
+        Returns:
+        Dict[str, Any]: The dataset name, the number of tasks, the mean of every metric under "metrics"
+                        and the per-task rows under "tasks".
+        """
+        rows = list(self.iter_results())
+        return {
+            "name": self.dataset_name,
+            "num_tasks": len(rows),
+            "metrics": self.aggregate(rows, self.metrics),
+            "tasks": rows,
+        }
+
+    @staticmethod
+    def aggregate(rows: List[Dict[str, Any]], metrics: Sequence[str]) -> Dict[str, float]:
+        """
+        Average every metric over the result rows.
+
+        Parameters:
+        rows (List[Dict[str, Any]]): The per-task result rows.
+        metrics (Sequence[str]): The metrics to average.
+
+        Returns:
+        Dict[str, float]: The mean value of every metric, 0.0 for an empty dataset.
+        """
+        aggregates = DatasetEvaluator.build_aggregates(rows, metrics)
+        return {metric: aggregate.mean for metric, aggregate in aggregates.items()}
+
+    @staticmethod
+    def build_aggregates(rows: Iterable[Dict[str, Any]], metrics: Sequence[str]) -> Dict[str, MeanAggregate]:
+        """
+        Build the mergeable aggregate of every metric over the result rows.
+
+        Parameters:
+        rows (Iterable[Dict[str, Any]]): The per-task result rows.
+        metrics (Sequence[str]): The metrics to aggregate.
+
+        Returns:
+        Dict[str, MeanAggregate]: The aggregate of every metric.
+        """
+        aggregates = {metric: METRIC_CLASSES[metric].create_aggregate() for metric in metrics}
+        for row in rows:
+            for metric, aggregate in aggregates.items():
+                aggregate.update(row[metric])
+        return aggregates
+
+    def write_partial(self, file_path: str, rows: Optional[List[Dict[str, Any]]] = None) -> Dict[str, Any]:
+        """
+        Write the partial aggregates and per-task rows of the shard, with a hash of the whole sample
+        dataset so that shards of different sample datasets are never merged.
+
+        Parameters:
+        file_path (str): The partial-aggregate JSON file, gzip-compressed if it ends with .gz.
+        rows (Optional[List[Dict[str, Any]]]): The rows of an `iter_results` run, the shard is evaluated if omitted.
+
+        Returns:
+        Dict[str, Any]: The written partial aggregate.
+        """
+        positions = {task_id: position for position, task_id in enumerate(self._baseline_tasks)}
+        if rows is None:
+            rows = list(self.iter_results())
+        partial = {
+            "format": PARTIAL_FORMAT,
+            "name": self.dataset_name,
+            "samples": dataset_hash({"TASKS": self._sample_tasks}),
+            "metrics": self.metrics,
+            "normalization": self.normalizer.signature if self.normalizer is not None else "raw",
+            "shard_index": self.shard_index,
+            "num_shards": self.num_shards,
+            "aggregates": {
+                metric: aggregate.to_dict() for metric, aggregate in self.build_aggregates(rows, self.metrics).items()
+            },
+            "positions": [positions[row["task_id"]] for row in rows],
+            "tasks": rows,
+        }
+        os.makedirs(os.path.dirname(os.path.abspath(file_path)), exist_ok=True)
+        with _open_text(file_path, "w") as f:
+            json.dump(partial, f, ensure_ascii=False, separators=(",", ":"))
+        return partial
+
+    @staticmethod
+    def merge_partials(partials: Iterable[Union[str, Dict[str, Any]]], allow_missing_shards: bool = False) -> Dict[str, Any]:
+        """
+        Merge shard outputs into the dataset-level result of a single-process `evaluate`.
+
+        Parameters:
+        partials (Iterable[Union[str, Dict[str, Any]]]): Partial-aggregate files or already loaded partials.
+        allow_missing_shards (bool): Whether to merge an incomplete set of shards.
+
+        Returns:
+        Dict[str, Any]: The dataset name, the number of tasks, the mean of every metric under "metrics",
+                        the mergeable aggregates under "aggregates" and the per-task rows in dataset order.
+
+        Raises:
+        ValueError: If the partials do not belong to one sharded run.
+        """
+        loaded = []
+        for partial in partials:
+            if isinstance(partial, str):
+                with _open_text(partial, "r") as f:
+                    partial = json.load(f)
+            if partial.get("format") != PARTIAL_FORMAT:
+                raise ValueError("Invalid partial aggregate! Unknown file format.")
+            loaded.append(partial)
+        if not loaded:
+            raise ValueError("No partial aggregate to merge!")
+
+        metrics = loaded[0]["metrics"]
+        num_shards = loaded[0]["num_shards"]
+        shard_indices = [partial["shard_index"] for partial in loaded]
+        normalization = loaded[0].get("normalization", "raw")
+        if any(
+            partial["metrics"] != metrics or partial["num_shards"] != num_shards or partial.get("normalization", "raw") != normalization
+            for partial in loaded
+        ):
+            raise ValueError("Invalid partial aggregates! Shards were evaluated with different metrics, normalizations or shard counts.")
+        if any(partial.get("samples") != loaded[0].get("samples") for partial in loaded):
+            raise ValueError("Invalid partial aggregates! Shards were evaluated on different sample datasets.")
+        if len(set(shard_indices)) != len(shard_indices):
+            raise ValueError(f"Invalid partial aggregates! Duplicated shards in {sorted(shard_indices)}.")
+        missing_shards = sorted(set(range(num_shards)) - set(shard_indices))
+        if missing_shards and not allow_missing_shards:
+            raise ValueError(f"Missing shards {missing_shards} of {num_shards}!")
+
+        aggregates = {metric: METRIC_CLASSES[metric].create_aggregate() for metric in metrics}
+        positioned_rows = []
+        for partial in loaded:
+            for metric, aggregate_dict in partial["aggregates"].items():
+                aggregates[metric].merge(MeanAggregate.from_dict(aggregate_dict))
+            positioned_rows.extend(zip(partial["positions"], partial["tasks"]))
+        positioned_rows.sort(key=lambda positioned_row: positioned_row[0])
+        return {
+            "name": loaded[0]["name"],
+            "normalization": normalization,
+            "num_tasks": len(positioned_rows),
+            "metrics": {metric: aggregate.mean for metric, aggregate in aggregates.items()},
+            "aggregates": {metric: aggregate.to_dict() for metric, aggregate in aggregates.items()},
+            "tasks": [row for _, row in positioned_rows],
+            "missing_shards": missing_shards,
+        }
+
+    def _iter_chunks(self) -> Iterator[List[Tuple[str, Dict[str, Any], Dict[str, Any]]]]:
+        """
+        Group the raw task pairs into chunks for the worker processes.
+
+        Returns:
+        Iterator[List[Tuple[str, Dict[str, Any], Dict[str, Any]]]]: Chunks of at most `chunk_size` task pairs.
+        """
+        chunk = []
+        for task_pair in self.iter_task_pairs():
+            chunk.append(task_pair)
+            if len(chunk) == self.chunk_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
@@ -0,0 +1,204 @@
+import os
+import json
+import sqlite3
+import hashlib
+import threading
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+# SQLite limits the number of bound variables of a statement, 999 in old versions
+_LOOKUP_BATCH_SIZE = 500
+
+_CONTEXT_KEYS = ("TEXT", "FILE_PATH", "PAGE_NUMBER", "SCORE")
+
+
+def task_hash(baseline_task_dict: Dict[str, Any], sample_task_dict: Dict[str, Any], normalization: str = "raw") -> str:
+    """
+    Compute a stable hash of everything the metrics of a task depend on: the question, answers and
+    contexts of both sides, and the text normalization. Extra keys such as latencies or generation
+    costs and the task id are left out, so they do not invalidate cached results.
+
+    Parameters:
+    baseline_task_dict (Dict[str, Any]): The baseline task dictionary.
+    sample_task_dict (Dict[str, Any]): The sample task dictionary.
+    normalization (str): The signature of the text normalization, "raw" without normalization.
+
+    Returns:
+    str: The hexadecimal SHA-256 of the canonical JSON of the task.
+    """
+    def content(task_dict: Dict[str, Any]) -> List[Any]:
+        contexts = [
+            [context_dict.get(key) for key in _CONTEXT_KEYS] for context_dict in task_dict["CONTEXTS"]
+        ]
+        return [task_dict["QUESTION"], task_dict["ANSWER"], contexts]
+
+    payload = json.dumps(
+        [normalization, content(baseline_task_dict), content(sample_task_dict)], ensure_ascii=False, separators=(",", ":")
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class TaskResultCache:
+    """
+    A persistent memo of per-task metric values, stored in an SQLite database.
+
+    Values are keyed by the content hash of the task (see `task_hash`), the metric and the version of
+    the metric implementation, so an unchanged task is never evaluated twice, while editing a task or
+    bumping the VERSION of a metric only recomputes what changed. The database runs in WAL mode, so
+    several evaluator processes, e.g. the shards of a sharded run, can read and write it concurrently.
+    Connections are opened per process and thread, so the cache can be passed to worker processes.
+
+    Attributes:
+    path (str): The database file.
+    timeout (float): Seconds to wait for a lock held by another writer.
+    hits (int): Number of metric values read from the cache by this instance.
+    misses (int): Number of metric values missing from the cache.
+
+    Example:
+    >>> with TaskResultCache(".cache/results.sqlite") as cache:
+    ...     DatasetEvaluator(baseline_dataset_dict, sample_dataset_dict, cache=cache).evaluate()
+    """
+
+    def __init__(self, path: str, timeout: float = 30.0) -> None:
+        """
+        Initialize the TaskResultCache.
+
+        Parameters:
+        path (str): The database file, created with its directory if missing.
+        timeout (float): Seconds to wait for a lock held by another writer.
+        """
+        self.path = path
+        self.timeout = timeout
+        self.hits = 0
+        self.misses = 0
+        self._local = threading.local()
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        with self._connection:
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS results ("
+                "task_hash TEXT NOT NULL, metric TEXT NOT NULL, version INTEGER NOT NULL, value REAL, "
+                "PRIMARY KEY (task_hash, metric, version)) WITHOUT ROWID"
+            )
+
+    def __getstate__(self) -> Dict[str, Any]:
+        """
+        Pickle the cache without its connections.
+
+        Returns:
+        Dict[str, Any]: The picklable state.
+        """
+        state = self.__dict__.copy()
+        del state["_local"]
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        """
+        Unpickle the cache, connections are reopened on first use.
+
+        Parameters:
+        state (Dict[str, Any]): The pickled state.
+        """
+        self.__dict__.update(state)
+        self._local = threading.local()
+
+    @property
+    def _connection(self) -> sqlite3.Connection:
+        """
+        Get the connection of the current process and thread, opening it if needed.
+
+        Returns:
+        sqlite3.Connection: The connection.
+        """
+        connection = getattr(self._local, "connection", None)
+        if connection is None or self._local.pid != os.getpid():
+            connection = sqlite3.connect(self.path, timeout=self.timeout)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+            self._local.pid = os.getpid()
+        return connection
+
+    def get_many(self, task_hashes: Sequence[str], versions: Mapping[str, int]) -> Dict[str, Dict[str, Any]]:
+        """
+        Look up the cached values of many tasks.
+
+        Parameters:
+        task_hashes (Sequence[str]): The task hashes.
+        versions (Mapping[str, int]): The current version of every requested metric.
+
+        Returns:
+        Dict[str, Dict[str, Any]]: The cached metric values of every task hash with at least one
+                                   value of a current metric version.
+        """
+        found: Dict[str, Dict[str, Any]] = {}
+        unique_hashes = list(dict.fromkeys(task_hashes))
+        for start in range(0, len(unique_hashes), _LOOKUP_BATCH_SIZE):
+            batch = unique_hashes[start:start + _LOOKUP_BATCH_SIZE]
+            rows = self._connection.execute(
+                f"SELECT task_hash, metric, version, value FROM results WHERE task_hash IN ({','.join('?' * len(batch))})",
+                batch,
+            )
+            for hash_, metric, version, value in rows:
+                if versions.get(metric) == version:
+                    found.setdefault(hash_, {})[metric] = value
+        hits = sum(len(found.get(hash_, ())) for hash_ in task_hashes)
+        self.hits += hits
+        self.misses += len(task_hashes) * len(versions) - hits
+        return found
+
+    def put_many(self, entries: Iterable[Tuple[str, str, int, Any]]) -> None:
+        """
+        Store many metric values in one transaction.
+
+        Parameters:
+        entries (Iterable[Tuple[str, str, int, Any]]): (task hash, metric, version, value) tuples.
+        """
+        with self._connection:
+            self._connection.executemany("INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?)", entries)
+
+    def __len__(self) -> int:
+        """
+        Get the number of cached metric values.
+
+        Returns:
+        int: The number of cached values.
+        """
+        return self._connection.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+
+    def prune(self, versions: Mapping[str, int]) -> int:
+        """
+        Delete the values computed by other versions of the given metrics.
+
+        Parameters:
+        versions (Mapping[str, int]): The current version of every metric to prune.
+
+        Returns:
+        int: The number of deleted values.
+        """
+        with self._connection:
+            return sum(
+                self._connection.execute("DELETE FROM results WHERE metric = ? AND version != ?", (metric, version)).rowcount
+                for metric, version in versions.items()
+            )
+
+    def clear(self) -> None:
+        """
+        Delete every cached value.
+        """
+        with self._connection:
+            self._connection.execute("DELETE FROM results")
+
+    def close(self) -> None:
+        """
+        Close the connection of the current thread.
+        """
+        connection: Optional[sqlite3.Connection] = getattr(self._local, "connection", None)
+        if connection is not None:
+            connection.close()
+            self._local.connection = None
+
+    def __enter__(self) -> "TaskResultCache":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
@@ -0,0 +1,181 @@
+from typing import Any, Dict, List, Optional, Union
+
+from ...datasets.pubmed import PubMedQA
+from ...generation.answer_generator import AnswerGenerator
+from ...metrics.metrics_by_answer.calc_decision import DECISIONS, DecisionClassification, parse_decision
+from ...preprocessing.text_normalizer import TextNormalizer
+from ...profiling.profiler import stage, count
+from ..dataset_evaluator.dataset_evaluator import DatasetEvaluator
+
+DECISION_SYSTEM_PROMPT = (
+    "You answer biomedical research questions using only the given sections of an abstract. "
+    "Start your answer with exactly one word, yes, no or maybe, then justify it in one sentence."
+)
+
+
+def generate_decisions(
+    dataset: PubMedQA,
+    generator: AnswerGenerator,
+    sample_dataset_dict: Optional[Dict[str, Any]] = None
+) -> Dict[str, Any]:
+    """
+    Generate the answer of every PubMedQA question with a chat model.
+
+    Parameters:
+    dataset (PubMedQA): The dataset.
+    generator (AnswerGenerator): The generator, usually built with DECISION_SYSTEM_PROMPT.
+    sample_dataset_dict (Optional[Dict[str, Any]]): Retrieved contexts to answer from, defaults to the
+                                                    sections of every abstract.
+
+    Returns:
+    Dict[str, Any]: The sample dataset dictionary with the generated answers. Without sample_dataset_dict
+                    its contexts are the sections of the abstracts, so pass only `decision_answers` of it
+                    to PubMedQAEvaluator, or it scores the abstracts as a perfect retrieval.
+    """
+    if sample_dataset_dict is None:
+        sample_dataset_dict = dataset.to_sample_dict()
+    return generator.generate(sample_dataset_dict)
+
+
+def decision_answers(sample_dataset_dict: Dict[str, Any]) -> Dict[str, str]:
+    """
+    Get the answers of a sample dataset, without its contexts.
+
+    Parameters:
+    sample_dataset_dict (Dict[str, Any]): The sample dataset dictionary, e.g. from `generate_decisions`.
+
+    Returns:
+    Dict[str, str]: The answer of every task, "" for a task without answer.
+    """
+    return {task_id: task_dict.get("ANSWER", "") for task_id, task_dict in sample_dataset_dict["TASKS"].items()}
+
+
+class PubMedQAEvaluator:
+    """
+    Evaluates yes/no/maybe predictions on PubMedQA, and optionally the contexts retrieved for them.
+
+    Predictions are parsed into decisions once, and accuracy, macro-F1 and the confusion matrix are
+    computed over all of them at once by DecisionClassification. Questions without a prediction, or
+    whose answer holds no decision, count as invalid predictions. Retrieved contexts are scored against
+    the sections of the abstracts with the overlap metrics of DatasetEvaluator, in a process pool when
+    `workers` is above 1.
+
+    Attributes:
+    dataset (PubMedQA): The dataset.
+    labels (List[str]): The labelled decision of every question.
+    predictions (List[Optional[str]]): The parsed decision of every question, None if invalid.
+    workers (int): Number of worker processes of the retrieval evaluation.
+
+    Example:
+    >>> evaluator = PubMedQAEvaluator(PubMedQA.from_file(), {"21645374": "Yes, ..."})
+    >>> evaluator.evaluate()["decisions"]["accuracy"]
+    """
+
+    def __init__(
+        self,
+        dataset: PubMedQA,
+        predictions: Union[Dict[str, str], Dict[str, Any]],
+        workers: int = 1
+    ) -> None:
+        """
+        Initialize the PubMedQAEvaluator.
+
+        Parameters:
+        dataset (PubMedQA): The dataset.
+        predictions (Union[Dict[str, str], Dict[str, Any]]): Either a mapping from PubMed ids to answers, or
+                                                             a sample dataset dictionary whose tasks carry
+                                                             the answers, e.g. from `generate_decisions`.
+        workers (int): Number of worker processes of the retrieval evaluation.
+        """
+        self.dataset = dataset
+        self.workers = max(1, workers)
+        self._sample_dataset_dict: Optional[Dict[str, Any]] = None
+        if isinstance(predictions.get("TASKS"), dict):
+            self._sample_dataset_dict = predictions
+            answers = decision_answers(predictions)
+        else:
+            answers = predictions
+        task_ids = dataset.documents
+        self.labels: List[str] = dataset.labels
+        with stage("pubmedqa.parse"):
+            self.predictions: List[Optional[str]] = [parse_decision(answers.get(task_id)) for task_id in task_ids]
+        self._num_missing = sum(1 for task_id in task_ids if task_id not in answers)
+        count("pubmedqa_predictions", len(task_ids) - self._num_missing)
+
+    def evaluate_decisions(self) -> Dict[str, Any]:
+        """
+        Score the decisions.
+
+        Returns:
+        Dict[str, Any]: The accuracy, the macro-F1, the per-class scores, the confusion matrix (rows are
+                        labels and columns predictions, in DECISIONS order, then an "invalid" column) and
+                        the numbers of questions, missing and invalid predictions.
+        """
+        confusion_matrix = DecisionClassification.calculate_confusion_matrix(self.labels, self.predictions)
+        return {
+            "num_tasks": len(self.labels),
+            "num_missing": self._num_missing,
+            "num_invalid": int(confusion_matrix[:, -1].sum()),
+            "accuracy": DecisionClassification.calculate_accuracy(confusion_matrix),
+            "macro_f1": DecisionClassification.calculate_macro_f1(confusion_matrix),
+            "per_class": DecisionClassification.calculate_per_class(confusion_matrix),
+            "classes": [*DECISIONS, "invalid"],
+            "confusion_matrix": confusion_matrix.tolist(),
+        }
+
+    def evaluate_retrieval(
+        self,
+        sample_dataset_dict: Optional[Dict[str, Any]] = None,
+        normalizer: Optional[TextNormalizer] = None,
+        chunk_size: int = 64
+    ) -> Dict[str, Any]:
+        """
+        Score the retrieved contexts against the sections of the abstracts.
+
+        Retrieved contexts must address sections like the baseline, see PubMedQA.to_baseline_dict. Only
+        the questions of the sample dataset are scored.
+
+        Parameters:
+        sample_dataset_dict (Optional[Dict[str, Any]]): The sample dataset, defaults to the one given as
+                                                        predictions.
+        normalizer (Optional[TextNormalizer]): Normalizes texts before the char metrics compare them.
+        chunk_size (int): Number of tasks sent to a worker at once.
+
+        Returns:
+        Dict[str, Any]: The result of DatasetEvaluator.evaluate.
+
+        Raises:
+        ValueError: If there is no sample dataset.
+        """
+        sample_dataset_dict = sample_dataset_dict or self._sample_dataset_dict
+        if sample_dataset_dict is None:
+            raise ValueError("Invalid retrieval evaluation! The predictions carry no retrieved contexts.")
+        baseline_dataset_dict = self.dataset.to_baseline_dict()
+        sample_tasks = sample_dataset_dict["TASKS"]
+        baseline_dataset_dict["TASKS"] = {
+            task_id: task_dict for task_id, task_dict in baseline_dataset_dict["TASKS"].items() if task_id in sample_tasks
+        }
+        evaluator = DatasetEvaluator(
+            baseline_dataset_dict,
+            sample_dataset_dict,
+            workers=self.workers,
+            chunk_size=chunk_size,
+            normalizer=normalizer,
+        )
+        return evaluator.evaluate()
+
+    def evaluate(self, normalizer: Optional[TextNormalizer] = None) -> Dict[str, Any]:
+        """
+        Score the decisions, and the retrieved contexts if the predictions are a sample dataset.
+
+        Parameters:
+        normalizer (Optional[TextNormalizer]): Normalizes texts before the char metrics compare them.
+
+        Returns:
+        Dict[str, Any]: The dataset name, the decision scores under "decisions", and the mean retrieval
+                        metrics under "retrieval" if there are retrieved contexts.
+        """
+        result: Dict[str, Any] = {"name": self.dataset.dataset_name, "decisions": self.evaluate_decisions()}
+        if self._sample_dataset_dict is not None:
+            result["retrieval"] = self.evaluate_retrieval(normalizer=normalizer)["metrics"]
+        return result
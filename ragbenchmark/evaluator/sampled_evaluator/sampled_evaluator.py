@@ -0,0 +1,379 @@
+import math
+import random
+from statistics import NormalDist
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from ...preprocessing.text_normalizer import TextNormalizer
+from ...profiling.profiler import stage, count
+from ..dataset_evaluator.dataset_evaluator import DatasetEvaluator, METRICS
+from ..dataset_evaluator.task_result_cache import TaskResultCache
+
+MERGED_STRATUM = "(merged)"
+
+
+def file_stratum(task_dict: Dict[str, Any]) -> str:
+    """
+    Get the stratum of a baseline task: the file of its first context.
+
+    Parameters:
+    task_dict (Dict[str, Any]): The baseline task dictionary.
+
+    Returns:
+    str: The file path, "" for a task without context.
+    """
+    contexts = task_dict["CONTEXTS"]
+    return contexts[0]["FILE_PATH"] if contexts else ""
+
+
+class StratumEstimate:
+    """
+    Running sums of the metric values of the evaluated tasks of one stratum.
+
+    Attributes:
+    size (int): The number of tasks of the stratum.
+    count (int): The number of evaluated tasks.
+    sums (Dict[str, float]): The sum of the values of every metric.
+    sums_sq (Dict[str, float]): The sum of the squared values of every metric.
+    """
+
+    def __init__(self, size: int, metrics: Sequence[str]) -> None:
+        """
+        Initialize an empty StratumEstimate.
+
+        Parameters:
+        size (int): The number of tasks of the stratum.
+        metrics (Sequence[str]): The metrics.
+        """
+        self.size = size
+        self.count = 0
+        self.sums: Dict[str, float] = {metric: 0.0 for metric in metrics}
+        self.sums_sq: Dict[str, float] = {metric: 0.0 for metric in metrics}
+
+    def update(self, row: Dict[str, Any]) -> None:
+        """
+        Add the values of one evaluated task.
+
+        Parameters:
+        row (Dict[str, Any]): The result row of the task.
+        """
+        self.count += 1
+        for metric in self.sums:
+            value = float(row[metric])
+            self.sums[metric] += value
+            self.sums_sq[metric] += value * value
+
+    def mean(self, metric: str) -> float:
+        """
+        Get the sample mean of a metric.
+
+        Parameters:
+        metric (str): The metric.
+
+        Returns:
+        float: The mean, 0.0 before any evaluated task.
+        """
+        return self.sums[metric] / self.count if self.count else 0.0
+
+    def variance(self, metric: str) -> Optional[float]:
+        """
+        Get the unbiased sample variance of a metric.
+
+        Parameters:
+        metric (str): The metric.
+
+        Returns:
+        Optional[float]: The variance, None with fewer than two evaluated tasks.
+        """
+        if self.count < 2:
+            return None
+        mean = self.mean(metric)
+        return max(self.sums_sq[metric] - self.count * mean * mean, 0.0) / (self.count - 1)
+
+
+class SampledEvaluator:
+    """
+    Estimates the dataset metrics from a stratified random sample of tasks, evaluating more tasks only
+    until every confidence interval is narrow enough.
+
+    Tasks are grouped into strata, by default by the file of their first baseline context, and every
+    stratum is shuffled once. When there are more strata than tasks in the first round, the smallest
+    strata are merged into one MERGED_STRATUM, so that the first round still fits in the budget. Each
+    round evaluates the next tasks of every stratum, in proportion to the stratum sizes, with at least
+    one task per stratum and never more tasks than the round, through DatasetEvaluator. The dataset mean is
+    the stratified estimate sum(W_h * mean_h) with W_h the share of the tasks in stratum h, and its
+    variance sum(W_h^2 * s_h^2 / n_h * (1 - n_h / N_h)), the last factor being the finite population
+    correction, so evaluating every task gives the exact mean with a zero-width interval. A stratum with
+    a single evaluated task uses the variance of the whole sample.
+
+    Rounds grow: the next sample size is the one the current variance predicts to reach the target
+    width, at least `batch_size` more tasks and at most twice the current sample.
+
+    Attributes:
+    metrics (List[str]): The metrics to estimate.
+    target_width (float): The target width of the confidence intervals, upper minus lower bound.
+    confidence (float): The confidence level of the intervals.
+    batch_size (int): The size of the first round, and the minimal growth of the sample per round.
+    min_tasks (int): The minimal number of evaluated tasks before stopping.
+    max_tasks (Optional[int]): The maximal number of evaluated tasks, None for the whole dataset.
+    workers (int): Number of worker processes of DatasetEvaluator.
+    normalizer (Optional[TextNormalizer]): Normalizes texts before the metrics compare them.
+    cache (Optional[TaskResultCache]): Persistent memo of per-task metric values.
+
+    Example:
+    >>> evaluator = SampledEvaluator(baseline_dataset_dict, sample_dataset_dict, target_width=0.02)
+    >>> result = evaluator.evaluate()
+    >>> result["num_evaluated"], result["metrics"]["recall_by_char"]["mean"]
+    """
+
+    def __init__(
+        self,
+        baseline_dataset_dict: Dict[str, Any],
+        sample_dataset_dict: Dict[str, Any],
+        metrics: Optional[Sequence[str]] = None,
+        target_width: float = 0.05,
+        confidence: float = 0.95,
+        batch_size: int = 100,
+        min_tasks: int = 30,
+        max_tasks: Optional[int] = None,
+        strata: Optional[Callable[[Dict[str, Any]], str]] = file_stratum,
+        seed: int = 0,
+        workers: int = 1,
+        validate: bool = True,
+        normalizer: Optional[TextNormalizer] = None,
+        cache: Optional[TaskResultCache] = None
+    ) -> None:
+        """
+        Initialize the SampledEvaluator and draw the order of the tasks of every stratum.
+
+        Parameters:
+        baseline_dataset_dict (Dict[str, Any]): Dictionary containing baseline dataset information.
+        sample_dataset_dict (Dict[str, Any]): Dictionary containing sample dataset information.
+        metrics (Optional[Sequence[str]]): The metrics to estimate, defaults to all of METRICS.
+        target_width (float): The target width of the confidence intervals.
+        confidence (float): The confidence level of the intervals, between 0 and 1.
+        batch_size (int): The size of the first round, and the minimal growth of the sample per round.
+        min_tasks (int): The minimal number of evaluated tasks before stopping.
+        max_tasks (Optional[int]): The maximal number of evaluated tasks, None for the whole dataset.
+        strata (Optional[Callable[[Dict[str, Any]], str]]): Maps a baseline task dictionary to its stratum,
+                                                            None for simple random sampling.
+        seed (int): The seed of the random sample.
+        workers (int): Number of worker processes.
+        validate (bool): Whether to validate both datasets once before evaluation.
+        normalizer (Optional[TextNormalizer]): Normalizes texts before the metrics compare them.
+        cache (Optional[TaskResultCache]): Persistent memo of per-task metric values.
+
+        Raises:
+        ValueError: If an unknown metric is requested, or the width, confidence or batch size is invalid.
+        DatasetValidationError: If validation is enabled and the datasets are malformed.
+        """
+        metrics = list(metrics) if metrics else list(METRICS)
+        unknown_metrics = [metric for metric in metrics if metric not in METRICS]
+        if unknown_metrics:
+            raise ValueError(f"Invalid metrics {unknown_metrics}! Supported metrics: {', '.join(METRICS)}.")
+        if target_width <= 0 or not 0 < confidence < 1 or batch_size <= 0:
+            raise ValueError("target_width and batch_size must be positive, and confidence between 0 and 1!")
+        if validate:
+            from ...datasets.dataset_validator import DatasetValidator
+            DatasetValidator.validate_pair(baseline_dataset_dict, sample_dataset_dict)
+        self.metrics = metrics
+        self.target_width = target_width
+        self.confidence = confidence
+        self.batch_size = batch_size
+        self.min_tasks = min_tasks
+        self.max_tasks = max_tasks
+        self.workers = workers
+        self.normalizer = normalizer
+        self.cache = cache
+        self._baseline_dataset_dict = baseline_dataset_dict
+        self._sample_dataset_dict = sample_dataset_dict
+        self._z = NormalDist().inv_cdf(0.5 + confidence / 2)
+
+        rng = random.Random(seed)
+        orders: Dict[str, List[str]] = {}
+        for task_id, task_dict in baseline_dataset_dict["TASKS"].items():
+            orders.setdefault(strata(task_dict) if strata is not None else "", []).append(task_id)
+        self.num_tasks = sum(len(task_ids) for task_ids in orders.values())
+        limit = min(max_tasks, self.num_tasks) if max_tasks is not None else self.num_tasks
+        self._first_total = min(max(batch_size, min_tasks), limit)
+        if len(orders) > max(self._first_total, 1):
+            orders = self._merge_strata(orders, max(self._first_total, 1))
+        for task_ids in orders.values():
+            rng.shuffle(task_ids)
+        self._orders = orders
+        self._estimates = {stratum: StratumEstimate(len(task_ids), metrics) for stratum, task_ids in orders.items()}
+
+    @staticmethod
+    def _merge_strata(orders: Dict[str, List[str]], max_strata: int) -> Dict[str, List[str]]:
+        """
+        Merge the smallest strata into MERGED_STRATUM, keeping the largest ones.
+
+        Parameters:
+        orders (Dict[str, List[str]]): The task ids of every stratum.
+        max_strata (int): The maximal number of strata, at least 1.
+
+        Returns:
+        Dict[str, List[str]]: The task ids of at most max_strata strata.
+        """
+        by_size = sorted(orders, key=lambda stratum: (-len(orders[stratum]), stratum))
+        merged = {stratum: orders[stratum] for stratum in by_size[:max_strata - 1]}
+        merged[MERGED_STRATUM] = [task_id for stratum in by_size[max_strata - 1:] for task_id in orders[stratum]]
+        return merged
+
+    def _allocate(self, total: int) -> Dict[str, int]:
+        """
+        Allocate a sample size to the strata, in proportion to their sizes by largest remainders, with at
+        least one task per stratum, never fewer than the already evaluated tasks of a stratum, never more
+        than the stratum holds and never more than the sample size in total.
+
+        Parameters:
+        total (int): The sample size, at least the number of evaluated tasks.
+
+        Returns:
+        Dict[str, int]: The number of tasks of every stratum.
+        """
+        sizes = {stratum: len(task_ids) for stratum, task_ids in self._orders.items()}
+        quotas = {stratum: total * size / self.num_tasks for stratum, size in sizes.items()}
+        allocation = {stratum: self._estimates[stratum].count for stratum in sizes}
+        remaining = total - sum(allocation.values())
+        # one task per stratum first, then the whole parts of the quotas, then the largest remainders
+        for stratum in sizes:
+            if remaining > 0 and allocation[stratum] == 0:
+                allocation[stratum] = 1
+                remaining -= 1
+        for stratum, quota in quotas.items():
+            extra = min(max(int(quota) - allocation[stratum], 0), sizes[stratum] - allocation[stratum], remaining)
+            allocation[stratum] += extra
+            remaining -= extra
+        by_remainder = sorted(quotas, key=lambda stratum: quotas[stratum] - int(quotas[stratum]), reverse=True)
+        for stratum in by_remainder:
+            if remaining > 0 and allocation[stratum] < sizes[stratum]:
+                allocation[stratum] += 1
+                remaining -= 1
+        # strata evaluated beyond their quota leave tasks over, taken wherever tasks remain
+        for stratum in by_remainder:
+            extra = min(sizes[stratum] - allocation[stratum], remaining)
+            allocation[stratum] += extra
+            remaining -= extra
+        return allocation
+
+    def estimate(self) -> Dict[str, Dict[str, float]]:
+        """
+        Get the current estimate of every metric.
+
+        Returns:
+        Dict[str, Dict[str, float]]: The mean, standard error, confidence bounds and width of every metric.
+        """
+        num_evaluated = sum(estimate.count for estimate in self._estimates.values())
+        pooled = StratumEstimate(self.num_tasks, self.metrics)
+        pooled.count = num_evaluated
+        for estimate in self._estimates.values():
+            for metric in self.metrics:
+                pooled.sums[metric] += estimate.sums[metric]
+                pooled.sums_sq[metric] += estimate.sums_sq[metric]
+        result = {}
+        for metric in self.metrics:
+            mean = 0.0
+            variance = 0.0
+            for estimate in self._estimates.values():
+                if not estimate.count:
+                    continue
+                weight = estimate.size / self.num_tasks
+                mean += weight * estimate.mean(metric)
+                stratum_variance = estimate.variance(metric)
+                if stratum_variance is None:
+                    stratum_variance = pooled.variance(metric) or 0.0
+                correction = 1.0 - estimate.count / estimate.size
+                variance += weight * weight * stratum_variance / estimate.count * correction
+            std_error = math.sqrt(variance)
+            half_width = self._z * std_error
+            result[metric] = {
+                "mean": mean,
+                "std_error": std_error,
+                "ci_low": mean - half_width,
+                "ci_high": mean + half_width,
+                "width": 2 * half_width,
+            }
+        return result
+
+    def _next_total(self, num_evaluated: int, estimates: Dict[str, Dict[str, float]]) -> int:
+        """
+        Predict the sample size reaching the target width from the current widths.
+
+        Parameters:
+        num_evaluated (int): The current sample size.
+        estimates (Dict[str, Dict[str, float]]): The current estimates.
+
+        Returns:
+        int: The next sample size.
+        """
+        widest = max(estimate["width"] for estimate in estimates.values())
+        # the width shrinks like 1 / sqrt(n), ignoring the finite population correction
+        needed = math.ceil(num_evaluated * (widest / self.target_width) ** 2)
+        return max(num_evaluated + self.batch_size, min(needed, 2 * num_evaluated))
+
+    def evaluate(self) -> Dict[str, Any]:
+        """
+        Evaluate rounds of sampled tasks until every confidence interval is narrower than the target
+        width, the sample reaches max_tasks or every task is evaluated.
+
+        Returns:
+        Dict[str, Any]: The dataset name, the number of tasks and of evaluated tasks, why sampling stopped
+                        ("converged", "max_tasks" or "exhausted"), the estimate of every metric under
+                        "metrics", the sizes and sample sizes of the strata, and the widths after every
+                        round under "rounds".
+        """
+        limit = min(self.max_tasks, self.num_tasks) if self.max_tasks is not None else self.num_tasks
+        sample_tasks = self._sample_dataset_dict["TASKS"]
+        num_evaluated = 0
+        target = self._first_total
+        rounds = []
+        stopped = "exhausted"
+        while True:
+            allocation = self._allocate(target)
+            # the next tasks of every stratum, in its shuffled order
+            strata_of = {
+                task_id: stratum
+                for stratum, task_ids in self._orders.items()
+                for task_id in task_ids[self._estimates[stratum].count:allocation[stratum]]
+            }
+            batch = list(strata_of)
+            with stage("sampled.round"):
+                evaluator = DatasetEvaluator(
+                    {**self._baseline_dataset_dict, "TASKS": {task_id: self._baseline_dataset_dict["TASKS"][task_id] for task_id in batch}},
+                    {**self._sample_dataset_dict, "TASKS": {task_id: sample_tasks[task_id] for task_id in batch if task_id in sample_tasks}},
+                    metrics=self.metrics,
+                    workers=self.workers,
+                    validate=False,
+                    normalizer=self.normalizer,
+                    cache=self.cache,
+                )
+                for row in evaluator.iter_results():
+                    self._estimates[strata_of[row["task_id"]]].update(row)
+            num_evaluated += len(batch)
+            count("sampled_tasks", len(batch))
+            estimates = self.estimate()
+            rounds.append({"num_evaluated": num_evaluated, **{metric: estimates[metric]["width"] for metric in self.metrics}})
+            if num_evaluated >= self.num_tasks:
+                stopped = "exhausted"
+                break
+            if num_evaluated >= self.min_tasks and all(estimate["width"] <= self.target_width for estimate in estimates.values()):
+                stopped = "converged"
+                break
+            if num_evaluated >= limit:
+                stopped = "max_tasks"
+                break
+            target = min(self._next_total(num_evaluated, estimates), limit)
+
+        return {
+            "name": self._baseline_dataset_dict.get("NAME"),
+            "num_tasks": self.num_tasks,
+            "num_evaluated": num_evaluated,
+            "stopped": stopped,
+            "confidence": self.confidence,
+            "target_width": self.target_width,
+            "metrics": estimates,
+            "strata": {
+                stratum: {"size": estimate.size, "evaluated": estimate.count} for stratum, estimate in self._estimates.items()
+            },
+            "rounds": rounds,
+        }
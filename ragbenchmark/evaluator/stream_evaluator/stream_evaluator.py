@@ -0,0 +1,447 @@
+import os
+import json
+import math
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from ...datasets.dataset_validator import DatasetValidator
+from ...metrics.aggregate import MeanAggregate
+from ...preprocessing.text_normalizer import TextNormalizer
+from ...profiling.profiler import stage, count
+from ..dataset_evaluator.dataset_evaluator import METRICS, evaluate_task_pair
+
+
+class TraceTailer:
+    """
+    A class used to follow an append-only trace file of JSON lines, like `tail -f`.
+
+    Every poll reads the bytes appended since the previous one and returns the complete lines, a
+    trailing partial line being kept until its newline arrives. If the file is truncated or replaced,
+    e.g. by log rotation, it is read again from the start.
+
+    Attributes:
+    path (str): The path of the trace file.
+    offset (int): The offset of the first unread byte.
+    invalid_lines (int): The number of lines that were not JSON objects, skipped.
+    """
+
+    def __init__(self, path: str, from_start: bool = True, max_bytes: int = 8 << 20) -> None:
+        """
+        Initialize the TraceTailer.
+
+        Parameters:
+        path (str): The path of the trace file, which may not exist yet.
+        from_start (bool): Whether to read the lines already in the file, or only the appended ones.
+        max_bytes (int): The maximal number of bytes read by one poll, so a large backlog is read in steps.
+        """
+        self.path = path
+        self.max_bytes = max_bytes
+        self.offset = 0
+        self.invalid_lines = 0
+        self._inode: Optional[int] = None
+        self._partial = b""
+        if not from_start and os.path.exists(path):
+            stat = os.stat(path)
+            self.offset, self._inode = stat.st_size, stat.st_ino
+
+    def poll(self) -> List[Dict[str, Any]]:
+        """
+        Read the records appended since the last poll.
+
+        Returns:
+        List[Dict[str, Any]]: The records of the new complete lines, in file order.
+        """
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return []
+        if stat.st_ino != self._inode or stat.st_size < self.offset:
+            # rotated or truncated
+            self._inode, self.offset, self._partial = stat.st_ino, 0, b""
+        if stat.st_size == self.offset:
+            return []
+        with open(self.path, "rb") as f:
+            f.seek(self.offset)
+            data = f.read(min(stat.st_size - self.offset, self.max_bytes))
+        self.offset += len(data)
+        lines = (self._partial + data).split(b"\n")
+        self._partial = lines.pop()
+        records = []
+        for line in lines:
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                record = None
+            if isinstance(record, dict):
+                records.append(record)
+            else:
+                self.invalid_lines += 1
+        return records
+
+
+class RunningMean:
+    """
+    Running count and sums of metric values, to which values can be added and from which they can be
+    removed in O(1). Sums are compensated (Neumaier), so removing values does not accumulate rounding
+    errors, and they are reset whenever the count drops to zero.
+
+    Attributes:
+    metrics (Sequence[str]): The metrics.
+    count (int): The number of values currently aggregated.
+    """
+
+    def __init__(self, metrics: Sequence[str]) -> None:
+        """
+        Initialize an empty RunningMean.
+
+        Parameters:
+        metrics (Sequence[str]): The metrics.
+        """
+        self.metrics = tuple(metrics)
+        self.count = 0
+        self._sums = [0.0] * len(self.metrics)
+        self._compensations = [0.0] * len(self.metrics)
+
+    def add(self, values: Sequence[float], sign: int = 1) -> None:
+        """
+        Add the metric values of one event, or remove them with sign -1.
+
+        Parameters:
+        values (Sequence[float]): One value per metric, in metric order.
+        sign (int): 1 to add, -1 to remove.
+        """
+        self.count += sign
+        if self.count == 0:
+            self._sums = [0.0] * len(self.metrics)
+            self._compensations = [0.0] * len(self.metrics)
+            return
+        for index, value in enumerate(values):
+            value = sign * value
+            current = self._sums[index]
+            total = current + value
+            if abs(current) >= abs(value):
+                self._compensations[index] += (current - total) + value
+            else:
+                self._compensations[index] += (value - total) + current
+            self._sums[index] = total
+
+    def means(self) -> Dict[str, float]:
+        """
+        Get the mean of every metric.
+
+        Returns:
+        Dict[str, float]: The means, 0.0 if no value is aggregated.
+        """
+        if not self.count:
+            return {metric: 0.0 for metric in self.metrics}
+        return {
+            metric: (self._sums[index] + self._compensations[index]) / self.count
+            for index, metric in enumerate(self.metrics)
+        }
+
+
+class TumblingWindow:
+    """
+    Fixed, non-overlapping windows of `size` seconds, aligned on multiples of the size. A window is
+    closed, and its snapshot returned, by the first event past its end. Windows without events are
+    not reported.
+
+    Attributes:
+    size (float): The window length, in seconds.
+    start (Optional[float]): The start of the current window, None before the first event.
+    """
+
+    def __init__(self, size: float, metrics: Sequence[str]) -> None:
+        """
+        Initialize the TumblingWindow.
+
+        Parameters:
+        size (float): The window length, in seconds.
+        metrics (Sequence[str]): The metrics.
+        """
+        self.size = size
+        self.start: Optional[float] = None
+        self._running = RunningMean(metrics)
+
+    def add(self, event_time: float, values: Sequence[float]) -> Optional[Dict[str, Any]]:
+        """
+        Add an event.
+
+        Parameters:
+        event_time (float): The event time.
+        values (Sequence[float]): One value per metric.
+
+        Returns:
+        Optional[Dict[str, Any]]: The snapshot of the window closed by the event, if any.
+        """
+        closed = None
+        start = math.floor(event_time / self.size) * self.size
+        if self.start is not None and start > self.start:
+            closed = self.snapshot()
+            self._running = RunningMean(self._running.metrics)
+        if self.start is None or start > self.start:
+            self.start = start
+        self._running.add(values)
+        return closed
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Get the snapshot of the current window.
+
+        Returns:
+        Dict[str, Any]: The window bounds, the number of events and the mean of every metric.
+        """
+        start = self.start if self.start is not None else 0.0
+        return {"start": start, "end": start + self.size, "count": self._running.count, **self._running.means()}
+
+
+class SlidingWindow:
+    """
+    A window over the last `size` seconds of events. Events are kept in arrival order and removed from
+    the running sums once they expire, so every event is added and removed exactly once.
+
+    Attributes:
+    size (float): The window length, in seconds.
+    """
+
+    def __init__(self, size: float, metrics: Sequence[str]) -> None:
+        """
+        Initialize the SlidingWindow.
+
+        Parameters:
+        size (float): The window length, in seconds.
+        metrics (Sequence[str]): The metrics.
+        """
+        self.size = size
+        self._events: Deque[Tuple[float, Sequence[float]]] = deque()
+        self._running = RunningMean(metrics)
+
+    def add(self, event_time: float, values: Sequence[float]) -> None:
+        """
+        Add an event and expire the events older than the window.
+
+        Parameters:
+        event_time (float): The event time, not earlier than the previous one.
+        values (Sequence[float]): One value per metric.
+        """
+        self._events.append((event_time, values))
+        self._running.add(values)
+        self.expire(event_time)
+
+    def expire(self, now: float) -> None:
+        """
+        Remove the events at or before now - size.
+
+        Parameters:
+        now (float): The current time.
+        """
+        while self._events and self._events[0][0] <= now - self.size:
+            _, values = self._events.popleft()
+            self._running.add(values, sign=-1)
+
+    def snapshot(self, now: float) -> Dict[str, Any]:
+        """
+        Get the snapshot of the window ending now.
+
+        Parameters:
+        now (float): The current time.
+
+        Returns:
+        Dict[str, Any]: The window bounds, the number of events and the mean of every metric.
+        """
+        self.expire(now)
+        return {"start": now - self.size, "end": now, "count": self._running.count, **self._running.means()}
+
+
+class StreamEvaluator:
+    """
+    Evaluates sample tasks one at a time as they arrive, e.g. from the trace file of a production RAG
+    system, and keeps the metrics of a tumbling window, a sliding window and the whole stream.
+
+    Every trace record is a sample task dictionary with its TASK_ID, and optionally a TIMESTAMP in
+    seconds since the epoch, arrival time being used otherwise. It is joined to its baseline task by an
+    in-memory index of task ids, evaluated once, and its metric values are added to running sums, so
+    snapshots never rescan past events. Records of unknown tasks, or whose QUESTION differs from the
+    baseline, are counted and skipped, as are invalid records, e.g. with a malformed context or a
+    non-numeric TIMESTAMP, so that a bad line never stops a live watch. Event times never go
+    backwards: a late record counts at the time of the latest one.
+
+    Attributes:
+    metrics (List[str]): The metrics to compute.
+    normalizer (Optional[TextNormalizer]): Normalizes texts before the metrics compare them.
+    tumbling (TumblingWindow): The tumbling window.
+    sliding (SlidingWindow): The sliding window.
+    total (Dict[str, MeanAggregate]): The aggregate of every metric over the whole stream.
+    num_events (int): The number of evaluated records.
+    num_unmatched (int): The number of skipped records of unknown tasks or questions.
+    num_invalid (int): The number of skipped invalid records.
+
+    Example:
+    >>> evaluator = StreamEvaluator(baseline_dataset_dict, window=300, tumbling=60)
+    >>> for snapshot in evaluator.follow(TraceTailer("traces.jsonl"), interval=10):
+    ...     print(snapshot["sliding"]["recall_by_char"])
+    """
+
+    def __init__(
+        self,
+        baseline_dataset_dict: Dict[str, Any],
+        metrics: Optional[Sequence[str]] = None,
+        window: float = 300.0,
+        tumbling: float = 60.0,
+        normalizer: Optional[TextNormalizer] = None,
+        clock: Callable[[], float] = time.time
+    ) -> None:
+        """
+        Initialize the StreamEvaluator.
+
+        Parameters:
+        baseline_dataset_dict (Dict[str, Any]): The baseline dataset dictionary.
+        metrics (Optional[Sequence[str]]): The metrics to compute, defaults to all of METRICS.
+        window (float): The length of the sliding window, in seconds.
+        tumbling (float): The length of the tumbling windows, in seconds.
+        normalizer (Optional[TextNormalizer]): Normalizes texts before the metrics compare them.
+        clock (Callable[[], float]): The clock giving the arrival time of records without TIMESTAMP.
+
+        Raises:
+        ValueError: If an unknown metric is requested or a window length is not positive.
+        """
+        metrics = list(metrics) if metrics else list(METRICS)
+        unknown_metrics = [metric for metric in metrics if metric not in METRICS]
+        if unknown_metrics:
+            raise ValueError(f"Invalid metrics {unknown_metrics}! Supported metrics: {', '.join(METRICS)}.")
+        if window <= 0 or tumbling <= 0:
+            raise ValueError("Window lengths must be positive!")
+        self.dataset_name: Optional[str] = baseline_dataset_dict.get("NAME")
+        self._baseline_tasks: Dict[str, Dict[str, Any]] = {
+            str(task_id): task_dict for task_id, task_dict in baseline_dataset_dict["TASKS"].items()
+        }
+        self.metrics = metrics
+        self.normalizer = normalizer
+        self.clock = clock
+        self.tumbling = TumblingWindow(tumbling, metrics)
+        self.sliding = SlidingWindow(window, metrics)
+        self.total: Dict[str, MeanAggregate] = {metric: MeanAggregate() for metric in metrics}
+        self.num_events = 0
+        self.num_unmatched = 0
+        self.num_invalid = 0
+        self._validator = DatasetValidator(rag=True)
+        self._now: Optional[float] = None
+
+    def process(self, record: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        Evaluate one trace record and add it to the windows.
+
+        Parameters:
+        record (Dict[str, Any]): The sample task dictionary with its TASK_ID and optional TIMESTAMP.
+
+        Returns:
+        Optional[Dict[str, Any]]: The snapshot of the tumbling window closed by the record, if any.
+        """
+        task_id = str(record.get("TASK_ID"))
+        baseline_task_dict = self._baseline_tasks.get(task_id)
+        if baseline_task_dict is None or record.get("QUESTION", baseline_task_dict["QUESTION"]) != baseline_task_dict["QUESTION"]:
+            self.num_unmatched += 1
+            count("stream_unmatched")
+            return None
+        sample_task_dict = {
+            "QUESTION": baseline_task_dict["QUESTION"],
+            "ANSWER": record.get("ANSWER", ""),
+            "CONTEXTS": record.get("CONTEXTS", []),
+        }
+        try:
+            event_time = float(record["TIMESTAMP"]) if "TIMESTAMP" in record else self.clock()
+        except (TypeError, ValueError):
+            event_time = math.nan
+        if not math.isfinite(event_time) or next(self._validator.iter_task_errors([(task_id, sample_task_dict)]), None) is not None:
+            self.num_invalid += 1
+            count("stream_invalid")
+            return None
+        with stage("stream.evaluate"):
+            row = evaluate_task_pair((task_id, baseline_task_dict, sample_task_dict), self.metrics, normalizer=self.normalizer)
+        values = [row[metric] for metric in self.metrics]
+        self._now = event_time if self._now is None else max(self._now, event_time)
+        self.num_events += 1
+        count("stream_events")
+        for metric, value in zip(self.metrics, values):
+            self.total[metric].update(value)
+        self.sliding.add(self._now, values)
+        closed = self.tumbling.add(self._now, values)
+        return self._snapshot(closed, self._now) if closed is not None else None
+
+    def snapshot(self, now: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Get the current metrics.
+
+        Parameters:
+        now (Optional[float]): The end of the sliding window, defaults to the clock. The latest event time
+                               is used instead if it is later.
+
+        Returns:
+        Dict[str, Any]: The time, the event counters, the current tumbling window, the sliding window and
+                        the means over the whole stream.
+        """
+        return self._snapshot(self.tumbling.snapshot(), now)
+
+    def _snapshot(self, tumbling: Dict[str, Any], now: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Build a snapshot around a tumbling window snapshot.
+
+        Parameters:
+        tumbling (Dict[str, Any]): The tumbling window snapshot.
+        now (Optional[float]): The end of the sliding window.
+
+        Returns:
+        Dict[str, Any]: The snapshot.
+        """
+        now = self.clock() if now is None else now
+        if self._now is not None:
+            now = max(now, self._now)
+        return {
+            "name": self.dataset_name,
+            "time": now,
+            "num_events": self.num_events,
+            "num_unmatched": self.num_unmatched,
+            "num_invalid": self.num_invalid,
+            "tumbling": tumbling,
+            "sliding": self.sliding.snapshot(now),
+            "total": {"count": self.num_events, **{metric: aggregate.mean for metric, aggregate in self.total.items()}},
+        }
+
+    def follow(
+        self,
+        tailer: TraceTailer,
+        interval: float = 10.0,
+        poll_interval: float = 0.5,
+        duration: Optional[float] = None
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Follow a trace file and yield snapshots, one per closed tumbling window and one every `interval`
+        seconds of wall time.
+
+        Parameters:
+        tailer (TraceTailer): The trace file.
+        interval (float): The period of the snapshots, in seconds.
+        poll_interval (float): The time between two reads of the file, in seconds.
+        duration (Optional[float]): Stop after this many seconds, None to follow forever.
+
+        Returns:
+        Iterator[Dict[str, Any]]: The snapshots.
+        """
+        started = time.monotonic()
+        next_snapshot = started + interval
+        while True:
+            for record in tailer.poll():
+                closed = self.process(record)
+                if closed is not None:
+                    yield closed
+            current = time.monotonic()
+            if duration is not None and current - started >= duration:
+                yield self.snapshot()
+                return
+            if current >= next_snapshot:
+                yield self.snapshot()
+                next_snapshot = current + interval
+            time.sleep(poll_interval)
@@ -1,26 +1,36 @@
-import os
-import sys
 import warnings
 from typing import Optional, Dict, Tuple
 
-sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
-
-from tasks.base_task import BaseTask
-from chat_models.base_chat_model import BaseChatModel
-from metrics.metrics_by_page_number.calc_recall_by_page_number import RecallByPageNumber
-from metrics.metrics_by_page_number.calc_precision_by_page_number import PrecisionByPageNumber
-from metrics.metrics_by_char.utils import count_chars
-from metrics.metrics_by_char.calc_recall_by_char import RecallByChar
-from metrics.metrics_by_char.calc_precision_by_char import PrecisionByRecall
+from ...tasks.base_task import BaseTask
+from ...chat_models.base_chat_model import BaseChatModel
+from ...metrics.metrics_by_page_number.calc_recall_by_page_number import RecallByPageNumber
+from ...metrics.metrics_by_page_number.calc_precision_by_page_number import PrecisionByPageNumber
+from ...metrics.metrics_by_char.utils import count_chars
+from ...metrics.metrics_by_char.calc_recall_by_char import RecallByChar
+from ...metrics.metrics_by_char.calc_precision_by_char import PrecisionByRecall
+from ...preprocessing.text_normalizer import TextNormalizer
+from ...profiling.profiler import profile_stage
 
 class TaskEvaluator:
-    def __init__(self, task: BaseTask, chat_model: Optional[BaseChatModel]):
+    def __init__(
+        self,
+        task: BaseTask,
+        chat_model: Optional[BaseChatModel],
+        validated: bool = False,
+        normalizer: Optional[TextNormalizer] = None
+    ):
         self.task = task
         self.chat_model = chat_model
+        # tasks of a dataset checked by DatasetValidator skip the per-record checks of the metrics
+        self.validated = validated
+        # texts and answers are normalized once and shared by the char, token and answer metrics
+        self.normalizer = normalizer
         # metrics by page number
         self.page_number_pairs: Tuple = None
         self.recall_by_page_number: Dict[str, float] = None
         self.precision_by_page_number: Dict[str, float] = None
+        # metrics by answer
+        self.answer_pair: Tuple = None
         # metrics by content
         self.text_pairs: Tuple =None
         # metrics by token
@@ -32,8 +42,10 @@ class TaskEvaluator:
 
         self._extract_task_info()
 
+    @profile_stage("preprocess.task")
     def _extract_task_info(self):
         self._extract_page_number_list()
+        self._extract_answer_pair()
         self._extract_text_list()
         self._extract_char_list()
 
@@ -51,9 +63,17 @@ class TaskEvaluator:
         if baseline_page_number_list and sample_page_number_list:
             self.page_number_pairs = baseline_page_number_list, sample_page_number_list
 
+    def _extract_answer_pair(self):
+        answer_pair = self.task.baseline_answer, self.task.sample_answer
+        if self.normalizer is not None:
+            answer_pair = tuple(self.normalizer.normalize_batch(answer_pair))
+        self.answer_pair = answer_pair
+
     def _extract_text_list(self):
-        baseline_text_list = [baseline_context.text for baseline_context in self.task.baseline_contexts]
-        sample_text_list = [sample_context.text for sample_context in self.task.sample_contexts]
+        if self.normalizer is not None:
+            self.normalizer.normalize_contexts(self.task.baseline_contexts + self.task.sample_contexts)
+        baseline_text_list = [baseline_context.normalized_text for baseline_context in self.task.baseline_contexts]
+        sample_text_list = [sample_context.normalized_text for sample_context in self.task.sample_contexts]
         self.text_pairs = baseline_text_list, sample_text_list
 
     def _extract_char_list(self):
@@ -67,7 +87,7 @@ class TaskEvaluator:
                 warnings.warn("No page numbers provided in the task.")
                 self.recall_by_page_number = 0.0
             else:
-                self.recall_by_page_number = RecallByPageNumber.calculate_recall_by_page_number(*self.page_number_pairs)
+                self.recall_by_page_number = RecallByPageNumber.calculate_recall_by_page_number(*self.page_number_pairs, check=not self.validated)
         return self.recall_by_page_number
 
     def get_precision_by_page_number(self):
@@ -76,7 +96,7 @@ class TaskEvaluator:
                 warnings.warn("No page numbers provided in the task.")
                 self.precision_by_page_number = 0.0
             else:
-                self.precision_by_page_number = PrecisionByPageNumber.calculate_precision_by_page_number(*self.page_number_pairs)
+                self.precision_by_page_number = PrecisionByPageNumber.calculate_precision_by_page_number(*self.page_number_pairs, check=not self.validated)
         return self.precision_by_page_number
 
     def get_recall_by_char(self):
@@ -85,12 +105,21 @@ class TaskEvaluator:
             for baseline_char_count in self.char_pairs[0]:
                 for sample_char_count in self.char_pairs[1]:
                     recall_list.append(RecallByChar.calculate_recall_by_char(baseline_char_count, sample_char_count))
-            self.recall_by_char = sum(recall_list) / len(recall_list)
+            self.recall_by_char = sum(recall_list) / len(recall_list) if recall_list else 0.0
         return self.recall_by_char
 
+    def get_precision_by_char(self):
+        if self.precision_by_char is None:
+            precision_list = []
+            for baseline_char_count in self.char_pairs[0]:
+                for sample_char_count in self.char_pairs[1]:
+                    precision_list.append(PrecisionByRecall.calculate_precision_by_char(baseline_char_count, sample_char_count))
+            self.precision_by_char = sum(precision_list) / len(precision_list) if precision_list else 0.0
+        return self.precision_by_char
+
 if __name__ == "__main__":
     import json
-    from tasks.custom_task import CustomTask
+    from ...tasks.custom_task import CustomTask
     baseline_data_path = "data/customized_dataset/baseline.json"
     with open(baseline_data_path, "r") as f:
         baseline_dataset = json.load(f)
@@ -103,3 +132,4 @@ if __name__ == "__main__":
     print("recall_by_page_number", task_evaluator.get_recall_by_page_number())
     print("precision_by_page_number", task_evaluator.get_precision_by_page_number())
     print("recall_by_char", task_evaluator.get_recall_by_char())
+    print("precision_by_char", task_evaluator.get_precision_by_char())
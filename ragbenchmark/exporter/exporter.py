@@ -0,0 +1,61 @@
+import os
+import json
+import importlib.util
+from typing import Any, Dict, List
+
+EXPORT_FORMATS = ("json", "jsonl", "csv", "parquet")
+PARQUET_ENGINES = ("pyarrow", "fastparquet")
+
+
+def check_export_format(format: str) -> None:
+    """
+    Check that rows can be exported in a format, before any result is computed.
+
+    Parameters:
+    format (str): One of EXPORT_FORMATS.
+
+    Raises:
+    ValueError: If the format is not supported, or is parquet and no parquet engine is installed.
+    """
+    if format not in EXPORT_FORMATS:
+        raise ValueError(f"Invalid export format {format!r}! Supported formats: {', '.join(EXPORT_FORMATS)}.")
+    if format == "parquet" and not any(importlib.util.find_spec(engine) for engine in PARQUET_ENGINES):
+        raise ValueError("The parquet format requires pyarrow or fastparquet, install one with `pip install pyarrow`.")
+
+
+def export_rows(rows: List[Dict[str, Any]], file_path: str, format: str = "json") -> str:
+    """
+    Export a list of result rows to a file.
+
+    Parameters:
+    rows (List[Dict[str, Any]]): The rows to export, one dictionary per row.
+    file_path (str): The output file path. Missing parent directories are created.
+    format (str): One of "json", "jsonl", "csv" and "parquet". Parquet requires pyarrow or fastparquet.
+
+    Returns:
+    str: The path of the written file.
+
+    Raises:
+    ValueError: If the format is not supported, see `check_export_format`.
+    """
+    check_export_format(format)
+
+    directory = os.path.dirname(os.path.abspath(file_path))
+    os.makedirs(directory, exist_ok=True)
+
+    if format == "json":
+        with open(file_path, "w", encoding="utf-8") as f:
+            json.dump(rows, f, ensure_ascii=False, indent=4)
+    elif format == "jsonl":
+        with open(file_path, "w", encoding="utf-8") as f:
+            for row in rows:
+                f.write(json.dumps(row, ensure_ascii=False) + "\n")
+    else:
+        import pandas as pd
+
+        frame = pd.DataFrame(rows)
+        if format == "csv":
+            frame.to_csv(file_path, index=False)
+        else:
+            frame.to_parquet(file_path, index=False)
+    return file_path
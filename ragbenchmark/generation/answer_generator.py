@@ -0,0 +1,402 @@
+import os
+import json
+import hashlib
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from ..chat_models.base_chat_model import BaseChatModel, ChatResponse, Messages
+from ..context.custom_context import CustomRagContext
+from ..profiling.profiler import stage, count
+
+DEFAULT_SYSTEM_PROMPT = (
+    "You answer questions using only the given contexts. "
+    "Answer concisely. If the contexts do not contain the answer, say that you don't know."
+)
+
+
+def build_messages(
+    question: str,
+    contexts: Sequence[CustomRagContext],
+    top_k: int = 5,
+    system_prompt: str = DEFAULT_SYSTEM_PROMPT
+) -> Messages:
+    """
+    Build the prompt of a task from its question and its top-k contexts by score.
+
+    Contexts are numbered from [1] in decreasing score, each on its own line with its source.
+
+    Parameters:
+    question (str): The question.
+    contexts (Sequence[CustomRagContext]): The retrieved contexts.
+    top_k (int): The number of contexts put into the prompt.
+    system_prompt (str): The instructions of the model.
+
+    Returns:
+    Messages: The system and user messages.
+    """
+    ranked = sorted(contexts, key=lambda context: context.score, reverse=True)[:top_k]
+    lines = ["Contexts:"]
+    for rank, context in enumerate(ranked, start=1):
+        text = " ".join(context.text.split())
+        pages = ", ".join(map(str, context.page_number))
+        lines.append(f"[{rank}] {text} (source: {context.file_path}, pages: {pages})")
+    lines.append("")
+    lines.append(f"Question: {question}")
+    return [{"role": "system", "content": system_prompt}, {"role": "user", "content": "\n".join(lines)}]
+
+
+class ResponseCache:
+    """
+    A content-addressed on-disk cache of chat responses.
+
+    The key of a request is the SHA-256 of its model, generation parameters and messages, so a re-run
+    of the same prompts costs nothing while any change of the prompt or the model misses the cache.
+    Every response is a small JSON file under `<cache_dir>/<key[:2]>/<key>.json`, written atomically,
+    so that several processes can share a cache directory.
+
+    Attributes:
+    cache_dir (str): The cache directory.
+    """
+
+    def __init__(self, cache_dir: str) -> None:
+        """
+        Initialize the ResponseCache.
+
+        Parameters:
+        cache_dir (str): The cache directory, created if missing.
+        """
+        self.cache_dir = cache_dir
+        os.makedirs(cache_dir, exist_ok=True)
+
+    @staticmethod
+    def key(model: str, params: Dict[str, Any], messages: Messages) -> str:
+        """
+        Compute the key of a request.
+
+        Parameters:
+        model (str): The model name.
+        params (Dict[str, Any]): The generation parameters.
+        messages (Messages): The conversation.
+
+        Returns:
+        str: The hexadecimal SHA-256 of the canonical JSON of the request.
+        """
+        payload = json.dumps({"model": model, "params": params, "messages": messages}, sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> str:
+        """
+        Get the file path of a key.
+
+        Parameters:
+        key (str): The key.
+
+        Returns:
+        str: The file path.
+        """
+        return os.path.join(self.cache_dir, key[:2], f"{key}.json")
+
+    def get(self, key: str) -> Optional[ChatResponse]:
+        """
+        Look up a response.
+
+        Parameters:
+        key (str): The key.
+
+        Returns:
+        Optional[ChatResponse]: The cached response, None on a miss.
+        """
+        try:
+            with open(self._path(key), "r", encoding="utf-8") as f:
+                return ChatResponse.from_dict(json.load(f), cached=True)
+        except (FileNotFoundError, json.JSONDecodeError, KeyError):
+            return None
+
+    def put(self, key: str, response: ChatResponse) -> None:
+        """
+        Store a response.
+
+        Parameters:
+        key (str): The key.
+        response (ChatResponse): The response.
+        """
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(response.to_dict(), f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+
+
+class UsageTracker:
+    """
+    A thread-safe account of the requests, tokens and cost of a generation run.
+
+    Cached responses are counted as cache hits and cost nothing.
+
+    Attributes:
+    prompt_price (float): The price of a million prompt tokens.
+    completion_price (float): The price of a million completion tokens.
+    requests (int): Number of requests sent to the model.
+    cache_hits (int): Number of responses served from the cache.
+    errors (int): Number of failed requests.
+    prompt_tokens (int): Number of billed prompt tokens.
+    completion_tokens (int): Number of billed completion tokens.
+    """
+
+    def __init__(self, prompt_price: float = 0.0, completion_price: float = 0.0) -> None:
+        """
+        Initialize the UsageTracker.
+
+        Parameters:
+        prompt_price (float): The price of a million prompt tokens.
+        completion_price (float): The price of a million completion tokens.
+        """
+        self.prompt_price = prompt_price
+        self.completion_price = completion_price
+        self.requests = 0
+        self.cache_hits = 0
+        self.errors = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self._lock = threading.Lock()
+
+    def cost_of(self, response: ChatResponse) -> float:
+        """
+        Compute the cost of a response, 0 if it was cached.
+
+        Parameters:
+        response (ChatResponse): The response.
+
+        Returns:
+        float: The cost.
+        """
+        if response.cached:
+            return 0.0
+        return (response.prompt_tokens * self.prompt_price + response.completion_tokens * self.completion_price) / 1e6
+
+    def record(self, response: ChatResponse) -> None:
+        """
+        Account for one response.
+
+        Parameters:
+        response (ChatResponse): The response.
+        """
+        with self._lock:
+            if response.cached:
+                self.cache_hits += 1
+            else:
+                self.requests += 1
+                self.prompt_tokens += response.prompt_tokens
+                self.completion_tokens += response.completion_tokens
+
+    def record_error(self, number: int = 1) -> None:
+        """
+        Account for failed requests.
+
+        Parameters:
+        number (int): Number of failed requests.
+        """
+        with self._lock:
+            self.errors += number
+
+    @property
+    def cost(self) -> float:
+        """
+        Get the total cost.
+
+        Returns:
+        float: The cost of the billed tokens.
+        """
+        return (self.prompt_tokens * self.prompt_price + self.completion_tokens * self.completion_price) / 1e6
+
+    def summary(self) -> Dict[str, Any]:
+        """
+        Summarize the usage.
+
+        Returns:
+        Dict[str, Any]: The requests, cache_hits, errors, prompt_tokens, completion_tokens and cost.
+        """
+        return {
+            "requests": self.requests,
+            "cache_hits": self.cache_hits,
+            "errors": self.errors,
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "cost": self.cost,
+        }
+
+
+class AnswerGenerator:
+    """
+    A class used to generate the answers of a sample dataset from its questions and retrieved contexts.
+
+    Prompts are built from the question and the top-k contexts of every task. Identical prompts are
+    sent once, cache hits are not sent at all, and the remaining prompts are sent in batches of
+    `batch_size` conversations, with at most `max_concurrency` batches in flight.
+
+    Attributes:
+    chat_model (BaseChatModel): The chat model backend.
+    top_k (int): The number of contexts put into a prompt.
+    batch_size (int): The number of conversations sent to the backend at once.
+    max_concurrency (int): The maximal number of batches in flight.
+    cache (Optional[ResponseCache]): The response cache, None to always call the model.
+    usage (UsageTracker): The token and cost account, accumulated over every `generate` call.
+    system_prompt (str): The instructions of the model.
+    params (Dict[str, Any]): The generation parameters, part of the cache key.
+
+    Example:
+    >>> generator = AnswerGenerator(GPTChatModel("gpt-4o-mini"), top_k=3, cache_dir=".cache/responses")
+    >>> sample_dataset_dict = generator.generate(sample_dataset_dict)
+    >>> generator.usage.summary()["cost"]
+    """
+
+    def __init__(
+        self,
+        chat_model: BaseChatModel,
+        top_k: int = 5,
+        batch_size: int = 8,
+        max_concurrency: int = 4,
+        cache_dir: Optional[str] = None,
+        prompt_price: float = 0.0,
+        completion_price: float = 0.0,
+        system_prompt: str = DEFAULT_SYSTEM_PROMPT,
+        params: Optional[Dict[str, Any]] = None
+    ) -> None:
+        """
+        Initialize the AnswerGenerator.
+
+        Parameters:
+        chat_model (BaseChatModel): The chat model backend.
+        top_k (int): The number of contexts put into a prompt.
+        batch_size (int): The number of conversations sent to the backend at once.
+        max_concurrency (int): The maximal number of batches in flight.
+        cache_dir (Optional[str]): The directory of the response cache, None to disable caching.
+        prompt_price (float): The price of a million prompt tokens.
+        completion_price (float): The price of a million completion tokens.
+        system_prompt (str): The instructions of the model.
+        params (Optional[Dict[str, Any]]): Generation parameters overriding the defaults of the backend.
+
+        Raises:
+        ValueError: If top_k, batch_size or max_concurrency is not positive.
+        """
+        if top_k <= 0 or batch_size <= 0 or max_concurrency <= 0:
+            raise ValueError("top_k, batch_size and max_concurrency must be positive!")
+        self.chat_model = chat_model
+        self.top_k = top_k
+        self.batch_size = batch_size
+        self.max_concurrency = max_concurrency
+        self.cache = ResponseCache(cache_dir) if cache_dir else None
+        self.usage = UsageTracker(prompt_price, completion_price)
+        self.system_prompt = system_prompt
+        self.params = {**(chat_model.default_params() or {}), **(params or {})}
+
+    def build_messages(self, task_dict: Dict[str, Any]) -> Messages:
+        """
+        Build the prompt of a task.
+
+        Parameters:
+        task_dict (Dict[str, Any]): The task dictionary of a sample dataset.
+
+        Returns:
+        Messages: The conversation.
+        """
+        contexts = [CustomRagContext(context_dict) for context_dict in task_dict["CONTEXTS"]]
+        return build_messages(task_dict["QUESTION"], contexts, self.top_k, self.system_prompt)
+
+    def _send(self, batch: List[Tuple[str, Messages]]) -> List[Tuple[str, Any]]:
+        """
+        Send a batch of conversations and cache the responses.
+
+        Parameters:
+        batch (List[Tuple[str, Messages]]): The (key, conversation) pairs.
+
+        Returns:
+        List[Tuple[str, Any]]: The key and response of every conversation, or its error message if it
+                               failed, the whole batch failed or the backend returned no response for it.
+        """
+        try:
+            responses = self.chat_model.chat_batch([messages for _, messages in batch], **self.params)
+        except Exception as e:
+            self.usage.record_error(len(batch))
+            return [(key, f"{type(e).__name__}: {e}") for key, _ in batch]
+        results = []
+        for index, (key, _) in enumerate(batch):
+            response = responses[index] if index < len(responses) else None
+            if isinstance(response, ChatResponse):
+                self.usage.record(response)
+                if self.cache is not None:
+                    self.cache.put(key, response)
+                results.append((key, response))
+            else:
+                self.usage.record_error()
+                if isinstance(response, Exception):
+                    results.append((key, f"{type(response).__name__}: {response}"))
+                else:
+                    results.append((key, f"Missing response: the backend returned {len(responses)} responses for {len(batch)} conversations"))
+        return results
+
+    def generate(self, sample_dataset_dict: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Generate the answer of every task of a sample dataset.
+
+        Parameters:
+        sample_dataset_dict (Dict[str, Any]): The sample dataset dictionary, whose answers may be empty.
+
+        Returns:
+        Dict[str, Any]: A copy of the dataset with the generated ANSWER of every task, and a GENERATION
+                        entry with the model, token counts, cost and cache status. Tasks whose request
+                        failed keep an empty answer and carry an ERROR.
+        """
+        model = self.chat_model.model
+        keys = {}
+        prompts = {}
+        with stage("generation.prompt"):
+            for task_id, task_dict in sample_dataset_dict["TASKS"].items():
+                messages = self.build_messages(task_dict)
+                key = ResponseCache.key(model, self.params, messages)
+                keys[task_id] = key
+                prompts.setdefault(key, messages)
+        count("generation_prompts", len(prompts))
+
+        responses: Dict[str, Any] = {}
+        if self.cache is not None:
+            with stage("generation.cache"):
+                for key in prompts:
+                    response = self.cache.get(key)
+                    if response is not None:
+                        self.usage.record(response)
+                        responses[key] = response
+
+        missing = [(key, messages) for key, messages in prompts.items() if key not in responses]
+        if missing:
+            batches = [missing[i:i + self.batch_size] for i in range(0, len(missing), self.batch_size)]
+            with stage("generation.chat"), ThreadPoolExecutor(max_workers=self.max_concurrency) as executor:
+                for results in executor.map(self._send, batches):
+                    responses.update(results)
+            count("generation_requests", len(missing))
+
+        tasks = {}
+        for task_id, task_dict in sample_dataset_dict["TASKS"].items():
+            response = responses[keys[task_id]]
+            task_dict = dict(task_dict)
+            if isinstance(response, ChatResponse):
+                task_dict["ANSWER"] = response.text
+                task_dict["GENERATION"] = {
+                    "MODEL": response.model,
+                    "PROMPT_TOKENS": response.prompt_tokens,
+                    "COMPLETION_TOKENS": response.completion_tokens,
+                    "COST": self.usage.cost_of(response),
+                    "CACHED": response.cached,
+                }
+            else:
+                task_dict["ANSWER"] = ""
+                task_dict["ERROR"] = response
+            tasks[task_id] = task_dict
+        return {**sample_dataset_dict, "TASKS": tasks}
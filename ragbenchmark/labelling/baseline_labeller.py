@@ -0,0 +1,405 @@
+import re
+import zlib
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from thefuzz import fuzz
+
+from ..chunking.corpus import Document
+from ..profiling.profiler import stage, count
+
+_WORD_PATTERN = re.compile(r"\w+")
+_WHITESPACE_PATTERN = re.compile(r"\s+")
+
+# set in every worker process by _init_worker, so the index is shipped once per worker
+_WORKER_LABELLER: Optional["BaselineLabeller"] = None
+
+
+def tokenize(text: str) -> Tuple[List[str], array, array]:
+    """
+    Split a text into case-folded words with their character offsets.
+
+    Parameters:
+    text (str): The text.
+
+    Returns:
+    Tuple[List[str], array, array]: The words, the offset where every word starts and the offset after it ends.
+    """
+    words, starts, ends = [], array("l"), array("l")
+    for match in _WORD_PATTERN.finditer(text):
+        words.append(match.group().casefold())
+        starts.append(match.start())
+        ends.append(match.end())
+    return words, starts, ends
+
+
+def gram_key(words: Sequence[str]) -> int:
+    """
+    Hash a word n-gram. CRC-32 is stable across processes, unlike the built-in hash().
+
+    Parameters:
+    words (Sequence[str]): The words of the n-gram.
+
+    Returns:
+    int: The key of the n-gram.
+    """
+    return zlib.crc32(" ".join(words).encode("utf-8"))
+
+
+def _squash(text: str) -> str:
+    """
+    Case-fold a text and collapse its whitespace, for fuzzy comparison.
+
+    Parameters:
+    text (str): The text.
+
+    Returns:
+    str: The squashed text.
+    """
+    return _WHITESPACE_PATTERN.sub(" ", text).strip().casefold()
+
+
+class NgramIndex:
+    """
+    An inverted index from the word n-grams of a corpus to their positions.
+
+    The words of all documents are numbered in one sequence, and the index maps every n-gram, and every
+    single word for answers shorter than n words, to the positions where it starts. N-grams never cross
+    documents but do cross pages, since a passage may run over a page break.
+
+    Attributes:
+    documents (List[Document]): The indexed documents.
+    n (int): The number of words of an n-gram.
+    num_words (int): The number of words of the corpus.
+    """
+
+    def __init__(self, documents: Sequence[Document], n: int = 3) -> None:
+        """
+        Build the index.
+
+        Parameters:
+        documents (Sequence[Document]): The documents.
+        n (int): The number of words of an n-gram.
+
+        Raises:
+        ValueError: If n is not positive.
+        """
+        if n <= 0:
+            raise ValueError("n must be positive!")
+        self.documents = list(documents)
+        self.n = n
+        self._document_starts: List[int] = []
+        self._starts = array("l")
+        self._ends = array("l")
+        grams: Dict[int, array] = {}
+        words_index: Dict[int, array] = {}
+        position = 0
+        with stage("labelling.index"):
+            for document in self.documents:
+                words, starts, ends = tokenize(document.text)
+                self._document_starts.append(position)
+                self._starts.extend(starts)
+                self._ends.extend(ends)
+                for offset, word in enumerate(words):
+                    words_index.setdefault(gram_key((word,)), array("l")).append(position + offset)
+                for offset in range(len(words) - n + 1):
+                    grams.setdefault(gram_key(words[offset:offset + n]), array("l")).append(position + offset)
+                position += len(words)
+        self.num_words = position
+        self._grams = grams
+        self._words = words_index
+        count("labelling_words", position)
+
+    def lookup(self, words: Sequence[str]) -> array:
+        """
+        Get the positions of an n-gram, or of a single word.
+
+        Parameters:
+        words (Sequence[str]): The n words of the n-gram, or one word.
+
+        Returns:
+        array: The positions where it starts, in increasing order.
+        """
+        table = self._words if len(words) == 1 else self._grams
+        return table.get(gram_key(words), array("l"))
+
+    def document_of(self, position: int) -> int:
+        """
+        Get the document of a word position.
+
+        Parameters:
+        position (int): The word position.
+
+        Returns:
+        int: The index of the document.
+        """
+        return bisect_right(self._document_starts, position) - 1
+
+    def word_range(self, document_index: int) -> Tuple[int, int]:
+        """
+        Get the word positions of a document.
+
+        Parameters:
+        document_index (int): The index of the document.
+
+        Returns:
+        Tuple[int, int]: The first position and the position after the last word.
+        """
+        end = self._document_starts[document_index + 1] if document_index + 1 < len(self._document_starts) else self.num_words
+        return self._document_starts[document_index], end
+
+    def char_span(self, first: int, last: int) -> Tuple[int, int]:
+        """
+        Get the character span of a range of words of one document.
+
+        Parameters:
+        first (int): The position of the first word.
+        last (int): The position of the last word, included.
+
+        Returns:
+        Tuple[int, int]: The offsets of the first character and after the last character, in the document text.
+        """
+        return self._starts[first], self._ends[last]
+
+
+class BaselineLabeller:
+    """
+    A class used to label the baseline contexts of questions by aligning their reference answers to the
+    pages of the documents.
+
+    The corpus is indexed once by word n-grams. Every n-gram of an answer is looked up, and each hit
+    votes for the alignment of the answer start it implies (hit position minus n-gram offset in the
+    answer), answers shorter than n words voting with each of their words, so a passage matching the answer with a few changed words still collects most votes on
+    nearly the same alignment. The best alignments become candidate passages, which are verified with
+    thefuzz's partial ratio against the answer. N-grams more frequent than `max_postings` say little
+    about where an answer is, and are skipped.
+
+    Questions are labelled in a process pool, each worker receiving the index once.
+
+    Attributes:
+    index (NgramIndex): The n-gram index of the corpus.
+    threshold (int): The minimal fuzzy score, between 0 and 100, of a labelled passage.
+    max_contexts (int): The maximal number of contexts labelled per question.
+    max_candidates (int): The number of alignments verified per question.
+    max_postings (int): N-grams with more positions are not looked up.
+    slack (int): The number of words by which alignments may drift, due to inserted or missing words.
+    workers (int): Number of worker processes.
+    chunk_size (int): Number of questions sent to a worker at once.
+
+    Example:
+    >>> labeller = BaselineLabeller(load_tsv_documents("docs.tsv", page_size=3000), workers=8)
+    >>> baseline_dataset_dict = labeller.label({"0": {"QUESTION": "...", "ANSWER": "..."}}, name="covid")
+    """
+
+    def __init__(
+        self,
+        documents: Sequence[Document],
+        n: int = 3,
+        threshold: int = 85,
+        max_contexts: int = 1,
+        max_candidates: int = 5,
+        max_postings: int = 1000,
+        slack: int = 3,
+        workers: int = 1,
+        chunk_size: int = 64
+    ) -> None:
+        """
+        Initialize the BaselineLabeller and index the documents.
+
+        Parameters:
+        documents (Sequence[Document]): The documents, with their pages.
+        n (int): The number of words of an n-gram.
+        threshold (int): The minimal fuzzy score of a labelled passage.
+        max_contexts (int): The maximal number of contexts labelled per question.
+        max_candidates (int): The number of alignments verified per question.
+        max_postings (int): N-grams with more positions are not looked up.
+        slack (int): The number of words by which alignments may drift.
+        workers (int): Number of worker processes.
+        chunk_size (int): Number of questions sent to a worker at once.
+        """
+        self.index = NgramIndex(documents, n=n)
+        self.threshold = threshold
+        self.max_contexts = max_contexts
+        self.max_candidates = max_candidates
+        self.max_postings = max_postings
+        self.slack = slack
+        self.workers = max(1, workers)
+        self.chunk_size = max(1, chunk_size)
+
+    def _candidates(self, words: List[str]) -> List[Tuple[int, int]]:
+        """
+        Find the candidate passages of an answer by voting on alignments.
+
+        Parameters:
+        words (List[str]): The words of the answer.
+
+        Returns:
+        List[Tuple[int, int]]: The first and last word positions of every candidate, most votes first.
+        """
+        n = self.index.n if len(words) >= self.index.n else 1
+        # answers too short for an n-gram vote with every word
+        postings = [(offset, self.index.lookup(words[offset:offset + n])) for offset in range(len(words) - n + 1)]
+        hits = []
+        for offset, positions in postings:
+            if len(positions) > self.max_postings:
+                continue
+            hits.extend((position - offset, position, offset) for position in positions)
+        if not hits:
+            return []
+        hits.sort()
+        alignments = [alignment for alignment, _, _ in hits]
+        votes = Counter(alignments)
+        candidates = []
+        for alignment, _ in votes.most_common():
+            if len(candidates) == self.max_candidates:
+                break
+            if any(abs(alignment - other) <= max(len(words), self.slack) for other, _, _ in candidates):
+                continue
+            # the hits of nearby alignments bound the passage
+            near = hits[bisect_left(alignments, alignment - self.slack):bisect_right(alignments, alignment + self.slack)]
+            document_index = self.index.document_of(near[0][1])
+            near = [hit for hit in near if self.index.document_of(hit[1]) == document_index]
+            document_start, document_end = self.index.word_range(document_index)
+            first = min(position - offset for _, position, offset in near)
+            last = max(position + (len(words) - 1 - offset) for _, position, offset in near)
+            candidates.append((alignment, max(first, document_start), min(last, document_end - 1)))
+        return [(first, last) for _, first, last in candidates]
+
+    def label_answer(self, answer: str) -> List[Dict[str, Any]]:
+        """
+        Find the passages of the documents matching an answer.
+
+        Parameters:
+        answer (str): The reference answer.
+
+        Returns:
+        List[Dict[str, Any]]: Contexts in the baseline format, with their TEXT, FILE_PATH and PAGE_NUMBER,
+                              and the fuzzy score as MATCH_SCORE, best first.
+        """
+        words, _, _ = tokenize(answer)
+        if not words:
+            return []
+        squashed = _squash(answer)
+        contexts = []
+        for first, last in self._candidates(words):
+            document = self.index.documents[self.index.document_of(first)]
+            document_start, document_end = self.index.word_range(self.index.document_of(first))
+            window_start, _ = self.index.char_span(max(first - self.slack, document_start), first)
+            _, window_end = self.index.char_span(last, min(last + self.slack, document_end - 1))
+            score = fuzz.partial_ratio(squashed, _squash(document.text[window_start:window_end]))
+            if score < self.threshold:
+                continue
+            start, end = self.index.char_span(first, last)
+            contexts.append({
+                "TEXT": document.text[start:end],
+                "FILE_PATH": document.file_path,
+                "PAGE_NUMBER": document.page_numbers(start, end),
+                "MATCH_SCORE": score,
+            })
+        contexts.sort(key=lambda context: context["MATCH_SCORE"], reverse=True)
+        return contexts[:self.max_contexts]
+
+    def _label_chunk(self, questions: List[Tuple[str, Dict[str, Any]]]) -> List[Tuple[str, List[Dict[str, Any]]]]:
+        """
+        Label a chunk of questions.
+
+        Parameters:
+        questions (List[Tuple[str, Dict[str, Any]]]): The task ids and task dictionaries with the ANSWER.
+
+        Returns:
+        List[Tuple[str, List[Dict[str, Any]]]]: The task ids and their contexts.
+        """
+        return [(task_id, self.label_answer(task_dict["ANSWER"])) for task_id, task_dict in questions]
+
+    def label(self, questions: Dict[str, Dict[str, Any]], name: str = "labelled") -> Dict[str, Any]:
+        """
+        Label every question and build the baseline dataset.
+
+        Parameters:
+        questions (Dict[str, Dict[str, Any]]): The task dictionaries with the QUESTION and the reference ANSWER, by task id.
+        name (str): Name of the dataset.
+
+        Returns:
+        Dict[str, Any]: The baseline dataset dictionary. Questions without any passage above the threshold
+                        keep empty CONTEXTS, and their ids are listed under UNLABELLED.
+        """
+        items = list(questions.items())
+        chunks = [items[i:i + self.chunk_size] for i in range(0, len(items), self.chunk_size)]
+        labelled: Dict[str, List[Dict[str, Any]]] = {}
+        with stage("labelling.label"):
+            if self.workers == 1 or len(chunks) <= 1:
+                for chunk in chunks:
+                    labelled.update(self._label_chunk(chunk))
+            else:
+                with ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker, initargs=(self,)) as executor:
+                    for results in executor.map(_label_chunk_in_worker, chunks):
+                        labelled.update(results)
+        count("labelling_questions", len(items))
+        tasks = {
+            task_id: {"QUESTION": task_dict["QUESTION"], "ANSWER": task_dict["ANSWER"], "CONTEXTS": labelled[task_id]}
+            for task_id, task_dict in items
+        }
+        return {
+            "NAME": name,
+            "DOCUMENTS": [document.file_path for document in self.index.documents],
+            "TASKS": tasks,
+            "UNLABELLED": [task_id for task_id, task_dict in tasks.items() if not task_dict["CONTEXTS"]],
+        }
+
+
+def _init_worker(labeller: BaselineLabeller) -> None:
+    """
+    Keep the labeller of a worker process.
+
+    Parameters:
+    labeller (BaselineLabeller): The labeller, with its index.
+    """
+    global _WORKER_LABELLER
+    _WORKER_LABELLER = labeller
+
+
+def _label_chunk_in_worker(questions: List[Tuple[str, Dict[str, Any]]]) -> List[Tuple[str, List[Dict[str, Any]]]]:
+    """
+    Label a chunk of questions with the labeller of the worker process.
+
+    Parameters:
+    questions (List[Tuple[str, Dict[str, Any]]]): The task ids and task dictionaries with the ANSWER.
+
+    Returns:
+    List[Tuple[str, List[Dict[str, Any]]]]: The task ids and their contexts.
+    """
+    return _WORKER_LABELLER._label_chunk(questions)
+
+
+def load_questions(questions_dict: Any) -> Dict[str, Dict[str, Any]]:
+    """
+    Read questions with reference answers, either a dataset dictionary with TASKS, or a list of
+    {"QUESTION", "ANSWER"} objects numbered from 0.
+
+    Parameters:
+    questions_dict (Any): The parsed JSON.
+
+    Returns:
+    Dict[str, Dict[str, Any]]: The task dictionaries by task id.
+
+    Raises:
+    ValueError: If the JSON is neither a dataset with TASKS nor a list, or a question has no QUESTION or ANSWER.
+    """
+    if isinstance(questions_dict, dict):
+        if not isinstance(questions_dict.get("TASKS"), dict):
+            raise ValueError("Invalid questions! Expected a dataset dictionary with TASKS, or a list of questions.")
+        questions = {str(task_id): task_dict for task_id, task_dict in questions_dict["TASKS"].items()}
+    elif isinstance(questions_dict, list):
+        questions = {str(index): task_dict for index, task_dict in enumerate(questions_dict)}
+    else:
+        raise ValueError("Invalid questions! Expected a dataset dictionary with TASKS, or a list of questions.")
+    invalid = [
+        task_id for task_id, task_dict in questions.items()
+        if not isinstance(task_dict, dict) or not isinstance(task_dict.get("QUESTION"), str) or not isinstance(task_dict.get("ANSWER"), str)
+    ]
+    if invalid:
+        raise ValueError(f"Invalid questions {invalid[:5]}! Every question needs a QUESTION and an ANSWER.")
+    return questions
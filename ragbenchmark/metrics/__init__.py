@@ -0,0 +1,14 @@
+from .._lazy import lazy_attributes
+
+__getattr__, __dir__ = lazy_attributes(__name__, {
+    "MeanAggregate": ".aggregate",
+    "count_chars": ".metrics_by_char.utils",
+    "RecallByChar": ".metrics_by_char.calc_recall_by_char",
+    "PrecisionByRecall": ".metrics_by_char.calc_precision_by_char",
+    "RecallByPageNumber": ".metrics_by_page_number.calc_recall_by_page_number",
+    "PrecisionByPageNumber": ".metrics_by_page_number.calc_precision_by_page_number",
+    "DecisionClassification": ".metrics_by_answer.calc_decision",
+    "parse_decision": ".metrics_by_answer.calc_decision",
+    "CharNgramVectorizer": ".metrics_by_content.calc_tfidf_similarity",
+    "TfidfSimilarity": ".metrics_by_content.calc_tfidf_similarity",
+})
@@ -0,0 +1,166 @@
+import math
+from typing import Any, Dict, Iterable, List
+
+
+def _add_exact(partials: List[float], value: float) -> None:
+    """
+    Add a value to a list of non-overlapping partial sums without any rounding error (Shewchuk's algorithm).
+
+    Parameters:
+    partials (List[float]): The partial sums, updated in place.
+    value (float): The value to add.
+    """
+    i = 0
+    for partial in partials:
+        if abs(value) < abs(partial):
+            value, partial = partial, value
+        high = value + partial
+        low = partial - (high - value)
+        if low:
+            partials[i] = low
+            i += 1
+        value = high
+    partials[i:] = [value]
+
+
+class MeanAggregate:
+    """
+    A mergeable aggregate of per-task metric values: count, sum and sum of squares.
+
+    Sums are kept as exact partial sums, so merging aggregates built on any split of the tasks, in any
+    order, gives exactly the same mean as aggregating all tasks in a single process.
+
+    Attributes:
+    count (int): Number of aggregated values.
+    _sum_partials (List[float]): Exact partial sums of the values.
+    _sum_sq_partials (List[float]): Exact partial sums of the squared values.
+    """
+
+    def __init__(self) -> None:
+        """
+        Initialize an empty MeanAggregate.
+        """
+        self.count: int = 0
+        self._sum_partials: List[float] = []
+        self._sum_sq_partials: List[float] = []
+
+    def update(self, value: float) -> "MeanAggregate":
+        """
+        Add one value.
+
+        Parameters:
+        value (float): The metric value of one task.
+
+        Returns:
+        MeanAggregate: The aggregate itself.
+        """
+        value = float(value)
+        self.count += 1
+        _add_exact(self._sum_partials, value)
+        _add_exact(self._sum_sq_partials, value * value)
+        return self
+
+    def update_all(self, values: Iterable[float]) -> "MeanAggregate":
+        """
+        Add several values.
+
+        Parameters:
+        values (Iterable[float]): The metric values.
+
+        Returns:
+        MeanAggregate: The aggregate itself.
+        """
+        for value in values:
+            self.update(value)
+        return self
+
+    def merge(self, other: "MeanAggregate") -> "MeanAggregate":
+        """
+        Merge another aggregate into this one.
+
+        Parameters:
+        other (MeanAggregate): The aggregate of other tasks.
+
+        Returns:
+        MeanAggregate: The aggregate itself.
+        """
+        self.count += other.count
+        for partial in other._sum_partials:
+            _add_exact(self._sum_partials, partial)
+        for partial in other._sum_sq_partials:
+            _add_exact(self._sum_sq_partials, partial)
+        return self
+
+    @property
+    def sum(self) -> float:
+        """
+        Get the correctly rounded sum of the values.
+
+        Returns:
+        float: The sum.
+        """
+        return math.fsum(self._sum_partials)
+
+    @property
+    def sum_sq(self) -> float:
+        """
+        Get the correctly rounded sum of the squared values.
+
+        Returns:
+        float: The sum of squares.
+        """
+        return math.fsum(self._sum_sq_partials)
+
+    @property
+    def mean(self) -> float:
+        """
+        Get the mean of the values.
+
+        Returns:
+        float: The mean, 0.0 if no value was aggregated.
+        """
+        return self.sum / self.count if self.count else 0.0
+
+    @property
+    def std(self) -> float:
+        """
+        Get the population standard deviation of the values.
+
+        Returns:
+        float: The standard deviation, 0.0 if no value was aggregated.
+        """
+        if not self.count:
+            return 0.0
+        return math.sqrt(max(self.sum_sq / self.count - self.mean ** 2, 0.0))
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Serialize the aggregate. Floats survive a JSON round trip exactly.
+
+        Returns:
+        Dict[str, Any]: The count, the rounded sums and the exact partial sums.
+        """
+        return {
+            "count": self.count,
+            "sum": self.sum,
+            "sum_sq": self.sum_sq,
+            "sum_partials": list(self._sum_partials),
+            "sum_sq_partials": list(self._sum_sq_partials),
+        }
+
+    @classmethod
+    def from_dict(cls, aggregate_dict: Dict[str, Any]) -> "MeanAggregate":
+        """
+        Deserialize an aggregate written by `to_dict`.
+
+        Parameters:
+        aggregate_dict (Dict[str, Any]): The serialized aggregate.
+
+        Returns:
+        MeanAggregate: The aggregate.
+        """
+        aggregate = cls()
+        aggregate.count = int(aggregate_dict["count"])
+        aggregate._sum_partials = [float(partial) for partial in aggregate_dict.get("sum_partials", [aggregate_dict["sum"]])]
+        aggregate._sum_sq_partials = [float(partial) for partial in aggregate_dict.get("sum_sq_partials", [aggregate_dict["sum_sq"]])]
+        return aggregate
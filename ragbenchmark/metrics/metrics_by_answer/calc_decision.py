@@ -0,0 +1,161 @@
+import re
+from typing import Dict, Iterable, Optional, Sequence
+
+import numpy as np
+
+from ...profiling.profiler import profile_stage
+
+DECISIONS = ("yes", "no", "maybe")
+
+# the decision must lead the answer, after optional whitespace and punctuation such as quotes or markdown
+_DECISION_PATTERN = re.compile(r"[\W_]*(yes|no|maybe)\b", re.IGNORECASE)
+
+
+def parse_decision(answer: Optional[str]) -> Optional[str]:
+    """
+    Read a yes/no/maybe decision from a free-text answer, e.g. "No, the study shows ...". The decision
+    word must start the answer, as DECISION_SYSTEM_PROMPT asks, so that "There is no evidence" is not
+    read as "no".
+
+    Parameters:
+    answer (Optional[str]): The answer.
+
+    Returns:
+    Optional[str]: The leading decision word of the answer, lower-cased, None if the answer does not start with one.
+
+    Example:
+    >>> parse_decision("Maybe. The evidence is mixed.")
+    'maybe'
+    """
+    if not answer:
+        return None
+    match = _DECISION_PATTERN.match(answer)
+    return match.group(1).lower() if match else None
+
+
+class DecisionClassification:
+    """
+    A class used to score yes/no/maybe decisions, as in PubMedQA, over all predictions at once.
+
+    Decisions are encoded as class indices, and the confusion matrix is a single bincount over the
+    pairs of indices, from which accuracy and macro-F1 follow with array operations. Predictions that
+    are not a valid decision get an extra "invalid" column, so they count as wrong without being
+    credited to any class.
+
+    Attributes:
+    VERSION (int): The version of the implementation, to bump whenever its results change.
+    """
+
+    VERSION: int = 1
+
+    @staticmethod
+    def encode(decisions: Iterable[Optional[str]], classes: Sequence[str] = DECISIONS) -> np.ndarray:
+        """
+        Encode decisions as class indices.
+
+        Parameters:
+        decisions (Iterable[Optional[str]]): The decisions.
+        classes (Sequence[str]): The valid classes.
+
+        Returns:
+        np.ndarray: The index of every decision in classes, len(classes) for an invalid decision.
+        """
+        index = {label: position for position, label in enumerate(classes)}
+        return np.fromiter((index.get(decision, len(classes)) for decision in decisions), dtype=np.int64)
+
+    @staticmethod
+    @profile_stage("metric.decision_confusion_matrix")
+    def calculate_confusion_matrix(
+        labels: Sequence[str],
+        predictions: Sequence[Optional[str]],
+        classes: Sequence[str] = DECISIONS
+    ) -> np.ndarray:
+        """
+        Calculate the confusion matrix of the predictions.
+
+        Parameters:
+        labels (Sequence[str]): The true decisions.
+        predictions (Sequence[Optional[str]]): The predicted decisions, aligned with labels.
+        classes (Sequence[str]): The valid classes.
+
+        Returns:
+        np.ndarray: A (len(classes), len(classes) + 1) matrix counting true classes by row and predicted
+                    classes by column, the last column counting invalid predictions.
+
+        Raises:
+        ValueError: If labels and predictions differ in length, or a label is not a valid class.
+
+        Example:
+        >>> DecisionClassification.calculate_confusion_matrix(["yes", "no"], ["yes", "maybe"])
+        array([[1, 0, 0, 0],
+               [0, 0, 1, 0],
+               [0, 0, 0, 0]])
+        """
+        if len(labels) != len(predictions):
+            raise ValueError(f"Invalid predictions! Expected {len(labels)} predictions, got {len(predictions)}.")
+        num_classes = len(classes)
+        true = DecisionClassification.encode(labels, classes)
+        if true.size and true.max() == num_classes:
+            raise ValueError(f"Invalid labels! Every label must be one of {', '.join(classes)}.")
+        predicted = DecisionClassification.encode(predictions, classes)
+        counts = np.bincount(true * (num_classes + 1) + predicted, minlength=num_classes * (num_classes + 1))
+        return counts.reshape(num_classes, num_classes + 1)
+
+    @staticmethod
+    def calculate_accuracy(confusion_matrix: np.ndarray) -> float:
+        """
+        Calculate the accuracy from a confusion matrix.
+
+        Parameters:
+        confusion_matrix (np.ndarray): The matrix of `calculate_confusion_matrix`.
+
+        Returns:
+        float: The fraction of correct predictions, 0.0 without predictions.
+        """
+        total = confusion_matrix.sum()
+        return float(np.trace(confusion_matrix[:, :confusion_matrix.shape[0]]) / total) if total else 0.0
+
+    @staticmethod
+    def calculate_per_class(confusion_matrix: np.ndarray, classes: Sequence[str] = DECISIONS) -> Dict[str, Dict[str, float]]:
+        """
+        Calculate the precision, recall, F1 and support of every class from a confusion matrix.
+
+        Parameters:
+        confusion_matrix (np.ndarray): The matrix of `calculate_confusion_matrix`.
+        classes (Sequence[str]): The valid classes, in matrix order.
+
+        Returns:
+        Dict[str, Dict[str, float]]: The scores of every class, 0.0 where undefined.
+        """
+        square = confusion_matrix[:, :len(classes)].astype(float)
+        hits = np.diag(square)
+        predicted = square.sum(axis=0)
+        support = confusion_matrix.sum(axis=1).astype(float)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            precision = np.where(predicted > 0, hits / predicted, 0.0)
+            recall = np.where(support > 0, hits / support, 0.0)
+            f1 = np.where(precision + recall > 0, 2 * precision * recall / (precision + recall), 0.0)
+        return {
+            label: {"precision": float(precision[i]), "recall": float(recall[i]), "f1": float(f1[i]), "support": int(support[i])}
+            for i, label in enumerate(classes)
+        }
+
+    @staticmethod
+    def calculate_macro_f1(confusion_matrix: np.ndarray, classes: Sequence[str] = DECISIONS) -> float:
+        """
+        Calculate the macro-F1 from a confusion matrix, the unweighted mean of the F1 of every class.
+
+        Parameters:
+        confusion_matrix (np.ndarray): The matrix of `calculate_confusion_matrix`.
+        classes (Sequence[str]): The valid classes, in matrix order.
+
+        Returns:
+        float: The macro-F1.
+
+        Example:
+        >>> matrix = DecisionClassification.calculate_confusion_matrix(["yes", "no", "maybe"], ["yes", "no", "no"])
+        >>> DecisionClassification.calculate_macro_f1(matrix)
+        0.5555555555555555
+        """
+        per_class = DecisionClassification.calculate_per_class(confusion_matrix, classes)
+        return float(np.mean([scores["f1"] for scores in per_class.values()])) if per_class else 0.0
@@ -1,11 +1,32 @@
 from typing import Dict
 
+from ..aggregate import MeanAggregate
+from ...profiling.profiler import profile_stage
+
 class PrecisionByRecall:
     """
     A class used to calculate the precision of characters in a sample compared to a baseline.
+
+    Attributes:
+    VERSION (int): The version of the implementation, to bump whenever its results change, so that
+                   cached per-task results computed by an older implementation are recomputed.
     """
 
+    VERSION: int = 1
+
+    @staticmethod
+    def create_aggregate() -> MeanAggregate:
+        """
+        Create the mergeable dataset-level aggregate of this metric. The dataset precision by char is the
+        mean of the per-task values, so shards can be aggregated separately and merged.
+
+        Returns:
+        MeanAggregate: An empty aggregate.
+        """
+        return MeanAggregate()
+
     @staticmethod
+    @profile_stage("metric.precision_by_char")
     def calculate_precision_by_char(
         baseline_char_count: Dict[str, int],
         sample_char_count: Dict[str, int]
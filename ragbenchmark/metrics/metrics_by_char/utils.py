@@ -1,5 +1,8 @@
 from typing import Dict
 
+from ...profiling.profiler import profile_stage
+
+@profile_stage("preprocess.count_chars", counter="chars", size=len)
 def count_chars(content: str) -> Dict[str, int]:
     """
     Count the occurrences of each character in a given string.
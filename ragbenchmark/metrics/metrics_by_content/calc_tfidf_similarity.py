@@ -0,0 +1,293 @@
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from ..aggregate import MeanAggregate
+from ...preprocessing.text_normalizer import TextNormalizer
+from ...profiling.profiler import count, profile_stage, stage
+
+# multiplier of the rolling polynomial hash over the code points of an n-gram
+_ROLLING_BASE = np.uint64(1000003)
+# Fibonacci hashing constant, spreading the rolling hash over the high bits before they are kept
+_MIX = np.uint64(0x9E3779B97F4A7C15)
+
+
+class CharNgramVectorizer:
+    """
+    A class used to turn texts into L2-normalized TF-IDF vectors of hashed character n-grams.
+
+    The n-grams are hashed into a fixed number of columns, so no vocabulary is built and the hashes
+    of all the n-grams of a text are computed at once with numpy, without a Python loop over the
+    characters. The vectors of all the texts are stored as the rows of one sparse CSR matrix.
+
+    Attributes:
+    ngram_range (Tuple[int, int]): The smallest and largest n-gram lengths, inclusive.
+    n_features (int): The number of hashed columns, a power of two.
+    sublinear_tf (bool): Whether term frequencies are replaced by 1 + log(tf).
+    lowercase (bool): Whether texts are case-folded before hashing.
+    idf (np.ndarray): The inverse document frequency of each column, set by fit_transform.
+    """
+
+    def __init__(
+        self,
+        ngram_range: Tuple[int, int] = (3, 5),
+        n_features: int = 2 ** 20,
+        sublinear_tf: bool = True,
+        lowercase: bool = True
+    ) -> None:
+        """
+        Initialize the CharNgramVectorizer.
+
+        Parameters:
+        ngram_range (Tuple[int, int]): The smallest and largest n-gram lengths, inclusive.
+        n_features (int): The number of hashed columns, a power of two.
+        sublinear_tf (bool): Whether term frequencies are replaced by 1 + log(tf).
+        lowercase (bool): Whether texts are case-folded before hashing.
+
+        Raises:
+        ValueError: If the n-gram range is empty or n_features is not a power of two.
+        """
+        if ngram_range[0] < 1 or ngram_range[0] > ngram_range[1]:
+            raise ValueError(f"Invalid n-gram range: {ngram_range}")
+        if n_features < 2 or n_features & (n_features - 1):
+            raise ValueError(f"n_features must be a power of two, got {n_features}")
+        self.ngram_range = ngram_range
+        self.n_features = n_features
+        self.sublinear_tf = sublinear_tf
+        self.lowercase = lowercase
+        self.idf = None
+        self._shift = np.uint64(64 - (n_features.bit_length() - 1))
+
+    def hash_ngrams(self, text: str) -> np.ndarray:
+        """
+        Compute the columns of all the character n-grams of a text.
+
+        Parameters:
+        text (str): The text.
+
+        Returns:
+        np.ndarray: The column of each n-gram occurrence, in no particular order.
+        """
+        if self.lowercase:
+            text = text.casefold()
+        codes = np.frombuffer(text.encode("utf-32-le"), dtype=np.uint32).astype(np.uint64)
+        hashes = []
+        for n in range(self.ngram_range[0], self.ngram_range[1] + 1):
+            num_ngrams = len(codes) - n + 1
+            if num_ngrams <= 0:
+                break
+            # uint64 arithmetic wraps around, which is the modulus of the rolling hash
+            rolling = np.full(num_ngrams, n, dtype=np.uint64)
+            for offset in range(n):
+                rolling = rolling * _ROLLING_BASE + codes[offset:offset + num_ngrams]
+            hashes.append(rolling)
+        if not hashes:
+            return np.empty(0, dtype=np.int64)
+        return ((np.concatenate(hashes) * _MIX) >> self._shift).astype(np.int64)
+
+    def fit_transform(self, texts: List[str]) -> Any:
+        """
+        Fit the inverse document frequencies over the texts and vectorize them.
+
+        The idf of a column is log((1 + N) / (1 + df)) + 1, where N is the number of texts and df the
+        number of texts with an n-gram in that column.
+
+        Parameters:
+        texts (List[str]): The texts, ideally without duplicates so that they do not skew the idf.
+
+        Returns:
+        scipy.sparse.csr_matrix: One L2-normalized row per text. Texts shorter than the smallest
+                                 n-gram get an empty row, whose similarity to anything is 0.
+        """
+        from scipy.sparse import csr_matrix
+
+        indptr = np.zeros(len(texts) + 1, dtype=np.int64)
+        indices, data = [], []
+        for row, text in enumerate(texts):
+            columns, frequencies = np.unique(self.hash_ngrams(text), return_counts=True)
+            indices.append(columns)
+            data.append(frequencies.astype(np.float64))
+            indptr[row + 1] = indptr[row] + len(columns)
+        indices = np.concatenate(indices) if indices else np.empty(0, dtype=np.int64)
+        data = np.concatenate(data) if data else np.empty(0, dtype=np.float64)
+        count("tfidf_nonzeros", len(data))
+
+        if self.sublinear_tf:
+            data = 1.0 + np.log(data)
+        document_frequency = np.bincount(indices, minlength=self.n_features)
+        self.idf = np.log((1.0 + len(texts)) / (1.0 + document_frequency)) + 1.0
+        data *= self.idf[indices]
+        rows = np.repeat(np.arange(len(texts)), np.diff(indptr))
+        norms = np.sqrt(np.bincount(rows, weights=data * data, minlength=len(texts)))
+        data /= norms[rows]
+        return csr_matrix((data, indices, indptr), shape=(len(texts), self.n_features))
+
+
+class TfidfSimilarity:
+    """
+    A class used to compare the retrieved texts of a sample with those of a baseline by the cosine
+    similarity of their character n-gram TF-IDF vectors.
+
+    Unlike the bag-of-characters metrics, shared n-grams reward texts that say the same thing in
+    the same words, and the idf discounts n-grams common to the whole dataset. The vectorizer is
+    fitted over every baseline and sample text of the dataset, so the scores of a task depend on
+    the dataset it is evaluated in.
+
+    For a task, recall_by_tfidf is the mean over the baseline contexts of their best similarity to
+    a sample context, and precision_by_tfidf the mean over the sample contexts of their best
+    similarity to a baseline context. A task without contexts on either side scores 0.
+
+    Attributes:
+    VERSION (int): The version of the implementation, to bump whenever its results change, so that
+                   cached per-task results computed by an older implementation are recomputed.
+    METRICS (List[str]): The names of the per-task metrics.
+    """
+
+    VERSION: int = 1
+    METRICS: List[str] = ["recall_by_tfidf", "precision_by_tfidf"]
+
+    def __init__(
+        self,
+        vectorizer: Optional[CharNgramVectorizer] = None,
+        batch_size: int = 256,
+        normalizer: Optional[TextNormalizer] = None
+    ) -> None:
+        """
+        Initialize the TfidfSimilarity.
+
+        Parameters:
+        vectorizer (Optional[CharNgramVectorizer]): The vectorizer, by default 3 to 5-grams over 2^20 columns.
+        batch_size (int): The number of tasks whose similarities are computed by one matrix product.
+        normalizer (Optional[TextNormalizer]): The normalizer applied to the texts before vectorizing.
+        """
+        self.vectorizer = vectorizer or CharNgramVectorizer()
+        self.batch_size = max(1, batch_size)
+        self.normalizer = normalizer
+
+    @staticmethod
+    def create_aggregate() -> MeanAggregate:
+        """
+        Create the mergeable dataset-level aggregate of a metric of this class.
+
+        Returns:
+        MeanAggregate: An empty aggregate.
+        """
+        return MeanAggregate()
+
+    @staticmethod
+    def calculate_best_similarities(
+        matrix,
+        baseline_rows: np.ndarray,
+        baseline_tasks: np.ndarray,
+        sample_rows: np.ndarray,
+        sample_tasks: np.ndarray
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Calculate, for each baseline and each sample context of a batch of tasks, its best similarity
+        to a context of the other side in the same task.
+
+        The similarities of the whole batch come from one sparse product; the pairs of different
+        tasks are then masked out before the row and column maxima.
+
+        Parameters:
+        matrix (scipy.sparse.csr_matrix): The L2-normalized vectors of the texts.
+        baseline_rows (np.ndarray): The matrix row of each baseline context.
+        baseline_tasks (np.ndarray): The task of each baseline context, as an integer.
+        sample_rows (np.ndarray): The matrix row of each sample context.
+        sample_tasks (np.ndarray): The task of each sample context, as an integer.
+
+        Returns:
+        Tuple[np.ndarray, np.ndarray]: The best similarity of each baseline and of each sample context,
+                                       0 for a context without counterpart in its task.
+
+        Example:
+        >>> matrix = CharNgramVectorizer().fit_transform(["same text", "other words"])
+        >>> TfidfSimilarity.calculate_best_similarities(matrix, np.array([0]), np.array([0]), np.array([0, 1]), np.array([0, 0]))
+        (array([1.]), array([1., 0.]))
+        """
+        if len(baseline_rows) == 0 or len(sample_rows) == 0:
+            return np.zeros(len(baseline_rows)), np.zeros(len(sample_rows))
+        similarities = (matrix[baseline_rows] @ matrix[sample_rows].T).toarray()
+        np.clip(similarities, 0.0, 1.0, out=similarities)
+        similarities[baseline_tasks[:, None] != sample_tasks[None, :]] = 0.0
+        return similarities.max(axis=1), similarities.max(axis=0)
+
+    @profile_stage("metric.tfidf_similarity")
+    def calculate_by_dataset(self, baseline_dict: Dict[str, Any], sample_dict: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Calculate the TF-IDF similarity metrics of every task of the baseline. Tasks missing from the
+        sample have no sample contexts.
+
+        Parameters:
+        baseline_dict (Dict[str, Any]): The baseline dataset.
+        sample_dict (Dict[str, Any]): The sample dataset.
+
+        Returns:
+        Dict[str, Any]: A dictionary with the name of the sample, the number of tasks, the dataset "metrics"
+                        (means of the per-task values) and one row per task, in the order of the baseline.
+        """
+        task_ids = list(baseline_dict["TASKS"])
+        with stage("tfidf.collect"):
+            row_of_text = {}
+            baseline_rows, baseline_tasks, sample_rows, sample_tasks = [], [], [], []
+            for task_index, task_id in enumerate(task_ids):
+                sample_task = sample_dict["TASKS"].get(task_id) or {"CONTEXTS": []}
+                for context_dict in baseline_dict["TASKS"][task_id]["CONTEXTS"]:
+                    baseline_rows.append(row_of_text.setdefault(context_dict["TEXT"], len(row_of_text)))
+                    baseline_tasks.append(task_index)
+                for context_dict in sample_task["CONTEXTS"]:
+                    sample_rows.append(row_of_text.setdefault(context_dict["TEXT"], len(row_of_text)))
+                    sample_tasks.append(task_index)
+            texts = list(row_of_text)
+            if self.normalizer is not None:
+                texts = self.normalizer.normalize_batch(texts)
+        with stage("tfidf.vectorize"):
+            matrix = self.vectorizer.fit_transform(texts)
+
+        baseline_rows, baseline_tasks = np.array(baseline_rows, dtype=np.int64), np.array(baseline_tasks, dtype=np.int64)
+        sample_rows, sample_tasks = np.array(sample_rows, dtype=np.int64), np.array(sample_tasks, dtype=np.int64)
+        baseline_best, sample_best = np.zeros(len(baseline_rows)), np.zeros(len(sample_rows))
+        # contexts are collected task by task, so the contexts of a batch of tasks are contiguous
+        baseline_bounds = np.searchsorted(baseline_tasks, np.arange(0, len(task_ids) + self.batch_size, self.batch_size))
+        sample_bounds = np.searchsorted(sample_tasks, np.arange(0, len(task_ids) + self.batch_size, self.batch_size))
+        with stage("tfidf.similarities"):
+            for batch in range(len(baseline_bounds) - 1):
+                b_slice = slice(baseline_bounds[batch], baseline_bounds[batch + 1])
+                s_slice = slice(sample_bounds[batch], sample_bounds[batch + 1])
+                baseline_best[b_slice], sample_best[s_slice] = self.calculate_best_similarities(
+                    matrix, baseline_rows[b_slice], baseline_tasks[b_slice], sample_rows[s_slice], sample_tasks[s_slice]
+                )
+
+        recalls = self._task_means(baseline_best, baseline_tasks, len(task_ids))
+        precisions = self._task_means(sample_best, sample_tasks, len(task_ids))
+        tasks = [
+            {"task_id": task_id, "recall_by_tfidf": float(recall), "precision_by_tfidf": float(precision)}
+            for task_id, recall, precision in zip(task_ids, recalls, precisions)
+        ]
+        return {
+            "name": sample_dict.get("NAME", ""),
+            "num_tasks": len(tasks),
+            "metrics": {
+                "recall_by_tfidf": float(recalls.mean()) if tasks else 0.0,
+                "precision_by_tfidf": float(precisions.mean()) if tasks else 0.0,
+            },
+            "tasks": tasks,
+        }
+
+    @staticmethod
+    def _task_means(values: np.ndarray, tasks: np.ndarray, num_tasks: int) -> np.ndarray:
+        """
+        Average per-context values by task.
+
+        Parameters:
+        values (np.ndarray): The value of every context.
+        tasks (np.ndarray): The task index of every context.
+        num_tasks (int): The number of tasks.
+
+        Returns:
+        np.ndarray: The mean value of every task, 0 for a task without context.
+        """
+        sizes = np.bincount(tasks, minlength=num_tasks)
+        sums = np.bincount(tasks, weights=values, minlength=num_tasks)
+        return np.divide(sums, sizes, out=np.zeros(num_tasks), where=sizes > 0)
+
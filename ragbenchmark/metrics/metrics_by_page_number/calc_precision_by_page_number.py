@@ -1,14 +1,36 @@
 from typing import List
 
+from ..aggregate import MeanAggregate
+from ...profiling.profiler import profile_stage
+
 class PrecisionByPageNumber:
     """
     A class used to calculate the precision of page numbers in a sample compared to a baseline.
+
+    Attributes:
+    VERSION (int): The version of the implementation, to bump whenever its results change, so that
+                   cached per-task results computed by an older implementation are recomputed.
     """
 
+    VERSION: int = 1
+
+    @staticmethod
+    def create_aggregate() -> MeanAggregate:
+        """
+        Create the mergeable dataset-level aggregate of this metric. The dataset precision by page number is the
+        mean of the per-task values, so shards can be aggregated separately and merged.
+
+        Returns:
+        MeanAggregate: An empty aggregate.
+        """
+        return MeanAggregate()
+
     @staticmethod
+    @profile_stage("metric.precision_by_page_number")
     def calculate_precision_by_page_number(
         baseline_page_number_list: List[List[int]],
-        sample_page_number_list: List[List[int]]
+        sample_page_number_list: List[List[int]],
+        check: bool = True
     ) -> float:
         """
         Calculate the precision of page numbers in the sample compared to the baseline.
@@ -22,6 +44,8 @@ class PrecisionByPageNumber:
                                                      page numbers from the baseline.
         sample_page_number_list (List[List[int]]): A list of lists where each inner list contains 
                                                    page numbers from the sample.
+        check (bool): Whether to reject empty sample page number lists. Datasets checked by
+                      DatasetValidator beforehand can skip this per-record check.
 
         Returns:
         float: The average precision of the sample page numbers compared to the baseline. This is 
@@ -37,7 +61,7 @@ class PrecisionByPageNumber:
 
         for sample_page_number in sample_page_number_list:
             actual_pages = len(sample_page_number)
-            if actual_pages == 0:
+            if check and actual_pages == 0:
                 raise ValueError("Invalid sample page number! Page number list cannot be empty!")
 
             hit_pages = 0
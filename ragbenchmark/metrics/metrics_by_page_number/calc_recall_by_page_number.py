@@ -1,18 +1,36 @@
-import os
-import sys
 from typing import List
 
-sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from ..aggregate import MeanAggregate
+from ...profiling.profiler import profile_stage
 
 class RecallByPageNumber:
     """
     A class used to calculate the recall of page numbers in a sample compared to a baseline.
+
+    Attributes:
+    VERSION (int): The version of the implementation, to bump whenever its results change, so that
+                   cached per-task results computed by an older implementation are recomputed.
     """
 
+    VERSION: int = 1
+
+    @staticmethod
+    def create_aggregate() -> MeanAggregate:
+        """
+        Create the mergeable dataset-level aggregate of this metric. The dataset recall by page number is the
+        mean of the per-task values, so shards can be aggregated separately and merged.
+
+        Returns:
+        MeanAggregate: An empty aggregate.
+        """
+        return MeanAggregate()
+
     @staticmethod
+    @profile_stage("metric.recall_by_page_number")
     def calculate_recall_by_page_number(
         baseline_page_number_list: List[List[int]],
-        sample_page_number_list: List[List[int]]
+        sample_page_number_list: List[List[int]],
+        check: bool = True
     ) -> float:
         """
         Calculate the recall of page numbers in the sample compared to the baseline.
@@ -26,6 +44,8 @@ class RecallByPageNumber:
                                                      page numbers from the baseline.
         sample_page_number_list (List[List[int]]): A list of lists where each inner list contains 
                                                    page numbers from the sample.
+        check (bool): Whether to reject empty baseline page number lists. Datasets checked by
+                      DatasetValidator beforehand can skip this per-record check.
 
         Returns:
         float: The average recall of the sample page numbers compared to the baseline. This is 
@@ -41,7 +61,7 @@ class RecallByPageNumber:
 
         for baseline_page_number in baseline_page_number_list:
             expected_pages = len(baseline_page_number)
-            if expected_pages == 0:
+            if check and expected_pages == 0:
                 raise ValueError("Invalid baseline page number! Page number list cannot be empty!")
 
             hit_pages = 0
@@ -0,0 +1,188 @@
+import re
+import unicodedata
+from typing import Dict, Iterable, List, Optional, Sequence
+
+from ..profiling.profiler import stage, count
+
+NORMALIZATION_STEPS = ("nfkc", "casefold", "punctuation", "stopwords", "whitespace")
+
+ENGLISH_STOPWORDS = frozenset("""
+a about above after again against all am an and any are as at be because been before being below between both
+but by can could did do does doing down during each few for from further had has have having he her here hers
+herself him himself his how i if in into is it its itself just me more most my myself no nor not of off on once
+only or other our ours ourselves out over own same she should so some such than that the their theirs them
+themselves then there these they this those through to too under until up very was we were what when where
+which while who whom why will with would you your yours yourself yourselves
+""".split())
+
+_PUNCTUATION_PATTERN = re.compile(r"[^\w\s]|_")
+_WHITESPACE_PATTERN = re.compile(r"\s+")
+
+
+class TextNormalizer:
+    """
+    A class used to normalize texts once before any metric compares them.
+
+    The enabled steps run in a fixed order: Unicode NFKC composition, case folding, punctuation
+    stripping, stopword removal and whitespace collapsing. Normalized forms are cached by raw text,
+    and `normalize_batch` only normalizes the unique texts missing from the cache, so a text shared
+    by many tasks, or by the baseline and several sample datasets, is normalized once per run.
+
+    Attributes:
+    steps (List[str]): The enabled steps, in application order.
+    stopwords (frozenset): The removed words, compared after case folding when it is enabled.
+    _cache (Dict[str, str]): The normalized form of every text seen so far.
+    _stopword_pattern (Optional[re.Pattern]): Matches a stopword token.
+
+    Example:
+    >>> normalizer = TextNormalizer(["nfkc", "casefold", "whitespace"])
+    >>> normalizer.normalize("Ｔhe  Transformer\\n")
+    'the transformer'
+    """
+
+    def __init__(self, steps: Sequence[str] = ("nfkc", "whitespace"), stopwords: Optional[Iterable[str]] = None) -> None:
+        """
+        Initialize the TextNormalizer.
+
+        Parameters:
+        steps (Sequence[str]): The steps to enable, any of NORMALIZATION_STEPS.
+        stopwords (Optional[Iterable[str]]): The words removed by the stopwords step, ENGLISH_STOPWORDS by default.
+
+        Raises:
+        ValueError: If an unknown step is given.
+        """
+        unknown_steps = [step for step in steps if step not in NORMALIZATION_STEPS]
+        if unknown_steps:
+            raise ValueError(f"Invalid normalization steps {unknown_steps}! Supported steps: {', '.join(NORMALIZATION_STEPS)}.")
+        self.steps: List[str] = [step for step in NORMALIZATION_STEPS if step in steps]
+        self.stopwords = frozenset(ENGLISH_STOPWORDS if stopwords is None else stopwords)
+        self._cache: Dict[str, str] = {}
+        self._stopword_pattern = None
+        if "stopwords" in self.steps and self.stopwords:
+            words = sorted(self.stopwords, key=len, reverse=True)
+            flags = re.IGNORECASE if "casefold" not in self.steps else 0
+            self._stopword_pattern = re.compile(r"(?<!\S)(?:" + "|".join(map(re.escape, words)) + r")(?!\S)", flags)
+
+    @classmethod
+    def parse(cls, spec: str) -> "TextNormalizer":
+        """
+        Build a normalizer from comma-separated steps, e.g. `nfkc,casefold,whitespace`.
+
+        Parameters:
+        spec (str): The steps.
+
+        Returns:
+        TextNormalizer: The normalizer.
+        """
+        return cls([step.strip() for step in spec.split(",") if step.strip()])
+
+    @property
+    def signature(self) -> str:
+        """
+        Get a string identifying the normalization, e.g. to tell apart results of different normalizations.
+
+        Returns:
+        str: The enabled steps joined by "+", "raw" if none is enabled.
+        """
+        return "+".join(self.steps) or "raw"
+
+    def _normalize(self, text: str) -> str:
+        """
+        Normalize one text without the cache.
+
+        Parameters:
+        text (str): The raw text.
+
+        Returns:
+        str: The normalized text.
+        """
+        for step in self.steps:
+            if step == "nfkc":
+                text = unicodedata.normalize("NFKC", text)
+            elif step == "casefold":
+                text = text.casefold()
+            elif step == "punctuation":
+                text = _PUNCTUATION_PATTERN.sub("", text)
+            elif step == "stopwords" and self._stopword_pattern is not None:
+                text = self._stopword_pattern.sub("", text)
+            elif step == "whitespace":
+                text = _WHITESPACE_PATTERN.sub(" ", text).strip()
+        return text
+
+    def normalize(self, text: str) -> str:
+        """
+        Normalize one text.
+
+        Parameters:
+        text (str): The raw text.
+
+        Returns:
+        str: The normalized text.
+        """
+        normalized = self._cache.get(text)
+        if normalized is None:
+            normalized = self._cache[text] = self._normalize(text)
+        return normalized
+
+    def normalize_batch(self, texts: Iterable[str]) -> List[str]:
+        """
+        Normalize many texts, normalizing every unique text missing from the cache once.
+
+        Parameters:
+        texts (Iterable[str]): The raw texts.
+
+        Returns:
+        List[str]: The normalized texts, in the given order.
+        """
+        texts = list(texts)
+        cache = self._cache
+        missing = {text for text in texts if text not in cache}
+        if missing:
+            with stage("preprocess.normalize"):
+                for text in missing:
+                    cache[text] = self._normalize(text)
+            count("normalized_texts", len(missing))
+        return [cache[text] for text in texts]
+
+    def normalize_contexts(self, contexts: Iterable[object]) -> None:
+        """
+        Normalize the text of contexts and store the normalized form on every context.
+
+        Parameters:
+        contexts (Iterable[BaseContext]): The contexts.
+        """
+        contexts = list(contexts)
+        for context, normalized_text in zip(contexts, self.normalize_batch(context.text for context in contexts)):
+            context.normalized_text = normalized_text
+
+    def subset(self, texts: Iterable[str]) -> "TextNormalizer":
+        """
+        Copy the normalizer with the cached forms of some texts only, e.g. to ship the forms a worker process needs.
+
+        Parameters:
+        texts (Iterable[str]): The raw texts, normalized first if missing from the cache.
+
+        Returns:
+        TextNormalizer: A normalizer with the same steps and a cache restricted to the texts.
+        """
+        texts = list(texts)
+        copy = TextNormalizer.__new__(TextNormalizer)
+        copy.__dict__.update(self.__dict__)
+        copy._cache = dict(zip(texts, self.normalize_batch(texts)))
+        return copy
+
+    @property
+    def cache_size(self) -> int:
+        """
+        Get the number of cached texts.
+
+        Returns:
+        int: The number of cached texts.
+        """
+        return len(self._cache)
+
+    def clear_cache(self) -> None:
+        """
+        Drop every cached form.
+        """
+        self._cache = {}
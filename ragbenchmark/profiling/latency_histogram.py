@@ -0,0 +1,187 @@
+import math
+from typing import Any, Dict, Optional
+
+
+class LatencyHistogram:
+    """
+    A class used to record latencies with a bounded relative error, in the style of HdrHistogram.
+
+    Values are counted in log-linear buckets: every power-of-two range is split into the same number
+    of linear sub-buckets, enough to keep `significant_digits` decimal digits. Recording is O(1), memory
+    only grows with the number of distinct buckets hit, and histograms recorded by different clients
+    can be merged exactly. Percentiles report the highest value equivalent to their bucket.
+
+    Attributes:
+    significant_digits (int): Number of significant decimal digits kept.
+    unit (float): The resolution in seconds, values are counted as integer multiples of it.
+    count (int): Number of recorded values.
+    _sub_bucket_bits (int): Number of bits of the linear sub-bucket index.
+    _counts (Dict[int, int]): The count of every non-empty bucket, by bucket index.
+    _min (Optional[int]): The smallest recorded value, in units.
+    _max (Optional[int]): The largest recorded value, in units.
+    _total (int): The sum of the recorded values, in units.
+
+    Example:
+    >>> histogram = LatencyHistogram()
+    >>> for latency in (0.010, 0.012, 0.250):
+    ...     histogram.record(latency)
+    >>> round(histogram.percentile(50), 3)
+    0.012
+    """
+
+    def __init__(self, significant_digits: int = 3, unit: float = 1e-6) -> None:
+        """
+        Initialize an empty LatencyHistogram.
+
+        Parameters:
+        significant_digits (int): Number of significant decimal digits kept, between 1 and 5.
+        unit (float): The resolution in seconds, microseconds by default.
+        """
+        if not 1 <= significant_digits <= 5 or unit <= 0:
+            raise ValueError("significant_digits must be between 1 and 5 and unit must be positive!")
+        self.significant_digits = significant_digits
+        self.unit = unit
+        self._sub_bucket_bits = (2 * 10 ** significant_digits - 1).bit_length()
+        self.count = 0
+        self._counts: Dict[int, int] = {}
+        self._min: Optional[int] = None
+        self._max: Optional[int] = None
+        self._total = 0
+
+    def _index(self, value: int) -> int:
+        """
+        Get the bucket index of a value.
+
+        Parameters:
+        value (int): The value, in units.
+
+        Returns:
+        int: The bucket index.
+        """
+        sub_bucket_count = 1 << self._sub_bucket_bits
+        if value < sub_bucket_count:
+            return value
+        shift = value.bit_length() - self._sub_bucket_bits
+        half = sub_bucket_count >> 1
+        return sub_bucket_count + (shift - 1) * half + (value >> shift) - half
+
+    def _highest_equivalent_value(self, index: int) -> int:
+        """
+        Get the highest value counted in a bucket.
+
+        Parameters:
+        index (int): The bucket index.
+
+        Returns:
+        int: The value, in units.
+        """
+        sub_bucket_count = 1 << self._sub_bucket_bits
+        if index < sub_bucket_count:
+            return index
+        half = sub_bucket_count >> 1
+        shift, offset = divmod(index - sub_bucket_count, half)
+        return ((half + offset + 1) << (shift + 1)) - 1
+
+    def record(self, seconds: float, count: int = 1) -> None:
+        """
+        Record a latency.
+
+        Parameters:
+        seconds (float): The latency in seconds, negative values are recorded as 0.
+        count (int): Number of times the latency occurred.
+        """
+        value = max(int(round(seconds / self.unit)), 0)
+        index = self._index(value)
+        self._counts[index] = self._counts.get(index, 0) + count
+        self.count += count
+        self._total += value * count
+        self._min = value if self._min is None else min(self._min, value)
+        self._max = value if self._max is None else max(self._max, value)
+
+    def merge(self, other: "LatencyHistogram") -> "LatencyHistogram":
+        """
+        Merge another histogram into this one.
+
+        Parameters:
+        other (LatencyHistogram): A histogram with the same precision and unit.
+
+        Returns:
+        LatencyHistogram: The histogram itself.
+
+        Raises:
+        ValueError: If the histograms have different precisions or units.
+        """
+        if (other.significant_digits, other.unit) != (self.significant_digits, self.unit):
+            raise ValueError("Only histograms with the same precision and unit can be merged!")
+        for index, count in other._counts.items():
+            self._counts[index] = self._counts.get(index, 0) + count
+        self.count += other.count
+        self._total += other._total
+        for value in (other._min, other._max):
+            if value is not None:
+                self._min = value if self._min is None else min(self._min, value)
+                self._max = value if self._max is None else max(self._max, value)
+        return self
+
+    def percentile(self, percentile: float) -> float:
+        """
+        Get the latency below which a percentage of the recorded latencies fall.
+
+        Parameters:
+        percentile (float): The percentage, between 0 and 100.
+
+        Returns:
+        float: The latency in seconds, 0.0 if nothing was recorded.
+        """
+        if not self.count:
+            return 0.0
+        rank = max(math.ceil(percentile / 100 * self.count), 1)
+        seen = 0
+        for index in sorted(self._counts):
+            seen += self._counts[index]
+            if seen >= rank:
+                return min(self._highest_equivalent_value(index), self._max) * self.unit
+        return self._max * self.unit
+
+    @property
+    def min(self) -> float:
+        """
+        Get the smallest recorded latency.
+
+        Returns:
+        float: The latency in seconds, 0.0 if nothing was recorded.
+        """
+        return (self._min or 0) * self.unit
+
+    @property
+    def max(self) -> float:
+        """
+        Get the largest recorded latency.
+
+        Returns:
+        float: The latency in seconds, 0.0 if nothing was recorded.
+        """
+        return (self._max or 0) * self.unit
+
+    @property
+    def mean(self) -> float:
+        """
+        Get the mean recorded latency.
+
+        Returns:
+        float: The latency in seconds, 0.0 if nothing was recorded.
+        """
+        return self._total / self.count * self.unit if self.count else 0.0
+
+    def summary(self) -> Dict[str, Any]:
+        """
+        Summarize the histogram in milliseconds.
+
+        Returns:
+        Dict[str, Any]: The count, min, mean, p50, p95, p99, p99.9 and max latencies.
+        """
+        summary: Dict[str, Any] = {"count": self.count, "min_ms": self.min * 1000, "mean_ms": self.mean * 1000}
+        for percentile in (50, 95, 99, 99.9):
+            summary[f"p{percentile:g}_ms"] = self.percentile(percentile) * 1000
+        summary["max_ms"] = self.max * 1000
+        return summary
@@ -0,0 +1,318 @@
+import functools
+import io
+import json
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+
+class _NullStage:
+    """
+    A reusable no-op context manager returned by `Profiler.stage` while profiling is disabled.
+    """
+
+    def __enter__(self) -> "_NullStage":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> bool:
+        return False
+
+
+_NULL_STAGE = _NullStage()
+
+
+class _Stage:
+    """
+    A context manager recording the wall time of one stage execution.
+
+    Attributes:
+    _profiler (Profiler): The profiler to record into.
+    _name (str): The name of the stage.
+    _start (float): The start time of the execution.
+    """
+
+    __slots__ = ("_profiler", "_name", "_start")
+
+    def __init__(self, profiler: "Profiler", name: str) -> None:
+        self._profiler = profiler
+        self._name = name
+        self._start = 0.0
+
+    def __enter__(self) -> "_Stage":
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info: Any) -> bool:
+        self._profiler.record(self._name, time.perf_counter() - self._start)
+        return False
+
+
+class Profiler:
+    """
+    A class used to collect per-stage timings and counters of an evaluation run.
+
+    While disabled, `stage` returns a shared no-op context manager and decorated functions only pay
+    one attribute check, so instrumentation can stay in the hot paths permanently.
+
+    Attributes:
+    enabled (bool): Whether timings and counters are being recorded.
+    _stages (Dict[str, List[float]]): Per stage [calls, total, min, max] wall times in seconds.
+    _counters (Dict[str, int]): Named counters, e.g. tasks, contexts and chars.
+    _cprofile (Optional[cProfile.Profile]): The cProfile profiler, if captured.
+    _cprofile_stats (Optional[List[Dict[str, Any]]]): Top functions of the last cProfile capture.
+    _tracemalloc (bool): Whether tracemalloc is being captured.
+    _tracemalloc_stats (Optional[Dict[str, Any]]): Memory statistics of the last tracemalloc capture.
+    """
+
+    def __init__(self) -> None:
+        """
+        Initialize a disabled Profiler.
+        """
+        self.enabled: bool = False
+        self._stages: Dict[str, List[float]] = {}
+        self._counters: Dict[str, int] = {}
+        self._cprofile = None
+        self._cprofile_stats: Optional[List[Dict[str, Any]]] = None
+        self._tracemalloc: bool = False
+        self._tracemalloc_stats: Optional[Dict[str, Any]] = None
+
+    def enable(self, cprofile: bool = False, tracemalloc: bool = False) -> None:
+        """
+        Start recording, optionally capturing a cProfile profile and tracemalloc statistics.
+
+        Parameters:
+        cprofile (bool): Whether to run cProfile until `disable` is called.
+        tracemalloc (bool): Whether to trace memory allocations until `disable` is called.
+        """
+        if cprofile:
+            import cProfile
+            self._cprofile = cProfile.Profile()
+            self._cprofile.enable()
+        if tracemalloc:
+            import tracemalloc as _tracemalloc
+            _tracemalloc.start()
+            self._tracemalloc = True
+        self.enabled = True
+
+    def disable(self) -> None:
+        """
+        Stop recording and finish the cProfile and tracemalloc captures.
+        """
+        self.enabled = False
+        if self._cprofile is not None:
+            self._cprofile.disable()
+            self._cprofile_stats = self._collect_cprofile_stats(self._cprofile)
+            self._cprofile = None
+        if self._tracemalloc:
+            import tracemalloc as _tracemalloc
+            snapshot = _tracemalloc.take_snapshot()
+            current, peak = _tracemalloc.get_traced_memory()
+            _tracemalloc.stop()
+            self._tracemalloc = False
+            self._tracemalloc_stats = {
+                "current_bytes": current,
+                "peak_bytes": peak,
+                "top": [
+                    {"location": str(stat.traceback), "size_bytes": stat.size, "count": stat.count}
+                    for stat in snapshot.statistics("lineno")[:10]
+                ],
+            }
+
+    def reset(self) -> None:
+        """
+        Drop all recorded timings, counters and captures.
+        """
+        self._stages.clear()
+        self._counters.clear()
+        self._cprofile_stats = None
+        self._tracemalloc_stats = None
+
+    def stage(self, name: str) -> Any:
+        """
+        Get a context manager timing a stage.
+
+        Parameters:
+        name (str): The name of the stage, e.g. "parse.dataset".
+
+        Returns:
+        Any: A context manager recording the stage, or a no-op one while disabled.
+        """
+        if not self.enabled:
+            return _NULL_STAGE
+        return _Stage(self, name)
+
+    def record(self, name: str, seconds: float) -> None:
+        """
+        Record one execution of a stage.
+
+        Parameters:
+        name (str): The name of the stage.
+        seconds (float): The wall time of the execution.
+        """
+        stats = self._stages.get(name)
+        if stats is None:
+            self._stages[name] = [1, seconds, seconds, seconds]
+        else:
+            stats[0] += 1
+            stats[1] += seconds
+            stats[2] = min(stats[2], seconds)
+            stats[3] = max(stats[3], seconds)
+
+    def count(self, name: str, value: int = 1) -> None:
+        """
+        Increase a counter.
+
+        Parameters:
+        name (str): The name of the counter, e.g. "tasks".
+        value (int): The increment.
+        """
+        if self.enabled:
+            self._counters[name] = self._counters.get(name, 0) + value
+
+    def report(self) -> Dict[str, Any]:
+        """
+        Build a structured report of everything recorded.
+
+        Returns:
+        Dict[str, Any]: A JSON-serializable report with "stages", "counters", "cprofile" and "tracemalloc".
+        """
+        stages = {}
+        for name, (calls, total, minimum, maximum) in sorted(self._stages.items()):
+            stages[name] = {
+                "calls": int(calls),
+                "total_seconds": total,
+                "mean_seconds": total / calls,
+                "min_seconds": minimum,
+                "max_seconds": maximum,
+            }
+        return {
+            "stages": stages,
+            "counters": dict(sorted(self._counters.items())),
+            "cprofile": self._cprofile_stats,
+            "tracemalloc": self._tracemalloc_stats,
+        }
+
+    def to_json(self, file_path: Optional[str] = None, indent: int = 4) -> str:
+        """
+        Serialize the report as JSON, optionally writing it to a file.
+
+        Parameters:
+        file_path (Optional[str]): The file to write the report to.
+        indent (int): The JSON indentation.
+
+        Returns:
+        str: The JSON report.
+        """
+        content = json.dumps(self.report(), indent=indent)
+        if file_path is not None:
+            with open(file_path, "w", encoding="utf-8") as f:
+                f.write(content)
+        return content
+
+    def log_report(self) -> None:
+        """
+        Print the stage timings and counters as tables through tclogger.
+        """
+        from tclogger import logger, rows_to_table_str
+
+        report = self.report()
+        rows = [
+            [name, str(stats["calls"]), f"{stats['total_seconds']:.6f}", f"{stats['mean_seconds'] * 1e6:.2f}"]
+            for name, stats in report["stages"].items()
+        ]
+        logger.note("> Stage timings:")
+        if rows:
+            logger.mesg(rows_to_table_str(rows, headers=["stage", "calls", "total_s", "mean_us"]))
+        logger.note("> Counters:")
+        if report["counters"]:
+            logger.mesg(rows_to_table_str(
+                [[name, str(value)] for name, value in report["counters"].items()],
+                headers=["counter", "value"]
+            ))
+        if report["tracemalloc"] is not None:
+            logger.note(f"> Peak traced memory: {report['tracemalloc']['peak_bytes']} bytes")
+
+    @staticmethod
+    def _collect_cprofile_stats(profile: Any, limit: int = 20) -> List[Dict[str, Any]]:
+        """
+        Extract the top functions by cumulative time from a cProfile profile.
+
+        Parameters:
+        profile (cProfile.Profile): The finished profile.
+        limit (int): The number of functions to keep.
+
+        Returns:
+        List[Dict[str, Any]]: One entry per function with its call count and times.
+        """
+        import pstats
+
+        stats = pstats.Stats(profile, stream=io.StringIO())
+        entries = []
+        for (file_name, line_number, function_name), (_, calls, total, cumulative, _) in stats.stats.items():
+            entries.append({
+                "function": f"{file_name}:{line_number}({function_name})",
+                "calls": calls,
+                "total_seconds": total,
+                "cumulative_seconds": cumulative,
+            })
+        entries.sort(key=lambda entry: entry["cumulative_seconds"], reverse=True)
+        return entries[:limit]
+
+
+PROFILER = Profiler()
+
+
+def stage(name: str) -> Any:
+    """
+    Get a context manager timing a stage with the global profiler.
+
+    Parameters:
+    name (str): The name of the stage.
+
+    Returns:
+    Any: A context manager recording the stage, or a no-op one while disabled.
+    """
+    return PROFILER.stage(name)
+
+
+def count(name: str, value: int = 1) -> None:
+    """
+    Increase a counter of the global profiler.
+
+    Parameters:
+    name (str): The name of the counter.
+    value (int): The increment.
+    """
+    PROFILER.count(name, value)
+
+
+def profile_stage(name: str, counter: Optional[str] = None, size: Optional[Callable[[Any], int]] = None) -> Callable:
+    """
+    Decorate a function so that every call is timed as a stage of the global profiler.
+
+    Parameters:
+    name (str): The name of the stage.
+    counter (Optional[str]): A counter increased on every call.
+    size (Optional[Callable[[Any], int]]): Computes the counter increment from the first argument,
+                                           the increment is 1 if omitted.
+
+    Returns:
+    Callable: The decorator.
+
+    Example:
+    >>> @profile_stage("preprocess.count_chars", counter="chars", size=len)
+    ... def count_chars(content): ...
+    """
+    def decorator(func: Callable) -> Callable:
+        @functools.wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            if not PROFILER.enabled:
+                return func(*args, **kwargs)
+            if counter is not None:
+                PROFILER.count(counter, size(args[0]) if size is not None else 1)
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                PROFILER.record(name, time.perf_counter() - start)
+        return wrapper
+    return decorator
@@ -0,0 +1,67 @@
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List
+
+
+class BaseRetriever(ABC):
+    """
+    Abstract base class for retrievers benchmarked by the load generator.
+
+    A retriever returns the contexts of a question as sample context dictionaries, i.e. with TEXT,
+    FILE_PATH, PAGE_NUMBER and SCORE, so that its results can be evaluated by the existing metrics.
+    Implementations must be safe to call from several threads at once.
+    """
+
+    @abstractmethod
+    def retrieve(self, question: str, top_k: int) -> List[Dict[str, Any]]:
+        """
+        Retrieve the contexts of a question.
+
+        Parameters:
+        question (str): The question.
+        top_k (int): The maximum number of contexts.
+
+        Returns:
+        List[Dict[str, Any]]: The context dictionaries, best first.
+        """
+        pass
+
+    def close(self) -> None:
+        """
+        Release the resources of the retriever, e.g. connections. Does nothing by default.
+        """
+        pass
+
+
+class ChunkRetriever(BaseRetriever):
+    """
+    An in-process BM25 retriever over the chunks of one configuration of a ChunkingSimulator.
+
+    Attributes:
+    _simulator (ChunkingSimulator): The simulator holding the chunks and their BM25 index.
+    _config_name (str): The chunking configuration.
+    """
+
+    def __init__(self, simulator: Any, config_name: str) -> None:
+        """
+        Initialize the ChunkRetriever.
+
+        Parameters:
+        simulator (ChunkingSimulator): The simulator holding the chunks and their BM25 index.
+        config_name (str): The chunking configuration.
+        """
+        self._simulator = simulator
+        self._config_name = config_name
+        self._simulator.num_chunks(config_name)
+
+    def retrieve(self, question: str, top_k: int) -> List[Dict[str, Any]]:
+        """
+        Retrieve the best chunks of a question with BM25.
+
+        Parameters:
+        question (str): The question.
+        top_k (int): The maximum number of chunks.
+
+        Returns:
+        List[Dict[str, Any]]: The chunk context dictionaries, best first.
+        """
+        return self._simulator.retrieve(self._config_name, question, top_k)
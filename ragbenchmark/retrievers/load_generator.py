@@ -0,0 +1,259 @@
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from .base_retriever import BaseRetriever
+from ..profiling.latency_histogram import LatencyHistogram
+
+# (task id, question, intended start, actual start, end, contexts, error)
+_Call = Tuple[str, str, float, float, float, List[Dict[str, Any]], Optional[str]]
+
+
+class LoadTestResult:
+    """
+    The outcome of a load test: the retrieved contexts as a sample dataset, and the latencies.
+
+    Attributes:
+    baseline_dataset_dict (Dict[str, Any]): The replayed baseline dataset.
+    sample_dataset_dict (Dict[str, Any]): The retrieved contexts as a sample dataset, every task
+                                          also carries its LATENCY_MS and, on failure, its ERROR.
+    latency (LatencyHistogram): The response times, measured from the intended start of every request.
+    service_time (LatencyHistogram): The time spent inside the retriever.
+    duration (float): The wall time of the measured requests in seconds.
+    errors (Dict[str, str]): The error message of every failed task.
+    """
+
+    def __init__(
+        self,
+        baseline_dataset_dict: Dict[str, Any],
+        sample_dataset_dict: Dict[str, Any],
+        latency: LatencyHistogram,
+        service_time: LatencyHistogram,
+        duration: float,
+        errors: Dict[str, str]
+    ) -> None:
+        """
+        Initialize the LoadTestResult.
+
+        Parameters:
+        baseline_dataset_dict (Dict[str, Any]): The replayed baseline dataset.
+        sample_dataset_dict (Dict[str, Any]): The retrieved contexts as a sample dataset.
+        latency (LatencyHistogram): The response times.
+        service_time (LatencyHistogram): The time spent inside the retriever.
+        duration (float): The wall time of the measured requests in seconds.
+        errors (Dict[str, str]): The error message of every failed task.
+        """
+        self.baseline_dataset_dict = baseline_dataset_dict
+        self.sample_dataset_dict = sample_dataset_dict
+        self.latency = latency
+        self.service_time = service_time
+        self.duration = duration
+        self.errors = errors
+
+    @property
+    def throughput(self) -> float:
+        """
+        Get the number of completed requests per second.
+
+        Returns:
+        float: The throughput.
+        """
+        return self.latency.count / self.duration if self.duration > 0 else 0.0
+
+    @property
+    def dataset(self) -> Any:
+        """
+        Get the baseline and the retrieved contexts as a dataset.
+
+        Returns:
+        CustomRagDataset: The dataset.
+        """
+        from ..datasets.custom_dataset import CustomRagDataset
+
+        return CustomRagDataset(self.baseline_dataset_dict, self.sample_dataset_dict)
+
+    def evaluate(self, metrics: Optional[List[str]] = None) -> Dict[str, Any]:
+        """
+        Score the retrieved contexts and report them together with the latencies.
+
+        Parameters:
+        metrics (Optional[List[str]]): The metrics to compute, all of them if None.
+
+        Returns:
+        Dict[str, Any]: The evaluation of DatasetEvaluator plus latency, service_time, throughput and errors.
+        """
+        from ..evaluator.dataset_evaluator.dataset_evaluator import DatasetEvaluator
+
+        result = DatasetEvaluator(self.baseline_dataset_dict, self.sample_dataset_dict, metrics=metrics).evaluate()
+        result.update({
+            "latency": self.latency.summary(),
+            "service_time": self.service_time.summary(),
+            "throughput": self.throughput,
+            "errors": len(self.errors),
+        })
+        return result
+
+
+class LoadGenerator:
+    """
+    A class used to replay the questions of a dataset against a retriever and measure its latency.
+
+    Two load models are supported:
+    - closed loop (qps is None): `concurrency` clients each send their next question as soon as the
+      previous one is answered, which measures the maximal throughput.
+    - open loop (qps given): questions are sent on a fixed schedule of `qps` requests per second by up
+      to `concurrency` threads. Latencies are measured from the scheduled start, so requests queued
+      behind slow ones are not hidden (coordinated omission).
+
+    Attributes:
+    retriever (BaseRetriever): The benchmarked retriever.
+    top_k (int): The number of contexts requested per question.
+    concurrency (int): The number of clients (closed loop) or threads (open loop).
+    qps (Optional[float]): The request rate of the open loop, None for a closed loop.
+    warmup (int): Number of questions sent before measuring, whose results are discarded.
+
+    Example:
+    >>> result = LoadGenerator(retriever, top_k=5, concurrency=8).run(baseline_dataset_dict)
+    >>> result.evaluate()["latency"]["p99_ms"]
+    """
+
+    def __init__(
+        self,
+        retriever: BaseRetriever,
+        top_k: int = 5,
+        concurrency: int = 1,
+        qps: Optional[float] = None,
+        warmup: int = 0
+    ) -> None:
+        """
+        Initialize the LoadGenerator.
+
+        Parameters:
+        retriever (BaseRetriever): The benchmarked retriever.
+        top_k (int): The number of contexts requested per question.
+        concurrency (int): The number of clients (closed loop) or threads (open loop).
+        qps (Optional[float]): The request rate of an open loop, None for a closed loop.
+        warmup (int): Number of questions sent before measuring, whose results are discarded.
+
+        Raises:
+        ValueError: If a parameter is out of range.
+        """
+        if top_k <= 0 or concurrency <= 0 or warmup < 0 or (qps is not None and qps <= 0):
+            raise ValueError("top_k, concurrency and qps must be positive and warmup cannot be negative!")
+        self.retriever = retriever
+        self.top_k = top_k
+        self.concurrency = concurrency
+        self.qps = qps
+        self.warmup = warmup
+
+    def _call(self, task_id: str, question: str, intended_start: float) -> _Call:
+        """
+        Send one question to the retriever.
+
+        Parameters:
+        task_id (str): The task id.
+        question (str): The question.
+        intended_start (float): When the request should have started, on the perf_counter clock.
+
+        Returns:
+        _Call: The task id, question, timings, contexts and error message.
+        """
+        start = time.perf_counter()
+        try:
+            contexts, error = self.retriever.retrieve(question, self.top_k), None
+        except Exception as e:
+            contexts, error = [], f"{type(e).__name__}: {e}"
+        return task_id, question, intended_start, start, time.perf_counter(), contexts, error
+
+    def _run_closed(self, questions: List[Tuple[str, str]]) -> Iterator[_Call]:
+        """
+        Replay questions with a closed loop of clients.
+
+        Parameters:
+        questions (List[Tuple[str, str]]): The (task id, question) pairs.
+
+        Returns:
+        Iterator[_Call]: The calls, in completion order per client.
+        """
+        items = iter(questions)
+        lock = threading.Lock()
+
+        def client() -> List[_Call]:
+            calls = []
+            while True:
+                with lock:
+                    item = next(items, None)
+                if item is None:
+                    return calls
+                calls.append(self._call(item[0], item[1], time.perf_counter()))
+
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            futures = [executor.submit(client) for _ in range(self.concurrency)]
+            for future in futures:
+                yield from future.result()
+
+    def _run_open(self, questions: List[Tuple[str, str]]) -> Iterator[_Call]:
+        """
+        Replay questions at a fixed rate.
+
+        Parameters:
+        questions (List[Tuple[str, str]]): The (task id, question) pairs.
+
+        Returns:
+        Iterator[_Call]: The calls, in schedule order.
+        """
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            start = time.perf_counter()
+            futures = []
+            for index, (task_id, question) in enumerate(questions):
+                intended_start = start + index / self.qps
+                delay = intended_start - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                futures.append(executor.submit(self._call, task_id, question, intended_start))
+            for future in futures:
+                yield future.result()
+
+    def run(self, baseline_dataset_dict: Dict[str, Any]) -> LoadTestResult:
+        """
+        Replay every question of a dataset against the retriever.
+
+        Parameters:
+        baseline_dataset_dict (Dict[str, Any]): The baseline dataset dictionary.
+
+        Returns:
+        LoadTestResult: The retrieved contexts and the latencies.
+        """
+        questions = [(task_id, task_dict["QUESTION"]) for task_id, task_dict in baseline_dataset_dict["TASKS"].items()]
+        replay = self._run_closed if self.qps is None else self._run_open
+        if self.warmup:
+            for _ in replay([questions[index % len(questions)] for index in range(self.warmup)] if questions else []):
+                pass
+
+        latency = LatencyHistogram()
+        service_time = LatencyHistogram()
+        tasks = {}
+        errors = {}
+        first_start = last_end = None
+        for task_id, question, intended_start, start, end, contexts, error in replay(questions):
+            latency.record(end - intended_start)
+            service_time.record(end - start)
+            first_start = intended_start if first_start is None else min(first_start, intended_start)
+            last_end = end if last_end is None else max(last_end, end)
+            tasks[task_id] = {
+                "QUESTION": question,
+                "ANSWER": "",
+                "CONTEXTS": contexts,
+                "LATENCY_MS": (end - intended_start) * 1000,
+            }
+            if error is not None:
+                tasks[task_id]["ERROR"] = errors[task_id] = error
+
+        sample_dataset_dict = {
+            "NAME": f"{baseline_dataset_dict['NAME']}-{type(self.retriever).__name__}",
+            "DOCUMENTS": list(baseline_dataset_dict["DOCUMENTS"]),
+            "TASKS": {task_id: tasks[task_id] for task_id, _ in questions},
+        }
+        duration = last_end - first_start if questions else 0.0
+        return LoadTestResult(baseline_dataset_dict, sample_dataset_dict, latency, service_time, duration, errors)
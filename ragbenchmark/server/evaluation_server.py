@@ -0,0 +1,536 @@
+import os
+import json
+import time
+import threading
+from collections import OrderedDict
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from ..datasets.dataset_validator import DatasetValidator
+from ..evaluator.dataset_evaluator.dataset_evaluator import DatasetEvaluator, METRIC_CLASSES, METRICS, evaluate_task_pair, iter_task_texts
+from ..evaluator.dataset_evaluator.task_result_cache import TaskResultCache, task_hash
+from ..preprocessing.text_normalizer import TextNormalizer
+from ..profiling.profiler import count, stage
+
+TaskPair = Tuple[str, Dict[str, Any], Dict[str, Any]]
+
+MAX_BODY_SIZE = 64 * 1024 * 1024
+
+
+class EvaluationRequestError(ValueError):
+    """
+    Raised when a request cannot be evaluated, with the HTTP status to answer.
+
+    Attributes:
+    status (int): The HTTP status code.
+    """
+
+    def __init__(self, message: str, status: int = HTTPStatus.BAD_REQUEST) -> None:
+        """
+        Initialize the EvaluationRequestError.
+
+        Parameters:
+        message (str): The error message sent to the client.
+        status (int): The HTTP status code.
+        """
+        super().__init__(message)
+        self.status = int(status)
+
+
+def _evaluate_chunk(
+    task_pairs: List[TaskPair],
+    metrics: Sequence[str],
+    validated: bool,
+    normalizer: Optional[TextNormalizer]
+) -> List[Dict[str, Any]]:
+    """
+    Evaluate a chunk of tasks in a worker process.
+
+    Parameters:
+    task_pairs (List[TaskPair]): The raw task pairs.
+    metrics (Sequence[str]): The metrics to compute.
+    validated (bool): Whether the tasks were checked by DatasetValidator.
+    normalizer (Optional[TextNormalizer]): Normalizes texts, shipped with the normalized forms of the chunk.
+
+    Returns:
+    List[Dict[str, Any]]: One row per task.
+    """
+    return [evaluate_task_pair(task_pair, metrics, validated, normalizer) for task_pair in task_pairs]
+
+
+def _warm_up(_: int) -> int:
+    """
+    Evaluate a tiny task, so that a worker process has imported and initialized everything before the first request.
+
+    Returns:
+    int: The id of the worker process.
+    """
+    context_dict = {"TEXT": "warm up", "FILE_PATH": "warm_up.pdf", "PAGE_NUMBER": [1], "SCORE": 1.0}
+    task_dict = {"QUESTION": "?", "ANSWER": "", "CONTEXTS": [context_dict]}
+    evaluate_task_pair(("warm_up", task_dict, task_dict), METRICS, True)
+    return os.getpid()
+
+
+class EvaluationService:
+    """
+    Evaluates sample tasks posted by clients against baselines loaded once.
+
+    Baselines are validated and indexed by dataset name and task id at start-up, so a request only
+    pays for its own tasks. Metric values are memoized by task content hash (see `task_hash`) in an
+    in-memory LRU shared by all requests, optionally backed by a persistent TaskResultCache. Batches
+    with many uncached tasks are split into chunks evaluated by a pool of worker processes started
+    and warmed up with the service, while single tasks and small batches are evaluated in the
+    calling thread, which is faster than a round trip to a worker.
+
+    Attributes:
+    metrics (List[str]): The metrics computed for every task.
+    workers (int): Number of worker processes, 1 evaluates in the calling thread.
+    chunk_size (int): Number of tasks sent to a worker at once.
+    pool_threshold (int): Minimal number of uncached tasks of a batch evaluated by the pool.
+    validate (bool): Whether the posted tasks are validated before evaluation.
+    normalizer (Optional[TextNormalizer]): Normalizes texts before the metrics compare them.
+    cache (Optional[TaskResultCache]): Persistent memo of per-task metric values.
+    memo_size (int): Maximal number of tasks in the in-memory memo.
+    num_requests (int): Number of requests served.
+    num_tasks (int): Number of tasks evaluated or found in a cache.
+    memo_hits (int): Number of tasks found in the in-memory memo.
+    _baselines (Dict[str, Dict[str, Dict[str, Any]]]): The baseline tasks by dataset name and task id.
+    _memo (OrderedDict): The in-memory memo, from task hash to metric values, least recently used first.
+    _lock (threading.Lock): Guards the memo and the counters, requests are served by several threads.
+    _executor (Optional[ProcessPoolExecutor]): The worker pool.
+    """
+
+    def __init__(
+        self,
+        baselines: Dict[str, Dict[str, Any]],
+        metrics: Optional[Sequence[str]] = None,
+        workers: int = 1,
+        chunk_size: int = 64,
+        pool_threshold: Optional[int] = None,
+        validate: bool = True,
+        normalizer: Optional[TextNormalizer] = None,
+        cache: Optional[TaskResultCache] = None,
+        memo_size: int = 100_000
+    ) -> None:
+        """
+        Initialize the EvaluationService.
+
+        Parameters:
+        baselines (Dict[str, Dict[str, Any]]): The baseline datasets by name.
+        metrics (Optional[Sequence[str]]): The metrics to compute, all by default.
+        workers (int): Number of worker processes, 1 evaluates in the calling thread.
+        chunk_size (int): Number of tasks sent to a worker at once.
+        pool_threshold (Optional[int]): Minimal number of uncached tasks of a batch evaluated by the pool,
+                                        defaults to twice the chunk size.
+        validate (bool): Whether to validate the baselines and the posted tasks.
+        normalizer (Optional[TextNormalizer]): Normalizes texts before the metrics compare them.
+        cache (Optional[TaskResultCache]): Persistent memo of per-task metric values.
+        memo_size (int): Maximal number of tasks in the in-memory memo.
+
+        Raises:
+        ValueError: If an unknown metric is requested or no baseline is given.
+        DatasetValidationError: If validation is enabled and a baseline is malformed.
+        """
+        metrics = list(metrics) if metrics else list(METRICS)
+        unknown_metrics = [metric for metric in metrics if metric not in METRICS]
+        if unknown_metrics:
+            raise ValueError(f"Invalid metrics {unknown_metrics}! Supported metrics: {', '.join(METRICS)}.")
+        if not baselines:
+            raise ValueError("The evaluation service needs at least one baseline!")
+        if validate:
+            for baseline_dataset_dict in baselines.values():
+                DatasetValidator(rag=False).validate(baseline_dataset_dict)
+        self.metrics: List[str] = metrics
+        self.workers = max(1, workers)
+        self.chunk_size = max(1, chunk_size)
+        self.pool_threshold = pool_threshold if pool_threshold is not None else 2 * self.chunk_size
+        self.validate = validate
+        self.normalizer = normalizer
+        self.cache = cache
+        self.memo_size = memo_size
+        self.num_requests = 0
+        self.num_tasks = 0
+        self.memo_hits = 0
+        self._baselines: Dict[str, Dict[str, Dict[str, Any]]] = {
+            name: {str(task_id): task_dict for task_id, task_dict in baseline_dataset_dict["TASKS"].items()}
+            for name, baseline_dataset_dict in baselines.items()
+        }
+        self._normalization = normalizer.signature if normalizer is not None else "raw"
+        self._metric_versions: Dict[str, int] = {metric: METRIC_CLASSES[metric].VERSION for metric in metrics}
+        self._sample_validator = DatasetValidator(rag=True)
+        self._memo: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._executor = None
+        self._started = time.time()
+
+    def start(self) -> "EvaluationService":
+        """
+        Start and warm up the worker pool, if any.
+
+        Returns:
+        EvaluationService: The service itself.
+        """
+        if self.workers > 1 and self._executor is None:
+            from concurrent.futures import ProcessPoolExecutor
+
+            self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            list(self._executor.map(_warm_up, range(self.workers)))
+        return self
+
+    def close(self) -> None:
+        """
+        Stop the worker pool.
+        """
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def __enter__(self) -> "EvaluationService":
+        return self.start()
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    def status(self) -> Dict[str, Any]:
+        """
+        Describe the loaded baselines and the counters of the service.
+
+        Returns:
+        Dict[str, Any]: The datasets with their number of tasks, the metrics, workers and cache counters.
+        """
+        status = {
+            "status": "ok",
+            "uptime": time.time() - self._started,
+            "datasets": {name: len(tasks) for name, tasks in self._baselines.items()},
+            "metrics": self.metrics,
+            "workers": self.workers,
+            "num_requests": self.num_requests,
+            "num_tasks": self.num_tasks,
+            "memo": {"size": len(self._memo), "hits": self.memo_hits},
+        }
+        if self.cache is not None:
+            status["cache"] = {"path": self.cache.path, "hits": self.cache.hits, "misses": self.cache.misses}
+        return status
+
+    def evaluate(self, payload: Any) -> Dict[str, Any]:
+        """
+        Evaluate one sample task.
+
+        Parameters:
+        payload (Any): A sample task dictionary with its TASK_ID, and the DATASET name when several
+                       baselines are loaded. QUESTION defaults to the baseline question and ANSWER to "".
+
+        Returns:
+        Dict[str, Any]: The dataset name, the task id and one value per metric.
+
+        Raises:
+        EvaluationRequestError: If the payload is malformed or does not match a baseline task.
+        """
+        if not isinstance(payload, dict):
+            raise EvaluationRequestError("The payload must be a JSON object with a TASK_ID!")
+        name, baseline_tasks = self._dataset(payload.get("DATASET"))
+        task_pair = self._task_pair(baseline_tasks, payload.get("TASK_ID"), payload)
+        self._validate([task_pair])
+        row = self._evaluate_task_pairs([task_pair])[0]
+        return {"dataset": name, **row}
+
+    def evaluate_batch(self, payload: Any) -> Dict[str, Any]:
+        """
+        Evaluate a batch of sample tasks.
+
+        Parameters:
+        payload (Any): A sample dataset dictionary whose TASKS map task ids to sample task dictionaries, or
+                       a list of sample task dictionaries with their TASK_ID, with the DATASET name when
+                       several baselines are loaded. A bare list of tasks is also accepted.
+
+        Returns:
+        Dict[str, Any]: The dataset name, the number of tasks, the mean of every metric and one row per task,
+                        in the order of the payload.
+
+        Raises:
+        EvaluationRequestError: If the payload is malformed or any task does not match a baseline task.
+        """
+        if isinstance(payload, list):
+            payload = {"TASKS": payload}
+        if not isinstance(payload, dict) or not isinstance(payload.get("TASKS"), (dict, list)):
+            raise EvaluationRequestError("The payload must be a JSON object with TASKS, or a list of tasks!")
+        name, baseline_tasks = self._dataset(payload.get("DATASET"))
+        tasks = payload["TASKS"]
+        if isinstance(tasks, dict):
+            task_items = list(tasks.items())
+        else:
+            task_items = [(task_dict.get("TASK_ID") if isinstance(task_dict, dict) else None, task_dict) for task_dict in tasks]
+        task_pairs = [self._task_pair(baseline_tasks, task_id, task_dict) for task_id, task_dict in task_items]
+        self._validate(task_pairs)
+        rows = self._evaluate_task_pairs(task_pairs)
+        return {
+            "dataset": name,
+            "num_tasks": len(rows),
+            "metrics": DatasetEvaluator.aggregate(rows, self.metrics),
+            "tasks": rows,
+        }
+
+    def _dataset(self, name: Optional[str]) -> Tuple[str, Dict[str, Dict[str, Any]]]:
+        """
+        Select the baseline of a request.
+
+        Parameters:
+        name (Optional[str]): The requested dataset name, optional with a single baseline.
+
+        Returns:
+        Tuple[str, Dict[str, Dict[str, Any]]]: The dataset name and its tasks by id.
+
+        Raises:
+        EvaluationRequestError: If the dataset is unknown, or missing with several baselines.
+        """
+        if name is None:
+            if len(self._baselines) == 1:
+                return next(iter(self._baselines.items()))
+            raise EvaluationRequestError(f"Several baselines are loaded, set DATASET to one of: {', '.join(self._baselines)}.")
+        baseline_tasks = self._baselines.get(name)
+        if baseline_tasks is None:
+            raise EvaluationRequestError(f"Unknown dataset {name!r}! Loaded datasets: {', '.join(self._baselines)}.", HTTPStatus.NOT_FOUND)
+        return name, baseline_tasks
+
+    @staticmethod
+    def _task_pair(baseline_tasks: Dict[str, Dict[str, Any]], task_id: Any, task_dict: Any) -> TaskPair:
+        """
+        Pair a posted task with its baseline task.
+
+        Parameters:
+        baseline_tasks (Dict[str, Dict[str, Any]]): The baseline tasks by id.
+        task_id (Any): The id of the task.
+        task_dict (Any): The posted sample task dictionary.
+
+        Returns:
+        TaskPair: The task id, the baseline task dictionary and the sample task dictionary.
+
+        Raises:
+        EvaluationRequestError: If the task is not an object, is unknown, or asks another question.
+        """
+        if not isinstance(task_dict, dict):
+            raise EvaluationRequestError(f"Task {task_id!r} must be a JSON object!")
+        if task_id is None:
+            raise EvaluationRequestError("Every task needs a TASK_ID!")
+        task_id = str(task_id)
+        baseline_task_dict = baseline_tasks.get(task_id)
+        if baseline_task_dict is None:
+            raise EvaluationRequestError(f"Unknown task {task_id!r}!", HTTPStatus.NOT_FOUND)
+        question = task_dict.get("QUESTION", baseline_task_dict["QUESTION"])
+        if question != baseline_task_dict["QUESTION"]:
+            raise EvaluationRequestError(f"Task {task_id!r}: Questions of baseline and sample do not belong to one task!")
+        sample_task_dict = {**task_dict, "QUESTION": question, "ANSWER": task_dict.get("ANSWER", "")}
+        return task_id, baseline_task_dict, sample_task_dict
+
+    def _validate(self, task_pairs: List[TaskPair]) -> None:
+        """
+        Validate the posted tasks, listing every error.
+
+        Parameters:
+        task_pairs (List[TaskPair]): The task pairs.
+
+        Raises:
+        EvaluationRequestError: If any task is malformed.
+        """
+        if not self.validate:
+            return
+        errors = list(self._sample_validator.iter_task_errors((task_id, sample) for task_id, _, sample in task_pairs))
+        if errors:
+            shown = [f"task {task_id}: {message}" for task_id, message in errors[:10]]
+            raise EvaluationRequestError(f"Invalid tasks! {len(errors)} error(s): " + "; ".join(shown))
+
+    def _evaluate_task_pairs(self, task_pairs: List[TaskPair]) -> List[Dict[str, Any]]:
+        """
+        Evaluate task pairs, reading and filling the in-memory memo and the persistent cache.
+
+        Parameters:
+        task_pairs (List[TaskPair]): The validated task pairs.
+
+        Returns:
+        List[Dict[str, Any]]: One row per task, in order.
+        """
+        hashes = [task_hash(baseline, sample, self._normalization) for _, baseline, sample in task_pairs]
+        values: Dict[str, Dict[str, Any]] = {}
+        with self._lock:
+            self.num_requests += 1
+            self.num_tasks += len(task_pairs)
+            for hash_ in hashes:
+                memoized = self._memo.get(hash_)
+                if memoized is not None:
+                    self._memo.move_to_end(hash_)
+                    values[hash_] = memoized
+                    self.memo_hits += 1
+        count("server_memo_hits", len(values))
+
+        missing = {hash_: task_pair for hash_, task_pair in zip(hashes, task_pairs) if hash_ not in values}
+        if missing and self.cache is not None:
+            for hash_, cached in self.cache.get_many(list(missing), self._metric_versions).items():
+                if all(metric in cached for metric in self.metrics):
+                    values[hash_] = cached
+                    del missing[hash_]
+        if missing:
+            with stage("server.evaluate"):
+                rows = self._compute(list(missing.values()))
+            computed = {hash_: {metric: row[metric] for metric in self.metrics} for hash_, row in zip(missing, rows)}
+            values.update(computed)
+            if self.cache is not None:
+                self.cache.put_many(
+                    (hash_, metric, self._metric_versions[metric], value)
+                    for hash_, metric_values in computed.items() for metric, value in metric_values.items()
+                )
+        with self._lock:
+            for hash_ in missing:
+                self._memo[hash_] = values[hash_]
+            while len(self._memo) > self.memo_size:
+                self._memo.popitem(last=False)
+        return [{"task_id": task_pair[0], **values[hash_]} for task_pair, hash_ in zip(task_pairs, hashes)]
+
+    def _compute(self, task_pairs: List[TaskPair]) -> List[Dict[str, Any]]:
+        """
+        Compute the metrics of task pairs, in the worker pool for large batches.
+
+        Parameters:
+        task_pairs (List[TaskPair]): The task pairs missing from the caches.
+
+        Returns:
+        List[Dict[str, Any]]: One row per task, in order.
+        """
+        if self._executor is None or len(task_pairs) < self.pool_threshold:
+            return [evaluate_task_pair(task_pair, self.metrics, self.validate, self.normalizer) for task_pair in task_pairs]
+        futures = []
+        for start in range(0, len(task_pairs), self.chunk_size):
+            chunk = task_pairs[start:start + self.chunk_size]
+            normalizer = None
+            if self.normalizer is not None:
+                normalizer = self.normalizer.subset(text for task_pair in chunk for text in iter_task_texts(task_pair))
+            futures.append(self._executor.submit(_evaluate_chunk, chunk, self.metrics, self.validate, normalizer))
+        return [row for future in futures for row in future.result()]
+
+
+class EvaluationRequestHandler(BaseHTTPRequestHandler):
+    """
+    Serves the routes of an EvaluationServer:
+    - GET /health: the status of the service.
+    - POST /evaluate: one sample task, see `EvaluationService.evaluate`.
+    - POST /evaluate/batch: a batch of sample tasks, see `EvaluationService.evaluate_batch`.
+    """
+
+    server_version = "ragbench"
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self) -> None:
+        """
+        Serve a GET request.
+        """
+        if self.path.split("?", 1)[0] == "/health":
+            self._send_json(HTTPStatus.OK, self.server.service.status())
+        else:
+            self._send_error(HTTPStatus.NOT_FOUND, f"Unknown route {self.path}!")
+
+    def do_POST(self) -> None:
+        """
+        Serve a POST request.
+        """
+        routes = {"/evaluate": self.server.service.evaluate, "/evaluate/batch": self.server.service.evaluate_batch}
+        route = routes.get(self.path.split("?", 1)[0].rstrip("/"))
+        length_header = self.headers.get("Content-Length")
+        length = int(length_header) if length_header is not None and length_header.strip().isdigit() else -1
+        if route is None or length < 0 or length > MAX_BODY_SIZE:
+            # the body is not read, so the connection cannot be reused
+            self.close_connection = True
+            if route is None:
+                self._send_error(HTTPStatus.NOT_FOUND, f"Unknown route {self.path}!")
+            elif length_header is None:
+                self._send_error(HTTPStatus.LENGTH_REQUIRED, "The Content-Length header is required!")
+            elif length < 0:
+                self._send_error(HTTPStatus.BAD_REQUEST, f"Invalid Content-Length {length_header!r}!")
+            else:
+                self._send_error(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, f"The body exceeds {MAX_BODY_SIZE} bytes!")
+            return
+        try:
+            payload = json.loads(self.rfile.read(length) or b"null")
+        except ValueError as e:
+            self._send_error(HTTPStatus.BAD_REQUEST, f"Invalid JSON: {e}")
+            return
+        try:
+            self._send_json(HTTPStatus.OK, route(payload))
+        except EvaluationRequestError as e:
+            self._send_error(e.status, str(e))
+        except Exception as e:
+            # e.g. a malformed context of an unvalidated task, the client still gets an answer
+            self.log_error("Evaluation failed: %r", e)
+            self._send_error(HTTPStatus.INTERNAL_SERVER_ERROR, f"Evaluation failed: {type(e).__name__}: {e}")
+
+    def _send_error(self, status: int, message: str) -> None:
+        """
+        Send a JSON error.
+
+        Parameters:
+        status (int): The HTTP status code.
+        message (str): The error message.
+        """
+        self._send_json(status, {"error": message})
+
+    def _send_json(self, status: int, body: Any) -> None:
+        """
+        Send a JSON response.
+
+        Parameters:
+        status (int): The HTTP status code.
+        body (Any): The JSON-serializable body.
+        """
+        data = json.dumps(body, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format: str, *args: Any) -> None:
+        """
+        Log a request, only when the server is verbose.
+        """
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+
+class EvaluationServer(ThreadingHTTPServer):
+    """
+    A threaded HTTP server exposing an EvaluationService.
+
+    Attributes:
+    service (EvaluationService): The service evaluating the requests.
+    verbose (bool): Whether every request is logged to stderr.
+
+    Example:
+    >>> with EvaluationService({"transformer": baseline_dataset_dict}, workers=4) as service:
+    ...     EvaluationServer(service, port=8000).serve_forever()
+    """
+
+    daemon_threads = True
+
+    def __init__(self, service: EvaluationService, host: str = "127.0.0.1", port: int = 8000, verbose: bool = False) -> None:
+        """
+        Initialize the EvaluationServer and bind its socket.
+
+        Parameters:
+        service (EvaluationService): The service evaluating the requests.
+        host (str): The address to listen on.
+        port (int): The port to listen on, 0 picks a free port.
+        verbose (bool): Whether every request is logged to stderr.
+        """
+        self.service = service
+        self.verbose = verbose
+        super().__init__((host, port), EvaluationRequestHandler)
+
+    @property
+    def url(self) -> str:
+        """
+        Get the base URL of the server.
+
+        Returns:
+        str: The URL, e.g. http://127.0.0.1:8000.
+        """
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
@@ -1,11 +1,7 @@
-import os
-import sys
 from typing import List
 from abc import ABC
 
-sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-
-from context.base_context import BaseContext
+from ..context.base_context import BaseContext
 
 class BaseTask(ABC):
     """
@@ -1,11 +1,8 @@
-import os
-import sys
 from typing import Dict, Any, Union, List
 
-sys.path.append(os.path.dirname(os.path.abspath(__file__)))
-
-from base_task import BaseTask
-from context.custom_context import CustomContext, CustomRagContext
+from .base_task import BaseTask
+from ..context.custom_context import CustomContext, CustomRagContext
+from ..profiling.profiler import profile_stage
 
 class CustomTask(BaseTask):
     """
@@ -22,6 +19,7 @@ class CustomTask(BaseTask):
     - task_id: Property to get the unique identifier for the custom task.
     """
 
+    @profile_stage("construct.task", counter="tasks")
     def __init__(self, task_id: str, baseline_task_dict: Dict[str, Any], sample_task_dict: Dict[str, Any]) -> None:
         """
         Initialize the CustomTask with a unique identifier and task dictionaries.
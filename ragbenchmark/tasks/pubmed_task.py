@@ -1,5 +1,113 @@
+from typing import Any, Dict, List, Optional
+
 from .base_task import BaseTask
+from ..context.pubmed_context import PubMedContext
 
 class PubMedTask(BaseTask):
-    def __init__(self) -> None:
-        super().__init__()
\ No newline at end of file
+    """
+    Task class for a PubMedQA question, answered by yes, no or maybe from the sections of an abstract.
+
+    The baseline answer is the labelled final decision, and the baseline contexts are the labelled
+    sections of the abstract. The sample answer is a predicted decision and the sample contexts are
+    the retrieved texts, if any.
+
+    Attributes:
+    _task_id (str): The PubMed id of the question.
+    _long_answer (str): The conclusion of the abstract, which justifies the decision.
+    _year (str): The publication year.
+    _meshes (List[str]): The MeSH terms of the abstract.
+    _reasoning_required (str): The decision of the reasoning-required setting of the original annotation.
+    """
+
+    def __init__(self, task_id: str, task_dict: Dict[str, Any], sample_task_dict: Optional[Dict[str, Any]] = None) -> None:
+        """
+        Initialize the PubMedTask from an entry of ori_pqal.json.
+
+        Parameters:
+        task_id (str): The PubMed id of the question.
+        task_dict (Dict[str, Any]): The PubMedQA entry with the QUESTION, CONTEXTS, LABELS and final_decision.
+        sample_task_dict (Optional[Dict[str, Any]]): The predicted ANSWER and the retrieved CONTEXTS, as in
+                                                     sample datasets, None if there is no prediction.
+        """
+        super().__init__()
+        self._task_id = task_id
+        self._question = task_dict["QUESTION"]
+        self._baseline_answer = task_dict["final_decision"]
+        self._baseline_contexts = self._extract_baseline_contexts(task_id, task_dict)
+        self._long_answer: str = task_dict.get("LONG_ANSWER", "")
+        self._year: str = task_dict.get("YEAR", "")
+        self._meshes: List[str] = task_dict.get("MESHES", [])
+        self._reasoning_required: str = task_dict.get("reasoning_required_pred", "")
+        if sample_task_dict is not None:
+            self._sample_answer = sample_task_dict.get("ANSWER", "")
+            self._sample_contexts = [
+                PubMedContext({"TEXT": context_dict["TEXT"]}) for context_dict in sample_task_dict.get("CONTEXTS", [])
+            ]
+
+    @staticmethod
+    def _extract_baseline_contexts(task_id: str, task_dict: Dict[str, Any]) -> List[PubMedContext]:
+        """
+        Extract the labelled sections of the abstract.
+
+        Parameters:
+        task_id (str): The PubMed id of the question.
+        task_dict (Dict[str, Any]): The PubMedQA entry.
+
+        Returns:
+        List[PubMedContext]: One context per section.
+        """
+        labels = task_dict.get("LABELS", [])
+        return [
+            PubMedContext({"TEXT": text, "LABEL": labels[index] if index < len(labels) else "", "PMID": task_id, "SECTION": index + 1})
+            for index, text in enumerate(task_dict["CONTEXTS"])
+        ]
+
+    @property
+    def task_id(self) -> str:
+        """
+        Get the PubMed id of the question.
+
+        Returns:
+        str: The PubMed id.
+        """
+        return self._task_id
+
+    @property
+    def long_answer(self) -> str:
+        """
+        Get the conclusion of the abstract.
+
+        Returns:
+        str: The long answer.
+        """
+        return self._long_answer
+
+    @property
+    def year(self) -> str:
+        """
+        Get the publication year.
+
+        Returns:
+        str: The year.
+        """
+        return self._year
+
+    @property
+    def meshes(self) -> List[str]:
+        """
+        Get the MeSH terms of the abstract.
+
+        Returns:
+        List[str]: The MeSH terms.
+        """
+        return self._meshes
+
+    @property
+    def reasoning_required(self) -> str:
+        """
+        Get the decision of the reasoning-required setting of the original annotation.
+
+        Returns:
+        str: yes, no or maybe.
+        """
+        return self._reasoning_required
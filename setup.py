@@ -18,13 +18,20 @@ setup(
         "pillow",
         "py",
         "pytest",
+        "pypdf",
         "pytz",
         "PyYAML",
         "requests",
         "schema",
+        "scipy",
         "six",
         "tokenizers",
     ],
+    entry_points={
+        "console_scripts": [
+            "ragbench=ragbenchmark.cli:main",
+        ],
+    },
     author="BITCynthia",
     author_email="cynthia74326@outlook.com",
     description="A benchmark to evaluate performance of RAG (Retrieval-Augmented Generation)",
@@ -0,0 +1,60 @@
+"""
+Paths of the bundled test data, and loaders of the bundled datasets shared by the tests.
+"""
+import os
+import sys
+import copy
+import json
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple, Union
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATA_DIR = os.path.join(ROOT_DIR, "data", "customized_dataset")
+BASELINE_PATH = os.path.join(DATA_DIR, "baseline.json")
+SAMPLES_PATH = os.path.join(DATA_DIR, "samples.json")
+
+if ROOT_DIR not in sys.path:
+    sys.path.append(ROOT_DIR)
+
+
+def load_json(file_path: str) -> Any:
+    """Load a JSON file."""
+    with open(file_path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def load_datasets(
+    copies: Union[None, int, Iterable[Any]] = None,
+    distinct_questions: bool = False,
+    transform: Optional[Callable[[Any, Dict[str, Any], Dict[str, Any]], None]] = None
+) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """
+    Load the bundled baseline and sample datasets, optionally replicated into larger ones.
+
+    Parameters:
+    copies (Union[None, int, Iterable[Any]]): None to keep the tasks as they are, or the number of copies,
+                                              or their suffixes. Copy `c` of task `t` gets the id `t-c`,
+                                              and tasks are ordered copy by copy.
+    distinct_questions (bool): Whether to append the copy to the questions, so that copies differ in content.
+    transform (Optional[Callable]): Called with the copy, the baseline task and the sample task of every
+                                    copied task, to modify them in place.
+
+    Returns:
+    Tuple[Dict[str, Any], Dict[str, Any]]: The baseline and sample datasets, which the caller can modify freely.
+    """
+    baseline, samples = load_json(BASELINE_PATH), load_json(SAMPLES_PATH)
+    if copies is None:
+        return baseline, samples
+    suffixes = range(copies) if isinstance(copies, int) else list(copies)
+    baseline_tasks, sample_tasks = {}, {}
+    for suffix in suffixes:
+        for task_id in baseline["TASKS"]:
+            new_id = f"{task_id}-{suffix}"
+            baseline_task = copy.deepcopy(baseline["TASKS"][task_id])
+            sample_task = copy.deepcopy(samples["TASKS"][task_id])
+            if distinct_questions:
+                for task_dict in (baseline_task, sample_task):
+                    task_dict["QUESTION"] = f"{task_dict['QUESTION']} ({suffix})"
+            if transform is not None:
+                transform(suffix, baseline_task, sample_task)
+            baseline_tasks[new_id], sample_tasks[new_id] = baseline_task, sample_task
+    return {**baseline, "TASKS": baseline_tasks}, {**samples, "TASKS": sample_tasks}
@@ -0,0 +1,151 @@
+import os
+import sys
+import json
+import shutil
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from io import StringIO
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ragbenchmark.analysis.alignment import AlignmentBuilder, assign, char_hit_matrix, page_overlap_matrix
+from ragbenchmark.cli import main
+from ragbenchmark.embeddings.embedding_base import EmbeddingBase
+from ragbenchmark.evaluator.task_evaluator.task_evaluator import TaskEvaluator
+from ragbenchmark.metrics.metrics_by_page_number.calc_precision_by_page_number import PrecisionByPageNumber
+from ragbenchmark.metrics.metrics_by_page_number.calc_recall_by_page_number import RecallByPageNumber
+from ragbenchmark.tasks.custom_task import CustomTask
+from helpers import BASELINE_PATH, SAMPLES_PATH, load_datasets
+
+
+class LengthEmbedding(EmbeddingBase):
+    def embed(self, texts):
+        return np.array([[len(text), text.count(" ") + 1.0] for text in texts])
+
+
+class TestAlignmentMatrices(unittest.TestCase):
+    def setUp(self):
+        self.baseline, self.samples = load_datasets()
+
+    def test_matrices_reduce_to_task_metrics(self):
+        alignments = AlignmentBuilder(metrics=[
+            "recall_by_char", "precision_by_char", "recall_by_page_number", "precision_by_page_number"
+        ]).align_dataset(self.baseline, self.samples)
+        self.assertEqual([alignment.task_id for alignment in alignments], list(self.baseline["TASKS"]))
+        for alignment in alignments:
+            baseline_task = self.baseline["TASKS"][alignment.task_id]
+            sample_task = self.samples["TASKS"][alignment.task_id]
+            evaluator = TaskEvaluator(CustomTask(alignment.task_id, baseline_task, sample_task), None)
+            matrices = alignment.matrices
+            self.assertEqual(alignment.shape, (len(baseline_task["CONTEXTS"]), len(sample_task["CONTEXTS"])))
+            self.assertEqual(matrices["recall_by_char"].dtype, np.float32)
+            # TaskEvaluator keeps the mean of the char matrices and the page metrics the mean of the best matches
+            self.assertAlmostEqual(float(matrices["recall_by_char"].mean()), evaluator.get_recall_by_char(), places=5)
+            self.assertAlmostEqual(float(matrices["precision_by_char"].mean()), evaluator.get_precision_by_char(), places=5)
+            baseline_pages = [context["PAGE_NUMBER"] for context in baseline_task["CONTEXTS"]]
+            sample_pages = [context["PAGE_NUMBER"] for context in sample_task["CONTEXTS"]]
+            self.assertAlmostEqual(
+                float(matrices["recall_by_page_number"].max(axis=1).mean()),
+                RecallByPageNumber.calculate_recall_by_page_number(baseline_pages, sample_pages), places=5
+            )
+            self.assertAlmostEqual(
+                float(matrices["precision_by_page_number"].max(axis=0).mean()),
+                PrecisionByPageNumber.calculate_precision_by_page_number(baseline_pages, sample_pages), places=5
+            )
+
+    def test_hit_and_overlap_matrices(self):
+        hits, baseline_lengths, sample_lengths = char_hit_matrix(["aab", "c"], ["ab", "cc", ""])
+        np.testing.assert_array_equal(hits, [[2, 0, 0], [0, 1, 0]])
+        np.testing.assert_array_equal(baseline_lengths, [3, 1])
+        np.testing.assert_array_equal(sample_lengths, [2, 2, 0])
+        overlaps, baseline_sizes, sample_sizes = page_overlap_matrix([[1, 2], [5]], [[2, 3], [5, 1]])
+        np.testing.assert_array_equal(overlaps, [[1, 1], [0, 1]])
+        np.testing.assert_array_equal(baseline_sizes, [2, 1])
+        np.testing.assert_array_equal(sample_sizes, [2, 2])
+
+    def test_similarities(self):
+        builder = AlignmentBuilder(embedding=LengthEmbedding())
+        self.assertIn("similarity_by_embedding", builder.metrics)
+        alignment = builder.align_dataset(self.baseline, self.samples)[0]
+        for metric in ("similarity_by_tfidf", "similarity_by_embedding"):
+            matrix = alignment.matrices[metric]
+            self.assertEqual(matrix.shape, alignment.shape)
+            self.assertTrue(((matrix >= -1e-5) & (matrix <= 1 + 1e-5)).all())
+        self.assertNotIn("similarity_by_embedding", AlignmentBuilder().metrics)
+        with self.assertRaises(ValueError):
+            AlignmentBuilder(metrics=["similarity_by_embedding"])
+        with self.assertRaises(ValueError):
+            AlignmentBuilder(metrics=["recall_by_token"])
+
+    def test_missing_sample_task(self):
+        samples = {"NAME": "empty", "DOCUMENTS": [], "TASKS": {}}
+        alignments = AlignmentBuilder().align_dataset(self.baseline, samples, assignment_metric="recall_by_char")
+        for alignment in alignments:
+            self.assertEqual(alignment.shape[1], 0)
+            self.assertEqual(len(alignment.assignment[0]), 0)
+
+
+class TestAssignment(unittest.TestCase):
+    def test_hungarian_beats_greedy(self):
+        matrix = np.array([[0.9, 0.8], [0.7, 0.0]])
+        rows, columns = assign(matrix, "hungarian")
+        self.assertEqual(list(zip(rows.tolist(), columns.tolist())), [(0, 1), (1, 0)])
+        rows, columns = assign(matrix, "greedy")
+        self.assertEqual(list(zip(rows.tolist(), columns.tolist())), [(0, 0)])
+
+    def test_zero_pairs_are_not_matched(self):
+        matrix = np.array([[0.0, 0.0, 0.5], [0.2, 0.0, 0.6], [0.0, 0.0, 0.0]])
+        rows, columns = assign(matrix, "hungarian")
+        self.assertEqual(list(zip(rows.tolist(), columns.tolist())), [(0, 2), (1, 0)])
+        rows, columns = assign(matrix, "greedy")
+        self.assertEqual(list(zip(rows.tolist(), columns.tolist())), [(1, 2)])
+        self.assertEqual(len(assign(np.zeros((2, 0)))[0]), 0)
+        with self.assertRaises(ValueError):
+            assign(matrix, "auction")
+
+
+class TestAlignmentExport(unittest.TestCase):
+    def setUp(self):
+        self.output_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.output_dir)
+
+    def test_save_and_load(self):
+        baseline, samples = load_datasets()
+        samples["TASKS"].pop("2")
+        alignments = AlignmentBuilder().align_dataset(baseline, samples, assignment_metric="recall_by_char", assignment_method="greedy")
+        path = AlignmentBuilder.save(alignments, os.path.join(self.output_dir, "alignment.npz"))
+        loaded = AlignmentBuilder.load(path)
+        self.assertEqual([alignment.task_id for alignment in loaded], [alignment.task_id for alignment in alignments])
+        for original, restored in zip(alignments, loaded):
+            self.assertEqual(list(restored.matrices), list(original.matrices))
+            for metric, matrix in original.matrices.items():
+                np.testing.assert_array_equal(restored.matrices[metric], matrix)
+            np.testing.assert_array_equal(restored.assignment[0], original.assignment[0])
+            np.testing.assert_array_equal(restored.assignment[1], original.assignment[1])
+            np.testing.assert_array_equal(restored.matched_values("recall_by_char"), original.matched_values("recall_by_char"))
+
+    def test_cli(self):
+        stdout = StringIO()
+        with redirect_stdout(stdout):
+            code = main([
+                "align", "--baseline", BASELINE_PATH,
+                "--samples", SAMPLES_PATH,
+                "--metrics", "recall_by_char,recall_by_page_number", "--assign", "recall_by_page_number",
+                "--output", self.output_dir,
+            ])
+        self.assertEqual(code, 0)
+        summary = json.loads(stdout.getvalue())
+        result = summary["samples"][SAMPLES_PATH]
+        self.assertEqual(result["num_tasks"], 5)
+        loaded = AlignmentBuilder.load(result["output"])
+        self.assertEqual(sorted(loaded[0].matrices), ["recall_by_char", "recall_by_page_number"])
+        self.assertEqual(result["num_matches"], sum(len(alignment.assignment[0]) for alignment in loaded))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,213 @@
+import os
+import sys
+import json
+import tempfile
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ragbenchmark.chat_models.base_chat_model import ChatResponse
+from ragbenchmark.chat_models.gpt_chat_model import GPTChatModel
+from ragbenchmark.chat_models.stub_chat_model import StubChatModel
+from ragbenchmark.context.custom_context import CustomRagContext
+from ragbenchmark.generation.answer_generator import AnswerGenerator, ResponseCache, build_messages
+from ragbenchmark.datasets.dataset_validator import DatasetValidator
+from helpers import SAMPLES_PATH, load_json
+
+
+class MockOpenAIHandler(BaseHTTPRequestHandler):
+    """Answers /chat/completions with the length of the prompt, failing the first request with HTTP 429."""
+
+    requests = []
+    fail_next = False
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        type(self).requests.append((self.path, self.headers.get("Authorization"), body))
+        if type(self).fail_next:
+            type(self).fail_next = False
+            self.send_response(429)
+            self.send_header("Retry-After", "0")
+            self.end_headers()
+            return
+        content = f"{len(body['messages'][-1]['content'])} characters"
+        payload = json.dumps({
+            "model": body["model"],
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": content}}],
+            "usage": {"prompt_tokens": 100, "completion_tokens": 10},
+        }).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class TestBuildMessages(unittest.TestCase):
+
+    def test_top_k_by_score(self):
+        contexts = [
+            CustomRagContext({"TEXT": "low", "FILE_PATH": "a.pdf", "PAGE_NUMBER": [1], "SCORE": 0.1}),
+            CustomRagContext({"TEXT": "high\nscore", "FILE_PATH": "b.pdf", "PAGE_NUMBER": [2, 3], "SCORE": 0.9}),
+            CustomRagContext({"TEXT": "middle", "FILE_PATH": "c.pdf", "PAGE_NUMBER": [4], "SCORE": 0.5}),
+        ]
+        messages = build_messages("Why?", contexts, top_k=2)
+        self.assertEqual([message["role"] for message in messages], ["system", "user"])
+        prompt = messages[1]["content"]
+        self.assertIn("[1] high score (source: b.pdf, pages: 2, 3)", prompt)
+        self.assertIn("[2] middle", prompt)
+        self.assertNotIn("low", prompt)
+        self.assertTrue(prompt.endswith("Question: Why?"))
+
+
+class TestAnswerGenerator(unittest.TestCase):
+
+    def setUp(self):
+        self.samples = load_json(SAMPLES_PATH)
+        self.tmp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_generate_and_cache(self):
+        model = StubChatModel()
+        generator = AnswerGenerator(
+            model, top_k=2, batch_size=2, max_concurrency=2, cache_dir=self.tmp_dir.name,
+            prompt_price=1.0, completion_price=2.0
+        )
+        generated = generator.generate(self.samples)
+        num_tasks = len(self.samples["TASKS"])
+        self.assertEqual(model.calls, num_tasks)
+        for task_id, task_dict in generated["TASKS"].items():
+            self.assertTrue(task_dict["ANSWER"])
+            self.assertFalse(task_dict["GENERATION"]["CACHED"])
+            self.assertEqual(task_dict["CONTEXTS"], self.samples["TASKS"][task_id]["CONTEXTS"])
+        self.assertEqual(list(DatasetValidator(rag=True).iter_errors(generated)), [])
+        usage = generator.usage.summary()
+        self.assertEqual(usage["requests"], num_tasks)
+        self.assertAlmostEqual(usage["cost"], (usage["prompt_tokens"] + 2 * usage["completion_tokens"]) / 1e6)
+
+        rerun = AnswerGenerator(model, top_k=2, cache_dir=self.tmp_dir.name, prompt_price=1.0, completion_price=2.0)
+        regenerated = rerun.generate(self.samples)
+        self.assertEqual(model.calls, num_tasks)
+        self.assertEqual(rerun.usage.summary()["cache_hits"], num_tasks)
+        self.assertEqual(rerun.usage.cost, 0.0)
+        for task_id, task_dict in regenerated["TASKS"].items():
+            self.assertEqual(task_dict["ANSWER"], generated["TASKS"][task_id]["ANSWER"])
+            self.assertTrue(task_dict["GENERATION"]["CACHED"])
+
+        AnswerGenerator(model, top_k=2, cache_dir=self.tmp_dir.name, system_prompt="Be brief.").generate(self.samples)
+        self.assertEqual(model.calls, 2 * num_tasks)
+
+    def test_duplicate_prompts_sent_once(self):
+        task_dict = next(iter(self.samples["TASKS"].values()))
+        samples = dict(self.samples, TASKS={"a": task_dict, "b": dict(task_dict)})
+        model = StubChatModel()
+        generated = AnswerGenerator(model).generate(samples)
+        self.assertEqual(model.calls, 1)
+        self.assertEqual(generated["TASKS"]["a"]["ANSWER"], generated["TASKS"]["b"]["ANSWER"])
+
+    def test_failed_batch(self):
+        class FailingModel(StubChatModel):
+            def chat(self, messages, **params):
+                raise TimeoutError("stub timeout")
+
+        generator = AnswerGenerator(FailingModel(), cache_dir=self.tmp_dir.name)
+        generated = generator.generate(self.samples)
+        for task_dict in generated["TASKS"].values():
+            self.assertEqual(task_dict["ANSWER"], "")
+            self.assertEqual(task_dict["ERROR"], "TimeoutError: stub timeout")
+        self.assertEqual(generator.usage.errors, len(self.samples["TASKS"]))
+        self.assertEqual(os.listdir(self.tmp_dir.name), [])
+
+    def test_failed_conversation_keeps_batch(self):
+        first_question = next(iter(self.samples["TASKS"].values()))["QUESTION"]
+
+        class FlakyModel(StubChatModel):
+            def chat(self, messages, **params):
+                if first_question in messages[-1]["content"]:
+                    raise TimeoutError("stub timeout")
+                return super().chat(messages, **params)
+
+        generator = AnswerGenerator(FlakyModel(), batch_size=len(self.samples["TASKS"]), cache_dir=self.tmp_dir.name)
+        generated = generator.generate(self.samples)
+        errors = [task_id for task_id, task_dict in generated["TASKS"].items() if "ERROR" in task_dict]
+        self.assertEqual(errors, [next(iter(self.samples["TASKS"]))])
+        self.assertEqual(generator.usage.errors, 1)
+        self.assertEqual(generator.usage.requests, len(self.samples["TASKS"]) - 1)
+        rerun = AnswerGenerator(StubChatModel(), cache_dir=self.tmp_dir.name)
+        rerun.generate(self.samples)
+        self.assertEqual(rerun.usage.summary()["cache_hits"], len(self.samples["TASKS"]) - 1)
+
+    def test_missing_responses(self):
+        class ShortBatchModel(StubChatModel):
+            def chat_batch(self, batch, **params):
+                return super().chat_batch(batch[:-1], **params)
+
+        generator = AnswerGenerator(ShortBatchModel(), batch_size=len(self.samples["TASKS"]))
+        generated = generator.generate(self.samples)
+        last_task = generated["TASKS"][list(self.samples["TASKS"])[-1]]
+        self.assertEqual(last_task["ANSWER"], "")
+        self.assertTrue(last_task["ERROR"].startswith("Missing response"))
+        self.assertEqual(generator.usage.errors, 1)
+
+    def test_cache_key(self):
+        messages = [{"role": "user", "content": "hi"}]
+        key = ResponseCache.key("m", {"temperature": 0.0}, messages)
+        self.assertEqual(key, ResponseCache.key("m", {"temperature": 0.0}, [dict(messages[0])]))
+        self.assertNotEqual(key, ResponseCache.key("n", {"temperature": 0.0}, messages))
+        self.assertNotEqual(key, ResponseCache.key("m", {"temperature": 1.0}, messages))
+        cache = ResponseCache(self.tmp_dir.name)
+        self.assertIsNone(cache.get(key))
+        cache.put(key, ChatResponse("hello", 3, 1, "m"))
+        self.assertEqual(cache.get(key).to_dict(), {"text": "hello", "prompt_tokens": 3, "completion_tokens": 1, "model": "m"})
+
+
+class TestGPTChatModel(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), MockOpenAIHandler)
+        cls.thread = threading.Thread(target=cls.server.serve_forever, daemon=True)
+        cls.thread.start()
+        cls.base_url = f"http://127.0.0.1:{cls.server.server_address[1]}/v1"
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        MockOpenAIHandler.requests = []
+
+    def test_chat_with_retry(self):
+        MockOpenAIHandler.fail_next = True
+        model = GPTChatModel("mock-model", base_url=self.base_url, api_key="secret", max_tokens=16)
+        response = model.chat([{"role": "user", "content": "hello"}])
+        self.assertEqual(response.text, "5 characters")
+        self.assertEqual((response.prompt_tokens, response.completion_tokens), (100, 10))
+        self.assertEqual(len(MockOpenAIHandler.requests), 2)
+        path, authorization, body = MockOpenAIHandler.requests[-1]
+        self.assertEqual(path, "/v1/chat/completions")
+        self.assertEqual(authorization, "Bearer secret")
+        self.assertEqual((body["model"], body["temperature"], body["max_tokens"]), ("mock-model", 0.0, 16))
+
+    def test_generate(self):
+        samples = load_json(SAMPLES_PATH)
+        model = GPTChatModel("mock-model", base_url=self.base_url, api_key="secret")
+        generator = AnswerGenerator(model, batch_size=1, max_concurrency=4, prompt_price=0.5, completion_price=1.5)
+        generated = generator.generate(samples)
+        num_tasks = len(samples["TASKS"])
+        self.assertEqual(len(MockOpenAIHandler.requests), num_tasks)
+        self.assertTrue(all(task["ANSWER"].endswith("characters") for task in generated["TASKS"].values()))
+        self.assertEqual(generator.usage.summary()["prompt_tokens"], 100 * num_tasks)
+        self.assertAlmostEqual(generator.usage.cost, num_tasks * (100 * 0.5 + 10 * 1.5) / 1e6)
+
+
+if __name__ == "__main__":
+    unittest.main()
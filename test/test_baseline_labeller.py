@@ -0,0 +1,95 @@
+import os
+import sys
+import unittest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ragbenchmark.chunking.corpus import Document, load_squad_documents, squad_to_baseline_dict
+from ragbenchmark.datasets.dataset_validator import DatasetValidator
+from ragbenchmark.labelling.baseline_labeller import BaselineLabeller, load_questions
+from helpers import ROOT_DIR
+
+COVID_QA_PATH = os.path.join(ROOT_DIR, "data", "covid_qa", "200421_covidQA.json")
+
+
+class TestBaselineLabeller(unittest.TestCase):
+    def setUp(self):
+        self.documents = [
+            Document("a.txt", [
+                "Transformers replace recurrence with attention. The encoder maps an input sequence of symbols ",
+                "to a sequence of continuous representations. Training took three days on eight GPUs.",
+            ]),
+            Document("b.txt", ["Convolutional networks share weights across positions of the input image."]),
+        ]
+        self.labeller = BaselineLabeller(self.documents, threshold=80)
+
+    def test_label_answer(self):
+        """Test exact, paraphrased, page-spanning and unrelated answers"""
+        contexts = self.labeller.label_answer("Convolutional networks share weights across positions")
+        self.assertEqual(len(contexts), 1)
+        self.assertEqual(contexts[0]["FILE_PATH"], "b.txt")
+        self.assertEqual(contexts[0]["PAGE_NUMBER"], [1])
+        self.assertEqual(contexts[0]["TEXT"], "Convolutional networks share weights across positions")
+        self.assertEqual(contexts[0]["MATCH_SCORE"], 100)
+
+        spanning = self.labeller.label_answer("the encoder maps an input sequence of symbols to a sequence of continuous representations")
+        self.assertEqual(spanning[0]["FILE_PATH"], "a.txt")
+        self.assertEqual(spanning[0]["PAGE_NUMBER"], [1, 2])
+
+        paraphrased = self.labeller.label_answer("training took 3 days on eight GPUs")
+        self.assertEqual(paraphrased[0]["PAGE_NUMBER"], [2])
+        self.assertGreaterEqual(paraphrased[0]["MATCH_SCORE"], 80)
+
+        self.assertEqual(self.labeller.label_answer("three"), [{"TEXT": "three", "FILE_PATH": "a.txt", "PAGE_NUMBER": [2], "MATCH_SCORE": 100}])
+        self.assertEqual(self.labeller.label_answer("Gradient boosting builds decision trees sequentially"), [])
+        self.assertEqual(self.labeller.label_answer("..."), [])
+
+    def test_load_questions(self):
+        """Test that questions are read from a list or a dataset, and rejected without an answer"""
+        questions = load_questions([{"QUESTION": "Q?", "ANSWER": "A"}])
+        self.assertEqual(questions, {"0": {"QUESTION": "Q?", "ANSWER": "A"}})
+        self.assertEqual(load_questions({"TASKS": {1: {"QUESTION": "Q?", "ANSWER": "A"}}}), {"1": {"QUESTION": "Q?", "ANSWER": "A"}})
+        for invalid in ([{"QUESTION": "Q?"}], ["Q?"], {"version": "v1.0", "data": []}, "Q?"):
+            with self.assertRaises(ValueError):
+                load_questions(invalid)
+
+
+class TestCovidQALabelling(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        documents = load_squad_documents(COVID_QA_PATH, page_size=2000)
+        cls.gold = squad_to_baseline_dict(COVID_QA_PATH, documents)
+        # long answers are unambiguous, short ones such as "three" may occur in many documents
+        cls.questions = {
+            task_id: {"QUESTION": task_dict["QUESTION"], "ANSWER": task_dict["ANSWER"]}
+            for task_id, task_dict in cls.gold["TASKS"].items()
+            if len(task_dict["ANSWER"].split()) >= 8
+        }
+        cls.labeller = BaselineLabeller(documents)
+
+    def test_matches_answer_spans(self):
+        """Test that long answers are labelled on the file and pages of their annotated span"""
+        baseline = self.labeller.label(self.questions, name="covid")
+        DatasetValidator(rag=False).validate(baseline)
+        hits = 0
+        for task_id, task_dict in baseline["TASKS"].items():
+            gold_context = self.gold["TASKS"][task_id]["CONTEXTS"][0]
+            contexts = task_dict["CONTEXTS"]
+            if contexts and contexts[0]["FILE_PATH"] == gold_context["FILE_PATH"] and set(contexts[0]["PAGE_NUMBER"]) & set(gold_context["PAGE_NUMBER"]):
+                hits += 1
+        self.assertGreaterEqual(hits / len(self.questions), 0.95)
+        self.assertLessEqual(len(baseline["UNLABELLED"]), len(self.questions) * 0.02)
+
+    def test_workers(self):
+        """Test that the worker pool labels like a single process"""
+        questions = dict(list(self.questions.items())[:200])
+        self.labeller.workers, self.labeller.chunk_size = 2, 50
+        try:
+            parallel = self.labeller.label(questions)
+        finally:
+            self.labeller.workers, self.labeller.chunk_size = 1, 64
+        self.assertEqual(parallel, self.labeller.label(questions))
+
+
+if __name__ == "__main__":
+    unittest.main()
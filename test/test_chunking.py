@@ -0,0 +1,118 @@
+import os
+import sys
+import unittest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ragbenchmark.chunking.corpus import Document
+from ragbenchmark.chunking.chunkers import ChunkingConfig, TokenizedDocument
+from ragbenchmark.chunking.simulator import ChunkingSimulator
+from ragbenchmark.datasets.dataset_validator import DatasetValidator
+from ragbenchmark.evaluator.dataset_evaluator.dataset_evaluator import DatasetEvaluator
+
+TEXT = "One two three. Four five six seven! Eight nine.\n\nTen eleven twelve thirteen fourteen fifteen sixteen"
+
+
+class TestChunkers(unittest.TestCase):
+    def setUp(self):
+        self.tokens = TokenizedDocument(Document.from_text("doc", TEXT))
+
+    def spans(self, spec):
+        return ChunkingConfig.parse(spec).token_spans(self.tokens).tolist()
+
+    def test_tokenization(self):
+        """Test token offsets and sentence boundaries"""
+        self.assertEqual(self.tokens.num_tokens, 16)
+        self.assertEqual(self.tokens.sentence_ends.tolist(), [3, 7, 9, 16])
+        self.assertEqual(TEXT[self.tokens.starts[2]:self.tokens.ends[2]], "three.")
+        self.assertEqual(self.tokens.terms[2], "three")
+
+    def test_fixed_and_sliding(self):
+        """Test fixed-size and sliding-window chunks"""
+        self.assertEqual(self.spans("fixed:6"), [[0, 6], [6, 12], [12, 16]])
+        self.assertEqual(self.spans("sliding:8:4"), [[0, 8], [4, 12], [8, 16]])
+
+    def test_sentence(self):
+        """Test that sentences are packed, overlapped and cut when too long"""
+        self.assertEqual(self.spans("sentence:5"), [[0, 3], [3, 7], [7, 9], [9, 14], [14, 16]])
+        self.assertEqual(self.spans("sentence:8:1"), [[0, 7], [3, 9], [9, 16]])
+
+    def test_invalid_configs(self):
+        """Test that invalid configurations are rejected"""
+        for spec in ("fixed:4:1", "sliding:4:4", "words:4", "fixed", "fixed:-1"):
+            with self.assertRaises(ValueError):
+                ChunkingConfig.parse(spec)
+
+    def test_page_numbers(self):
+        """Test that emulated pages keep the text and map spans back to pages"""
+        document = Document.from_text("doc", "a b c\nd e f\ng h i\n", page_size=7)
+        self.assertEqual(document.text, "a b c\nd e f\ng h i\n")
+        self.assertEqual(document.num_pages, 3)
+        self.assertEqual(document.page_numbers(0, 5), [1])
+        self.assertEqual(document.page_numbers(4, 9), [1, 2])
+        self.assertEqual(Document.from_text("doc", "first\fsecond").page_numbers(6, 12), [2])
+
+
+class TestChunkingSimulator(unittest.TestCase):
+    def setUp(self):
+        self.documents = [
+            Document(
+                "paper.pdf",
+                [
+                    "The Transformer relies entirely on self-attention. It does not use recurrence.\n",
+                    "Positional encodings inject the order of the tokens. They are added to the embeddings.\n",
+                ],
+            ),
+            Document("other.pdf", ["Convolutional networks use local filters over images.\n"]),
+        ]
+        self.baseline = {
+            "NAME": "toy",
+            "DOCUMENTS": ["paper.pdf", "other.pdf"],
+            "TASKS": {
+                "1": {
+                    "QUESTION": "What do positional encodings inject?",
+                    "ANSWER": "The order of the tokens.",
+                    "CONTEXTS": [{
+                        "TEXT": "Positional encodings inject the order of the tokens.",
+                        "FILE_PATH": "paper.pdf",
+                        "PAGE_NUMBER": [2],
+                    }],
+                },
+            },
+        }
+        self.configs = [ChunkingConfig("fixed", 8), ChunkingConfig("sentence", 12)]
+        self.simulator = ChunkingSimulator(self.documents, self.configs).run()
+
+    def test_chunks_cover_corpus(self):
+        """Test that chunk texts, offsets and pages come from the corpus"""
+        for config in self.configs:
+            for context_dict in self.simulator.iter_chunks(config.name):
+                document = self.documents[0] if context_dict["FILE_PATH"] == "paper.pdf" else self.documents[1]
+                self.assertEqual(document.text[context_dict["START"]:context_dict["END"]], context_dict["TEXT"])
+                self.assertEqual(context_dict["PAGE_NUMBER"], document.page_numbers(context_dict["START"], context_dict["END"]))
+        self.assertEqual(self.simulator.summary()[1]["num_chunks"], 4)
+
+    def test_sample_datasets(self):
+        """Test that generated sample datasets are valid and evaluated by the existing metrics"""
+        for retriever in ("bm25", "oracle"):
+            sample_dataset_dicts = self.simulator.build_sample_datasets(self.baseline, top_k=1, retriever=retriever)
+            self.assertEqual(sorted(sample_dataset_dicts), ["fixed-8", "sentence-12"])
+            sample_dataset_dict = sample_dataset_dicts["sentence-12"]
+            DatasetValidator.validate_pair(self.baseline, sample_dataset_dict)
+            context_dict = sample_dataset_dict["TASKS"]["1"]["CONTEXTS"][0]
+            self.assertEqual(context_dict["TEXT"], "Positional encodings inject the order of the tokens.")
+            metrics = DatasetEvaluator(self.baseline, sample_dataset_dict).evaluate()["metrics"]
+            self.assertEqual(metrics["recall_by_page_number"], 1.0)
+            self.assertEqual(metrics["precision_by_char"], 1.0)
+
+    def test_oracle_scores(self):
+        """Test that the oracle scores the share of baseline characters inside each chunk"""
+        spans = self.simulator.locate_contexts(self.baseline["TASKS"]["1"])
+        self.assertEqual(len(spans), 1)
+        scores = self.simulator.oracle_scores("sentence-12", spans)
+        self.assertEqual(scores.max(), 1.0)
+        self.assertAlmostEqual(scores.sum(), 1.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
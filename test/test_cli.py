@@ -0,0 +1,110 @@
+import os
+import sys
+import json
+import shutil
+import tempfile
+import unittest
+import warnings
+from contextlib import redirect_stderr
+from io import StringIO
+from unittest.mock import patch
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ragbenchmark.cli import main
+from ragbenchmark.evaluator.dataset_evaluator.dataset_evaluator import DatasetEvaluator
+from helpers import BASELINE_PATH, SAMPLES_PATH
+
+
+class TestDatasetEvaluator(unittest.TestCase):
+    def setUp(self):
+        with open(BASELINE_PATH, "r", encoding="utf-8") as f:
+            self.baseline = json.load(f)
+        with open(SAMPLES_PATH, "r", encoding="utf-8") as f:
+            self.samples = json.load(f)
+
+    def test_evaluate(self):
+        """Test that every task is evaluated and the metrics are averaged"""
+        result = DatasetEvaluator(self.baseline, self.samples).evaluate()
+        self.assertEqual(result["num_tasks"], 5)
+        self.assertEqual([row["task_id"] for row in result["tasks"]], ["1", "2", "3", "4", "5"])
+        self.assertAlmostEqual(result["metrics"]["precision_by_page_number"], 0.9)
+
+    def test_workers_keep_order_and_values(self):
+        """Test that a process pool gives the same rows as a single process"""
+        single = list(DatasetEvaluator(self.baseline, self.samples).iter_results())
+        parallel = list(DatasetEvaluator(self.baseline, self.samples, workers=2, chunk_size=2).iter_results())
+        self.assertEqual(single, parallel)
+
+    def test_missing_sample_task(self):
+        """Test that a baseline task without a sample task scores zero"""
+        del self.samples["TASKS"]["5"]
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            rows = list(DatasetEvaluator(self.baseline, self.samples).iter_results())
+        self.assertEqual(rows[-1]["recall_by_char"], 0.0)
+        self.assertEqual(rows[-1]["recall_by_page_number"], 0.0)
+
+    def test_unknown_metric(self):
+        """Test that unknown metrics are rejected"""
+        with self.assertRaises(ValueError):
+            DatasetEvaluator(self.baseline, self.samples, metrics=["recall_by_magic"])
+
+
+class TestCli(unittest.TestCase):
+    def setUp(self):
+        self.output_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.output_dir)
+
+    def run_eval(self, *extra_args):
+        return main([
+            "eval", "--baseline", BASELINE_PATH, "--samples", SAMPLES_PATH, SAMPLES_PATH,
+            "--output", self.output_dir, "--quiet", *extra_args
+        ])
+
+    def test_eval_writes_results(self):
+        """Test that per-task results and the summary are written"""
+        self.assertEqual(self.run_eval("--format", "csv", "--metrics", "recall_by_char"), 0)
+        self.assertTrue(os.path.isfile(os.path.join(self.output_dir, "samples.csv")))
+        with open(os.path.join(self.output_dir, "summary.json"), "r", encoding="utf-8") as f:
+            summary = json.load(f)
+        self.assertEqual(list(summary["samples"][SAMPLES_PATH]["metrics"]), ["recall_by_char"])
+
+    def test_eval_threshold_regression(self):
+        """Test that a metric below its threshold gives a non-zero exit code"""
+        self.assertEqual(self.run_eval("--threshold", "precision_by_page_number=0.8"), 0)
+        self.assertEqual(self.run_eval("--threshold", "precision_by_page_number=0.95"), 1)
+
+    def test_eval_shard_rejects_threshold(self):
+        """Test that thresholds of a sharded evaluation are rejected, since they apply to merged results"""
+        with redirect_stderr(StringIO()) as stderr, self.assertRaises(SystemExit):
+            self.run_eval("--shard", "0/2", "--threshold", "precision_by_page_number=0.95")
+        self.assertIn("ragbench merge", stderr.getvalue())
+
+    def test_usage_errors_and_internal_errors(self):
+        """Test that invalid input is a usage error, while an internal ValueError keeps its traceback"""
+        with redirect_stderr(StringIO()) as stderr, self.assertRaises(SystemExit) as context:
+            main(["eval", "--baseline", os.path.join(self.output_dir, "missing.json"), "--samples", SAMPLES_PATH, "--quiet"])
+        self.assertEqual(context.exception.code, 2)
+        self.assertIn("missing.json", stderr.getvalue())
+        with redirect_stderr(StringIO()) as stderr, self.assertRaises(SystemExit):
+            self.run_eval("--normalize", "nfkc,bogus")
+        self.assertIn("bogus", stderr.getvalue())
+        self.assertEqual(self.run_eval("--normalize", "nfkc,casefold"), 0)
+        with patch.object(DatasetEvaluator, "aggregate", side_effect=ValueError("shape mismatch")), \
+                self.assertRaisesRegex(ValueError, "shape mismatch"):
+            self.run_eval()
+
+    def test_eval_parquet_without_engine(self):
+        """Test that a missing parquet engine is reported before evaluating"""
+        with patch("ragbenchmark.exporter.exporter.PARQUET_ENGINES", ("no_such_parquet_engine",)), \
+                redirect_stderr(StringIO()) as stderr, self.assertRaises(SystemExit):
+            self.run_eval("--format", "parquet")
+        self.assertIn("pyarrow", stderr.getvalue())
+        self.assertEqual(os.listdir(self.output_dir), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,103 @@
+import os
+import sys
+import unittest
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ragbenchmark.analysis.coverage import CoverageAnalyzer, IntervalAccumulator, combine_intervals, merge_intervals
+from ragbenchmark.chunking.corpus import Document
+from helpers import load_datasets
+
+
+def dataset(tasks):
+    return {"NAME": "coverage", "DOCUMENTS": ["a.txt", "b.txt"], "TASKS": {
+        task_id: {"QUESTION": f"Q{task_id}?", "ANSWER": "", "CONTEXTS": [
+            {"TEXT": text, "FILE_PATH": file_path, "PAGE_NUMBER": pages, "SCORE": 1.0} for text, file_path, pages in contexts
+        ]}
+        for task_id, contexts in tasks.items()
+    }}
+
+
+class TestCoverageAnalyzer(unittest.TestCase):
+    def setUp(self):
+        self.corpus = [
+            Document("a.txt", ["Alpha beta gamma. ", "Delta epsilon zeta. ", "Eta theta iota. ", "Kappa lambda mu."]),
+            Document("b.txt", ["Nu xi omicron. ", "Pi rho sigma."]),
+        ]
+        self.baseline = dataset({
+            "1": [("beta gamma", "docs/a.txt", [1]), ("Kappa lambda", "docs/a.txt", [4])],
+            "2": [("xi omicron", "b.txt", [1])],
+            "3": [("theta", "a.txt", [3])],
+        })
+        self.samples = dataset({
+            "1": [("Alpha beta gamma. Delta", "a.txt", [1, 2]), ("Nu xi", "b.txt", [1])],
+            "2": [("paraphrased away", "b.txt", [2]), ("unknown", "c.txt", [1])],
+        })
+
+    def test_intervals(self):
+        """Test merging touching intervals and combining interval sets"""
+        starts, ends = merge_intervals(np.array([5, 1, 2, 9]), np.array([7, 3, 5, 9]))
+        self.assertEqual((starts.tolist(), ends.tolist()), ([1], [7]))
+        left, right = (np.array([0, 20]), np.array([10, 30])), (np.array([5, 25]), np.array([22, 40]))
+        both = combine_intervals(left, right, np.logical_and)
+        self.assertEqual((both[0].tolist(), both[1].tolist()), ([5, 20, 25], [10, 22, 30]))
+        only_right = combine_intervals(right, left, lambda a, b: a & ~b)
+        self.assertEqual((only_right[0].tolist(), only_right[1].tolist()), ([10, 30], [20, 40]))
+
+        accumulator, compacted = IntervalAccumulator(), IntervalAccumulator(compact_size=2)
+        rng = np.random.default_rng(0)
+        for start in rng.integers(0, 1000, size=200).tolist():
+            accumulator.add_context([(start, start + 7)])
+            compacted.add_context([(start, start + 7)])
+        self.assertEqual([array.tolist() for array in accumulator.merged()], [array.tolist() for array in compacted.merged()])
+        self.assertEqual(compacted.num_contexts, 200)
+
+    def test_pages(self):
+        """Test covered, missed, over-retrieved and unsurfaced pages, with paths resolved by file name"""
+        report = CoverageAnalyzer(documents=["a.txt", "b.txt"], corpus=self.corpus).analyze_dataset_dicts(self.baseline, self.samples)
+        self.assertEqual(report["num_tasks"], 3)
+        self.assertEqual(report["num_unmapped_contexts"], 1)
+        a_report = report["documents"]["a.txt"]
+        self.assertEqual(a_report["regions"]["covered"], [{"start": 1, "end": 1, "size": 1}])
+        self.assertEqual(a_report["regions"]["missed"], [{"start": 3, "end": 4, "size": 2}])
+        self.assertEqual(a_report["regions"]["over_retrieved"], [{"start": 2, "end": 2, "size": 1}])
+        self.assertEqual(a_report["regions"]["unsurfaced"], [{"start": 3, "end": 4, "size": 2}])
+        self.assertEqual(a_report["num_baseline_contexts"], 3)
+        self.assertEqual(report["totals"], {
+            "baseline": 4, "sample": 4, "covered": 2, "missed": 2, "over_retrieved": 2, "corpus": 6, "unsurfaced": 2
+        })
+        self.assertEqual(report["coverage_rate"], 0.5)
+        self.assertAlmostEqual(report["surfaced_rate"], 4 / 6)
+
+    def test_chars(self):
+        """Test that texts are located in their pages, and cover their whole pages when not found"""
+        analyzer = CoverageAnalyzer(corpus=self.corpus, granularity="char")
+        report = analyzer.analyze_dataset_dicts(self.baseline, self.samples)
+        self.assertEqual(report["num_approximate_contexts"], 1)
+        a_text = self.corpus[0].text
+        a_report = report["documents"]["a.txt"]
+        start = a_text.index("beta gamma")
+        self.assertEqual(a_report["regions"]["covered"], [{"start": start, "end": start + 10, "size": 10}])
+        self.assertEqual(a_report["regions"]["over_retrieved"][0]["start"], 0)
+        self.assertEqual(a_report["sizes"]["missed"], len("theta") + len("Kappa lambda"))
+        # the paraphrase is not found, so it covers the whole second page of b.txt
+        b_report = report["documents"]["b.txt"]
+        self.assertEqual(b_report["regions"]["covered"], [{"start": 3, "end": 5, "size": 2}])
+        self.assertEqual(b_report["sizes"]["over_retrieved"], len("Nu ") + len("Pi rho sigma."))
+        self.assertEqual(b_report["sizes"]["unsurfaced"], len(" omicron. "))
+        with self.assertRaises(ValueError):
+            CoverageAnalyzer(granularity="char")
+
+    def test_bundled_dataset(self):
+        """Test that the bundled sample retrieves every page its baseline needs"""
+        baseline, samples = load_datasets()
+        report = CoverageAnalyzer(documents=baseline["DOCUMENTS"]).analyze_dataset_dicts(baseline, samples)
+        self.assertEqual(report["num_unmapped_contexts"], 0)
+        self.assertEqual(report["coverage_rate"], 1.0)
+        self.assertEqual(list(report["documents"]), baseline["DOCUMENTS"])
+
+
+if __name__ == "__main__":
+    unittest.main()
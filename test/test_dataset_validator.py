@@ -0,0 +1,72 @@
+import os
+import sys
+import copy
+import unittest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ragbenchmark.datasets.dataset_validator import DatasetValidator, DatasetValidationError
+from ragbenchmark.evaluator.dataset_evaluator.dataset_evaluator import DatasetEvaluator
+from helpers import load_datasets
+
+
+class TestDatasetValidator(unittest.TestCase):
+    def setUp(self):
+        self.baseline, self.samples = load_datasets()
+
+    def test_valid_datasets(self):
+        """Test that the bundled datasets are valid"""
+        DatasetValidator(rag=False).validate(self.baseline)
+        DatasetValidator(rag=True).validate(self.samples)
+        DatasetValidator.validate_pair(self.baseline, self.samples)
+
+    def test_collects_every_error(self):
+        """Test that all errors are collected with their task ids"""
+        samples = copy.deepcopy(self.samples)
+        del samples["TASKS"]["1"]["CONTEXTS"][0]["SCORE"]
+        samples["TASKS"]["3"]["CONTEXTS"][0]["PAGE_NUMBER"] = []
+        del samples["TASKS"]["5"]["ANSWER"]
+        errors = list(DatasetValidator(rag=True).iter_errors(samples))
+        self.assertEqual([task_id for task_id, _ in errors], ["1", "3", "5"])
+        self.assertIn("SCORE", errors[0][1])
+        self.assertIn("PAGE_NUMBER", errors[1][1])
+        self.assertIn("ANSWER", errors[2][1])
+
+    def test_booleans_are_not_numbers(self):
+        """Test that true/false are rejected as page numbers and scores"""
+        samples = copy.deepcopy(self.samples)
+        samples["TASKS"]["1"]["CONTEXTS"][0]["PAGE_NUMBER"] = [True]
+        samples["TASKS"]["2"]["CONTEXTS"][0]["SCORE"] = False
+        errors = list(DatasetValidator(rag=True).iter_errors(samples))
+        self.assertEqual([task_id for task_id, _ in errors], ["1", "2"])
+        self.assertIn("PAGE_NUMBER", errors[0][1])
+        self.assertIn("SCORE", errors[1][1])
+
+    def test_baseline_does_not_need_score(self):
+        """Test that only sample contexts need a score"""
+        self.assertEqual(list(DatasetValidator(rag=True).iter_errors(self.baseline))[0][0], "1")
+        self.assertEqual(list(DatasetValidator(rag=False).iter_errors(self.baseline)), [])
+
+    def test_dataset_level_errors(self):
+        """Test that a malformed dataset is reported without a task id"""
+        errors = list(DatasetValidator().iter_errors({"NAME": "broken", "TASKS": {}}))
+        self.assertEqual(errors[0][0], None)
+        self.assertIn("DOCUMENTS", errors[0][1])
+
+    def test_question_mismatch(self):
+        """Test that baseline and sample tasks must ask the same question"""
+        self.samples["TASKS"]["2"]["QUESTION"] = "Another question?"
+        with self.assertRaises(DatasetValidationError) as context:
+            DatasetValidator.validate_pair(self.baseline, self.samples)
+        self.assertEqual(context.exception.errors[0][0], "2")
+
+    def test_evaluator_validates_before_evaluation(self):
+        """Test that the dataset evaluator rejects malformed datasets before evaluating any task"""
+        self.samples["TASKS"]["4"]["CONTEXTS"][0]["PAGE_NUMBER"] = []
+        with self.assertRaises(DatasetValidationError):
+            DatasetEvaluator(self.baseline, self.samples)
+        self.assertTrue(DatasetEvaluator(self.baseline, copy.deepcopy(self.baseline), validate=False).metrics)
+
+
+if __name__ == "__main__":
+    unittest.main()
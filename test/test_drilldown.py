@@ -0,0 +1,98 @@
+import os
+import sys
+import json
+import shutil
+import tempfile
+import unittest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ragbenchmark.analysis.drilldown import DrillDownReport
+from ragbenchmark.evaluator.dataset_evaluator.dataset_evaluator import DatasetEvaluator, METRICS
+from helpers import load_datasets
+
+
+def move_to_other_file(_, baseline_task, sample_task):
+    for context_dict in baseline_task["CONTEXTS"]:
+        context_dict["FILE_PATH"] = "data/other.pdf"
+        context_dict["PAGE_NUMBER"] = [10, 11]
+    for context_dict in sample_task["CONTEXTS"]:
+        context_dict["FILE_PATH"] = "data/other.pdf"
+        context_dict["PAGE_NUMBER"] = [11, 12]
+        context_dict["TEXT"] = context_dict["TEXT"][: len(context_dict["TEXT"]) // 2]
+
+
+def load_report_datasets():
+    """Load the bundled datasets, with an extra file whose contexts are never retrieved on the right page."""
+    baseline, samples = load_datasets()
+    other_baseline, other_samples = load_datasets(copies=["other"], transform=move_to_other_file)
+    baseline["TASKS"].update(other_baseline["TASKS"])
+    samples["TASKS"].update(other_samples["TASKS"])
+    return baseline, samples
+
+
+class TestDrillDownReport(unittest.TestCase):
+    def setUp(self):
+        self.baseline, self.samples = load_report_datasets()
+        self.report = DrillDownReport.build(self.baseline, self.samples)
+        self.evaluation = DatasetEvaluator(self.baseline, self.samples).evaluate()
+
+    def test_task_metrics_match_evaluator(self):
+        """Test that the weighted contributions of the fact table give exactly the values of the evaluator"""
+        task_metrics = self.report.task_metrics()
+        for row in self.evaluation["tasks"]:
+            for metric in METRICS:
+                self.assertAlmostEqual(task_metrics.loc[row["task_id"], metric], row[metric], msg=f"{row['task_id']} {metric}")
+
+    def test_by_file(self):
+        """Test that the recall loss by file sums up to the gap of the dataset mean and points at the bad file"""
+        by_file = self.report.by_file()
+        self.assertEqual(list(by_file.index), ["data/attention_is_all_you_need.pdf", "data/other.pdf"])
+        for metric in ("recall_by_page_number", "recall_by_char"):
+            loss = metric.replace("recall", "recall_loss")
+            self.assertAlmostEqual(by_file[loss].sum(), 1.0 - self.evaluation["metrics"][metric])
+        self.assertEqual(by_file.loc["data/other.pdf", "recall_by_page_number"], 0.5)
+        self.assertEqual(by_file.loc["data/attention_is_all_you_need.pdf", "recall_loss_by_page_number"], 0.0)
+        self.assertEqual(by_file["num_tasks"].tolist(), [5, 5])
+        self.assertEqual(by_file["baseline_contexts"].sum(), (self.report.facts["side"] == "baseline").sum())
+
+    def test_by_page(self):
+        """Test that a context spanning several pages counts once for each of them"""
+        by_page = self.report.by_page()
+        other = by_page.loc["data/other.pdf"]
+        self.assertEqual(other.loc[10, "baseline_contexts"], 5)
+        self.assertEqual(other.loc[11, "baseline_contexts"], 5)
+        self.assertEqual(other.loc[12, "baseline_contexts"], 0)
+        self.assertEqual(other.loc[12, "sample_contexts"], other.loc[11, "sample_contexts"])
+
+    def test_buckets(self):
+        """Test the score and question length buckets"""
+        by_score = self.report.by_score(bins=[0.0, 0.92, 1.0])
+        self.assertEqual(by_score["sample_contexts"].sum(), (self.report.facts["side"] == "sample").sum())
+        self.assertEqual(by_score["baseline_contexts"].sum(), 0)
+        by_length = self.report.by_question_length(bins=2)
+        self.assertEqual(len(by_length), 2)
+        self.assertEqual(by_length["num_tasks"].sum(), len(self.baseline["TASKS"]))
+        with self.assertRaises(ValueError):
+            self.report.view("answer")
+
+    def test_export(self):
+        """Test that views and the fact table export through the exporter"""
+        output_dir = tempfile.mkdtemp()
+        try:
+            path = self.report.export("score", os.path.join(output_dir, "by_score.json"), bins=2)
+            with open(path, "r", encoding="utf-8") as f:
+                rows = json.load(f)
+            self.assertEqual(len(rows), 2)
+            self.assertIsInstance(rows[0]["score_bucket"], str)
+            self.assertIsNone(rows[0]["recall_by_char"])
+            facts_path = self.report.export("facts", os.path.join(output_dir, "facts.jsonl"), format="jsonl")
+            with open(facts_path, "r", encoding="utf-8") as f:
+                self.assertEqual(sum(1 for _ in f), len(self.report.facts))
+            self.report.export("page", os.path.join(output_dir, "by_page.csv"), format="csv")
+        finally:
+            shutil.rmtree(output_dir)
+
+
+if __name__ == "__main__":
+    unittest.main()
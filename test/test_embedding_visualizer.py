@@ -0,0 +1,168 @@
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ragbenchmark.embeddings.embedding_base import EmbeddingBase
+from ragbenchmark.embeddings.embedding_visualizer import (
+    ChunkedPCA, EmbeddingVisualizer, RandomProjection, ReservoirSampler, VectorSource, dataset_hash
+)
+from helpers import load_datasets
+
+
+class HashEmbedding(EmbeddingBase):
+    """Embeds texts with letter counts, recording the size of every batch."""
+
+    def __init__(self):
+        super().__init__()
+        self.batches = []
+
+    def embed(self, texts):
+        self.batches.append(len(texts))
+        vectors = np.zeros((len(texts), 26), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for char in text.lower():
+                if "a" <= char <= "z":
+                    vectors[row, ord(char) - ord("a")] += 1
+        return vectors
+
+
+class TestChunkedPCA(unittest.TestCase):
+    def test_matches_full_pca(self):
+        rng = np.random.default_rng(1)
+        vectors = rng.standard_normal((1000, 12)) @ rng.standard_normal((12, 12)) + 50.0
+        pca = ChunkedPCA(n_components=2)
+        for _, batch in VectorSource(vectors, batch_size=97).iter_batches():
+            pca.partial_fit(batch)
+        pca.finalize()
+
+        centered = vectors - vectors.mean(axis=0)
+        _, singular_values, vt = np.linalg.svd(centered, full_matrices=False)
+        np.testing.assert_allclose(pca.mean, vectors.mean(axis=0))
+        for component, expected in zip(pca.components, vt[:2]):
+            self.assertAlmostEqual(abs(float(component @ expected)), 1.0, places=6)
+        np.testing.assert_allclose(pca.explained_variance_ratio, (singular_values ** 2 / (singular_values ** 2).sum())[:2])
+
+    def test_finalize_without_vectors(self):
+        with self.assertRaises(ValueError):
+            ChunkedPCA().finalize()
+
+    def test_random_projection_is_seeded(self):
+        vectors = np.random.default_rng(0).standard_normal((10, 8))
+        first, second = RandomProjection(seed=3), RandomProjection(seed=3)
+        first.partial_fit(vectors)
+        second.partial_fit(vectors)
+        np.testing.assert_array_equal(first.transform(vectors), second.transform(vectors))
+
+
+class TestReservoirSampler(unittest.TestCase):
+    def test_sample_size_and_determinism(self):
+        samples = []
+        for _ in range(2):
+            sampler = ReservoirSampler(50, seed=7)
+            for size in (30, 100, 1, 869):
+                sampler.add(size)
+            samples.append(sampler.indices())
+        self.assertEqual(len(samples[0]), 50)
+        self.assertEqual(len(set(samples[0].tolist())), 50)
+        self.assertTrue((samples[0] < 1000).all())
+        np.testing.assert_array_equal(samples[0], samples[1])
+
+    def test_fewer_items_than_size(self):
+        sampler = ReservoirSampler(50)
+        sampler.add(20)
+        np.testing.assert_array_equal(sampler.indices(), np.arange(20))
+
+    def test_sample_is_uniform(self):
+        counts = np.zeros(100)
+        for seed in range(400):
+            sampler = ReservoirSampler(10, seed=seed)
+            for _ in range(10):
+                sampler.add(10)
+            counts[sampler.indices()] += 1
+        # every item is sampled with probability 0.1, i.e. 40 times in expectation
+        self.assertLess(abs(counts[:50].sum() - counts[50:].sum()), 200)
+        self.assertGreater(counts.min(), 15)
+
+
+class TestEmbeddingVisualizer(unittest.TestCase):
+    def setUp(self):
+        self.cache_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.cache_dir)
+
+    def test_project_memmapped_vectors_and_cache(self):
+        vectors = np.random.default_rng(2).standard_normal((5000, 16)).astype(np.float32)
+        path = os.path.join(self.cache_dir, "vectors.npy")
+        np.save(path, vectors)
+        visualizer = EmbeddingVisualizer(sample_size=300, cache_dir=self.cache_dir)
+
+        projection = visualizer.project(VectorSource(path, batch_size=512), labels=["x"] * 5000)
+        self.assertFalse(projection.from_cache)
+        self.assertEqual(projection.coordinates.shape, (5000, 2))
+        self.assertEqual(len(projection.sample_indices), 300)
+        self.assertEqual(projection.sample_coordinates.shape, (300, 2))
+        self.assertEqual(projection.sample_labels.tolist(), ["x"] * 300)
+        self.assertTrue(os.path.exists(projection.cache_path))
+
+        cached = visualizer.project(VectorSource(path, batch_size=512))
+        self.assertTrue(cached.from_cache)
+        np.testing.assert_array_equal(cached.coordinates, projection.coordinates)
+        np.testing.assert_array_equal(cached.sample_indices, projection.sample_indices)
+
+        other = EmbeddingVisualizer(method="random", sample_size=300, cache_dir=self.cache_dir)
+        self.assertFalse(other.project(VectorSource(path)).from_cache)
+
+    def test_invalid_arguments(self):
+        with self.assertRaises(ValueError):
+            EmbeddingVisualizer(method="tsne")
+        with self.assertRaises(ValueError):
+            EmbeddingVisualizer(cache_dir=None).project(VectorSource(np.zeros((3, 2))), labels=["a"])
+        with self.assertRaises(ValueError):
+            VectorSource(np.zeros(3))
+
+    def test_visualize_dataset(self):
+        baseline, sample = load_datasets()
+        embedding = HashEmbedding()
+        visualizer = EmbeddingVisualizer(sample_size=1000, cache_dir=self.cache_dir)
+
+        projection = visualizer.visualize_dataset(embedding, baseline, sample, batch_size=4)
+        labels = projection.labels.tolist()
+        self.assertEqual(labels.count("question"), len(baseline["TASKS"]))
+        self.assertIn("baseline", labels)
+        self.assertIn("sample", labels)
+        self.assertTrue(all(size <= 4 for size in embedding.batches))
+        self.assertEqual(len(projection.sample_indices), len(labels))
+
+        embedding.batches.clear()
+        again = visualizer.visualize_dataset(embedding, baseline, sample, batch_size=4)
+        self.assertTrue(again.from_cache)
+        self.assertEqual(embedding.batches, [])
+        self.assertNotEqual(dataset_hash(baseline), dataset_hash(baseline, sample))
+
+    def test_embedding_base_requires_embed(self):
+        with self.assertRaises(NotImplementedError):
+            EmbeddingBase().embed(["text"])
+
+    def test_plot(self):
+        try:
+            import matplotlib
+        except ImportError:
+            self.skipTest("matplotlib is not installed")
+        visualizer = EmbeddingVisualizer(sample_size=50, cache_dir=None)
+        projection = visualizer.project(VectorSource(np.random.default_rng(0).standard_normal((200, 4))), labels=["a", "b"] * 100)
+        path = os.path.join(self.cache_dir, "plot.png")
+        backend = matplotlib.get_backend()
+        visualizer.plot(projection, path=path)
+        self.assertTrue(os.path.exists(path))
+        self.assertEqual(matplotlib.get_backend(), backend)
+
+
+if __name__ == '__main__':
+    unittest.main()
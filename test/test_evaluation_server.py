@@ -0,0 +1,147 @@
+import os
+import sys
+import json
+import shutil
+import http.client
+import tempfile
+import threading
+import unittest
+import urllib.error
+import urllib.request
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ragbenchmark.evaluator.dataset_evaluator.dataset_evaluator import DatasetEvaluator, METRICS
+from ragbenchmark.evaluator.dataset_evaluator.task_result_cache import TaskResultCache
+from ragbenchmark.server.evaluation_server import EvaluationRequestError, EvaluationServer, EvaluationService
+from helpers import load_datasets
+
+
+class TestEvaluationServer(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.baseline, cls.samples = load_datasets()
+        cls.expected = {row["task_id"]: row for row in DatasetEvaluator(cls.baseline, cls.samples).evaluate()["tasks"]}
+        cls.service = EvaluationService({"transformer": cls.baseline}).start()
+        cls.server = EvaluationServer(cls.service, port=0)
+        cls.thread = threading.Thread(target=cls.server.serve_forever, daemon=True)
+        cls.thread.start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        cls.service.close()
+
+    def request(self, path, payload=None, data=None):
+        if payload is not None:
+            data = json.dumps(payload).encode("utf-8")
+        request = urllib.request.Request(self.server.url + path, data=data, method="POST" if data is not None else "GET")
+        try:
+            with urllib.request.urlopen(request, timeout=10) as response:
+                return response.status, json.loads(response.read())
+        except urllib.error.HTTPError as e:
+            return e.code, json.loads(e.read())
+
+    def assertRowsEqual(self, row, task_id):
+        for metric in METRICS:
+            self.assertAlmostEqual(row[metric], self.expected[task_id][metric])
+
+    def test_evaluate(self):
+        """Test that a single task is scored like the dataset evaluator, and memoized"""
+        task_id = next(iter(self.samples["TASKS"]))
+        status, row = self.request("/evaluate", {"TASK_ID": task_id, **self.samples["TASKS"][task_id]})
+        self.assertEqual(status, 200)
+        self.assertEqual((row["dataset"], row["task_id"]), ("transformer", task_id))
+        self.assertRowsEqual(row, task_id)
+        memo_hits = self.service.memo_hits
+        self.request("/evaluate", {"TASK_ID": task_id, "DATASET": "transformer", **self.samples["TASKS"][task_id]})
+        self.assertEqual(self.service.memo_hits, memo_hits + 1)
+
+    def test_evaluate_batch(self):
+        """Test that a sample dataset can be posted as is, or as a list of tasks"""
+        status, result = self.request("/evaluate/batch", self.samples)
+        self.assertEqual(status, 200)
+        self.assertEqual(result["num_tasks"], len(self.samples["TASKS"]))
+        for row in result["tasks"]:
+            self.assertRowsEqual(row, row["task_id"])
+        expected_metrics = DatasetEvaluator(self.baseline, self.samples).evaluate()["metrics"]
+        for metric in METRICS:
+            self.assertAlmostEqual(result["metrics"][metric], expected_metrics[metric])
+        tasks = [{"TASK_ID": task_id, **task_dict} for task_id, task_dict in reversed(list(self.samples["TASKS"].items()))]
+        status, result = self.request("/evaluate/batch", tasks)
+        self.assertEqual([row["task_id"] for row in result["tasks"]], [task["TASK_ID"] for task in tasks])
+
+    def test_errors(self):
+        """Test the statuses of malformed requests"""
+        task_id, task_dict = next(iter(self.samples["TASKS"].items()))
+        self.assertEqual(self.request("/evaluate", {"TASK_ID": "unknown", "CONTEXTS": []})[0], 404)
+        self.assertEqual(self.request("/evaluate", {"TASK_ID": task_id, "QUESTION": "Another question?", "CONTEXTS": []})[0], 400)
+        status, body = self.request("/evaluate", {"TASK_ID": task_id, "CONTEXTS": [{"TEXT": "no score"}]})
+        self.assertEqual(status, 400)
+        self.assertIn("Invalid tasks", body["error"])
+        self.assertEqual(self.request("/evaluate", data=b"{not json")[0], 400)
+        self.assertEqual(self.request("/evaluate", {"TASK_ID": task_id, "DATASET": "other", **task_dict})[0], 404)
+        self.assertEqual(self.request("/unknown", {})[0], 404)
+        status, health = self.request("/health")
+        self.assertEqual((status, health["datasets"]), (200, {"transformer": len(self.baseline["TASKS"])}))
+
+    def test_invalid_content_length(self):
+        """Test that a missing, non-integer or negative Content-Length is rejected without reading the body"""
+        for length, expected in ((None, 411), ("abc", 400), ("-1", 400)):
+            connection = http.client.HTTPConnection(self.server.server_address[0], self.server.server_address[1], timeout=10)
+            try:
+                connection.putrequest("POST", "/evaluate")
+                if length is not None:
+                    connection.putheader("Content-Length", length)
+                connection.endheaders()
+                response = connection.getresponse()
+                self.assertEqual(response.status, expected)
+                self.assertIn("Content-Length", json.loads(response.read())["error"])
+            finally:
+                connection.close()
+
+    def test_unexpected_error(self):
+        """Test that an unexpected failure is answered with a 500 JSON error"""
+        task_id = next(iter(self.samples["TASKS"]))
+        with EvaluationService({"transformer": self.baseline}, validate=False) as service:
+            server = EvaluationServer(service, port=0)
+            thread = threading.Thread(target=server.serve_forever, daemon=True)
+            thread.start()
+            try:
+                payload = {"TASK_ID": task_id, **self.samples["TASKS"][task_id], "CONTEXTS": [{"TEXT": "no file path", "SCORE": 1.0}]}
+                request = urllib.request.Request(server.url + "/evaluate", data=json.dumps(payload).encode("utf-8"), method="POST")
+                with self.assertRaises(urllib.error.HTTPError) as context:
+                    urllib.request.urlopen(request, timeout=10)
+                self.assertEqual(context.exception.code, 500)
+                self.assertIn("Evaluation failed", json.loads(context.exception.read())["error"])
+            finally:
+                server.shutdown()
+                server.server_close()
+
+
+class TestEvaluationService(unittest.TestCase):
+    def setUp(self):
+        self.baseline, self.samples = load_datasets()
+        self.output_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.output_dir)
+
+    def test_pool_and_cache(self):
+        """Test that the worker pool and the persistent cache give the in-process results"""
+        expected = EvaluationService({"a": self.baseline}).evaluate_batch(self.samples)
+        cache = TaskResultCache(os.path.join(self.output_dir, "results.sqlite"))
+        with EvaluationService({"a": self.baseline, "b": self.baseline}, workers=2, chunk_size=2, pool_threshold=1, cache=cache) as service:
+            self.assertEqual(service.evaluate_batch({**self.samples, "DATASET": "a"})["tasks"], expected["tasks"])
+            with self.assertRaises(EvaluationRequestError):
+                service.evaluate_batch(self.samples)
+        misses = cache.misses
+        with EvaluationService({"a": self.baseline}, cache=cache) as service:
+            self.assertEqual(service.evaluate_batch(self.samples)["tasks"], expected["tasks"])
+        self.assertEqual(cache.misses, misses)
+        cache.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
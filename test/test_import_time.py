@@ -0,0 +1,63 @@
+import os
+import sys
+import json
+import subprocess
+import unittest
+
+from helpers import ROOT_DIR
+
+IMPORT_TIME_BUDGET_SECONDS = 0.1
+HEAVY_MODULES = ("numpy", "pandas", "tclogger", "transformers", "openai", "nltk", "torch")
+
+MEASURE_SCRIPT = """
+import sys
+import json
+import time
+start = time.perf_counter()
+import ragbenchmark
+import ragbenchmark.cli
+elapsed = time.perf_counter() - start
+print(json.dumps({
+    "elapsed": elapsed,
+    "modules": sorted(sys.modules),
+    "path": sys.path,
+}))
+"""
+
+
+def measure_import():
+    output = subprocess.check_output([sys.executable, "-c", MEASURE_SCRIPT], cwd=ROOT_DIR, text=True)
+    return json.loads(output)
+
+
+class TestImportTime(unittest.TestCase):
+    def test_import_time_budget(self):
+        """Test that importing the package and the CLI stays within the import-time budget"""
+        elapsed = min(measure_import()["elapsed"] for _ in range(3))
+        self.assertLess(elapsed, IMPORT_TIME_BUDGET_SECONDS)
+
+    def test_heavy_dependencies_are_lazy(self):
+        """Test that heavy dependencies are not imported by the package or the CLI"""
+        modules = measure_import()["modules"]
+        for module in HEAVY_MODULES:
+            self.assertNotIn(module, modules)
+
+    def test_no_sys_path_hacks(self):
+        """Test that package modules are only imported under the ragbenchmark package"""
+        result = measure_import()
+        for module in ("base_task", "tasks", "context", "metrics", "base_context", "base_dataset"):
+            self.assertNotIn(module, result["modules"])
+        self.assertFalse(any(path.startswith(os.path.join(ROOT_DIR, "ragbenchmark")) for path in result["path"]))
+
+    def test_lazy_attributes(self):
+        """Test that public names are resolved on first access"""
+        import ragbenchmark
+        from ragbenchmark.tasks.custom_task import CustomTask
+        self.assertIs(ragbenchmark.CustomTask, CustomTask)
+        self.assertIn("DatasetEvaluator", dir(ragbenchmark))
+        with self.assertRaises(AttributeError):
+            ragbenchmark.NotAName
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,123 @@
+import os
+import sys
+import json
+import shutil
+import tempfile
+import unittest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ragbenchmark.datasets.custom_dataset import CustomDataset
+from ragbenchmark.datasets.jsonl_dataset import JsonlDataset, JsonlTaskFile
+from ragbenchmark.evaluator.dataset_evaluator.dataset_evaluator import DatasetEvaluator
+from helpers import load_datasets
+
+
+class TestJsonlDataset(unittest.TestCase):
+    def setUp(self):
+        self.baseline, self.samples = load_datasets()
+        self.output_dir = tempfile.mkdtemp()
+        self.baseline_path = os.path.join(self.output_dir, "baseline.jsonl")
+        self.sample_path = os.path.join(self.output_dir, "samples.jsonl")
+        JsonlTaskFile.create(self.baseline_path, self.baseline).close()
+        JsonlTaskFile.create(self.sample_path, self.samples).close()
+
+    def tearDown(self):
+        shutil.rmtree(self.output_dir)
+
+    def test_round_trip(self):
+        """Test that tasks read by id, and the whole file, match the JSON dataset"""
+        with JsonlTaskFile(self.baseline_path) as task_file:
+            self.assertEqual(task_file.name, self.baseline["NAME"])
+            self.assertEqual(task_file.task_ids, list(self.baseline["TASKS"]))
+            task_id = list(self.baseline["TASKS"])[3]
+            self.assertEqual(task_file[task_id], self.baseline["TASKS"][task_id])
+            self.assertEqual(task_file.to_dataset_dict(), self.baseline)
+            self.assertIsNone(task_file.get("missing"))
+            with self.assertRaises(KeyError):
+                task_file["missing"]
+
+    def test_dataset_matches_custom_dataset(self):
+        """Test that lazily built tasks equal the tasks of CustomDataset, and that ranges slice in file order"""
+        dataset = JsonlDataset(self.baseline_path, self.sample_path)
+        custom = CustomDataset(self.baseline, self.samples)
+        self.assertEqual(dataset.dataset_name, custom.dataset_name)
+        self.assertEqual(dataset.documents, custom.documents)
+        for task, expected in zip(dataset.tasks, custom.tasks):
+            self.assertEqual(task.task_id, expected.task_id)
+            self.assertEqual(task.sample_answer, expected.sample_answer)
+            self.assertEqual([context.text for context in task.sample_contexts], [context.text for context in expected.sample_contexts])
+        task_ids = dataset.task_ids
+        self.assertEqual([task.task_id for task in dataset.iter_tasks(start=task_ids[1], stop=task_ids[4])], task_ids[1:4])
+        self.assertEqual([task.task_id for task in dataset.iter_tasks(start=task_ids[-1])], task_ids[-1:])
+
+        baseline_slice, sample_slice = dataset.to_dataset_dicts(task_ids[:2])
+        evaluation = DatasetEvaluator(baseline_slice, sample_slice).evaluate()
+        full = DatasetEvaluator(self.baseline, self.samples).evaluate()
+        self.assertEqual(evaluation["tasks"], full["tasks"][:2])
+        dataset.close()
+
+    def test_append(self):
+        """Test that appended tasks are indexed, that a repeated id supersedes in place, and that the index persists"""
+        dataset = JsonlDataset(self.baseline_path, self.sample_path)
+        task_id = dataset.task_ids[0]
+        dataset.append("new", self.baseline["TASKS"][task_id], self.samples["TASKS"][task_id])
+        self.assertEqual(dataset.task_ids[-1], "new")
+        self.assertEqual(dataset.get_task("new").question, dataset.get_task(task_id).question)
+        changed = dict(self.samples["TASKS"][task_id], ANSWER="changed")
+        dataset.samples.append(task_id, changed)
+        self.assertEqual(dataset.samples.task_ids[0], task_id)
+        self.assertEqual(dataset.get_task(task_id).sample_answer, "changed")
+        dataset.close()
+
+        with open(self.sample_path, "rb") as f:
+            size = len(f.read())
+        reopened = JsonlTaskFile(self.sample_path)
+        self.assertEqual(len(reopened), len(self.samples["TASKS"]) + 1)
+        self.assertEqual(reopened[task_id]["ANSWER"], "changed")
+        reopened.close()
+        with open(self.sample_path, "rb") as f:
+            self.assertEqual(len(f.read()), size)
+
+    def test_index_recovery(self):
+        """Test that lines appended by other tools are indexed, and that a missing or stale index is rebuilt"""
+        with open(self.baseline_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps({"TASK_ID": "external", **self.baseline["TASKS"]["1"]}) + "\n")
+        with JsonlTaskFile(self.baseline_path) as task_file:
+            self.assertEqual(task_file["external"], self.baseline["TASKS"]["1"])
+        with open(self.baseline_path + ".idx", "r", encoding="utf-8") as f:
+            self.assertIn('"external"', f.read())
+
+        os.remove(self.baseline_path + ".idx")
+        with JsonlTaskFile(self.baseline_path) as task_file:
+            self.assertEqual(len(task_file), len(self.baseline["TASKS"]) + 1)
+
+        JsonlTaskFile.create(self.baseline_path, {**self.baseline, "TASKS": {"only": self.baseline["TASKS"]["1"]}}).close()
+        with open(self.baseline_path + ".idx", "a", encoding="utf-8") as f:
+            f.write('"ghost"\t100000\t10\n')
+        with JsonlTaskFile(self.baseline_path) as task_file:
+            self.assertEqual(task_file.task_ids, ["only"])
+
+        with open(self.baseline_path, "a", encoding="utf-8") as f:
+            f.write("not json\n")
+        with self.assertRaises(ValueError):
+            JsonlTaskFile(self.baseline_path)
+
+    def test_unterminated_external_line(self):
+        """Test that a last line without newline is not indexed, and that appending starts a new line"""
+        with open(self.baseline_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps({"TASK_ID": "external", **self.baseline["TASKS"]["1"]}))
+        with JsonlTaskFile(self.baseline_path) as task_file:
+            self.assertNotIn("external", task_file)
+            task_file.append("appended", self.baseline["TASKS"]["2"])
+            self.assertEqual(task_file["external"], self.baseline["TASKS"]["1"])
+            self.assertEqual(task_file["appended"], self.baseline["TASKS"]["2"])
+
+        os.remove(self.baseline_path + ".idx")
+        with JsonlTaskFile(self.baseline_path) as task_file:
+            self.assertEqual(task_file.task_ids[-2:], ["external", "appended"])
+            self.assertEqual(task_file["appended"], self.baseline["TASKS"]["2"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,114 @@
+import os
+import sys
+import time
+import random
+import threading
+import unittest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ragbenchmark.retrievers.base_retriever import BaseRetriever
+from ragbenchmark.retrievers.load_generator import LoadGenerator
+from ragbenchmark.profiling.latency_histogram import LatencyHistogram
+from ragbenchmark.datasets.custom_dataset import CustomRagDataset
+from ragbenchmark.evaluator.dataset_evaluator.dataset_evaluator import DatasetEvaluator
+from helpers import load_datasets
+
+
+class StubRetriever(BaseRetriever):
+    """Answers with the bundled sample contexts after a fixed delay, failing on one question."""
+
+    def __init__(self, samples, delay=0.01, failing_question=None):
+        self.contexts = {task["QUESTION"]: task["CONTEXTS"] for task in samples["TASKS"].values()}
+        self.delay = delay
+        self.failing_question = failing_question
+        self.active = 0
+        self.max_active = 0
+        self.lock = threading.Lock()
+
+    def retrieve(self, question, top_k):
+        with self.lock:
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        try:
+            time.sleep(self.delay)
+            if question == self.failing_question:
+                raise TimeoutError("stub timeout")
+            return self.contexts[question][:top_k]
+        finally:
+            with self.lock:
+                self.active -= 1
+
+
+class TestLatencyHistogram(unittest.TestCase):
+    def test_percentiles_within_precision(self):
+        """Test that percentiles stay within the relative error of three significant digits"""
+        rng = random.Random(0)
+        values = sorted(rng.lognormvariate(-4, 1) for _ in range(20000))
+        histogram = LatencyHistogram()
+        for value in values:
+            histogram.record(value)
+        for percentile in (50, 95, 99):
+            exact = values[int(percentile / 100 * len(values)) - 1]
+            self.assertLess(abs(histogram.percentile(percentile) - exact) / exact, 2e-3)
+        self.assertAlmostEqual(histogram.max, values[-1], places=6)
+
+    def test_merge(self):
+        """Test that merging histograms equals recording every value in one"""
+        first, second, both = LatencyHistogram(), LatencyHistogram(), LatencyHistogram()
+        for index in range(1000):
+            (first if index % 2 else second).record(index / 1000)
+            both.record(index / 1000)
+        first.merge(second)
+        self.assertEqual(first.summary(), both.summary())
+
+
+class TestLoadGenerator(unittest.TestCase):
+    def setUp(self):
+        self.baseline, self.samples = load_datasets()
+
+    def test_closed_loop(self):
+        """Test that a closed loop keeps N clients busy and returns a scorable dataset"""
+        retriever = StubRetriever(self.samples, delay=0.02)
+        result = LoadGenerator(retriever, top_k=10, concurrency=5).run(self.baseline)
+        self.assertEqual(retriever.max_active, 5)
+        self.assertEqual(result.latency.count, 5)
+        self.assertGreaterEqual(result.latency.percentile(50), 0.02)
+        self.assertIsInstance(result.dataset, CustomRagDataset)
+        self.assertEqual(list(result.sample_dataset_dict["TASKS"]), list(self.baseline["TASKS"]))
+
+        evaluation = result.evaluate()
+        self.assertEqual(evaluation["metrics"], DatasetEvaluator(self.baseline, self.samples).evaluate()["metrics"])
+        self.assertEqual(evaluation["latency"]["count"], 5)
+        self.assertGreater(evaluation["throughput"], 0)
+
+    def test_dataset_with_missing_sample_task(self):
+        """Test that a baseline task without sample task is built with no sample context"""
+        self.samples["TASKS"].pop("2")
+        dataset = CustomRagDataset(self.baseline, self.samples)
+        self.assertEqual(len(dataset.tasks), len(self.baseline["TASKS"]))
+        task = next(task for task in dataset.tasks if task.task_id == "2")
+        self.assertEqual(task.sample_contexts, [])
+        self.assertEqual(task.sample_answer, "")
+
+    def test_open_loop_schedule(self):
+        """Test that a fixed rate spaces the requests and counts queueing in the latency"""
+        retriever = StubRetriever(self.samples, delay=0.05)
+        result = LoadGenerator(retriever, concurrency=1, qps=100).run(self.baseline)
+        self.assertGreaterEqual(result.duration, 0.25)
+        # With one thread, requests scheduled every 10 ms queue behind 50 ms calls.
+        self.assertGreater(result.latency.max, 0.2)
+        self.assertLess(result.service_time.max, 0.2)
+
+    def test_errors_are_recorded(self):
+        """Test that failed requests are reported and scored as empty retrievals"""
+        question = self.baseline["TASKS"]["2"]["QUESTION"]
+        result = LoadGenerator(StubRetriever(self.samples, delay=0, failing_question=question), warmup=2).run(self.baseline)
+        self.assertEqual(list(result.errors), ["2"])
+        self.assertIn("TimeoutError", result.sample_dataset_dict["TASKS"]["2"]["ERROR"])
+        self.assertEqual(result.sample_dataset_dict["TASKS"]["2"]["CONTEXTS"], [])
+        self.assertEqual(result.evaluate()["errors"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
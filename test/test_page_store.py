@@ -0,0 +1,94 @@
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ragbenchmark.documents.page_store import PageStore, extract_pages
+from helpers import ROOT_DIR
+
+PDF_PATH = os.path.join("data", "covid_qa", "Handbook - Labelling Tool.pdf")
+
+try:
+    import pypdf
+except ImportError:
+    pypdf = None
+
+
+class CountingExtractor:
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, file_path):
+        self.calls.append(file_path)
+        return extract_pages(file_path)
+
+
+class TestPageStore(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.cache_dir = os.path.join(self.temp_dir, "cache")
+        self.docs_dir = os.path.join(self.temp_dir, "docs")
+        os.makedirs(self.docs_dir)
+        for name in ("a", "b", "c"):
+            self.write(f"{name}.txt", f"{name} page one\f{name} page   two\nends here\fé {name} three")
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def write(self, name, text):
+        with open(os.path.join(self.docs_dir, name), "w", encoding="utf-8") as f:
+            f.write(text)
+
+    def test_random_access(self):
+        """Test that pages are read back by (file_path, page)"""
+        with PageStore(self.cache_dir, root=self.docs_dir) as store:
+            self.assertEqual(store.num_pages("a.txt"), 3)
+            self.assertEqual(store.get_page("a.txt", 3), "é a three")
+            self.assertEqual(store.get_page("b.txt", 1), "b page one")
+            self.assertEqual(store.get_pages("c.txt")[1], "c page   two\nends here")
+            with self.assertRaises(IndexError):
+                store.get_page("a.txt", 4)
+
+    def test_extracts_once(self):
+        """Test that cached documents, including renamed copies, are not extracted again"""
+        extractor = CountingExtractor()
+        PageStore(self.cache_dir, root=self.docs_dir, extractor=extractor).add(["a.txt", "b.txt"])
+        shutil.copy(os.path.join(self.docs_dir, "a.txt"), os.path.join(self.docs_dir, "copy.txt"))
+        with PageStore(self.cache_dir, root=self.docs_dir, extractor=extractor) as store:
+            keys = store.add(["a.txt", "b.txt", "copy.txt"])
+            self.assertEqual(keys["a.txt"], keys["copy.txt"])
+            self.assertEqual(store.get_page("copy.txt", 1), "a page one")
+        self.assertEqual(len(extractor.calls), 2)
+
+        self.write("a.txt", "modified")
+        with PageStore(self.cache_dir, root=self.docs_dir, extractor=extractor) as store:
+            self.assertEqual(store.get_pages("a.txt"), ["modified"])
+        self.assertEqual(len(extractor.calls), 3)
+
+    def test_process_pool(self):
+        """Test that documents are extracted by worker processes"""
+        with PageStore(self.cache_dir, root=self.docs_dir, workers=2) as store:
+            keys = store.add(["a.txt", "b.txt", "c.txt"])
+            self.assertEqual(len(set(keys.values())), 3)
+            self.assertEqual(store.get_page("c.txt", 2), "c page   two\nends here")
+
+    def test_find_pages(self):
+        """Test that contexts are located in their pages regardless of whitespace"""
+        with PageStore(self.cache_dir, root=self.docs_dir) as store:
+            self.assertEqual(store.find_pages("a.txt", "page two ends\nhere"), [2])
+            self.assertEqual(store.find_pages("a.txt", "page"), [1, 2])
+            self.assertEqual(store.find_pages("a.txt", "missing"), [])
+
+    @unittest.skipIf(pypdf is None, "pypdf is not installed")
+    def test_pdf(self):
+        """Test that PDF pages are extracted"""
+        with PageStore(self.cache_dir, root=ROOT_DIR) as store:
+            self.assertEqual(store.num_pages(PDF_PATH), 13)
+            self.assertIn("DeepAnnotation", store.get_page(PDF_PATH, 1))
+
+
+if __name__ == "__main__":
+    unittest.main()
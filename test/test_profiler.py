@@ -0,0 +1,70 @@
+import os
+import sys
+import json
+import unittest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ragbenchmark.profiling.profiler import Profiler, PROFILER, profile_stage
+from ragbenchmark.metrics.metrics_by_char.utils import count_chars
+from ragbenchmark.tasks.custom_task import CustomTask
+
+
+class TestProfiler(unittest.TestCase):
+    def setUp(self):
+        self.task_dict = {
+            "QUESTION": "What is AI?",
+            "ANSWER": "Artificial Intelligence",
+            "CONTEXTS": [{"TEXT": "AI is AI.", "FILE_PATH": "test.txt", "PAGE_NUMBER": [1], "SCORE": 0.9}]
+        }
+        PROFILER.reset()
+
+    def tearDown(self):
+        PROFILER.disable()
+        PROFILER.reset()
+
+    def test_disabled_records_nothing(self):
+        """Test that nothing is recorded while the profiler is disabled"""
+        count_chars("hello")
+        with PROFILER.stage("stage"):
+            pass
+        report = PROFILER.report()
+        self.assertEqual(report["stages"], {})
+        self.assertEqual(report["counters"], {})
+
+    def test_stages_and_counters(self):
+        """Test that instrumented stages and counters are recorded while enabled"""
+        PROFILER.enable()
+        CustomTask("1", self.task_dict, self.task_dict)
+        count_chars("hello")
+        PROFILER.disable()
+        report = PROFILER.report()
+        self.assertEqual(report["stages"]["construct.task"]["calls"], 1)
+        self.assertEqual(report["stages"]["construct.context"]["calls"], 2)
+        self.assertEqual(report["stages"]["preprocess.count_chars"]["calls"], 1)
+        self.assertEqual(report["counters"], {"chars": 5, "contexts": 2, "tasks": 1})
+
+    def test_decorator_and_json(self):
+        """Test a custom decorated function and the JSON report"""
+        profiler = Profiler()
+        profiler.enable(cprofile=True, tracemalloc=True)
+        with profiler.stage("custom"):
+            sum(range(1000))
+        profiler.disable()
+        report = json.loads(profiler.to_json())
+        self.assertEqual(report["stages"]["custom"]["calls"], 1)
+        self.assertTrue(report["cprofile"])
+        self.assertGreaterEqual(report["tracemalloc"]["peak_bytes"], 0)
+
+    def test_profile_stage_preserves_result(self):
+        """Test that decorated functions keep their name and result"""
+        @profile_stage("test.double")
+        def double(value):
+            return value * 2
+
+        self.assertEqual(double.__name__, "double")
+        self.assertEqual(double(2), 4)
+
+
+if __name__ == "__main__":
+    unittest.main()
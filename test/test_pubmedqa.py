@@ -0,0 +1,132 @@
+import os
+import sys
+import json
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from io import StringIO
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ragbenchmark.chat_models.stub_chat_model import StubChatModel
+from ragbenchmark.cli import main
+from ragbenchmark.datasets.pubmed import PubMedQA
+from ragbenchmark.evaluator.pubmed_evaluator.pubmed_evaluator import PubMedQAEvaluator, DECISION_SYSTEM_PROMPT, generate_decisions
+from ragbenchmark.generation.answer_generator import AnswerGenerator
+from ragbenchmark.metrics.metrics_by_answer.calc_decision import DecisionClassification, parse_decision
+from helpers import ROOT_DIR
+
+DATA_DIR = os.path.join(ROOT_DIR, "data", "pubmedqa")
+
+
+class TestDecisionClassification(unittest.TestCase):
+    def test_parse_decision(self):
+        """Test that the leading decision word is read from free-text answers"""
+        self.assertEqual(parse_decision("No, the study shows otherwise. Maybe later."), "no")
+        self.assertEqual(parse_decision("MAYBE."), "maybe")
+        self.assertEqual(parse_decision('  **"Yes"** - the trial shows it.'), "yes")
+        self.assertIsNone(parse_decision("Nothing conclusive."))
+        self.assertIsNone(parse_decision("We cannot conclude; there is no evidence either way."))
+        self.assertIsNone(parse_decision("Yesterday's trial was inconclusive."))
+        self.assertIsNone(parse_decision(None))
+
+    def test_confusion_matrix(self):
+        """Test the confusion matrix, accuracy and macro-F1 against hand-computed values"""
+        labels = ["yes", "yes", "no", "maybe", "no"]
+        predictions = ["yes", "no", "no", None, "no"]
+        matrix = DecisionClassification.calculate_confusion_matrix(labels, predictions)
+        np.testing.assert_array_equal(matrix, [[1, 1, 0, 0], [0, 2, 0, 0], [0, 0, 0, 1]])
+        self.assertAlmostEqual(DecisionClassification.calculate_accuracy(matrix), 0.6)
+        # yes: p=1, r=0.5; no: p=2/3, r=1; maybe: 0
+        expected = (2 * 0.5 / 1.5 + 2 * (2 / 3) / (5 / 3) + 0.0) / 3
+        self.assertAlmostEqual(DecisionClassification.calculate_macro_f1(matrix), expected)
+        per_class = DecisionClassification.calculate_per_class(matrix)
+        self.assertEqual(per_class["maybe"]["support"], 1)
+        self.assertEqual(per_class["maybe"]["precision"], 0.0)
+
+    def test_invalid_inputs(self):
+        """Test that misaligned predictions and unknown labels are rejected"""
+        with self.assertRaises(ValueError):
+            DecisionClassification.calculate_confusion_matrix(["yes"], [])
+        with self.assertRaises(ValueError):
+            DecisionClassification.calculate_confusion_matrix(["unsure"], ["yes"])
+
+
+class TestPubMedQAEvaluator(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        with open(os.path.join(DATA_DIR, "test_ground_truth.json"), "r", encoding="utf-8") as f:
+            cls.ground_truth = json.load(f)
+        cls.dataset = PubMedQA.from_file(
+            os.path.join(DATA_DIR, "ori_pqal.json"), ground_truth_path=os.path.join(DATA_DIR, "test_ground_truth.json")
+        )
+
+    def test_dataset(self):
+        """Test that the test split is loaded with its labels and sections"""
+        full = PubMedQA.from_file(os.path.join(DATA_DIR, "ori_pqal.json"))
+        self.assertEqual(len(full.tasks), 1000)
+        self.assertEqual(len(self.dataset.tasks), 500)
+        self.assertEqual(dict(zip(self.dataset.documents, self.dataset.labels)), self.ground_truth)
+        task = self.dataset.tasks[0]
+        self.assertEqual([context.section for context in task.baseline_contexts], list(range(1, len(task.baseline_contexts) + 1)))
+        baseline_task = self.dataset.to_baseline_dict()["TASKS"][task.task_id]
+        self.assertEqual(baseline_task["CONTEXTS"][0]["FILE_PATH"], task.task_id)
+
+    def test_perfect_and_missing_predictions(self):
+        """Test that the ground truth scores perfectly, and that missing predictions count as invalid"""
+        result = PubMedQAEvaluator(self.dataset, self.ground_truth).evaluate()
+        self.assertEqual(result["decisions"]["accuracy"], 1.0)
+        self.assertEqual(result["decisions"]["macro_f1"], 1.0)
+        self.assertNotIn("retrieval", result)
+        partial = dict(list(self.ground_truth.items())[:400])
+        decisions = PubMedQAEvaluator(self.dataset, partial).evaluate_decisions()
+        self.assertEqual(decisions["num_missing"], 100)
+        self.assertEqual(decisions["num_invalid"], 100)
+        self.assertAlmostEqual(decisions["accuracy"], 0.8)
+        self.assertEqual(np.sum(decisions["confusion_matrix"]), 500)
+
+    def test_generated_decisions_and_retrieval(self):
+        """Test generating answers with a chat model, and scoring retrieval in parallel like in one process"""
+        generator = AnswerGenerator(StubChatModel(), top_k=10, system_prompt=DECISION_SYSTEM_PROMPT)
+        samples = generate_decisions(self.dataset, generator)
+        evaluator = PubMedQAEvaluator(self.dataset, samples, workers=2)
+        result = evaluator.evaluate()
+        self.assertEqual(result["decisions"]["num_missing"], 0)
+        self.assertEqual(result["retrieval"]["recall_by_page_number"], 1.0)
+        self.assertEqual(result["retrieval"]["precision_by_page_number"], 1.0)
+        serial = PubMedQAEvaluator(self.dataset, samples).evaluate_retrieval()
+        for metric, value in serial["metrics"].items():
+            self.assertAlmostEqual(result["retrieval"][metric], value)
+
+        # retrieving only the first section of a few abstracts misses the other sections
+        subset = {task_id: samples["TASKS"][task_id] for task_id in self.dataset.documents[:10]}
+        for task_dict in subset.values():
+            task_dict["CONTEXTS"] = task_dict["CONTEXTS"][:1]
+        retrieval = evaluator.evaluate_retrieval({**samples, "TASKS": subset})
+        self.assertEqual(retrieval["num_tasks"], 10)
+        self.assertLess(retrieval["metrics"]["recall_by_page_number"], 1.0)
+        with self.assertRaises(ValueError):
+            PubMedQAEvaluator(self.dataset, self.ground_truth).evaluate_retrieval()
+
+    def test_cli_generated_answers_skip_retrieval(self):
+        """Test that answers generated from the abstracts themselves are not scored as a retrieval"""
+        with tempfile.TemporaryDirectory() as output_dir:
+            output_path = os.path.join(output_dir, "samples.json")
+            stdout = StringIO()
+            with redirect_stdout(stdout):
+                code = main([
+                    "pubmedqa", "--data", os.path.join(DATA_DIR, "ori_pqal.json"),
+                    "--ground-truth", os.path.join(DATA_DIR, "test_ground_truth.json"), "--stub", "--output", output_path,
+                ])
+            self.assertEqual(code, 0)
+            result = json.loads(stdout.getvalue())
+            self.assertNotIn("retrieval", result)
+            self.assertEqual(result["decisions"]["num_missing"], 0)
+            with open(output_path, "r", encoding="utf-8") as f:
+                self.assertEqual(len(json.load(f)["TASKS"]), 500)
+
+
+if __name__ == "__main__":
+    unittest.main()
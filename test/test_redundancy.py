@@ -0,0 +1,89 @@
+import os
+import sys
+import unittest
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ragbenchmark.analysis.redundancy import MinHasher, MinHashLSH, RedundancyAnalyzer
+from ragbenchmark.tasks.custom_task import CustomTask
+
+TEXT = "Self-attention is a mechanism that allows the model to weigh the importance of different words in a sentence."
+OTHER_TEXT = "Positional encoding provides information about the position of words, since the model has no recurrence."
+
+
+def make_task(task_id, sample_contexts):
+    baseline = {
+        "QUESTION": "What is self-attention?",
+        "ANSWER": "A mechanism.",
+        "CONTEXTS": [{"TEXT": TEXT, "FILE_PATH": "doc.pdf", "PAGE_NUMBER": [3]}]
+    }
+    sample = {
+        "QUESTION": "What is self-attention?",
+        "ANSWER": "A mechanism.",
+        "CONTEXTS": sample_contexts
+    }
+    return CustomTask(task_id, baseline, sample)
+
+
+class TestMinHash(unittest.TestCase):
+    def test_signature_is_deterministic(self):
+        """Test that equal texts and equal seeds give equal signatures"""
+        signature = MinHasher(seed=7).signature(TEXT)
+        self.assertEqual(signature.shape, (128,))
+        np.testing.assert_array_equal(signature, MinHasher(seed=7).signature(TEXT))
+
+    def test_similarity_estimate(self):
+        """Test that near duplicates agree on most signature values and unrelated texts do not"""
+        minhasher = MinHasher()
+        signatures = minhasher.signatures([TEXT, TEXT + " Indeed.", OTHER_TEXT])
+        self.assertGreater((signatures[0] == signatures[1]).mean(), 0.8)
+        self.assertLess((signatures[0] == signatures[2]).mean(), 0.2)
+
+    def test_lsh_pairs(self):
+        """Test that LSH only reports verified near-duplicate pairs"""
+        signatures = MinHasher().signatures([TEXT, OTHER_TEXT, TEXT])
+        pairs = MinHashLSH().near_duplicate_pairs(signatures, 0.8)
+        self.assertEqual([(i, j) for i, j, _ in pairs], [(0, 2)])
+        self.assertEqual(pairs[0][2], 1.0)
+
+    def test_invalid_bands(self):
+        """Test that bands must divide the signature length"""
+        with self.assertRaises(ValueError):
+            MinHashLSH(num_perm=128, bands=10)
+
+
+class TestRedundancyAnalyzer(unittest.TestCase):
+    def setUp(self):
+        self.task = make_task("1", [
+            {"TEXT": TEXT, "FILE_PATH": "doc.pdf", "PAGE_NUMBER": [3], "SCORE": 0.9},
+            {"TEXT": TEXT + " Indeed.", "FILE_PATH": "doc.pdf", "PAGE_NUMBER": [3], "SCORE": 0.95},
+            {"TEXT": OTHER_TEXT, "FILE_PATH": "doc.pdf", "PAGE_NUMBER": [5], "SCORE": 0.5},
+        ])
+
+    def test_analyze_task(self):
+        """Test the redundancy rate and the dedup-adjusted precision of one task"""
+        report = RedundancyAnalyzer().analyze_task(self.task)
+        self.assertEqual(report["num_unique_contexts"], 2)
+        self.assertAlmostEqual(report["redundancy_rate"], 1 / 3)
+        self.assertEqual(report["unique_context_indices"], [1, 2])
+        self.assertAlmostEqual(report["precision_by_page_number"], 2 / 3)
+        self.assertAlmostEqual(report["dedup_precision_by_page_number"], 1 / 3)
+        self.assertLess(report["dedup_precision_by_char"], report["precision_by_char"])
+
+    def test_analyze_dataset(self):
+        """Test that near duplicates are also found across tasks"""
+        other_task = make_task("2", [
+            {"TEXT": OTHER_TEXT, "FILE_PATH": "doc.pdf", "PAGE_NUMBER": [5], "SCORE": 0.7},
+        ])
+        report = RedundancyAnalyzer().analyze_dataset([self.task, other_task])
+        self.assertEqual(report["num_tasks"], 2)
+        self.assertEqual(report["num_contexts"], 4)
+        self.assertAlmostEqual(report["redundancy_rate"], 1 / 4)
+        self.assertEqual([pair[:2] for pair in report["cross_task_duplicate_pairs"]], [(("1", 2), ("2", 0))])
+        self.assertAlmostEqual(report["cross_task_redundancy_rate"], 2 / 4)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,78 @@
+import os
+import sys
+import unittest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ragbenchmark.evaluator.dataset_evaluator.dataset_evaluator import DatasetEvaluator, METRICS
+from ragbenchmark.evaluator.sampled_evaluator.sampled_evaluator import SampledEvaluator, MERGED_STRATUM
+from helpers import load_datasets
+
+
+def vary_copy(copy_index, baseline_task, sample_task):
+    """Move every third copy to another file, and truncate the retrieved texts by varying amounts."""
+    if copy_index % 3 == 0:
+        for context_dict in baseline_task["CONTEXTS"] + sample_task["CONTEXTS"]:
+            context_dict["FILE_PATH"] = "data/other.pdf"
+    for context_dict in sample_task["CONTEXTS"]:
+        context_dict["TEXT"] = context_dict["TEXT"][: len(context_dict["TEXT"]) * (copy_index % 7 + 1) // 7]
+
+
+class TestSampledEvaluator(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.baseline, cls.samples = load_datasets(copies=60, transform=vary_copy)
+        cls.full = DatasetEvaluator(cls.baseline, cls.samples).evaluate()["metrics"]
+
+    def test_exhausted_sample_is_exact(self):
+        """Test that evaluating every task gives the exact means with zero-width intervals"""
+        result = SampledEvaluator(self.baseline, self.samples, target_width=1e-9, batch_size=40).evaluate()
+        self.assertEqual(result["stopped"], "exhausted")
+        self.assertEqual(result["num_evaluated"], len(self.baseline["TASKS"]))
+        for metric in METRICS:
+            self.assertAlmostEqual(result["metrics"][metric]["mean"], self.full[metric])
+            self.assertAlmostEqual(result["metrics"][metric]["width"], 0.0)
+        self.assertEqual([row["num_evaluated"] for row in result["rounds"]], [40, 80, 160, 300])
+
+    def test_early_stopping(self):
+        """Test that a loose target stops early, with estimates within a few standard errors of the exact means"""
+        result = SampledEvaluator(self.baseline, self.samples, target_width=0.3, batch_size=30, min_tasks=30).evaluate()
+        self.assertEqual(result["stopped"], "converged")
+        self.assertLess(result["num_evaluated"], len(self.baseline["TASKS"]))
+        for metric in METRICS:
+            estimate = result["metrics"][metric]
+            self.assertLessEqual(estimate["width"], 0.3)
+            self.assertLessEqual(abs(estimate["mean"] - self.full[metric]), 4 * estimate["std_error"] + 1e-9)
+        # one third of the tasks is in the other file, and the sample is allocated proportionally
+        strata = result["strata"]
+        self.assertEqual(strata["data/other.pdf"]["size"], 100)
+        self.assertEqual(strata["data/other.pdf"]["evaluated"] * 3, result["num_evaluated"])
+
+    def test_max_tasks_and_seed(self):
+        """Test the task budget, and that the sample only depends on the seed"""
+        first = SampledEvaluator(self.baseline, self.samples, target_width=1e-6, batch_size=20, max_tasks=50, seed=3).evaluate()
+        second = SampledEvaluator(self.baseline, self.samples, target_width=1e-6, batch_size=20, max_tasks=50, seed=3).evaluate()
+        self.assertEqual(first["stopped"], "max_tasks")
+        self.assertEqual(first["num_evaluated"], 50)
+        self.assertEqual(first["metrics"], second["metrics"])
+        unstratified = SampledEvaluator(self.baseline, self.samples, target_width=1e-6, batch_size=20, max_tasks=50, strata=None).evaluate()
+        self.assertEqual(list(unstratified["strata"]), [""])
+        with self.assertRaises(ValueError):
+            SampledEvaluator(self.baseline, self.samples, confidence=1.0)
+
+    def test_more_strata_than_tasks(self):
+        """Test that strata beyond the first round are merged, so that the budget holds with a file per task"""
+        baseline, samples = load_datasets(copies=40)
+        for task_id, task_dict in baseline["TASKS"].items():
+            for context_dict in task_dict["CONTEXTS"]:
+                context_dict["FILE_PATH"] = f"data/{task_id}.pdf"
+        result = SampledEvaluator(baseline, samples, target_width=1e-6, batch_size=5, max_tasks=20).evaluate()
+        self.assertEqual(result["stopped"], "max_tasks")
+        self.assertEqual(result["num_evaluated"], 20)
+        self.assertEqual(len(result["strata"]), 20)
+        self.assertEqual(result["strata"][MERGED_STRATUM]["size"], 181)
+        self.assertEqual(sum(stratum["evaluated"] for stratum in result["strata"].values()), 20)
+
+
+if __name__ == "__main__":
+    unittest.main()
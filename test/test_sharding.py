@@ -0,0 +1,102 @@
+import os
+import sys
+import json
+import random
+import shutil
+import tempfile
+import unittest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ragbenchmark.metrics.aggregate import MeanAggregate
+from ragbenchmark.evaluator.dataset_evaluator.dataset_evaluator import DatasetEvaluator, shard_of
+from helpers import load_datasets
+
+
+class TestMeanAggregate(unittest.TestCase):
+    def test_merge_is_exact(self):
+        """Test that merging any split of the values in any order gives exactly the same sums"""
+        rng = random.Random(0)
+        values = [rng.random() * 10 ** rng.randint(-8, 8) for _ in range(1000)]
+        single = MeanAggregate().update_all(values)
+        for _ in range(5):
+            rng.shuffle(values)
+            cut = rng.randint(0, len(values))
+            merged = MeanAggregate().update_all(values[cut:]).merge(MeanAggregate().update_all(values[:cut]))
+            self.assertEqual(merged.sum, single.sum)
+            self.assertEqual(merged.sum_sq, single.sum_sq)
+            self.assertEqual(merged.mean, single.mean)
+
+    def test_serialization_round_trip(self):
+        """Test that an aggregate survives a JSON round trip"""
+        aggregate = MeanAggregate().update_all([0.1, 0.2, 0.3])
+        restored = MeanAggregate.from_dict(json.loads(json.dumps(aggregate.to_dict())))
+        self.assertEqual(restored.count, 3)
+        self.assertEqual(restored.mean, aggregate.mean)
+        self.assertAlmostEqual(restored.std, 0.0816496580927726)
+
+
+class TestSharding(unittest.TestCase):
+    def setUp(self):
+        self.baseline, self.samples = load_datasets(copies=10)
+        self.output_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.output_dir)
+
+    def test_shards_partition_tasks(self):
+        """Test that every task belongs to exactly one shard"""
+        task_ids = []
+        for shard_index in range(4):
+            evaluator = DatasetEvaluator(self.baseline, self.samples, shard_index=shard_index, num_shards=4)
+            shard_task_ids = [task_id for task_id, _, _ in evaluator.iter_task_pairs()]
+            self.assertEqual(len(shard_task_ids), evaluator.num_tasks)
+            self.assertTrue(all(shard_of(task_id, 4) == shard_index for task_id in shard_task_ids))
+            task_ids.extend(shard_task_ids)
+        self.assertEqual(sorted(task_ids), sorted(self.baseline["TASKS"]))
+
+    def test_merge_equals_single_process(self):
+        """Test that merged shard outputs equal a single-process evaluation"""
+        single = DatasetEvaluator(self.baseline, self.samples).evaluate()
+        paths = []
+        for shard_index in (2, 0, 1):
+            path = os.path.join(self.output_dir, f"shard-{shard_index}.json.gz")
+            DatasetEvaluator(self.baseline, self.samples, shard_index=shard_index, num_shards=3).write_partial(path)
+            paths.append(path)
+        merged = DatasetEvaluator.merge_partials(paths)
+        self.assertEqual(merged["metrics"], single["metrics"])
+        self.assertEqual(merged["tasks"], single["tasks"])
+        self.assertEqual(merged["num_tasks"], single["num_tasks"])
+
+    def test_missing_and_duplicated_shards(self):
+        """Test that incomplete or duplicated shard sets are rejected"""
+        partial = DatasetEvaluator(self.baseline, self.samples, shard_index=0, num_shards=2).write_partial(
+            os.path.join(self.output_dir, "shard-0.json")
+        )
+        with self.assertRaises(ValueError):
+            DatasetEvaluator.merge_partials([partial])
+        with self.assertRaises(ValueError):
+            DatasetEvaluator.merge_partials([partial, partial], allow_missing_shards=True)
+        self.assertEqual(DatasetEvaluator.merge_partials([partial], allow_missing_shards=True)["missing_shards"], [1])
+
+    def test_different_samples(self):
+        """Test that shards of different sample datasets are rejected"""
+        other_samples = json.loads(json.dumps(self.samples))
+        next(iter(other_samples["TASKS"].values()))["CONTEXTS"].pop()
+        partials = [
+            DatasetEvaluator(self.baseline, samples, shard_index=shard_index, num_shards=2).write_partial(
+                os.path.join(self.output_dir, f"shard-{shard_index}.json")
+            )
+            for shard_index, samples in enumerate((self.samples, other_samples))
+        ]
+        with self.assertRaises(ValueError):
+            DatasetEvaluator.merge_partials(partials)
+
+    def test_invalid_shard(self):
+        """Test that shard indices must be smaller than the number of shards"""
+        with self.assertRaises(ValueError):
+            DatasetEvaluator(self.baseline, self.samples, shard_index=2, num_shards=2)
+
+
+if __name__ == "__main__":
+    unittest.main()
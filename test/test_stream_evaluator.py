@@ -0,0 +1,118 @@
+import os
+import sys
+import json
+import shutil
+import tempfile
+import unittest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ragbenchmark.evaluator.dataset_evaluator.dataset_evaluator import DatasetEvaluator, METRICS
+from ragbenchmark.evaluator.stream_evaluator.stream_evaluator import RunningMean, StreamEvaluator, TraceTailer
+from helpers import load_datasets
+
+
+class TestStreamEvaluator(unittest.TestCase):
+    def setUp(self):
+        self.baseline, self.samples = load_datasets()
+        self.rows = {row["task_id"]: row for row in DatasetEvaluator(self.baseline, self.samples).evaluate()["tasks"]}
+        self.output_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.output_dir)
+
+    def record(self, task_id, timestamp):
+        return {"TASK_ID": task_id, "TIMESTAMP": timestamp, **self.samples["TASKS"][task_id]}
+
+    def mean(self, task_ids, metric):
+        return sum(self.rows[task_id][metric] for task_id in task_ids) / len(task_ids)
+
+    def test_windows(self):
+        """Test that tumbling, sliding and total means match the per-task values of the batch evaluator"""
+        task_ids = list(self.samples["TASKS"])
+        evaluator = StreamEvaluator(self.baseline, window=25.0, tumbling=20.0)
+        closed = []
+        for position, task_id in enumerate(task_ids):
+            snapshot = evaluator.process(self.record(task_id, 10.0 * position))
+            if snapshot is not None:
+                closed.append(snapshot)
+        # events at 0, 10 | 20, 30 | 40: two windows closed, the last one is open
+        self.assertEqual([snapshot["tumbling"]["count"] for snapshot in closed], [2, 2])
+        self.assertEqual(closed[0]["tumbling"]["start"], 0.0)
+        for metric in METRICS:
+            self.assertAlmostEqual(closed[1]["tumbling"][metric], self.mean(task_ids[2:4], metric))
+        snapshot = evaluator.snapshot(now=40.0)
+        self.assertEqual(snapshot["tumbling"]["count"], 1)
+        # the sliding window (15, 40] holds the events at 20, 30 and 40
+        self.assertEqual(snapshot["sliding"]["count"], 3)
+        for metric in METRICS:
+            self.assertAlmostEqual(snapshot["sliding"][metric], self.mean(task_ids[2:5], metric))
+            self.assertAlmostEqual(snapshot["total"][metric], self.mean(task_ids, metric))
+        self.assertEqual(evaluator.snapshot(now=100.0)["sliding"]["count"], 0)
+        self.assertEqual(evaluator.snapshot(now=100.0)["sliding"]["recall_by_char"], 0.0)
+
+    def test_unmatched_and_late_records(self):
+        """Test that unknown tasks and mismatched questions are skipped, and late records count at the latest time"""
+        evaluator = StreamEvaluator(self.baseline, window=5.0, tumbling=100.0, clock=lambda: 0.0)
+        task_id = next(iter(self.samples["TASKS"]))
+        evaluator.process(self.record(task_id, 50.0))
+        evaluator.process({"TASK_ID": "unknown", "CONTEXTS": []})
+        evaluator.process({**self.record(task_id, 51.0), "QUESTION": "Another question?"})
+        evaluator.process(self.record(task_id, 10.0))
+        snapshot = evaluator.snapshot()
+        self.assertEqual(snapshot["num_unmatched"], 2)
+        self.assertEqual(snapshot["num_events"], 2)
+        self.assertEqual(snapshot["time"], 50.0)
+        self.assertEqual(snapshot["sliding"]["count"], 2)
+
+    def test_invalid_records(self):
+        """Test that malformed contexts and timestamps are counted and skipped instead of stopping the stream"""
+        evaluator = StreamEvaluator(self.baseline, window=5.0, tumbling=100.0, clock=lambda: 0.0)
+        task_id = next(iter(self.samples["TASKS"]))
+        evaluator.process({**self.record(task_id, 1.0), "CONTEXTS": [{"TEXT": "no file path", "SCORE": 1.0}]})
+        evaluator.process(self.record(task_id, "now"))
+        evaluator.process(self.record(task_id, float("nan")))
+        evaluator.process({**self.record(task_id, 2.0), "ANSWER": None})
+        evaluator.process(self.record(task_id, 3.0))
+        snapshot = evaluator.snapshot()
+        self.assertEqual((snapshot["num_invalid"], snapshot["num_unmatched"], snapshot["num_events"]), (4, 0, 1))
+        self.assertEqual(snapshot["time"], 3.0)
+
+    def test_running_mean(self):
+        """Test that removing values restores the previous means"""
+        running = RunningMean(["value"])
+        running.add([0.1])
+        for value in (1e16, 0.3, -7.0):
+            running.add([value])
+            running.add([value], sign=-1)
+        self.assertEqual(running.means()["value"], 0.1)
+        running.add([0.1], sign=-1)
+        self.assertEqual(running.count, 0)
+        self.assertEqual(running.means()["value"], 0.0)
+
+    def test_tailer(self):
+        """Test that the tailer returns complete lines only, skips invalid ones and restarts after truncation"""
+        path = os.path.join(self.output_dir, "traces.jsonl")
+        tailer = TraceTailer(path)
+        self.assertEqual(tailer.poll(), [])
+        task_ids = list(self.samples["TASKS"])
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(json.dumps(self.record(task_ids[0], 1.0)) + "\nnot json\n" + json.dumps(self.record(task_ids[1], 2.0))[:20])
+        records = tailer.poll()
+        self.assertEqual([record["TASK_ID"] for record in records], task_ids[:1])
+        self.assertEqual(tailer.invalid_lines, 1)
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(self.record(task_ids[1], 2.0))[20:] + "\n")
+        self.assertEqual([record["TASK_ID"] for record in tailer.poll()], task_ids[1:2])
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(json.dumps(self.record(task_ids[2], 3.0)) + "\n")
+        self.assertEqual([record["TASK_ID"] for record in tailer.poll()], task_ids[2:3])
+        self.assertEqual(TraceTailer(path, from_start=False).poll(), [])
+
+        evaluator = StreamEvaluator(self.baseline)
+        snapshots = list(evaluator.follow(TraceTailer(path), interval=60.0, poll_interval=0.01, duration=0.0))
+        self.assertEqual(snapshots[-1]["num_events"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,113 @@
+import os
+import sys
+import copy
+import shutil
+import tempfile
+import unittest
+from concurrent.futures import ProcessPoolExecutor
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ragbenchmark.evaluator.dataset_evaluator.dataset_evaluator import DatasetEvaluator, METRICS
+from ragbenchmark.evaluator.dataset_evaluator.task_result_cache import TaskResultCache, task_hash
+from ragbenchmark.metrics.metrics_by_char.calc_recall_by_char import RecallByChar
+from ragbenchmark.preprocessing.text_normalizer import TextNormalizer
+from helpers import load_datasets
+
+
+def evaluate_shard(baseline, samples, cache_path, shard_index, num_shards):
+    with TaskResultCache(cache_path) as cache:
+        evaluator = DatasetEvaluator(baseline, samples, shard_index=shard_index, num_shards=num_shards, cache=cache)
+        return list(evaluator.iter_results())
+
+
+class TestTaskResultCache(unittest.TestCase):
+    def setUp(self):
+        self.baseline, self.samples = load_datasets(copies=4, distinct_questions=True)
+        self.tmp_dir = tempfile.mkdtemp()
+        self.cache_path = os.path.join(self.tmp_dir, "results.sqlite")
+        self.expected = DatasetEvaluator(self.baseline, self.samples).evaluate()["tasks"]
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_task_hash(self):
+        """Test that the hash depends on the compared content and normalization only"""
+        task_id = next(iter(self.baseline["TASKS"]))
+        baseline_task, sample_task = self.baseline["TASKS"][task_id], self.samples["TASKS"][task_id]
+        key = task_hash(baseline_task, sample_task)
+        self.assertEqual(key, task_hash(baseline_task, dict(sample_task, LATENCY_MS=12.5, GENERATION={"COST": 0.1})))
+        self.assertNotEqual(key, task_hash(baseline_task, dict(sample_task, ANSWER="other")))
+        self.assertNotEqual(key, task_hash(baseline_task, sample_task, normalization="nfkc+whitespace"))
+        changed = copy.deepcopy(sample_task)
+        changed["CONTEXTS"][0]["PAGE_NUMBER"] = [999]
+        self.assertNotEqual(key, task_hash(baseline_task, changed))
+
+    def test_rerun_reads_cache(self):
+        """Test that a re-run reads every value from the cache and gives the same rows"""
+        with TaskResultCache(self.cache_path) as cache:
+            cold = DatasetEvaluator(self.baseline, self.samples, cache=cache).evaluate()["tasks"]
+            self.assertEqual(cold, self.expected)
+            self.assertEqual(cache.hits, 0)
+            self.assertEqual(len(cache), len(self.expected) * len(METRICS))
+        with TaskResultCache(self.cache_path) as cache:
+            warm = DatasetEvaluator(self.baseline, self.samples, cache=cache, chunk_size=3).evaluate()["tasks"]
+            self.assertEqual(warm, self.expected)
+            self.assertEqual((cache.hits, cache.misses), (len(self.expected) * len(METRICS), 0))
+
+    def test_only_changed_tasks_recomputed(self):
+        """Test that editing a task or bumping a metric version only recomputes what changed"""
+        with TaskResultCache(self.cache_path) as cache:
+            DatasetEvaluator(self.baseline, self.samples, cache=cache).evaluate()
+        task_id = next(iter(self.samples["TASKS"]))
+        self.samples["TASKS"][task_id] = dict(self.samples["TASKS"][task_id], CONTEXTS=[])
+        expected = DatasetEvaluator(self.baseline, self.samples).evaluate()["tasks"]
+        with TaskResultCache(self.cache_path) as cache:
+            rows = DatasetEvaluator(self.baseline, self.samples, cache=cache).evaluate()["tasks"]
+            self.assertEqual(rows, expected)
+            self.assertEqual(cache.misses, len(METRICS))
+
+        version = RecallByChar.VERSION
+        RecallByChar.VERSION = version + 1
+        try:
+            with TaskResultCache(self.cache_path) as cache:
+                rows = DatasetEvaluator(self.baseline, self.samples, cache=cache).evaluate()["tasks"]
+                self.assertEqual(rows, expected)
+                self.assertEqual(cache.misses, len(expected))
+                self.assertEqual(cache.prune({"recall_by_char": version + 1}), len(expected) + 1)
+        finally:
+            RecallByChar.VERSION = version
+
+    def test_normalization_is_part_of_the_key(self):
+        """Test that results of different normalizations are cached separately"""
+        with TaskResultCache(self.cache_path) as cache:
+            DatasetEvaluator(self.baseline, self.samples, cache=cache).evaluate()
+            normalizer = TextNormalizer(["nfkc", "casefold", "whitespace"])
+            rows = DatasetEvaluator(self.baseline, self.samples, cache=cache, normalizer=normalizer).evaluate()["tasks"]
+            self.assertEqual(cache.hits, 0)
+        self.assertEqual(rows, DatasetEvaluator(self.baseline, self.samples, normalizer=normalizer).evaluate()["tasks"])
+
+    def test_workers_and_concurrent_writers(self):
+        """Test the cache with worker processes, and with several evaluator processes sharing it"""
+        with TaskResultCache(self.cache_path) as cache:
+            rows = DatasetEvaluator(self.baseline, self.samples, workers=2, chunk_size=3, cache=cache).evaluate()["tasks"]
+            self.assertEqual(rows, self.expected)
+            cache.clear()
+
+        num_shards = 3
+        with ProcessPoolExecutor(max_workers=num_shards) as executor:
+            futures = [
+                executor.submit(evaluate_shard, self.baseline, self.samples, self.cache_path, shard_index, num_shards)
+                for shard_index in range(num_shards)
+            ]
+            shard_rows = [row for future in futures for row in future.result()]
+        self.assertEqual(sorted(shard_rows, key=lambda row: row["task_id"]), sorted(self.expected, key=lambda row: row["task_id"]))
+        with TaskResultCache(self.cache_path) as cache:
+            self.assertEqual(len(cache), len(self.expected) * len(METRICS))
+            rows = DatasetEvaluator(self.baseline, self.samples, workers=2, chunk_size=3, cache=cache).evaluate()["tasks"]
+            self.assertEqual(rows, self.expected)
+            self.assertEqual(cache.misses, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
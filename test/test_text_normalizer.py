@@ -0,0 +1,92 @@
+import os
+import sys
+import copy
+import unittest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ragbenchmark.preprocessing.text_normalizer import TextNormalizer
+from ragbenchmark.tasks.custom_task import CustomTask
+from ragbenchmark.evaluator.task_evaluator.task_evaluator import TaskEvaluator
+from ragbenchmark.evaluator.dataset_evaluator.dataset_evaluator import DatasetEvaluator
+from helpers import load_datasets
+
+
+class CountingNormalizer(TextNormalizer):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.normalized = []
+
+    def _normalize(self, text):
+        self.normalized.append(text)
+        return super()._normalize(text)
+
+
+class TestTextNormalizer(unittest.TestCase):
+    def test_steps(self):
+        """Test every normalization step"""
+        text = "Ｔhe  ﬁne-tuned\tModel, and THE data!"
+        self.assertEqual(TextNormalizer(["nfkc"]).normalize(text), "The  fine-tuned\tModel, and THE data!")
+        self.assertEqual(TextNormalizer(["casefold", "whitespace"]).normalize("Straße  Ok\n"), "strasse ok")
+        self.assertEqual(TextNormalizer(["nfkc", "punctuation", "whitespace"]).normalize(text), "The finetuned Model and THE data")
+        self.assertEqual(
+            TextNormalizer(["nfkc", "casefold", "punctuation", "stopwords", "whitespace"]).normalize(text),
+            "finetuned model data"
+        )
+        self.assertEqual(TextNormalizer([]).normalize(text), text)
+
+    def test_invalid_step(self):
+        """Test that unknown steps are rejected"""
+        with self.assertRaises(ValueError):
+            TextNormalizer.parse("nfkc,lemmatize")
+
+    def test_batch_normalizes_unique_texts_once(self):
+        """Test that repeated texts are normalized once across batches"""
+        normalizer = CountingNormalizer(["casefold"])
+        self.assertEqual(normalizer.normalize_batch(["A", "B", "A"]), ["a", "b", "a"])
+        self.assertEqual(normalizer.normalize_batch(["B", "C"]), ["b", "c"])
+        self.assertEqual(sorted(normalizer.normalized), ["A", "B", "C"])
+        self.assertEqual(normalizer.subset(["C"]).cache_size, 1)
+
+
+class TestNormalizedEvaluation(unittest.TestCase):
+    def setUp(self):
+        self.baseline, self.samples = load_datasets()
+
+    def test_contexts_share_normalized_texts(self):
+        """Test that normalized texts are stored on the contexts and used by the char metrics"""
+        sample_task_dict = copy.deepcopy(self.baseline["TASKS"]["1"])
+        for context_dict in sample_task_dict["CONTEXTS"]:
+            context_dict["TEXT"] = "  " + context_dict["TEXT"].upper() + "\n"
+            context_dict["SCORE"] = 1.0
+        task = CustomTask("1", self.baseline["TASKS"]["1"], sample_task_dict)
+        self.assertLess(TaskEvaluator(task, None).get_precision_by_char(), 1.0)
+
+        task = CustomTask("1", self.baseline["TASKS"]["1"], sample_task_dict)
+        task_evaluator = TaskEvaluator(task, None, normalizer=TextNormalizer(["casefold", "whitespace"]))
+        self.assertEqual(task.sample_contexts[0].normalized_text, task.baseline_contexts[0].normalized_text)
+        self.assertEqual(task_evaluator.answer_pair[0], self.baseline["TASKS"]["1"]["ANSWER"].casefold())
+        identical_task_dict = copy.deepcopy(self.baseline["TASKS"]["1"])
+        for context_dict in identical_task_dict["CONTEXTS"]:
+            context_dict["SCORE"] = 1.0
+        identical_evaluator = TaskEvaluator(CustomTask("1", self.baseline["TASKS"]["1"], identical_task_dict), None)
+        self.assertEqual(task_evaluator.get_precision_by_char(), identical_evaluator.get_precision_by_char())
+        self.assertEqual(task_evaluator.get_recall_by_char(), identical_evaluator.get_recall_by_char())
+
+    def test_dataset_normalizes_once_at_load_time(self):
+        """Test that a dataset run normalizes every unique text once, also with worker processes"""
+        normalizer = CountingNormalizer(["nfkc", "casefold", "whitespace"])
+        evaluator = DatasetEvaluator(self.baseline, self.samples, normalizer=normalizer)
+        normalized_at_load = len(normalizer.normalized)
+        self.assertEqual(normalized_at_load, len(set(normalizer.normalized)))
+        single = evaluator.evaluate()
+        self.assertEqual(len(normalizer.normalized), normalized_at_load)
+
+        parallel = DatasetEvaluator(self.baseline, self.samples, normalizer=TextNormalizer(["nfkc", "casefold", "whitespace"]),
+                                    workers=2, chunk_size=2).evaluate()
+        self.assertEqual(parallel["metrics"], single["metrics"])
+        self.assertNotEqual(single["metrics"], DatasetEvaluator(self.baseline, self.samples).evaluate()["metrics"])
+
+
+if __name__ == "__main__":
+    unittest.main()
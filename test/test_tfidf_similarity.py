@@ -0,0 +1,98 @@
+import os
+import sys
+import unittest
+from contextlib import redirect_stderr, redirect_stdout
+from io import StringIO
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ragbenchmark.metrics.metrics_by_content.calc_tfidf_similarity import CharNgramVectorizer, TfidfSimilarity
+from helpers import BASELINE_PATH, SAMPLES_PATH, load_datasets
+
+
+def dataset(name, tasks):
+    return {"NAME": name, "TASKS": {
+        task_id: {"QUESTION": "Q?", "CONTEXTS": [{"TEXT": text, "FILE_PATH": "a.pdf", "PAGE_NUMBER": [1]} for text in texts]}
+        for task_id, texts in tasks.items()
+    }}
+
+
+class TestTfidfSimilarity(unittest.TestCase):
+    def test_vectorizer(self):
+        """Test that rows are normalized, case-insensitive, and empty for texts shorter than an n-gram"""
+        matrix = CharNgramVectorizer().fit_transform(["Attention is all you need", "attention IS all you need", "ab"])
+        self.assertEqual(matrix.shape, (3, 2 ** 20))
+        self.assertAlmostEqual((matrix[0] @ matrix[1].T).toarray()[0, 0], 1.0)
+        self.assertEqual(matrix[2].nnz, 0)
+        with self.assertRaises(ValueError):
+            CharNgramVectorizer(n_features=1000)
+
+    def test_paraphrase_and_random_text(self):
+        """Test that identical texts score 1, a paraphrase scores higher than unrelated text, and a missing side scores 0"""
+        training = "Training took three and a half days on eight P100 GPUs."
+        paraphrase = "Training the big model took 3.5 days using eight P100 GPUs."
+        unrelated = "Penguins huddle together to survive the winter."
+        baseline = dataset("baseline", {
+            "1": ["The transformer relies entirely on self-attention to compute representations of its input."],
+            "2": [training],
+            "3": ["Dropout is applied to the output of each sub-layer."],
+        })
+        sample = dataset("sample", {
+            "1": ["The transformer relies entirely on self-attention to compute representations of its input."],
+            "2": [paraphrase, unrelated],
+            "3": [],
+        })
+        result = TfidfSimilarity().calculate_by_dataset(baseline, sample)
+        self.assertEqual(result["num_tasks"], 3)
+        rows = {row["task_id"]: row for row in result["tasks"]}
+        self.assertAlmostEqual(rows["1"]["recall_by_tfidf"], 1.0)
+        self.assertAlmostEqual(rows["1"]["precision_by_tfidf"], 1.0)
+        self.assertGreater(rows["2"]["recall_by_tfidf"], 0.3)
+        # the unrelated context halves the precision of the paraphrase
+        self.assertAlmostEqual(rows["2"]["precision_by_tfidf"] * 2, rows["2"]["recall_by_tfidf"], delta=0.05)
+        self.assertEqual((rows["3"]["recall_by_tfidf"], rows["3"]["precision_by_tfidf"]), (0.0, 0.0))
+
+    def test_batches_match_naive_computation(self):
+        """Test that batched products give the pairwise best similarities of each task"""
+        baseline, samples = load_datasets()
+        batched = TfidfSimilarity(batch_size=2).calculate_by_dataset(baseline, samples)
+        self.assertEqual(batched, TfidfSimilarity(batch_size=1000).calculate_by_dataset(baseline, samples))
+
+        texts = list(dict.fromkeys(
+            context_dict["TEXT"] for dataset_dict in (baseline, samples)
+            for task_dict in dataset_dict["TASKS"].values() for context_dict in task_dict["CONTEXTS"]
+        ))
+        matrix = CharNgramVectorizer().fit_transform(texts).toarray()
+        for row in batched["tasks"]:
+            baseline_vectors = [matrix[texts.index(c["TEXT"])] for c in baseline["TASKS"][row["task_id"]]["CONTEXTS"]]
+            sample_vectors = [matrix[texts.index(c["TEXT"])] for c in samples["TASKS"][row["task_id"]]["CONTEXTS"]]
+            similarities = np.array([[b @ s for s in sample_vectors] for b in baseline_vectors])
+            self.assertAlmostEqual(row["recall_by_tfidf"], similarities.max(axis=1).mean())
+            self.assertAlmostEqual(row["precision_by_tfidf"], similarities.max(axis=0).mean())
+
+    def test_missing_sample_task(self):
+        """Test that a baseline task missing from the sample has no similarity"""
+        baseline = dataset("baseline", {"1": ["the quick brown fox"], "2": ["jumps over the lazy dog"]})
+        sample = dataset("sample", {"1": ["the quick brown fox"]})
+        result = TfidfSimilarity().calculate_by_dataset(baseline, sample)
+        self.assertEqual([row["task_id"] for row in result["tasks"]], ["1", "2"])
+        self.assertAlmostEqual(result["tasks"][0]["recall_by_tfidf"], 1.0)
+        self.assertEqual(result["tasks"][1]["recall_by_tfidf"], 0.0)
+        self.assertAlmostEqual(result["metrics"]["recall_by_tfidf"], 0.5)
+
+    def test_cli_threshold(self):
+        """Test that the TF-IDF metrics can be thresholded with --tfidf only"""
+        from ragbenchmark.cli import main
+
+        paths = [BASELINE_PATH, SAMPLES_PATH]
+        args = ["eval", "--baseline", paths[0], "--samples", paths[1], "--quiet", "--threshold", "recall_by_tfidf=1.01"]
+        with redirect_stdout(StringIO()):
+            self.assertEqual(main([*args, "--tfidf"]), 1)
+        with redirect_stderr(StringIO()), self.assertRaises(SystemExit):
+            main(args)
+
+
+if __name__ == "__main__":
+    unittest.main()
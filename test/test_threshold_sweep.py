@@ -0,0 +1,86 @@
+import os
+import sys
+import copy
+import random
+import unittest
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ragbenchmark.analysis.threshold_sweep import ThresholdSweep, SWEEP_METRICS
+from ragbenchmark.evaluator.dataset_evaluator.dataset_evaluator import DatasetEvaluator
+from helpers import load_datasets
+
+
+def load_noisy_datasets(seed=0):
+    """Load the bundled datasets, with every task given extra sample contexts of random scores and pages."""
+    baseline, samples = load_datasets()
+    rng = random.Random(seed)
+    texts = [context["TEXT"] for task in baseline["TASKS"].values() for context in task["CONTEXTS"]]
+    for task in samples["TASKS"].values():
+        for _ in range(rng.randint(0, 4)):
+            context = copy.deepcopy(rng.choice(task["CONTEXTS"]))
+            context["TEXT"] = rng.choice(texts)[: rng.randint(20, 200)]
+            context["PAGE_NUMBER"] = sorted(rng.sample(range(1, 8), rng.randint(1, 2)))
+            # rounded scores produce ties, within and across tasks
+            context["SCORE"] = round(rng.random(), 1)
+            task["CONTEXTS"].append(context)
+    return baseline, samples
+
+
+def filter_samples(samples, threshold):
+    filtered = copy.deepcopy(samples)
+    for task in filtered["TASKS"].values():
+        task["CONTEXTS"] = [context for context in task["CONTEXTS"] if context["SCORE"] >= threshold]
+    return filtered
+
+
+class TestThresholdSweep(unittest.TestCase):
+    def setUp(self):
+        self.baseline, self.samples = load_noisy_datasets()
+        self.sweep = ThresholdSweep(self.baseline, self.samples)
+
+    def test_curve_matches_evaluator(self):
+        """Test that every point of the curve equals an evaluation of the contexts kept at its threshold"""
+        curve = self.sweep.curve()
+        self.assertEqual(curve["threshold"].iloc[0], np.inf)
+        self.assertEqual(len(curve), len(set(self.sweep.scores)) + 1)
+        self.assertTrue(np.all(np.diff(curve["threshold"].to_numpy()) < 0))
+        for _, point in curve.iterrows():
+            metrics = DatasetEvaluator(
+                self.baseline, filter_samples(self.samples, point["threshold"]), validate=False
+            ).evaluate()["metrics"]
+            for metric in SWEEP_METRICS:
+                self.assertAlmostEqual(point[metric], metrics[metric], msg=f"{metric} at {point['threshold']}")
+
+    def test_best_thresholds(self):
+        """Test that the best thresholds maximize their metric, preferring the tightest cutoff"""
+        curve = self.sweep.curve()
+        best = self.sweep.best_thresholds()
+        for metric, choice in best.items():
+            self.assertAlmostEqual(choice["value"], curve[metric].max())
+            tighter = curve[curve["threshold"] > choice["threshold"]]
+            self.assertTrue((tighter[metric] < choice["value"]).all())
+        pr_curve = self.sweep.pr_curve("page_number")
+        self.assertEqual(list(pr_curve.columns), ["threshold", "precision", "recall", "f1"])
+        with self.assertRaises(ValueError):
+            self.sweep.pr_curve("token")
+
+    def test_calibration(self):
+        """Test the reliability diagram against a direct computation"""
+        diagram, summary = self.sweep.calibration(num_bins=5)
+        self.assertEqual(diagram["count"].sum(), len(self.sweep.scores))
+        self.assertEqual(summary["num_contexts"], len(self.sweep.scores))
+        bins = np.minimum((self.sweep.scores * 5).astype(int), 4)
+        ece = 0.0
+        for index in range(5):
+            members = bins == index
+            if members.any():
+                ece += members.sum() * abs(self.sweep.relevant[members].mean() - self.sweep.scores[members].mean())
+        self.assertAlmostEqual(summary["ece"], ece / len(self.sweep.scores))
+        self.assertAlmostEqual(summary["brier"], np.mean((self.sweep.scores - self.sweep.relevant) ** 2))
+
+
+if __name__ == "__main__":
+    unittest.main()